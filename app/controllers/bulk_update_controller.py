@@ -0,0 +1,394 @@
+# app/controllers/bulk_update_controller.py
+import os
+import csv
+import logging
+from datetime import datetime
+
+class BulkUpdateController:
+    """
+    Controlador para actualizaciones masivas del catálogo
+    
+    Aplica un cambio a muchos productos con una sola sentencia UPDATE dentro de
+    una transacción ("subir 5% la categoría X", "stock mínimo 10 para estos
+    productos", una lista de precios). Cada operación puede ejecutarse en modo
+    de prueba para ver los cambios antes de aplicarlos.
+    """
+    
+    # Campos que se pueden modificar en bloque. El stock no se incluye: sus
+    # cambios deben registrarse como movimientos de inventario.
+    FIELDS = ('price', 'cost', 'min_stock_level', 'category_id', 'is_active')
+    # Campos que admiten cambios relativos (porcentaje o suma)
+    NUMERIC_FIELDS = ('price', 'cost', 'min_stock_level')
+    # Campos con decimales (se redondean a 2)
+    MONEY_FIELDS = ('price', 'cost')
+    
+    # Con más productos afectados los índices en memoria se recargan completos
+    INDEX_REFRESH_LIMIT = 1000
+    
+    def __init__(self, database, product_controller):
+        """
+        Inicializar controlador
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            product_controller: Controlador de productos (sus índices registrados
+                se mantienen sincronizados)
+        """
+        self.db = database
+        self.product_controller = product_controller
+        self.logger = logging.getLogger('pos.bulk_update')
+    
+    def update_products(self, filters, changes, dry_run=False, preview_limit=100):
+        """
+        Modificar en bloque los productos que cumplen los filtros
+        
+        Args:
+            filters: Diccionario con los productos a modificar (se combinan):
+                - category_id: ID de la categoría
+                - product_ids: Lista de IDs de productos
+                - barcodes: Lista de códigos de barras
+                - active_only: Solo productos activos (por defecto True)
+            changes: Diccionario campo -> cambio. El cambio puede ser un valor
+                (se asigna) o un diccionario con una operación:
+                - {'set': valor}: asignar el valor
+                - {'percent': 5}: aumentar (o disminuir si es negativo) un porcentaje
+                - {'add': 100}: sumar una cantidad
+            dry_run: Si es True solo se calculan los cambios, sin aplicarlos
+            preview_limit: Número máximo de cambios que se devuelven en 'changes'
+        
+        Returns:
+            Diccionario con success, message, count (productos que cambian),
+            changes (lista de {'product_id', 'barcode', 'name', 'field', 'old',
+            'new'}) y dry_run
+        """
+        try:
+            assignments = self._build_assignments(changes)
+        except ValueError as e:
+            return self._result(False, str(e), dry_run)
+        
+        if not filters:
+            return self._result(False, "Debe indicar qué productos modificar", dry_run)
+        
+        # Solo se modifican las filas en las que algún valor cambia
+        changed = " OR ".join(f"({expression}) IS NOT {field}" for field, expression, _ in assignments)
+        expression_params = [param for _, _, params in assignments for param in params]
+        
+        try:
+            with self.db.transaction():
+                where, where_params = self._build_filters(filters)
+                
+                rows = self.db.fetch_all(
+                    f"""
+                    SELECT product_id, barcode, name,
+                        {', '.join(f"{field} AS old_{field}, {expression} AS new_{field}"
+                                   for field, expression, _ in assignments)}
+                    FROM products
+                    WHERE {where} AND ({changed})
+                    ORDER BY name
+                    """,
+                    expression_params + where_params + expression_params
+                )
+                
+                if rows and not dry_run:
+                    self.db.execute(
+                        f"""
+                        UPDATE products
+                        SET {', '.join(f"{field} = {expression}" for field, expression, _ in assignments)},
+                            updated_at = ?
+                        WHERE {where} AND ({changed})
+                        """,
+                        expression_params + [self._now()] + where_params + expression_params
+                    )
+        except Exception as e:
+            self.logger.error(f"Error en la actualización masiva: {e}")
+            return self._result(False, f"Error en la actualización masiva: {e}", dry_run)
+        
+        fields = [field for field, _, _ in assignments]
+        return self._finish(rows, fields, dry_run, preview_limit)
+    
+    def update_price_list(self, prices, field='price', dry_run=False, preview_limit=100):
+        """
+        Aplicar una lista de precios (o costos) por código de barras
+        
+        La lista se carga en una tabla temporal y se aplica con un solo
+        UPDATE ... FROM.
+        
+        Args:
+            prices: Diccionario código de barras -> valor, o lista de pares
+            field: Campo a modificar ('price' o 'cost')
+            dry_run: Si es True solo se calculan los cambios, sin aplicarlos
+            preview_limit: Número máximo de cambios que se devuelven en 'changes'
+        
+        Returns:
+            Igual que update_products, más not_found (códigos que no existen)
+        """
+        if field not in self.MONEY_FIELDS:
+            return self._result(False, f"Campo no permitido en una lista de precios: {field}", dry_run)
+        
+        entries = prices.items() if isinstance(prices, dict) else prices
+        
+        try:
+            values = [(str(barcode).strip(), round(float(value), 2)) for barcode, value in entries]
+        except (TypeError, ValueError) as e:
+            return self._result(False, f"Lista de precios inválida: {e}", dry_run)
+        
+        if any(value < 0 for _, value in values):
+            return self._result(False, "La lista de precios tiene valores negativos", dry_run)
+        
+        try:
+            with self.db.transaction():
+                self.db.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS bulk_price_list (barcode TEXT PRIMARY KEY, value REAL)"
+                )
+                self.db.execute("DELETE FROM temp.bulk_price_list")
+                self.db.execute_many("INSERT OR REPLACE INTO temp.bulk_price_list (barcode, value) VALUES (?, ?)",
+                                     values)
+                
+                rows = self.db.fetch_all(
+                    f"""
+                    SELECT p.product_id, p.barcode, p.name, p.{field} AS old_{field}, l.value AS new_{field}
+                    FROM temp.bulk_price_list l
+                    JOIN products p ON p.barcode = l.barcode
+                    WHERE p.{field} IS NOT l.value
+                    ORDER BY p.name
+                    """
+                )
+                
+                not_found = [row['barcode'] for row in self.db.fetch_all(
+                    """
+                    SELECT l.barcode FROM temp.bulk_price_list l
+                    WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.barcode = l.barcode)
+                    ORDER BY l.barcode
+                    """
+                )]
+                
+                if rows and not dry_run:
+                    self.db.execute(
+                        f"""
+                        UPDATE products
+                        SET {field} = l.value, updated_at = ?
+                        FROM temp.bulk_price_list AS l
+                        WHERE products.barcode = l.barcode AND products.{field} IS NOT l.value
+                        """,
+                        [self._now()]
+                    )
+                
+                self.db.execute("DELETE FROM temp.bulk_price_list")
+        except Exception as e:
+            self.logger.error(f"Error al aplicar la lista de precios: {e}")
+            return self._result(False, f"Error al aplicar la lista de precios: {e}", dry_run)
+        
+        result = self._finish(rows, [field], dry_run, preview_limit)
+        result['not_found'] = not_found
+        return result
+    
+    def read_price_list(self, filepath):
+        """
+        Leer una lista de precios desde un CSV
+        
+        El archivo debe tener una columna de código de barras ('barcode',
+        'codigo') y otra de valor ('price', 'precio', 'cost', 'costo').
+        
+        Args:
+            filepath: Ruta del archivo CSV
+        
+        Returns:
+            Diccionario código de barras -> valor, o None si no se pudo leer
+        """
+        barcode_columns = ('barcode', 'codigo', 'código', 'codigo de barras', 'código de barras')
+        value_columns = ('price', 'precio', 'cost', 'costo')
+        
+        try:
+            with open(filepath, newline='', encoding='utf-8-sig') as f:
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+                except csv.Error:
+                    dialect = csv.excel
+                
+                reader = csv.reader(f, dialect)
+                header = [title.strip().lower() for title in next(reader, [])]
+                
+                barcode_position = next((i for i, title in enumerate(header) if title in barcode_columns), None)
+                value_position = next((i for i, title in enumerate(header) if title in value_columns), None)
+                if barcode_position is None or value_position is None:
+                    self.logger.error(f"Lista de precios sin columnas de código y valor: {filepath}")
+                    return None
+                
+                prices = {}
+                for row in reader:
+                    if len(row) <= max(barcode_position, value_position) or not row[barcode_position].strip():
+                        continue
+                    prices[row[barcode_position].strip()] = self._parse_value(row[value_position])
+                
+                return prices
+        except Exception as e:
+            self.logger.error(f"Error al leer la lista de precios {os.path.basename(filepath)}: {e}")
+            return None
+    
+    @staticmethod
+    def _parse_value(text):
+        """
+        Convertir un precio escrito a número ("$ 1.234,50", "1,234.50", "3500")
+        
+        Raises:
+            ValueError: Si el texto no es un número
+        """
+        text = text.replace('$', '').replace(' ', '')
+        if ',' in text and '.' in text:
+            if text.rfind(',') > text.rfind('.'):
+                text = text.replace('.', '').replace(',', '.')
+            else:
+                text = text.replace(',', '')
+        else:
+            text = text.replace(',', '.')
+        
+        return float(text)
+    
+    def _build_assignments(self, changes):
+        """
+        Traducir los cambios a expresiones SQL
+        
+        Returns:
+            Lista de (campo, expresión, parámetros)
+        
+        Raises:
+            ValueError: Si algún cambio no es válido
+        """
+        if not changes:
+            raise ValueError("No hay cambios que aplicar")
+        
+        assignments = []
+        for field, change in changes.items():
+            if field not in self.FIELDS:
+                raise ValueError(f"Campo no permitido en una actualización masiva: {field}")
+            
+            if not isinstance(change, dict):
+                change = {'set': change}
+            
+            if len(change) != 1:
+                raise ValueError(f"Indique una sola operación para {field}")
+            
+            operation, value = next(iter(change.items()))
+            
+            if operation == 'set':
+                if field == 'is_active':
+                    value = 1 if value else 0
+                if field in self.NUMERIC_FIELDS and (value is None or float(value) < 0):
+                    raise ValueError(f"Valor inválido para {field}: {value}")
+                expression = "?"
+            elif operation in ('percent', 'add') and field in self.NUMERIC_FIELDS:
+                value = float(value)
+                if operation == 'percent':
+                    expression = f"{field} * (1 + ? / 100.0)"
+                else:
+                    expression = f"{field} + ?"
+                
+                # Sin valores negativos
+                expression = f"MAX({expression}, 0)"
+            else:
+                raise ValueError(f"Operación no permitida para {field}: {operation}")
+            
+            if field in self.MONEY_FIELDS:
+                expression = f"ROUND({expression}, 2)"
+            elif field == 'min_stock_level':
+                expression = f"CAST(ROUND({expression}) AS INTEGER)"
+            
+            assignments.append((field, expression, [value]))
+        
+        return assignments
+    
+    def _build_filters(self, filters):
+        """
+        Construir la condición WHERE de los productos a modificar (requiere
+        una transacción: las listas de IDs y códigos se cargan en una tabla temporal)
+        
+        Returns:
+            Tupla (condición, parámetros)
+        """
+        conditions = []
+        params = []
+        
+        if filters.get('active_only', True):
+            conditions.append("is_active = 1")
+        
+        if filters.get('category_id') is not None:
+            conditions.append("category_id = ?")
+            params.append(filters['category_id'])
+        
+        if filters.get('product_ids') is not None or filters.get('barcodes') is not None:
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_selection (product_id INTEGER PRIMARY KEY)")
+            self.db.execute("DELETE FROM temp.bulk_selection")
+            
+            if filters.get('product_ids'):
+                self.db.execute_many("INSERT OR IGNORE INTO temp.bulk_selection (product_id) VALUES (?)",
+                                     [(product_id,) for product_id in filters['product_ids']])
+            
+            if filters.get('barcodes'):
+                self.db.execute_many(
+                    """INSERT OR IGNORE INTO temp.bulk_selection (product_id)
+                       SELECT product_id FROM products WHERE barcode = ?""",
+                    [(str(barcode),) for barcode in filters['barcodes']]
+                )
+            
+            conditions.append("product_id IN (SELECT product_id FROM temp.bulk_selection)")
+        
+        return " AND ".join(conditions) or "1 = 1", params
+    
+    def _finish(self, rows, fields, dry_run, preview_limit):
+        """Armar el resultado y sincronizar los índices si se aplicaron los cambios"""
+        changes = []
+        for row in rows:
+            if len(changes) >= preview_limit:
+                break
+            for field in fields:
+                if row[f'old_{field}'] != row[f'new_{field}']:
+                    changes.append({
+                        'product_id': row['product_id'],
+                        'barcode': row['barcode'],
+                        'name': row['name'],
+                        'field': field,
+                        'old': row[f'old_{field}'],
+                        'new': row[f'new_{field}']
+                    })
+        
+        if dry_run:
+            message = f"{len(rows)} productos cambiarían"
+        else:
+            message = f"{len(rows)} productos actualizados"
+            if rows:
+                self._refresh_indexes([row['product_id'] for row in rows])
+                self.logger.info(f"Actualización masiva de {', '.join(fields)}: {message}")
+        
+        result = self._result(True, message, dry_run)
+        result['count'] = len(rows)
+        result['changes'] = changes[:preview_limit]
+        return result
+    
+    def _refresh_indexes(self, product_ids):
+        """Actualizar los índices en memoria con los productos modificados"""
+        indexes = self.product_controller.indexes if self.product_controller else []
+        if not indexes:
+            return
+        
+        # Muchos cambios: recargar los índices completos es más rápido
+        if len(product_ids) > self.INDEX_REFRESH_LIMIT:
+            for index in indexes:
+                index.load()
+            return
+        
+        placeholders = ', '.join('?' for _ in product_ids)
+        products = self.db.fetch_all(f"SELECT * FROM products WHERE product_id IN ({placeholders})", product_ids)
+        
+        for product in products:
+            for index in indexes:
+                index.on_product_saved(product)
+    
+    def _result(self, success, message, dry_run):
+        """Resultado base de una operación"""
+        return {'success': success, 'message': message, 'count': 0, 'changes': [], 'dry_run': dry_run}
+    
+    def _now(self):
+        """Fecha de actualización con el mismo formato que Product.update"""
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
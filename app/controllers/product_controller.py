@@ -4,9 +4,57 @@ from datetime import datetime
 class ProductController:
     """Controlador para la gestión de productos"""
     
-    def __init__(self, database):
-        """Inicializar controlador con una conexión a la base de datos"""
+    # Expresiones de orden de las páginas de productos y movimientos por
+    # columna; terminan en el ID para que el orden sea único y no admiten NULL
+    PRODUCT_SORT_KEYS = {
+        'name': ['p.name', 'p.product_id'],
+        'product_id': ['p.product_id'],
+        'barcode': ["IFNULL(p.barcode, '')", 'p.product_id'],
+        'category_name': ["IFNULL(c.name, '')", 'p.name', 'p.product_id'],
+        'price': ['p.price', 'p.product_id'],
+        'cost': ['IFNULL(p.cost, 0)', 'p.product_id'],
+        'stock_quantity': ['IFNULL(p.stock_quantity, 0)', 'p.product_id'],
+    }
+    MOVEMENT_SORT_KEYS = {
+        'movement_date': ['m.movement_date', 'm.movement_id'],
+        'movement_id': ['m.movement_id'],
+        'product_name': ['p.name', 'm.movement_id'],
+        'movement_type': ['m.movement_type', 'm.movement_date', 'm.movement_id'],
+        'quantity': ['m.quantity', 'm.movement_id'],
+        'user_name': ['u.username', 'm.movement_id'],
+        'notes': ["IFNULL(m.notes, '')", 'm.movement_id'],
+    }
+    
+    def __init__(self, database, barcode_index=None, trigram_index=None):
+        """
+        Inicializar controlador con una conexión a la base de datos
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            barcode_index: Índice en memoria de códigos de barras (opcional)
+            trigram_index: Índice de trigramas para búsquedas con errores de
+                escritura (opcional)
+        """
         self.db = database
+        self.barcode_index = None
+        self.trigram_index = None
+        self.indexes = []
+        
+        if barcode_index:
+            self.barcode_index = barcode_index
+            self.register_index(barcode_index)
+        
+        if trigram_index is not None:
+            self.trigram_index = trigram_index
+            self.register_index(trigram_index)
+    
+    def register_index(self, index):
+        """
+        Registrar un índice en memoria para mantenerlo sincronizado con el catálogo
+        
+        El índice debe implementar on_product_saved, on_product_removed y on_stock_changed.
+        """
+        self.indexes.append(index)
     
     def get_all_products(self, active_only=True):
         """Obtener todos los productos"""
@@ -31,6 +79,53 @@ class ProductController:
         
         return self.db.fetch_all(query, params)
     
+    def get_products_page(self, cursor=None, limit=100, order_by='name', descending=False,
+                          category_id=None, active_only=True, low_stock_only=False):
+        """
+        Obtener una página de productos continuando después de un cursor (keyset)
+        
+        Args:
+            cursor: None para la primera página o el next_cursor de la anterior
+            limit: Número máximo de productos de la página
+            order_by: Columna de orden (ver PRODUCT_SORT_KEYS)
+            descending: Si es True, ordena de mayor a menor
+            category_id: ID de la categoría a filtrar (opcional)
+            active_only: Si es True, solo devuelve productos activos
+            low_stock_only: Si es True, solo devuelve productos con stock bajo
+        
+        Returns:
+            Diccionario con 'products' y 'next_cursor' (None en la última página)
+        """
+        if order_by not in self.PRODUCT_SORT_KEYS:
+            raise ValueError(f"Orden no soportado: {order_by}")
+        
+        conditions = []
+        params = []
+        
+        # Con "+" la columna no usa índice, para que SQLite recorra el que ya
+        # entrega el orden pedido y se detenga al completar la página
+        by_name = order_by == 'name'
+        
+        if active_only:
+            conditions.append("+p.is_active = 1" if category_id is not None or order_by == 'product_id'
+                              else "p.is_active = 1")
+        
+        if category_id is not None:
+            conditions.append("p.category_id = ?" if by_name else "+p.category_id = ?")
+            params.append(category_id)
+        
+        if low_stock_only:
+            conditions.append("p.stock_quantity <= p.min_stock_level")
+        
+        page = self.db.fetch_page(
+            "p.*, c.name AS category_name",
+            "products p LEFT JOIN categories c ON p.category_id = c.category_id",
+            self.PRODUCT_SORT_KEYS[order_by], conditions, params,
+            cursor=cursor, limit=limit, descending=descending
+        )
+        
+        return {'products': page['rows'], 'next_cursor': page['next_cursor']}
+    
     def get_product_by_id(self, product_id):
         """Obtener producto por ID"""
         query = "SELECT * FROM products WHERE product_id = ?"
@@ -40,28 +135,91 @@ class ProductController:
     
     def get_product_by_barcode(self, barcode):
         """Obtener producto por código de barras"""
+        # Usar el índice residente si está disponible (sin consulta a la base de datos)
+        if self.barcode_index:
+            return self.barcode_index.get(barcode)
+        
         query = "SELECT * FROM products WHERE barcode = ? AND is_active = 1"
         params = [barcode]
         
         return self.db.fetch_one(query, params)
     
-    def search_products(self, search_term, active_only=True):
-        """Buscar productos por nombre o descripción"""
-        query = """
-            SELECT * FROM products 
-            WHERE (name LIKE ? OR description LIKE ? OR barcode LIKE ?)
-        """
+    def search_products(self, search_term, active_only=True, limit=None):
+        """Buscar productos por nombre, descripción o código de barras (por relevancia)"""
+        match = self.db.build_match_expression(search_term)
+        
+        if match is None:
+            # Términos de un solo carácter: búsqueda parcial con '%'
+            query = """
+                SELECT * FROM products 
+                WHERE (name LIKE ? OR description LIKE ? OR barcode LIKE ?)
+            """
+            search_param = f"%{(search_term or '').strip()}%"
+            params = [search_param, search_param, search_param]
+        else:
+            # Índice de texto completo: prefijos sin distinguir acentos
+            query = """
+                SELECT p.* FROM products_fts
+                JOIN products p ON p.product_id = products_fts.rowid
+                WHERE products_fts MATCH ?
+            """
+            params = [match]
         
         if active_only:
             query += " AND is_active = 1"
         
-        query += " ORDER BY name"
+        if match is None:
+            query += " ORDER BY name"
+        else:
+            query += " ORDER BY products_fts.rank"
         
-        # Usar '%' para busqueda parcial
-        search_param = f"%{search_term}%"
-        params = [search_param, search_param, search_param]
+        # Limitar a los resultados más relevantes (p. ej. mientras se escribe)
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
         
-        return self.db.fetch_all(query, params)
+        products = self.db.fetch_all(query, params)
+        
+        # Sin coincidencias exactas: probar con la búsqueda tolerante a errores
+        if not products and active_only and self.trigram_index is not None and match is not None:
+            products = self.fuzzy_search_products(search_term, limit or 10)
+        
+        return products
+    
+    def fuzzy_search_products(self, search_term, limit=10):
+        """
+        Buscar productos activos parecidos al término aunque tenga errores de escritura
+        
+        Args:
+            search_term: Texto a buscar
+            limit: Número máximo de resultados
+        
+        Returns:
+            Lista de productos ordenados por similitud (cada uno con su 'score')
+        """
+        if self.trigram_index is None:
+            return []
+        
+        matches = self.trigram_index.search(search_term, limit)
+        if not matches:
+            return []
+        
+        placeholders = ', '.join('?' for _ in matches)
+        rows = self.db.fetch_all(
+            f"SELECT * FROM products WHERE product_id IN ({placeholders}) AND is_active = 1",
+            [match['product_id'] for match in matches]
+        )
+        
+        # Conservar el orden por similitud del índice
+        by_id = {row['product_id']: row for row in rows}
+        products = []
+        for match in matches:
+            product = by_id.get(match['product_id'])
+            if product is not None:
+                product['score'] = match['score']
+                products.append(product)
+        
+        return products
     
     def create_product(self, product_data):
         """Crear un nuevo producto"""
@@ -84,7 +242,10 @@ class ProductController:
             product_data.get('is_active', 1)
         ]
         
-        return self.db.execute(query, params)
+        product_id = self.db.execute(query, params)
+        self._notify_saved(product_id)
+        
+        return product_id
     
     def update_product(self, product_id, product_data):
         """Actualizar un producto existente"""
@@ -117,14 +278,22 @@ class ProductController:
             product_id
         ]
         
-        return self.db.execute(query, params)
+        result = self.db.execute(query, params)
+        self._notify_saved(product_id)
+        
+        return result
     
     def delete_product(self, product_id):
         """Eliminar un producto (marcarlo como inactivo)"""
         query = "UPDATE products SET is_active = 0 WHERE product_id = ?"
         params = [product_id]
         
-        return self.db.execute(query, params)
+        result = self.db.execute(query, params)
+        
+        for index in self.indexes:
+            index.on_product_removed(product_id)
+        
+        return result
     
     def update_stock(self, product_id, quantity_change, user_id, movement_type, notes=None, reference_id=None):
         """
@@ -142,40 +311,50 @@ class ProductController:
             True si se actualizó correctamente, False en caso contrario
         """
         try:
-            # Iniciar transacción
-            self.db.begin_transaction()
+            # Ejecutar como una única transacción
+            with self.db.transaction():
+                # Actualizar stock del producto
+                update_query = "UPDATE products SET stock_quantity = stock_quantity + ? WHERE product_id = ?"
+                update_params = [quantity_change, product_id]
+                self.db.execute(update_query, update_params)
+                
+                # Registrar movimiento
+                movement_query = """
+                    INSERT INTO inventory_movements (
+                        product_id, user_id, movement_type, quantity, reference_id, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """
+                movement_params = [
+                    product_id, 
+                    user_id, 
+                    movement_type, 
+                    quantity_change, 
+                    reference_id, 
+                    notes
+                ]
+                self.db.execute(movement_query, movement_params)
             
-            # Actualizar stock del producto
-            update_query = "UPDATE products SET stock_quantity = stock_quantity + ? WHERE product_id = ?"
-            update_params = [quantity_change, product_id]
-            self.db.execute(update_query, update_params)
+            for index in self.indexes:
+                index.on_stock_changed(product_id, quantity_change)
             
-            # Registrar movimiento
-            movement_query = """
-                INSERT INTO inventory_movements (
-                    product_id, user_id, movement_type, quantity, reference_id, notes
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            movement_params = [
-                product_id, 
-                user_id, 
-                movement_type, 
-                quantity_change, 
-                reference_id, 
-                notes
-            ]
-            self.db.execute(movement_query, movement_params)
-            
-            # Finalizar transacción
-            self.db.commit_transaction()
             return True
             
         except Exception as e:
-            # Revertir cambios en caso de error
-            self.db.rollback_transaction()
             print(f"Error al actualizar stock: {e}")
             return False
     
+    def _notify_saved(self, product_id):
+        """Propagar a los índices registrados los datos actuales de un producto"""
+        if not self.indexes or not product_id:
+            return
+        
+        product = self.get_product_by_id(product_id)
+        if not product:
+            return
+        
+        for index in self.indexes:
+            index.on_product_saved(product)
+    
     def get_low_stock_products(self):
         """Obtener productos con stock bajo el nivel mínimo"""
         query = """
@@ -229,6 +408,63 @@ class ProductController:
         
         return self.db.fetch_all(query, params)
     
+    def get_stock_movements_page(self, cursor=None, limit=100, order_by='movement_date', descending=True,
+                                 product_id=None, start_date=None, end_date=None, movement_type=None):
+        """
+        Obtener una página de movimientos de inventario continuando después de un cursor
+        
+        Args:
+            cursor: None para la primera página o el next_cursor de la anterior
+            limit: Número máximo de movimientos de la página
+            order_by: Columna de orden (ver MOVEMENT_SORT_KEYS)
+            descending: Si es True (por defecto), los más recientes primero
+            product_id: Filtrar por ID de producto (opcional)
+            start_date: Fecha de inicio (opcional)
+            end_date: Fecha de fin (opcional)
+            movement_type: Tipo de movimiento (opcional)
+        
+        Returns:
+            Diccionario con 'movements' y 'next_cursor' (None en la última página)
+        """
+        if order_by not in self.MOVEMENT_SORT_KEYS:
+            raise ValueError(f"Orden no soportado: {order_by}")
+        
+        conditions = []
+        params = []
+        
+        if product_id:
+            conditions.append("m.product_id = ?")
+            params.append(product_id)
+        
+        if start_date:
+            conditions.append("m.movement_date >= ?")
+            params.append(start_date)
+        
+        if end_date:
+            conditions.append("m.movement_date <= ?")
+            params.append(end_date)
+        
+        if movement_type:
+            conditions.append("m.movement_type = ?")
+            params.append(movement_type)
+        
+        # Por producto se recorren los productos por nombre y sus movimientos con
+        # idx_movements_product_date (CROSS JOIN fija ese orden de las tablas);
+        # si no, SQLite ordenaría todos los movimientos para la primera página
+        if order_by == 'product_name':
+            source = "products p CROSS JOIN inventory_movements m ON m.product_id = p.product_id"
+        else:
+            source = "inventory_movements m JOIN products p ON m.product_id = p.product_id"
+        
+        page = self.db.fetch_page(
+            "m.*, p.name as product_name, u.username as user_name",
+            source + " JOIN users u ON m.user_id = u.user_id",
+            self.MOVEMENT_SORT_KEYS[order_by], conditions, params,
+            cursor=cursor, limit=limit, descending=descending
+        )
+        
+        return {'movements': page['rows'], 'next_cursor': page['next_cursor']}
+    
     def get_all_categories(self):
         """Obtener todas las categorías"""
         query = "SELECT * FROM categories ORDER BY name"
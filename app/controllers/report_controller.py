@@ -10,10 +10,20 @@ import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.backends.backend_pdf import PdfPages
 
+from ..utils.money import sum_amounts
+from ..utils.report_cache import ReportCache
+
+# Avance informado al terminar las consultas; el resto corresponde al dibujo de las páginas
+QUERY_PROGRESS = 0.2
+
+class ReportCancelled(Exception):
+    """La generación del reporte se canceló desde la función de avance"""
+
 class ReportController:
     """Controlador para generación de reportes"""
     
-    def __init__(self, database, sales_controller, product_controller, user_controller):
+    def __init__(self, database, sales_controller, product_controller, user_controller, cache=None, reports_dir=None,
+                 use_cache=True):
         """
         Inicializar controlador de reportes
         
@@ -22,6 +32,9 @@ class ReportController:
             sales_controller: Controlador de ventas
             product_controller: Controlador de productos
             user_controller: Controlador de usuarios
+            cache: Caché de reportes generados (por defecto en reports/cache)
+            reports_dir: Directorio de los reportes (por defecto reports/ en la raíz del proyecto)
+            use_cache: False para generar siempre los reportes, sin caché
         """
         self.db = database
         self.sales_controller = sales_controller
@@ -30,56 +43,75 @@ class ReportController:
         self.logger = logging.getLogger('pos.reports')
         
         # Directorio para guardar reportes
-        self.reports_dir = os.path.join(os.path.dirname(__file__), '../../reports')
+        self.reports_dir = reports_dir or os.path.join(os.path.dirname(__file__), '../../reports')
         os.makedirs(self.reports_dir, exist_ok=True)
+        
+        # Reportes ya generados, válidos mientras no cambien las ventas que cubren
+        if not use_cache:
+            self.cache = None
+        else:
+            self.cache = cache if cache is not None else ReportCache(os.path.join(self.reports_dir, 'cache'))
     
-    def generate_daily_sales_report(self, date=None, format='pdf'):
+    def generate_daily_sales_report(self, date=None, format='pdf', progress=None):
         """
         Generar reporte de ventas diarias
         
         Args:
             date: Fecha para el reporte (formato: YYYY-MM-DD) o None para hoy
             format: Formato del reporte ('pdf', 'csv', 'json')
+            progress: Función progress(fracción) que se llama al terminar las
+                consultas y cada página del PDF. Si devuelve False la
+                generación se cancela y no queda archivo.
             
         Returns:
-            Ruta al archivo de reporte generado o None si hay error
+            Ruta al archivo de reporte generado o None si hay error o se canceló
         """
         try:
             # Si no se especifica fecha, usar la fecha actual
             if not date:
                 date = datetime.now().strftime("%Y-%m-%d")
             
-            # Obtener datos de ventas del día
-            sales = self.sales_controller.get_all(start_date=date, end_date=date)
-            
             # Nombre del archivo
             filename = f"ventas_diarias_{date.replace('-', '')}"
             
-            if format == 'pdf':
-                return self._generate_daily_sales_pdf(sales, date, filename)
-            elif format == 'csv':
-                return self._generate_daily_sales_csv(sales, date, filename)
-            elif format == 'json':
-                return self._generate_daily_sales_json(sales, date, filename)
-            else:
-                self.logger.error(f"Formato de reporte no válido: {format}")
-                return None
+            def build():
+                # Obtener datos de ventas del día
+                sales = self.sales_controller.get_sales_by_date_range(date, date)
+                self._report_progress(progress, QUERY_PROGRESS)
+                
+                if format == 'pdf':
+                    return self._generate_daily_sales_pdf(sales, date, filename, progress)
+                elif format == 'csv':
+                    return self._generate_daily_sales_csv(sales, date, filename)
+                elif format == 'json':
+                    return self._generate_daily_sales_json(sales, date, filename)
+                else:
+                    self.logger.error(f"Formato de reporte no válido: {format}")
+                    return None
+            
+            return self._cached_report('daily_sales', {'date': date}, format, filename, date, date, build)
                 
+        except ReportCancelled:
+            self.logger.info("Generación del reporte de ventas diarias cancelada")
+            return None
         except Exception as e:
             self.logger.error(f"Error al generar reporte de ventas diarias: {e}")
             return None
     
-    def _generate_daily_sales_pdf(self, sales, date, filename):
+    def _generate_daily_sales_pdf(self, sales, date, filename, progress=None):
         """Generar reporte de ventas diarias en PDF"""
         try:
             filepath = os.path.join(self.reports_dir, f"{filename}.pdf")
             
             # Calcular totales
-            total_amount = sum(sale['total_amount'] for sale in sales)
-            total_tax = sum(sale['tax_amount'] for sale in sales)
-            cash_sales = sum(sale['total_amount'] for sale in sales if sale['payment_method'] == 'cash')
-            card_sales = sum(sale['total_amount'] for sale in sales if sale['payment_method'] == 'card')
-            transfer_sales = sum(sale['total_amount'] for sale in sales if sale['payment_method'] == 'transfer')
+            total_amount = float(sum_amounts(sale['total_amount'] for sale in sales))
+            total_tax = float(sum_amounts(sale['tax_amount'] for sale in sales))
+            cash_sales = float(sum_amounts(sale['total_amount'] for sale in sales if sale['payment_method'] == 'cash'))
+            card_sales = float(sum_amounts(sale['total_amount'] for sale in sales if sale['payment_method'] == 'card'))
+            transfer_sales = float(sum_amounts(sale['total_amount'] for sale in sales if sale['payment_method'] == 'transfer'))
+            
+            # Páginas del reporte (para informar el avance)
+            pages = 3 if sales else 1
             
             # Crear PDF
             with PdfPages(filepath) as pdf:
@@ -113,26 +145,18 @@ class ReportController:
                 plt.tight_layout()
                 pdf.savefig()
                 plt.close()
+                self._report_page(progress, 1, pages)
                 
                 # Página 2: Ventas por hora
                 if sales:
                     plt.figure(figsize=(10, 8))
                     plt.suptitle(f"Ventas por Hora - {date}", fontsize=16)
                     
-                    # Agrupar ventas por hora
-                    sales_by_hour = {}
-                    for sale in sales:
-                        sale_datetime = datetime.strptime(sale['sale_date'], "%Y-%m-%d %H:%M:%S")
-                        hour = sale_datetime.hour
-                        if hour not in sales_by_hour:
-                            sales_by_hour[hour] = {'count': 0, 'amount': 0}
-                        sales_by_hour[hour]['count'] += 1
-                        sales_by_hour[hour]['amount'] += sale['total_amount']
-                    
-                    # Ordenar por hora
-                    hours = sorted(sales_by_hour.keys())
-                    counts = [sales_by_hour[h]['count'] for h in hours]
-                    amounts = [sales_by_hour[h]['amount'] for h in hours]
+                    # Distribución por hora desde el resumen por hora (ya ordenada)
+                    sales_by_hour = self.sales_controller.get_sales_by_hour(date, date)
+                    hours = [row['hour'] for row in sales_by_hour]
+                    counts = [row['total_sales'] for row in sales_by_hour]
+                    amounts = [row['total_amount'] for row in sales_by_hour]
                     
                     # Gráfico de cantidad de ventas por hora
                     ax1 = plt.subplot(2, 1, 1)
@@ -153,6 +177,7 @@ class ReportController:
                     plt.tight_layout()
                     pdf.savefig()
                     plt.close()
+                    self._report_page(progress, 2, pages)
                 
                 # Página 3: Listado de ventas
                 if sales:
@@ -189,10 +214,16 @@ class ReportController:
                     plt.tight_layout()
                     pdf.savefig()
                     plt.close()
+                    self._report_page(progress, 3, pages)
             
             self.logger.info(f"Reporte de ventas diarias generado: {filepath}")
             return filepath
         
+        except ReportCancelled:
+            # No dejar un PDF a medias en el directorio de reportes
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
         except Exception as e:
             self.logger.error(f"Error al generar PDF de ventas diarias: {e}")
             return None
@@ -241,11 +272,11 @@ class ReportController:
             filepath = os.path.join(self.reports_dir, f"{filename}.json")
             
             # Calcular totales
-            total_amount = sum(sale['total_amount'] for sale in sales)
-            total_tax = sum(sale['tax_amount'] for sale in sales)
-            cash_sales = sum(sale['total_amount'] for sale in sales if sale['payment_method'] == 'cash')
-            card_sales = sum(sale['total_amount'] for sale in sales if sale['payment_method'] == 'card')
-            transfer_sales = sum(sale['total_amount'] for sale in sales if sale['payment_method'] == 'transfer')
+            total_amount = float(sum_amounts(sale['total_amount'] for sale in sales))
+            total_tax = float(sum_amounts(sale['tax_amount'] for sale in sales))
+            cash_sales = float(sum_amounts(sale['total_amount'] for sale in sales if sale['payment_method'] == 'cash'))
+            card_sales = float(sum_amounts(sale['total_amount'] for sale in sales if sale['payment_method'] == 'card'))
+            transfer_sales = float(sum_amounts(sale['total_amount'] for sale in sales if sale['payment_method'] == 'transfer'))
             
             # Crear estructura de datos
             report_data = {
@@ -296,7 +327,7 @@ class ReportController:
             self.logger.error(f"Error al generar JSON de ventas diarias: {e}")
             return None
     
-    def generate_sales_by_period_report(self, start_date, end_date, period='day', format='pdf'):
+    def generate_sales_by_period_report(self, start_date, end_date, period='day', format='pdf', progress=None):
         """
         Generar reporte de ventas por período
         
@@ -305,43 +336,57 @@ class ReportController:
             end_date: Fecha de fin (formato: YYYY-MM-DD)
             period: Período de agrupación ('day', 'week', 'month')
             format: Formato del reporte ('pdf', 'csv', 'json')
+            progress: Función progress(fracción) que se llama al terminar las
+                consultas y cada página del PDF. Si devuelve False la
+                generación se cancela y no queda archivo.
             
         Returns:
-            Ruta al archivo de reporte generado o None si hay error
+            Ruta al archivo de reporte generado o None si hay error o se canceló
         """
         try:
-            # Obtener resumen de ventas por día
-            summary = self.sales_controller.get_summary_by_day(start_date, end_date)
-            
             # Nombre del archivo
             filename = f"ventas_{start_date.replace('-', '')}_{end_date.replace('-', '')}"
             
-            if format == 'pdf':
-                return self._generate_period_sales_pdf(summary, start_date, end_date, period, filename)
-            elif format == 'csv':
-                return self._generate_period_sales_csv(summary, start_date, end_date, period, filename)
-            elif format == 'json':
-                return self._generate_period_sales_json(summary, start_date, end_date, period, filename)
-            else:
-                self.logger.error(f"Formato de reporte no válido: {format}")
-                return None
+            def build():
+                # Obtener resumen de ventas por día
+                summary = self.sales_controller.get_sales_summary_by_day(start_date, end_date)
+                self._report_progress(progress, QUERY_PROGRESS)
+                
+                if format == 'pdf':
+                    return self._generate_period_sales_pdf(summary, start_date, end_date, period, filename, progress)
+                elif format == 'csv':
+                    return self._generate_period_sales_csv(summary, start_date, end_date, period, filename)
+                elif format == 'json':
+                    return self._generate_period_sales_json(summary, start_date, end_date, period, filename)
+                else:
+                    self.logger.error(f"Formato de reporte no válido: {format}")
+                    return None
+            
+            params = {'start_date': start_date, 'end_date': end_date, 'period': period}
+            return self._cached_report('period_sales', params, format, filename, start_date, end_date, build)
                 
+        except ReportCancelled:
+            self.logger.info("Generación del reporte de ventas por período cancelada")
+            return None
         except Exception as e:
             self.logger.error(f"Error al generar reporte de ventas por período: {e}")
             return None
     
-    def _generate_period_sales_pdf(self, summary, start_date, end_date, period, filename):
+    def _generate_period_sales_pdf(self, summary, start_date, end_date, period, filename, progress=None):
         """Generar reporte de ventas por período en PDF"""
         try:
             filepath = os.path.join(self.reports_dir, f"{filename}.pdf")
             
             # Calcular totales
             total_sales = sum(day['total_sales'] for day in summary)
-            total_amount = sum(day['total_amount'] for day in summary)
-            total_tax = sum(day['total_tax'] for day in summary)
-            cash_amount = sum(day['cash_amount'] for day in summary)
-            card_amount = sum(day['card_amount'] for day in summary)
-            transfer_amount = sum(day['transfer_amount'] for day in summary)
+            total_amount = float(sum_amounts(day['total_amount'] for day in summary))
+            total_tax = float(sum_amounts(day['total_tax'] for day in summary))
+            cash_amount = float(sum_amounts(day['cash_amount'] for day in summary))
+            card_amount = float(sum_amounts(day['card_amount'] for day in summary))
+            transfer_amount = float(sum_amounts(day['transfer_amount'] for day in summary))
+            
+            # Páginas del reporte (para informar el avance)
+            pages = 3 if summary else 1
             
             # Crear PDF
             with PdfPages(filepath) as pdf:
@@ -375,6 +420,7 @@ class ReportController:
                 plt.tight_layout()
                 pdf.savefig()
                 plt.close()
+                self._report_page(progress, 1, pages)
                 
                 # Página 2: Ventas por día
                 if summary:
@@ -412,6 +458,7 @@ class ReportController:
                     plt.tight_layout()
                     pdf.savefig()
                     plt.close()
+                    self._report_page(progress, 2, pages)
                 
                 # Página 3: Tabla de resumen
                 if summary:
@@ -449,10 +496,16 @@ class ReportController:
                     plt.tight_layout()
                     pdf.savefig()
                     plt.close()
+                    self._report_page(progress, 3, pages)
             
             self.logger.info(f"Reporte de ventas por período generado: {filepath}")
             return filepath
             
+        except ReportCancelled:
+            # No dejar un PDF a medias en el directorio de reportes
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
         except Exception as e:
             self.logger.error(f"Error al generar PDF de ventas por período: {e}")
             return None
@@ -483,11 +536,11 @@ class ReportController:
                 
                 # Totales
                 total_sales = sum(day['total_sales'] for day in summary)
-                total_amount = sum(day['total_amount'] for day in summary)
-                total_tax = sum(day['total_tax'] for day in summary)
-                cash_amount = sum(day['cash_amount'] for day in summary)
-                card_amount = sum(day['card_amount'] for day in summary)
-                transfer_amount = sum(day['transfer_amount'] for day in summary)
+                total_amount = float(sum_amounts(day['total_amount'] for day in summary))
+                total_tax = float(sum_amounts(day['total_tax'] for day in summary))
+                cash_amount = float(sum_amounts(day['cash_amount'] for day in summary))
+                card_amount = float(sum_amounts(day['card_amount'] for day in summary))
+                transfer_amount = float(sum_amounts(day['transfer_amount'] for day in summary))
                 
                 writer.writerow([])
                 writer.writerow([
@@ -514,11 +567,11 @@ class ReportController:
             
             # Calcular totales
             total_sales = sum(day['total_sales'] for day in summary)
-            total_amount = sum(day['total_amount'] for day in summary)
-            total_tax = sum(day['total_tax'] for day in summary)
-            cash_amount = sum(day['cash_amount'] for day in summary)
-            card_amount = sum(day['card_amount'] for day in summary)
-            transfer_amount = sum(day['transfer_amount'] for day in summary)
+            total_amount = float(sum_amounts(day['total_amount'] for day in summary))
+            total_tax = float(sum_amounts(day['total_tax'] for day in summary))
+            cash_amount = float(sum_amounts(day['cash_amount'] for day in summary))
+            card_amount = float(sum_amounts(day['card_amount'] for day in summary))
+            transfer_amount = float(sum_amounts(day['transfer_amount'] for day in summary))
             
             # Crear estructura de datos
             report_data = {
@@ -566,7 +619,7 @@ class ReportController:
             self.logger.error(f"Error al generar JSON de ventas por período: {e}")
             return None
     
-    def generate_top_products_report(self, start_date=None, end_date=None, limit=10, format='pdf'):
+    def generate_top_products_report(self, start_date=None, end_date=None, limit=10, format='pdf', progress=None):
         """
         Generar reporte de productos más vendidos
         
@@ -575,14 +628,14 @@ class ReportController:
             end_date: Fecha de fin (formato: YYYY-MM-DD)
             limit: Límite de productos a incluir
             format: Formato del reporte ('pdf', 'csv', 'json')
+            progress: Función progress(fracción) que se llama al terminar las
+                consultas y cada página del PDF. Si devuelve False la
+                generación se cancela y no queda archivo.
             
         Returns:
-            Ruta al archivo de reporte generado o None si hay error
+            Ruta al archivo de reporte generado o None si hay error o se canceló
         """
         try:
-            # Obtener productos más vendidos
-            top_products = self.sales_controller.get_top_products(start_date, end_date, limit)
-            
             # Determinar período para el nombre del archivo
             period_str = ""
             if start_date:
@@ -593,21 +646,32 @@ class ReportController:
             # Nombre del archivo
             filename = f"top_productos{period_str}"
             
-            if format == 'pdf':
-                return self._generate_top_products_pdf(top_products, start_date, end_date, filename)
-            elif format == 'csv':
-                return self._generate_top_products_csv(top_products, start_date, end_date, filename)
-            elif format == 'json':
-                return self._generate_top_products_json(top_products, start_date, end_date, filename)
-            else:
-                self.logger.error(f"Formato de reporte no válido: {format}")
-                return None
+            def build():
+                # Obtener productos más vendidos
+                top_products = self.sales_controller.get_top_selling_products(start_date, end_date, limit)
+                self._report_progress(progress, QUERY_PROGRESS)
+                
+                if format == 'pdf':
+                    return self._generate_top_products_pdf(top_products, start_date, end_date, filename, progress)
+                elif format == 'csv':
+                    return self._generate_top_products_csv(top_products, start_date, end_date, filename)
+                elif format == 'json':
+                    return self._generate_top_products_json(top_products, start_date, end_date, filename)
+                else:
+                    self.logger.error(f"Formato de reporte no válido: {format}")
+                    return None
+            
+            params = {'start_date': start_date, 'end_date': end_date, 'limit': limit}
+            return self._cached_report('top_products', params, format, filename, start_date, end_date, build)
                 
+        except ReportCancelled:
+            self.logger.info("Generación del reporte de productos más vendidos cancelada")
+            return None
         except Exception as e:
             self.logger.error(f"Error al generar reporte de productos más vendidos: {e}")
             return None
     
-    def _generate_top_products_pdf(self, products, start_date, end_date, filename):
+    def _generate_top_products_pdf(self, products, start_date, end_date, filename, progress=None):
         """Generar reporte de productos más vendidos en PDF"""
         try:
             filepath = os.path.join(self.reports_dir, f"{filename}.pdf")
@@ -622,6 +686,9 @@ class ReportController:
             else:
                 title = "Productos Más Vendidos"
             
+            # Páginas del reporte (para informar el avance)
+            pages = 2
+            
             # Crear PDF
             with PdfPages(filepath) as pdf:
                 # Gráfico de barras
@@ -649,6 +716,7 @@ class ReportController:
                     plt.tight_layout()
                     pdf.savefig()
                     plt.close()
+                    self._report_page(progress, 1, pages)
                 
                 # Tabla de productos
                 plt.figure(figsize=(10, 8))
@@ -684,10 +752,107 @@ class ReportController:
                     plt.tight_layout()
                     pdf.savefig()
                     plt.close()
+                    self._report_page(progress, 2, pages)
             
             self.logger.info(f"Reporte de productos más vendidos generado: {filepath}")
             return filepath
             
+        except ReportCancelled:
+            # No dejar un PDF a medias en el directorio de reportes
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
         except Exception as e:
             self.logger.error(f"Error al generar PDF de productos más vendidos: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def _report_progress(self, progress, fraction):
+        """
+        Informar el avance de un reporte
+        
+        Args:
+            progress: Función progress(fracción) o None
+            fraction: Fracción completada (0 a 1)
+        
+        Raises:
+            ReportCancelled: Si progress devuelve False
+        """
+        if progress is not None and progress(fraction) is False:
+            raise ReportCancelled()
+    
+    def _report_page(self, progress, page, pages):
+        """Informar que se terminó de dibujar una página del PDF"""
+        self._report_progress(progress, QUERY_PROGRESS + (1 - QUERY_PROGRESS) * page / pages)
+    
+    def _cached_report(self, report_type, params, format, filename, start_date, end_date, build):
+        """
+        Servir un reporte desde la caché o generarlo y guardarlo
+        
+        El reporte guardado sirve mientras no cambie la marca de agua de las
+        ventas del rango. Si el rango terminó antes de hoy (período cerrado)
+        el reporte se guarda como inmutable y ya no se verifica.
+        
+        Args:
+            report_type: Tipo de reporte
+            params: Parámetros del reporte
+            format: Formato del reporte
+            filename: Nombre del archivo (sin extensión) en el directorio de reportes
+            start_date: Primer día que cubre el reporte (o None)
+            end_date: Último día que cubre el reporte (o None)
+            build: Función que genera el reporte y devuelve su ruta
+            
+        Returns:
+            Ruta al archivo de reporte o None si hay error
+        """
+        if self.cache is None:
+            return build()
+        
+        key = ReportCache.make_key(report_type, params, format)
+        closed = bool(end_date) and end_date < datetime.now().strftime("%Y-%m-%d")
+        watermark = lambda: self._sales_watermark(start_date, end_date)
+        
+        cached = self.cache.get(key, watermark, freeze=closed)
+        if cached:
+            self.logger.info(f"Reporte servido desde la caché: {filename}.{format}")
+            return self.cache.serve(cached, os.path.join(self.reports_dir, f"{filename}.{format}"))
+        
+        # La marca se toma antes de generar: una venta registrada mientras se
+        # genera invalida el reporte guardado
+        current = watermark()
+        filepath = build()
+        if filepath:
+            self.cache.put(key, filepath, current, immutable=closed)
+        return filepath
+    
+    def _sales_watermark(self, start_date, end_date):
+        """
+        Obtener la marca de agua de las ventas de un rango
+        
+        Combina el último sale_id del rango (ventas nuevas) con las ventas e
+        importes por estado del resumen diario (cancelaciones y correcciones,
+        que no cambian el último sale_id).
+        
+        Args:
+            start_date: Primer día (YYYY-MM-DD o None)
+            end_date: Último día (YYYY-MM-DD o None)
+            
+        Returns:
+            Lista comparable con la marca de agua guardada
+        """
+        start_day = start_date or '0000-01-01'
+        end_day = end_date or '9999-12-31'
+        
+        last_sale = self.db.fetch_one(
+            "SELECT MAX(sale_id) AS sale_id FROM sales WHERE sale_date BETWEEN ? AND ?",
+            [f"{start_day} 00:00:00", f"{end_day} 23:59:59"]
+        )
+        totals = self.db.fetch_all("""
+            SELECT payment_status, SUM(sales_count) AS sales_count, SUM(total_cents) AS total_cents
+            FROM sales_daily_rollup
+            WHERE sale_day BETWEEN ? AND ?
+            GROUP BY payment_status
+            ORDER BY payment_status
+        """, [start_day, end_day])
+        
+        return [last_sale['sale_id'] if last_sale else None,
+                [[row['payment_status'], row['sales_count'], row['total_cents']] for row in totals]]
@@ -0,0 +1,310 @@
+# app/controllers/report_job_controller.py
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ..models.database import Database
+from ..utils.report_cache import ReportCache
+from .sales_controller import SalesController
+from .product_controller import ProductController
+from .user_controller import UserController
+from .report_controller import ReportController
+
+# Reportes que se pueden generar en segundo plano -> método de ReportController
+REPORT_JOBS = {
+    'daily_sales': 'generate_daily_sales_report',
+    'period_sales': 'generate_sales_by_period_report',
+    'top_products': 'generate_top_products_report'
+}
+
+# Casillas de cancelación compartidas con los procesos (una por trabajo activo)
+CANCEL_SLOTS = 1024
+
+# Estado de cada proceso del pool (lo prepara _init_worker)
+_worker = None
+
+def _init_worker(db_path, reports_dir, cache_dir, cache_lock, progress_queue, cancel_flags):
+    """Abrir la conexión y el controlador de reportes de un proceso del pool"""
+    global _worker
+    
+    db = Database(db_path)
+    db.connect()
+    
+    # Sin directorio de caché los reportes se generan siempre
+    cache = ReportCache(cache_dir, lock=cache_lock) if cache_dir else None
+    controller = ReportController(db, SalesController(db), ProductController(db), UserController(db),
+                                  cache=cache, reports_dir=reports_dir, use_cache=cache is not None)
+    
+    _worker = {
+        'controller': controller,
+        'progress': progress_queue,
+        'cancel_flags': cancel_flags
+    }
+
+def _run_report_job(job_id, slot, report_type, params):
+    """Generar un reporte dentro de un proceso del pool"""
+    cancel_flags = _worker['cancel_flags']
+    
+    def progress(fraction):
+        if cancel_flags[slot]:
+            return False
+        _worker['progress'].put((job_id, fraction))
+        return True
+    
+    # El trabajo pudo cancelarse mientras esperaba un proceso libre
+    if progress(0.0):
+        path = getattr(_worker['controller'], REPORT_JOBS[report_type])(progress=progress, **params)
+    else:
+        path = None
+    
+    if path:
+        return {'success': True, 'path': path, 'cancelled': False, 'message': "Reporte generado"}
+    if cancel_flags[slot]:
+        return {'success': False, 'path': None, 'cancelled': True, 'message': "Reporte cancelado"}
+    return {'success': False, 'path': None, 'cancelled': False, 'message': "No se pudo generar el reporte"}
+
+class ReportJobController:
+    """
+    Generación de reportes en un pool de procesos
+    
+    Los reportes (consultas y dibujo con matplotlib) se generan en procesos
+    aparte para no bloquear la interfaz, y varios reportes pueden generarse a
+    la vez. Cada proceso abre su propia conexión a la base de datos. El
+    avance se recibe en un hilo del controlador y se entrega con los
+    callbacks de cada trabajo; la interfaz debe reenviarlos a su hilo (por
+    ejemplo emitiendo una señal de Qt).
+    
+    La cancelación es cooperativa: un trabajo en espera no llega a
+    ejecutarse y uno en curso se detiene en el siguiente punto de avance
+    (al terminar las consultas o una página del PDF).
+    """
+    
+    def __init__(self, db_path, reports_dir=None, cache_dir=None, max_workers=None):
+        """
+        Inicializar controlador
+        
+        Args:
+            db_path: Ruta de la base de datos (cada proceso abre su conexión)
+            reports_dir: Directorio de los reportes (None = el de ReportController)
+            cache_dir: Directorio de la caché de reportes compartida por los
+                procesos (None para generar siempre)
+            max_workers: Procesos del pool (None = uno por núcleo)
+        """
+        self.db_path = db_path
+        self.reports_dir = reports_dir
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.logger = logging.getLogger('pos.reports.jobs')
+        
+        self._executor = None
+        self._listener = None
+        self._progress = None
+        self._cancel_flags = None
+        self.cache_lock = None
+        
+        # job_id -> {'future', 'slot', 'on_progress', 'on_finished'}
+        self._jobs = {}
+        # Casillas de cancelación libres; cada trabajo ocupa una hasta terminar
+        self._free_slots = list(range(CANCEL_SLOTS))
+        self._lock = threading.Lock()
+        self._next_id = 1
+    
+    @property
+    def is_running(self):
+        """True si el pool está en marcha"""
+        return self._executor is not None
+    
+    @property
+    def active(self):
+        """Número de trabajos en espera o en curso"""
+        with self._lock:
+            return len(self._jobs)
+    
+    def start(self):
+        """
+        Iniciar el pool de procesos
+        
+        Returns:
+            True si se inició (o ya estaba en marcha)
+        """
+        if self.is_running:
+            return True
+        
+        # spawn: los procesos no heredan los hilos ni el estado de Qt del proceso principal
+        context = multiprocessing.get_context('spawn')
+        self._progress = context.Queue()
+        self._cancel_flags = context.Array('b', CANCEL_SLOTS, lock=False)
+        # Lock compartido por las cachés de los procesos (y de la aplicación, si la usa)
+        self.cache_lock = context.Lock()
+        
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.db_path, self.reports_dir, self.cache_dir, self.cache_lock,
+                      self._progress, self._cancel_flags)
+        )
+        
+        self._listener = threading.Thread(target=self._listen, name="report-jobs", daemon=True)
+        self._listener.start()
+        
+        self.logger.info(f"Pool de reportes iniciado ({self.max_workers} procesos)")
+        return True
+    
+    def stop(self, wait=True):
+        """
+        Detener el pool cancelando los trabajos en curso y en espera
+        
+        Args:
+            wait: Esperar a que terminen los procesos
+        """
+        if not self.is_running:
+            return
+        
+        with self._lock:
+            job_ids = list(self._jobs)
+        for job_id in job_ids:
+            self.cancel(job_id)
+        
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        
+        self._progress.put(None)  # Marca de fin para el hilo de avance
+        if wait:
+            self._listener.join()
+        self._listener = None
+        
+        self.logger.info("Pool de reportes detenido")
+    
+    def submit(self, report_type, params=None, on_progress=None, on_finished=None):
+        """
+        Encolar la generación de un reporte
+        
+        Args:
+            report_type: Tipo de reporte (clave de REPORT_JOBS)
+            params: Argumentos del método de ReportController (fechas, formato, ...)
+            on_progress: Callback (job_id, fracción) con el avance del reporte
+            on_finished: Callback (job_id, resultado) al terminar, con un
+                diccionario {'success', 'path', 'cancelled', 'message'}
+        
+        Returns:
+            Identificador del trabajo o None si no se pudo encolar
+        """
+        if report_type not in REPORT_JOBS:
+            self.logger.error(f"Tipo de reporte no válido: {report_type}")
+            return None
+        
+        if not self.is_running:
+            self.logger.warning(f"Pool de reportes detenido, se descarta el reporte '{report_type}'")
+            return None
+        
+        with self._lock:
+            if not self._free_slots:
+                self.logger.warning("Demasiados reportes pendientes, se descarta el nuevo")
+                return None
+            
+            job_id = self._next_id
+            self._next_id += 1
+            slot = self._free_slots.pop()
+            self._cancel_flags[slot] = 0
+            
+            try:
+                future = self._executor.submit(_run_report_job, job_id, slot, report_type, dict(params or {}))
+            except (RuntimeError, BrokenProcessPool) as e:
+                self._free_slots.append(slot)
+                self.logger.error(f"No se pudo encolar el reporte '{report_type}': {e}")
+                return None
+            
+            self._jobs[job_id] = {'future': future, 'slot': slot, 'on_progress': on_progress,
+                                  'on_finished': on_finished}
+        
+        # Fuera del lock: si el trabajo ya terminó el callback se ejecuta aquí mismo
+        future.add_done_callback(lambda future: self._finish(job_id, future))
+        return job_id
+    
+    def cancel(self, job_id):
+        """
+        Cancelar un trabajo en espera o en curso
+        
+        Args:
+            job_id: Identificador devuelto por submit
+        
+        Returns:
+            True si el trabajo seguía pendiente
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            self._cancel_flags[job['slot']] = 1
+        
+        # Si aún no llegó a un proceso, ya no se ejecuta
+        job['future'].cancel()
+        return True
+    
+    def wait_idle(self, timeout=None):
+        """
+        Esperar a que terminen todos los trabajos encolados
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos (None = sin límite)
+        
+        Returns:
+            True si no quedan trabajos pendientes
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.active:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+    
+    def _finish(self, job_id, future):
+        """Entregar el resultado de un trabajo (desde el hilo del pool)"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                return
+            
+            # El proceso ya no lee la casilla: puede reutilizarla otro trabajo
+            self._cancel_flags[job['slot']] = 0
+            self._free_slots.append(job['slot'])
+        
+        if future.cancelled():
+            result = {'success': False, 'path': None, 'cancelled': True, 'message': "Reporte cancelado"}
+        elif future.exception() is not None:
+            self.logger.error(f"Error en el reporte #{job_id}: {future.exception()}")
+            result = {'success': False, 'path': None, 'cancelled': False, 'message': str(future.exception())}
+        else:
+            result = future.result()
+        
+        self._invoke(job['on_finished'], job_id, result)
+    
+    def _listen(self):
+        """Bucle del hilo que reparte el avance enviado por los procesos"""
+        while True:
+            item = self._progress.get()
+            if item is None:
+                break
+            
+            job_id, fraction = item
+            with self._lock:
+                job = self._jobs.get(job_id)
+            
+            # El avance de un trabajo ya terminado o cancelado se descarta
+            if job is not None:
+                self._invoke(job['on_progress'], job_id, fraction)
+    
+    def _invoke(self, callback, job_id, value):
+        """Invocar un callback sin que sus errores detengan el controlador"""
+        if callback is None:
+            return
+        
+        try:
+            callback(job_id, value)
+        except Exception as e:
+            self.logger.error(f"Error en el callback del reporte #{job_id}: {e}")
@@ -1,24 +1,54 @@
 # app/controllers/sales_controller.py
 from datetime import datetime, timedelta
 
+from ..utils.money import to_cents
+from ..models.register_counters import RegisterCounters, normalize_payment_method
+from ..models.rollups import SalesRollup
+
 class SalesController:
     """Controlador para la gestión de ventas"""
     
-    def __init__(self, database):
-        """Inicializar controlador con una conexión a la base de datos"""
+    # Máximo de productos por sentencia de actualización de stock (2 parámetros cada uno)
+    STOCK_UPDATE_CHUNK = 400
+    
+    def __init__(self, database, pricing_engine=None):
+        """
+        Inicializar controlador con una conexión a la base de datos
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            pricing_engine: Motor de impuestos para calcular el IVA de las
+                ventas registradas sin tax_amount (opcional)
+        """
         self.db = database
+        self.pricing_engine = pricing_engine
+        self.register_counters = RegisterCounters(database)
+        self.rollup = SalesRollup(database)
+        self.indexes = []
+    
+    def register_index(self, index):
+        """
+        Registrar un índice de productos en memoria para mantener su stock al día
+        
+        El índice debe implementar on_stock_changed(product_id, quantity_change).
+        """
+        self.indexes.append(index)
     
-    def create_sale(self, user_id, items, payment_method, total_amount, tax_amount=0, discount_amount=0, customer_name=None, notes=None):
+    def create_sale(self, user_id, items, payment_method, total_amount, tax_amount=None, discount_amount=0, customer_name=None, notes=None):
         """
         Crear una nueva venta
         
         Args:
             user_id: ID del usuario que realiza la venta
-            items: Lista de productos vendidos con sus cantidades
-            payment_method: Método de pago ('cash', 'card', 'transfer')
-            total_amount: Monto total de la venta
-            tax_amount: Monto de impuestos
-            discount_amount: Monto de descuento
+            items: Lista de productos vendidos con sus cantidades (price y
+                subtotal como Money, número o texto "$12.50")
+            payment_method: Método de pago ('cash', 'card', 'transfer' o el
+                nombre de la interfaz, como 'Efectivo')
+            total_amount: Monto total de la venta (Money, número o texto)
+            tax_amount: Monto de impuestos (Money, número o texto). Si es None
+                lo calcula el motor de impuestos con las tasas de las líneas
+                (las mismas del carrito), o es 0 si no hay motor
+            discount_amount: Monto de descuento (Money, número o texto)
             customer_name: Nombre del cliente (opcional)
             notes: Notas adicionales
         
@@ -26,95 +56,95 @@ class SalesController:
             ID de la venta creada o None si hay error
         """
         try:
-            # Iniciar transacción
-            self.db.begin_transaction()
-            
-            # Insertar cabecera de venta
-            sale_query = """
-                INSERT INTO sales (
-                    user_id, customer_name, total_amount, tax_amount, 
-                    discount_amount, payment_method, payment_status, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            sale_params = [
-                user_id,
-                customer_name,
-                total_amount,
-                tax_amount,
-                discount_amount,
-                payment_method,
-                'paid',  # Estado de pago por defecto
-                notes
-            ]
-            
-            sale_id = self.db.execute(sale_query, sale_params)
+            if tax_amount is None:
+                tax_amount = self.pricing_engine.quote(items)['tax'] if self.pricing_engine else 0
             
-            if not sale_id:
-                raise Exception("No se pudo crear la venta")
+            payment_method = normalize_payment_method(payment_method)
+            total_cents = to_cents(total_amount)
             
-            # Insertar detalles de venta
-            for item in items:
-                product_id = item.get('product_id')
-                quantity = int(item.get('quantity', 1))
-                unit_price = float(item.get('price').replace('$', '')) if isinstance(item.get('price'), str) else float(item.get('price', 0))
-                discount = float(item.get('discount', 0))
-                subtotal = float(item.get('subtotal').replace('$', '')) if isinstance(item.get('subtotal'), str) else float(item.get('subtotal', 0))
+            # Ejecutar como una única transacción
+            with self.db.transaction():
+                # La venta se asocia a la caja abierta del cajero
+                register_id = self.register_counters.open_register_id(user_id)
                 
-                # Insertar detalle
-                item_query = """
-                    INSERT INTO sale_items (
-                        sale_id, product_id, quantity, unit_price, discount, subtotal
-                    ) VALUES (?, ?, ?, ?, ?, ?)
+                # Insertar cabecera de venta
+                sale_query = """
+                    INSERT INTO sales (
+                        user_id, customer_name, total_amount, tax_amount, 
+                        discount_amount, payment_method, payment_status, notes, register_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """
                 
-                item_params = [
-                    sale_id,
-                    product_id,
-                    quantity,
-                    unit_price,
-                    discount,
-                    subtotal
+                # Los importes se convierten una vez a centavos y se guardan en pesos
+                sale_params = [
+                    user_id,
+                    customer_name,
+                    total_cents / 100,
+                    to_cents(tax_amount) / 100,
+                    to_cents(discount_amount) / 100,
+                    payment_method,
+                    'paid',  # Estado de pago por defecto
+                    notes,
+                    register_id
                 ]
                 
-                self.db.execute(item_query, item_params)
+                sale_id = self.db.execute(sale_query, sale_params)
                 
-                # Actualizar stock (restar)
-                stock_query = """
-                    UPDATE products 
-                    SET stock_quantity = stock_quantity - ? 
-                    WHERE product_id = ?
-                """
+                if not sale_id:
+                    raise Exception("No se pudo crear la venta")
                 
-                stock_params = [quantity, product_id]
-                self.db.execute(stock_query, stock_params)
+                # Totales de la caja en la misma transacción que la venta
+                self.register_counters.record_sale(register_id, payment_method, total_cents)
                 
-                # Registrar movimiento de inventario
-                movement_query = """
-                    INSERT INTO inventory_movements (
-                        product_id, user_id, movement_type, quantity, reference_id, notes
+                # Preparar detalles y movimientos para insertarlos en lote
+                item_rows = []
+                movement_rows = []
+                stock_changes = {}
+                
+                for item in items:
+                    product_id = item.get('product_id')
+                    quantity = int(item.get('quantity', 1))
+                    unit_price = to_cents(item.get('price', 0)) / 100
+                    discount = to_cents(item.get('discount', 0)) / 100
+                    subtotal = to_cents(item.get('subtotal', 0)) / 100
+                    
+                    item_rows.append((sale_id, product_id, quantity, unit_price, discount, subtotal))
+                    movement_rows.append((
+                        product_id,
+                        user_id,
+                        'sale',  # Tipo de movimiento
+                        -quantity,  # Cantidad negativa (salida)
+                        sale_id,  # Referencia a la venta
+                        f"Venta #{sale_id}"
+                    ))
+                    
+                    # Agrupar cantidades por producto (una línea puede repetirse)
+                    stock_changes[product_id] = stock_changes.get(product_id, 0) - quantity
+                
+                # Insertar detalles
+                self.db.execute_many("""
+                    INSERT INTO sale_items (
+                        sale_id, product_id, quantity, unit_price, discount, subtotal
                     ) VALUES (?, ?, ?, ?, ?, ?)
-                """
+                """, item_rows)
                 
-                movement_params = [
-                    product_id,
-                    user_id,
-                    'sale',  # Tipo de movimiento
-                    -quantity,  # Cantidad negativa (salida)
-                    sale_id,  # Referencia a la venta
-                    f"Venta #{sale_id}"
-                ]
+                # Actualizar stock (restar) con una sola sentencia
+                self._apply_stock_changes(stock_changes)
                 
-                self.db.execute(movement_query, movement_params)
+                # Registrar movimientos de inventario
+                self.db.execute_many("""
+                    INSERT INTO inventory_movements (
+                        product_id, user_id, movement_type, quantity, reference_id, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, movement_rows)
             
-            # Finalizar transacción
-            self.db.commit_transaction()
+            for index in self.indexes:
+                for product_id, quantity_change in stock_changes.items():
+                    index.on_stock_changed(product_id, quantity_change)
             
             return sale_id
             
         except Exception as e:
-            # Revertir cambios en caso de error
-            self.db.rollback_transaction()
             print(f"Error al crear venta: {e}")
             return None
     
@@ -131,78 +161,101 @@ class SalesController:
             True si se canceló correctamente, False en caso contrario
         """
         try:
-            # Iniciar transacción
-            self.db.begin_transaction()
-            
-            # Verificar si la venta existe
-            sale_query = "SELECT * FROM sales WHERE sale_id = ?"
-            sale = self.db.fetch_one(sale_query, [sale_id])
-            
-            if not sale:
-                raise Exception("Venta no encontrada")
-            
-            if sale['payment_status'] == 'canceled':
-                raise Exception("La venta ya está cancelada")
-            
-            # Actualizar estado de la venta
-            update_query = """
-                UPDATE sales 
-                SET payment_status = 'canceled', notes = ? 
-                WHERE sale_id = ?
-            """
-            
-            notes = f"{sale['notes'] or ''}\nCANCELADA: {reason or 'Sin motivo'}"
-            update_params = [notes, sale_id]
-            
-            self.db.execute(update_query, update_params)
-            
-            # Obtener detalles de la venta
-            items_query = "SELECT * FROM sale_items WHERE sale_id = ?"
-            items = self.db.fetch_all(items_query, [sale_id])
-            
-            for item in items:
-                product_id = item['product_id']
-                quantity = item['quantity']
+            # Ejecutar como una única transacción
+            with self.db.transaction():
+                # Verificar si la venta existe
+                sale_query = "SELECT * FROM sales WHERE sale_id = ?"
+                sale = self.db.fetch_one(sale_query, [sale_id])
                 
-                # Restaurar stock
-                stock_query = """
-                    UPDATE products 
-                    SET stock_quantity = stock_quantity + ? 
-                    WHERE product_id = ?
+                if not sale:
+                    raise Exception("Venta no encontrada")
+                
+                if sale['payment_status'] == 'canceled':
+                    raise Exception("La venta ya está cancelada")
+                
+                # Actualizar estado de la venta
+                update_query = """
+                    UPDATE sales 
+                    SET payment_status = 'canceled', notes = ? 
+                    WHERE sale_id = ?
                 """
                 
-                stock_params = [quantity, product_id]
-                self.db.execute(stock_query, stock_params)
+                notes = f"{sale['notes'] or ''}\nCANCELADA: {reason or 'Sin motivo'}"
+                update_params = [notes, sale_id]
+                
+                self.db.execute(update_query, update_params)
+                
+                # Pasar la venta a canceladas en los totales de su caja
+                if sale['payment_status'] == 'paid':
+                    self.register_counters.record_cancel(sale['register_id'], sale['payment_method'],
+                                                         to_cents(sale['total_amount']))
                 
-                # Registrar movimiento de inventario
-                movement_query = """
+                # Obtener detalles de la venta
+                items_query = "SELECT * FROM sale_items WHERE sale_id = ?"
+                items = self.db.fetch_all(items_query, [sale_id])
+                
+                stock_changes = {}
+                for item in items:
+                    stock_changes[item['product_id']] = stock_changes.get(item['product_id'], 0) + item['quantity']
+                
+                # Restaurar stock con una sola sentencia
+                self._apply_stock_changes(stock_changes)
+                
+                # Registrar movimientos de inventario
+                self.db.execute_many("""
                     INSERT INTO inventory_movements (
                         product_id, user_id, movement_type, quantity, reference_id, notes
                     ) VALUES (?, ?, ?, ?, ?, ?)
-                """
-                
-                movement_params = [
-                    product_id,
-                    user_id,
-                    'return',  # Tipo de movimiento
-                    quantity,  # Cantidad positiva (entrada)
-                    sale_id,  # Referencia a la venta
-                    f"Cancelación de venta #{sale_id}: {reason or 'Sin motivo'}"
-                ]
-                
-                self.db.execute(movement_query, movement_params)
+                """, [
+                    (
+                        item['product_id'],
+                        user_id,
+                        'return',  # Tipo de movimiento
+                        item['quantity'],  # Cantidad positiva (entrada)
+                        sale_id,  # Referencia a la venta
+                        f"Cancelación de venta #{sale_id}: {reason or 'Sin motivo'}"
+                    )
+                    for item in items
+                ])
             
-            # Finalizar transacción
-            self.db.commit_transaction()
+            for index in self.indexes:
+                for product_id, quantity_change in stock_changes.items():
+                    index.on_stock_changed(product_id, quantity_change)
             
             return True
             
         except Exception as e:
-            # Revertir cambios en caso de error
-            self.db.rollback_transaction()
             print(f"Error al cancelar venta: {e}")
             return False
     
+    def _apply_stock_changes(self, stock_changes):
+        """
+        Aplicar cambios de stock de varios productos con una sola sentencia UPDATE
+        
+        Usa UPDATE ... FROM (SQLite 3.33 o superior): cada producto se localiza
+        por su clave primaria a partir de la canasta.
+        
+        Args:
+            stock_changes: Diccionario product_id -> cambio de cantidad
+        """
+        changes = list(stock_changes.items())
+        
+        # Limitar el número de parámetros por sentencia
+        for start in range(0, len(changes), self.STOCK_UPDATE_CHUNK):
+            chunk = changes[start:start + self.STOCK_UPDATE_CHUNK]
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            
+            query = f"""
+                WITH basket(product_id, quantity) AS (VALUES {values})
+                UPDATE products
+                SET stock_quantity = stock_quantity + basket.quantity
+                FROM basket
+                WHERE products.product_id = basket.product_id
+            """
+            
+            params = [value for change in chunk for value in change]
+            self.db.execute(query, params)
+    
     def get_sale_by_id(self, sale_id):
         """
         Obtener una venta por su ID
@@ -324,6 +377,8 @@ class SalesController:
         """
         Obtener resumen de ventas agrupadas por día
         
+        Se lee del resumen diario materializado (sales_daily_rollup).
+        
         Args:
             start_date: Fecha de inicio (formato YYYY-MM-DD)
             end_date: Fecha de fin (formato YYYY-MM-DD)
@@ -331,34 +386,14 @@ class SalesController:
         Returns:
             Resumen de ventas por día
         """
-        query = """
-            SELECT 
-                DATE(sale_date) as date,
-                COUNT(*) as total_sales,
-                SUM(total_amount) as total_amount,
-                SUM(tax_amount) as total_tax,
-                SUM(CASE WHEN payment_method = 'cash' THEN total_amount ELSE 0 END) as cash_amount,
-                SUM(CASE WHEN payment_method = 'card' THEN total_amount ELSE 0 END) as card_amount,
-                SUM(CASE WHEN payment_method = 'transfer' THEN total_amount ELSE 0 END) as transfer_amount
-            FROM sales
-            WHERE sale_date BETWEEN ? AND ?
-            AND payment_status = 'paid'
-            GROUP BY DATE(sale_date)
-            ORDER BY DATE(sale_date)
-        """
-        
-        # Ajustar el rango para incluir todo el día
-        start = f"{start_date} 00:00:00"
-        end = f"{end_date} 23:59:59"
-        
-        params = [start, end]
-        
-        return self.db.fetch_all(query, params)
+        return self.rollup.summary_by_day(start_date, end_date)
     
     def get_top_selling_products(self, start_date=None, end_date=None, limit=10):
         """
         Obtener los productos más vendidos
         
+        Se lee del resumen por producto y día (product_daily_rollup).
+        
         Args:
             start_date: Fecha de inicio (opcional)
             end_date: Fecha de fin (opcional)
@@ -367,38 +402,33 @@ class SalesController:
         Returns:
             Lista de productos más vendidos
         """
-        query = """
-            SELECT 
-                p.product_id,
-                p.name as product_name,
-                p.barcode,
-                SUM(si.quantity) as total_quantity,
-                SUM(si.subtotal) as total_amount
-            FROM sale_items si
-            JOIN products p ON si.product_id = p.product_id
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.payment_status = 'paid'
+        return self.rollup.top_products(start_date, end_date, limit)
+    
+    def get_sales_by_hour(self, start_date, end_date):
         """
+        Obtener la distribución de ventas por hora del día
         
-        params = []
-        
-        if start_date:
-            query += " AND s.sale_date >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND s.sale_date <= ?"
-            params.append(end_date)
-        
-        query += """
-            GROUP BY p.product_id, p.name, p.barcode
-            ORDER BY total_quantity DESC
-            LIMIT ?
+        Args:
+            start_date: Fecha de inicio (formato YYYY-MM-DD)
+            end_date: Fecha de fin (formato YYYY-MM-DD)
+            
+        Returns:
+            Lista con hour, total_sales y total_amount
         """
+        return self.rollup.sales_by_hour(start_date, end_date)
+    
+    def get_sales_by_category(self, start_date=None, end_date=None):
+        """
+        Obtener las ventas por categoría de producto
         
-        params.append(limit)
-        
-        return self.db.fetch_all(query, params)
+        Args:
+            start_date: Fecha de inicio (opcional)
+            end_date: Fecha de fin (opcional)
+            
+        Returns:
+            Lista con category_id, category_name, total_quantity, total_amount y share
+        """
+        return self.rollup.category_mix(start_date, end_date)
     
     def get_daily_cash_flow(self, date=None):
         """
@@ -413,25 +443,7 @@ class SalesController:
         if not date:
             date = datetime.now().strftime("%Y-%m-%d")
         
-        # Ajustar para incluir todo el día
-        start_date = f"{date} 00:00:00"
-        end_date = f"{date} 23:59:59"
-        
-        query = """
-            SELECT 
-                SUM(CASE WHEN payment_method = 'cash' THEN total_amount ELSE 0 END) as cash_sales,
-                SUM(CASE WHEN payment_method = 'card' THEN total_amount ELSE 0 END) as card_sales,
-                SUM(CASE WHEN payment_method = 'transfer' THEN total_amount ELSE 0 END) as transfer_sales,
-                SUM(total_amount) as total_sales,
-                COUNT(*) as total_transactions
-            FROM sales
-            WHERE sale_date BETWEEN ? AND ?
-            AND payment_status = 'paid'
-        """
-        
-        params = [start_date, end_date]
-        
-        return self.db.fetch_one(query, params)
+        return self.rollup.cash_flow(date)
     
     def open_cash_register(self, user_id, opening_amount, notes=None):
         """
@@ -475,7 +487,7 @@ class SalesController:
         
         return self.db.execute(query, params)
     
-    def close_cash_register(self, register_id, user_id, closing_amount, cash_sales, card_sales, other_sales, notes=None):
+    def close_cash_register(self, register_id, user_id, closing_amount, cash_sales=None, card_sales=None, other_sales=None, notes=None):
         """
         Cerrar caja registradora
         
@@ -483,9 +495,9 @@ class SalesController:
             register_id: ID del registro de caja
             user_id: ID del usuario que cierra la caja
             closing_amount: Monto final
-            cash_sales: Ventas en efectivo
-            card_sales: Ventas con tarjeta
-            other_sales: Otras ventas
+            cash_sales: Ventas en efectivo (por defecto las de los contadores de la caja)
+            card_sales: Ventas con tarjeta (por defecto las de los contadores)
+            other_sales: Otras ventas (por defecto transferencias y otros métodos)
             notes: Notas adicionales
             
         Returns:
@@ -504,6 +516,14 @@ class SalesController:
             # No se encontró la caja o ya está cerrada
             return False
         
+        # Los totales por método de pago salen de los contadores de la caja
+        if cash_sales is None:
+            cash_sales = register['cash_cents'] / 100
+        if card_sales is None:
+            card_sales = register['card_cents'] / 100
+        if other_sales is None:
+            other_sales = (register['transfer_cents'] + register['other_cents']) / 100
+        
         # Actualizar registro con datos de cierre
         query = """
             UPDATE cash_registers SET
@@ -560,83 +580,57 @@ class SalesController:
         Returns:
             Ventas realizadas durante la apertura de caja
         """
-        # Obtener datos del registro
-        register_query = "SELECT * FROM cash_registers WHERE register_id = ?"
-        register = self.db.fetch_one(register_query, [register_id])
-        
-        if not register:
-            return []
-        
-        # Obtener ventas en el periodo
         sales_query = """
             SELECT * FROM sales
-            WHERE user_id = ?
-            AND sale_date BETWEEN ? AND ?
+            WHERE register_id = ?
             ORDER BY sale_date
         """
         
-        closing_time = register['closing_time'] or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return self.db.fetch_all(sales_query, [register_id])
+    
+    def generate_x_report(self, register_id):
+        """
+        Generar reporte X (corte parcial sin cerrar la caja)
         
-        params = [
-            register['user_id'],
-            register['opening_time'],
-            closing_time
-        ]
+        Lee los contadores de la caja, que se actualizan con cada venta y
+        cancelación, sin recorrer las ventas del turno.
         
-        return self.db.fetch_all(sales_query, params)
+        Args:
+            register_id: ID del registro de caja
+            
+        Returns:
+            Diccionario con los totales de la caja o None si no existe
+        """
+        return self.register_counters.report(register_id)
     
-    def generate_z_report(self, register_id):
+    def generate_z_report(self, register_id, include_sales=False):
         """
         Generar reporte Z (cierre de caja)
         
         Args:
             register_id: ID del registro de caja
+            include_sales: Si es True agrega la lista de ventas del turno
             
         Returns:
             Diccionario con información del reporte Z
         """
-        # Obtener datos del registro
-        register_query = """
-            SELECT r.*, u.username, u.full_name
-            FROM cash_registers r
-            JOIN users u ON r.user_id = u.user_id
-            WHERE r.register_id = ?
-        """
-        
-        register = self.db.fetch_one(register_query, [register_id])
+        # Los totales salen de una sola fila de cash_registers
+        result = self.register_counters.report(register_id)
         
-        if not register:
-            return None
+        if result is not None and include_sales:
+            result['sales'] = self.get_register_sales(register_id)
         
-        # Obtener ventas en el periodo
-        sales = self.get_register_sales(register_id)
-        
-        # Calcular totales
-        total_cash = sum(s['total_amount'] for s in sales if s['payment_method'] == 'cash' and s['payment_status'] == 'paid')
-        total_card = sum(s['total_amount'] for s in sales if s['payment_method'] == 'card' and s['payment_status'] == 'paid')
-        total_transfer = sum(s['total_amount'] for s in sales if s['payment_method'] == 'transfer' and s['payment_status'] == 'paid')
-        total_sales = total_cash + total_card + total_transfer
-        
-        # Calcular cancelaciones
-        total_canceled = sum(s['total_amount'] for s in sales if s['payment_status'] == 'canceled')
-        
-        # Preparar resultado
-        result = {
-            'register': register,
-            'sales_count': len([s for s in sales if s['payment_status'] == 'paid']),
-            'canceled_count': len([s for s in sales if s['payment_status'] == 'canceled']),
-            'total_cash': total_cash,
-            'total_card': total_card,
-            'total_transfer': total_transfer,
-            'total_sales': total_sales,
-            'total_canceled': total_canceled,
-            'opening_amount': register['opening_amount'],
-            'closing_amount': register['closing_amount'],
-            'expected_amount': register['opening_amount'] + total_cash,
-            'difference': (register['closing_amount'] or 0) - (register['opening_amount'] + total_cash),
-            'opening_time': register['opening_time'],
-            'closing_time': register['closing_time'],
-            'sales': sales
-        }
+        return result
+    
+    def verify_register_counters(self, register_ids=None, repair=True):
+        """
+        Comparar los contadores de las cajas con la tabla de ventas
         
-        return result
\ No newline at end of file
+        Args:
+            register_ids: Cajas a verificar (por defecto las abiertas)
+            repair: Si es True se corrigen los contadores con diferencias
+            
+        Returns:
+            Lista de diferencias encontradas
+        """
+        return self.register_counters.verify(register_ids, repair)
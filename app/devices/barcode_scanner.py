@@ -1,4 +1,5 @@
 # app/devices/barcode_scanner.py
+import os
 import time
 import threading
 import evdev  # Para manejar eventos de dispositivos de entrada en Linux
@@ -44,6 +45,10 @@ class BarcodeScanner:
             print(f"Error al conectar con la lectora de códigos: {e}")
             return False
     
+    def is_available(self):
+        """Verificar si la lectora sigue conectada (el archivo del dispositivo existe)"""
+        return self.is_connected and bool(self.device_path) and os.path.exists(self.device_path)
+    
     def start_listening(self, callback):
         """Iniciar escucha de códigos de barras"""
         if not self.is_connected and not self.connect():
@@ -92,6 +97,8 @@ import os
 from PIL import Image
 from escpos.printer import Usb, File
 
+from ..utils.money import Money
+
 class ThermalPrinter:
     """Controlador para la impresora térmica WPRP-260 de 58mm"""
     
@@ -202,14 +209,14 @@ class ThermalPrinter:
             p.set(align='left')
             for item in receipt_data['items']:
                 p.text(f"{item['quantity']} x {item['name']}\n")
-                p.text(f"{item['price']} = {item['subtotal']}\n")
+                p.text(f"{Money.parse(item['price'])} = {Money.parse(item['subtotal'])}\n")
             
             p.text('-' * 32 + '\n')
             
             # Totales
-            p.text(f"Subtotal: {receipt_data['subtotal']}\n")
-            p.text(f"IVA: {receipt_data['tax']}\n")
-            p.text(f"Total: {receipt_data['total']}\n")
+            p.text(f"Subtotal: {Money.parse(receipt_data['subtotal'])}\n")
+            p.text(f"IVA: {Money.parse(receipt_data['tax'])}\n")
+            p.text(f"Total: {Money.parse(receipt_data['total'])}\n")
             
             # Método de pago
             p.text(f"Pago: {receipt_data['payment_method']}\n")
@@ -227,6 +227,34 @@ class CashDrawer:
             self.logger.error(f"Error al conectar caja por archivo: {e}")
             return False
     
+    def is_available(self):
+        """
+        Verificar si la caja sigue disponible sin volver a conectar
+        
+        Returns:
+            True si el dispositivo de la caja sigue presente
+        """
+        if not self.is_connected:
+            return False
+        
+        try:
+            if self.connection_type == 'printer':
+                return self.printer is not None
+            elif self.connection_type == 'serial':
+                return self.serial_device is not None and self.serial_device.is_open
+            elif self.connection_type == 'usb':
+                return usb is not None and usb.core.find(
+                    idVendor=self.usb_vendor_id,
+                    idProduct=self.usb_product_id
+                ) is not None
+            elif self.connection_type == 'file':
+                return os.path.exists(self.device_path)
+            
+            return True
+        except Exception as e:
+            self.logger.error(f"Error al verificar la caja: {e}")
+            return False
+    
     def open_drawer(self):
         """
         Abrir la caja de dinero
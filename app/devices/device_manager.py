@@ -0,0 +1,269 @@
+# app/devices/device_manager.py
+import time
+import logging
+import threading
+
+class DeviceManager:
+    """
+    Administrador de conexiones persistentes con los dispositivos
+    
+    Cada dispositivo se conecta una sola vez y la conexión se reutiliza en cada
+    venta. Un hilo revisa periódicamente que los dispositivos sigan disponibles;
+    si uno se desconecta (por ejemplo al desenchufarlo) se vuelve a conectar en
+    la siguiente revisión o la próxima vez que se use. Los cambios de estado se
+    publican a los oyentes registrados.
+    """
+    
+    def __init__(self, check_interval=5.0):
+        """
+        Inicializar administrador
+        
+        Args:
+            check_interval: Segundos entre revisiones de estado
+        """
+        self.logger = logging.getLogger('pos.devices.manager')
+        self.check_interval = check_interval
+        
+        # Dispositivos por nombre: estado de conexión, funciones y bloqueo propio
+        self._devices = {}
+        self._listeners = []
+        
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def register(self, name, device, connect=None, check=None):
+        """
+        Registrar un dispositivo
+        
+        Args:
+            name: Nombre del dispositivo (por ejemplo 'printer')
+            device: Objeto del dispositivo
+            connect: Función connect(device) -> bool (por defecto device.connect())
+            check: Función check(device) -> bool que indica si sigue disponible
+                (por defecto device.is_available())
+        """
+        with self._lock:
+            self._devices[name] = {
+                'device': device,
+                'connect': connect or (lambda d: d.connect()),
+                'check': check or self._default_check,
+                'connected': False,
+                'reported': False,
+                'last_error': None,
+                'last_check': None,
+                'lock': threading.RLock()
+            }
+    
+    def add_status_listener(self, listener):
+        """
+        Agregar un oyente de cambios de estado
+        
+        Args:
+            listener: Función listener(name, connected, message). Se invoca desde
+                el hilo que detecta el cambio.
+        """
+        self._listeners.append(listener)
+    
+    def get_device(self, name):
+        """Obtener el objeto de un dispositivo registrado (o None)"""
+        entry = self._devices.get(name)
+        return entry['device'] if entry else None
+    
+    def is_connected(self, name):
+        """True si el dispositivo está registrado y conectado"""
+        entry = self._devices.get(name)
+        return bool(entry and entry['connected'])
+    
+    def get_status(self):
+        """
+        Obtener el estado de todos los dispositivos
+        
+        Returns:
+            Diccionario nombre -> {'connected', 'last_error', 'last_check'}
+        """
+        return {
+            name: {
+                'connected': entry['connected'],
+                'last_error': entry['last_error'],
+                'last_check': entry['last_check']
+            }
+            for name, entry in list(self._devices.items())
+        }
+    
+    def connect_all(self):
+        """
+        Conectar todos los dispositivos registrados
+        
+        Returns:
+            Diccionario nombre -> True si quedó conectado
+        """
+        return {name: self.ensure_connected(name) for name in list(self._devices)}
+    
+    def ensure_connected(self, name):
+        """
+        Conectar el dispositivo solo si no está conectado
+        
+        Args:
+            name: Nombre del dispositivo
+        
+        Returns:
+            True si el dispositivo está conectado
+        """
+        entry = self._devices.get(name)
+        if entry is None:
+            self.logger.error(f"Dispositivo no registrado: {name}")
+            return False
+        
+        with entry['lock']:
+            if entry['connected']:
+                return True
+            
+            try:
+                connected = bool(entry['connect'](entry['device']))
+                error = None if connected else "no se pudo conectar"
+            except Exception as e:
+                connected = False
+                error = str(e)
+            
+            self._set_status(name, entry, connected, error)
+            return connected
+    
+    def run(self, name, operation):
+        """
+        Ejecutar una operación con un dispositivo usando su conexión persistente
+        
+        Si el dispositivo está desconectado se intenta reconectar antes. Si la
+        operación falla (devuelve False o lanza una excepción) el dispositivo se
+        marca como desconectado para reconectarlo en el siguiente uso.
+        
+        Args:
+            name: Nombre del dispositivo
+            operation: Función operation(device) que devuelve el resultado
+        
+        Returns:
+            Resultado de la operación, o False si el dispositivo no está disponible
+        """
+        entry = self._devices.get(name)
+        if entry is None:
+            self.logger.error(f"Dispositivo no registrado: {name}")
+            return False
+        
+        with entry['lock']:
+            if not self.ensure_connected(name):
+                return False
+            
+            try:
+                result = operation(entry['device'])
+            except Exception as e:
+                self._set_status(name, entry, False, str(e))
+                raise
+            
+            if result is False:
+                self._set_status(name, entry, False, "el dispositivo no respondió")
+            
+            return result
+    
+    def mark_disconnected(self, name, error=None):
+        """
+        Marcar un dispositivo como desconectado (se reconectará al usarlo)
+        
+        Args:
+            name: Nombre del dispositivo
+            error: Descripción del error (opcional)
+        """
+        entry = self._devices.get(name)
+        if entry is not None:
+            with entry['lock']:
+                self._set_status(name, entry, False, error)
+    
+    def check_now(self):
+        """Revisar el estado de todos los dispositivos y reconectar los caídos"""
+        for name, entry in list(self._devices.items()):
+            with entry['lock']:
+                if entry['connected']:
+                    try:
+                        available = bool(entry['check'](entry['device']))
+                        error = None if available else "dispositivo no disponible"
+                    except Exception as e:
+                        available = False
+                        error = str(e)
+                    
+                    entry['last_check'] = time.time()
+                    if available:
+                        continue
+                    
+                    self._set_status(name, entry, False, error)
+                
+                # Reconexión en segundo plano (p. ej. tras volver a enchufarlo)
+                self.ensure_connected(name)
+                entry['last_check'] = time.time()
+    
+    def start(self):
+        """
+        Iniciar el hilo de revisión de estado
+        
+        Returns:
+            True si se inició (o ya estaba en marcha)
+        """
+        if self._thread and self._thread.is_alive():
+            return True
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="device-health", daemon=True)
+        self._thread.start()
+        
+        self.logger.info("Revisión de estado de dispositivos iniciada")
+        return True
+    
+    def stop(self, timeout=5):
+        """
+        Detener el hilo de revisión de estado
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+        """
+        self._stop_event.set()
+        
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _run(self):
+        """Bucle del hilo de revisión de estado"""
+        while not self._stop_event.wait(self.check_interval):
+            try:
+                self.check_now()
+            except Exception as e:
+                self.logger.error(f"Error al revisar el estado de los dispositivos: {e}")
+    
+    def _default_check(self, device):
+        """Revisión por defecto: is_available() si existe, si no is_connected"""
+        if hasattr(device, 'is_available'):
+            return device.is_available()
+        
+        return getattr(device, 'is_connected', True)
+    
+    def _set_status(self, name, entry, connected, error):
+        """Actualizar el estado y avisar a los oyentes si cambió"""
+        entry['last_error'] = error
+        
+        # El primer resultado se publica siempre; después, solo los cambios
+        if entry['reported'] and entry['connected'] == connected:
+            return
+        
+        entry['connected'] = connected
+        entry['reported'] = True
+        
+        if connected:
+            message = "conectado"
+            self.logger.info(f"Dispositivo '{name}' conectado")
+        else:
+            message = f"desconectado: {error}" if error else "desconectado"
+            self.logger.warning(f"Dispositivo '{name}' {message}")
+        
+        for listener in list(self._listeners):
+            try:
+                listener(name, connected, message)
+            except Exception as e:
+                self.logger.error(f"Error en el oyente de estado de dispositivos: {e}")
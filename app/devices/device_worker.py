@@ -0,0 +1,153 @@
+# app/devices/device_worker.py
+import logging
+import queue
+import threading
+
+class DeviceWorker:
+    """
+    Ejecutor en segundo plano para las operaciones con dispositivos
+    
+    Las tareas (imprimir, abrir la caja, etc.) se ejecutan en orden en un hilo
+    propio, de modo que la interfaz no espera a la impresora ni a la caja.
+    Los callbacks se invocan desde el hilo del ejecutor; la interfaz debe
+    reenviarlos a su hilo (por ejemplo emitiendo una señal de Qt).
+    """
+    
+    def __init__(self, name="device-worker"):
+        """
+        Inicializar ejecutor
+        
+        Args:
+            name: Nombre del hilo (para los logs)
+        """
+        self.logger = logging.getLogger('pos.devices.worker')
+        self.name = name
+        
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+    
+    @property
+    def is_running(self):
+        """True si el hilo del ejecutor está activo"""
+        return self._running and self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def pending(self):
+        """Número aproximado de tareas pendientes"""
+        return self._queue.qsize()
+    
+    def start(self):
+        """
+        Iniciar el hilo del ejecutor
+        
+        Returns:
+            True si se inició (o ya estaba en marcha)
+        """
+        if self.is_running:
+            return True
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        
+        self.logger.info("Ejecutor de dispositivos iniciado")
+        return True
+    
+    def stop(self, timeout=5):
+        """
+        Detener el ejecutor después de terminar las tareas ya encoladas
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+        
+        Returns:
+            True si el hilo terminó, False si sigue ocupado
+        """
+        if not self._thread:
+            return True
+        
+        self._running = False
+        self._queue.put(None)  # Marca de fin
+        self._thread.join(timeout)
+        
+        stopped = not self._thread.is_alive()
+        if stopped:
+            self._thread = None
+            self.logger.info("Ejecutor de dispositivos detenido")
+        else:
+            self.logger.warning("El ejecutor de dispositivos no terminó a tiempo")
+        
+        return stopped
+    
+    def submit(self, task_name, func, *args, on_finished=None, on_failed=None, **kwargs):
+        """
+        Encolar una tarea
+        
+        Args:
+            task_name: Nombre de la tarea (se devuelve en los callbacks)
+            func: Función a ejecutar
+            *args, **kwargs: Argumentos para la función
+            on_finished: Callback (task_name, resultado) al terminar sin excepción
+            on_failed: Callback (task_name, error) si la función lanza una excepción
+        
+        Returns:
+            True si la tarea se encoló, False si el ejecutor no está en marcha
+        """
+        if not self._running:
+            self.logger.warning(f"Ejecutor detenido, se descarta la tarea '{task_name}'")
+            return False
+        
+        self._queue.put((task_name, func, args, kwargs, on_finished, on_failed))
+        return True
+    
+    def wait_idle(self, timeout=None):
+        """
+        Esperar a que se procesen todas las tareas encoladas
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos (None = sin límite)
+        
+        Returns:
+            True si no quedan tareas pendientes
+        """
+        done = threading.Event()
+        
+        if not self.submit("_idle", done.set):
+            return self._queue.empty()
+        
+        return done.wait(timeout)
+    
+    def _run(self):
+        """Bucle principal del hilo del ejecutor"""
+        while True:
+            task = self._queue.get()
+            
+            try:
+                if task is None:
+                    break
+                
+                self._execute(*task)
+            finally:
+                self._queue.task_done()
+    
+    def _execute(self, task_name, func, args, kwargs, on_finished, on_failed):
+        """Ejecutar una tarea e invocar sus callbacks"""
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.logger.error(f"Error en la tarea de dispositivo '{task_name}': {e}")
+            self._invoke(on_failed, task_name, e)
+            return
+        
+        self._invoke(on_finished, task_name, result)
+    
+    def _invoke(self, callback, task_name, value):
+        """Invocar un callback sin que sus errores detengan el ejecutor"""
+        if callback is None:
+            return
+        
+        try:
+            callback(task_name, value)
+        except Exception as e:
+            self.logger.error(f"Error en el callback de la tarea '{task_name}': {e}")
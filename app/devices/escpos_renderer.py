@@ -0,0 +1,159 @@
+# app/devices/escpos_renderer.py
+from datetime import datetime
+
+from ..utils.money import Money
+
+# Comandos ESC/POS
+ESC = b'\x1b'
+GS = b'\x1d'
+
+INIT = ESC + b'@'
+CODEPAGE_CP437 = ESC + b't\x00'
+ALIGN = {
+    'left': ESC + b'a\x00',
+    'center': ESC + b'a\x01',
+    'right': ESC + b'a\x02'
+}
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+FEED_AND_CUT = ESC + b'd\x06' + GS + b'V\x00'
+
+class EscposReceiptRenderer:
+    """
+    Generador del flujo de bytes ESC/POS de un recibo
+    
+    Construye el recibo completo en memoria para enviarlo a la impresora en una
+    sola escritura, en lugar de una transferencia por cada línea o cambio de estilo.
+    """
+    
+    def __init__(self, width=32, encoding='cp437'):
+        """
+        Inicializar generador
+        
+        Args:
+            width: Ancho del papel en caracteres
+            encoding: Codificación del texto (debe coincidir con la página de códigos)
+        """
+        self.width = width
+        self.encoding = encoding
+    
+    def render(self, receipt_data):
+        """
+        Generar el recibo
+        
+        Args:
+            receipt_data: Diccionario con datos del recibo (mismo formato que
+                ThermalPrinter.print_receipt)
+        
+        Returns:
+            Bytes con los comandos ESC/POS del recibo completo
+        """
+        buffer = bytearray()
+        separator = '-' * self.width + '\n'
+        
+        buffer += INIT + CODEPAGE_CP437
+        
+        # Encabezado
+        buffer += ALIGN['center'] + BOLD_ON
+        self._text(buffer, receipt_data.get('store_name', 'Mi Tienda') + '\n')
+        buffer += BOLD_OFF
+        self._text(buffer, receipt_data.get('store_address', '') + '\n')
+        self._text(buffer, receipt_data.get('store_phone', '') + '\n')
+        self._text(buffer, separator)
+        
+        # Fecha y número de recibo
+        buffer += ALIGN['left']
+        self._text(buffer, f"Fecha: {receipt_data.get('date', datetime.now().strftime('%d/%m/%Y %H:%M'))}\n")
+        self._text(buffer, f"Recibo: #{receipt_data.get('receipt_number', '')}\n")
+        self._text(buffer, f"Cajero: {receipt_data.get('cashier_name', '')}\n")
+        self._text(buffer, separator)
+        
+        # Encabezados de columnas
+        self._text(buffer, 'CANT  DESCRIPCION            PRECIO   TOTAL\n')
+        self._text(buffer, separator)
+        
+        # Productos
+        for item in receipt_data.get('items', []):
+            name = item.get('name', '')
+            quantity = self._to_number(item.get('quantity', 1), default=1)
+            price = self._amount(item.get('price', 0))
+            subtotal = self._amount(item.get('subtotal', 0))
+            
+            # Formatear nombre para que quepa en el ancho disponible
+            if len(name) > 20:
+                name = name[:17] + '...'
+            
+            self._text(buffer, f"{quantity:<5}{name:<20}${price:<7.2f}{subtotal}\n")
+        
+        self._text(buffer, separator)
+        
+        # Totales
+        buffer += ALIGN['right']
+        self._text(buffer, f"SUBTOTAL: {self._amount(receipt_data.get('subtotal', 0))}\n")
+        self._text(buffer, f"IMPUESTO: {self._amount(receipt_data.get('tax', 0))}\n")
+        buffer += BOLD_ON
+        self._text(buffer, f"TOTAL:    {self._amount(receipt_data.get('total', 0))}\n")
+        buffer += BOLD_OFF
+        
+        # Método de pago
+        payment_method = receipt_data.get('payment_method', 'Efectivo')
+        self._text(buffer, f"PAGO:     {payment_method}\n")
+        
+        # Si es pago en efectivo, mostrar monto y cambio
+        if payment_method.lower() in ('efectivo', 'cash'):
+            amount_received = self._amount(receipt_data.get('amount_received', 0))
+            change = self._amount(receipt_data.get('change', 0))
+            
+            if amount_received.cents > 0:
+                self._text(buffer, f"RECIBIDO: {amount_received}\n")
+                self._text(buffer, f"CAMBIO:   {change}\n")
+        
+        # Pie de página
+        buffer += ALIGN['center']
+        self._text(buffer, '\n' + receipt_data.get('custom_text', '¡Gracias por su compra!') + '\n\n')
+        
+        # Código QR o de barras (opcional)
+        if 'qr_data' in receipt_data:
+            buffer += self._qr(receipt_data['qr_data'])
+        elif 'barcode_data' in receipt_data:
+            buffer += self._barcode_code39(receipt_data['barcode_data'])
+        
+        # Avanzar y cortar papel
+        buffer += FEED_AND_CUT
+        
+        return bytes(buffer)
+    
+    def _text(self, buffer, text):
+        """Agregar texto codificado al búfer"""
+        buffer += text.encode(self.encoding, errors='replace')
+    
+    def _to_number(self, value, default=0):
+        """Convertir cantidades escritas como texto ('1,5') a número"""
+        if isinstance(value, str):
+            try:
+                return float(value.replace(',', '.'))
+            except ValueError:
+                return default
+        return value
+    
+    def _amount(self, value):
+        """Convertir un importe (Money, número o texto '$1,234.50') a Money"""
+        return Money.parse(value, default=Money())
+    
+    def _barcode_code39(self, data):
+        """Comandos para imprimir un código de barras CODE39 con su texto debajo"""
+        payload = str(data).upper().encode('ascii', errors='replace')
+        return (GS + b'h\x50' +     # Altura: 80 puntos
+                GS + b'H\x02' +     # Texto debajo del código
+                GS + b'k\x04' + payload + b'\x00' + b'\n')
+    
+    def _qr(self, data, size=6):
+        """Comandos para imprimir un código QR (modelo 2)"""
+        payload = str(data).encode('utf-8')
+        length = len(payload) + 3
+        
+        return (GS + b'(k\x04\x001A2\x00' +                                      # Modelo 2
+                GS + b'(k\x03\x001C' + bytes([size]) +                           # Tamaño del módulo
+                GS + b'(k\x03\x001E0' +                                          # Corrección de errores L
+                GS + b'(k' + bytes([length % 256, length // 256]) + b'1P0' + payload +  # Datos
+                GS + b'(k\x03\x001Q0' + b'\n')                                   # Imprimir
@@ -0,0 +1,396 @@
+# app/devices/print_spooler.py
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+
+class PrintSpooler:
+    """
+    Cola de impresión persistente en disco
+    
+    Los trabajos se guardan en una base de datos SQLite propia antes de imprimirse,
+    de modo que una impresora sin papel o desconectada no hace perder recibos.
+    Un hilo procesa los trabajos en orden (FIFO) y reintenta con espera
+    exponencial; los trabajos pendientes se retoman al iniciar la aplicación.
+    Los trabajos que no pueden imprimirse nunca (sin controlador o con datos
+    inválidos) o que agotan max_attempts pasan al estado 'failed' y dejan de
+    bloquear a los siguientes; se pueden consultar y descartar con discard().
+    """
+    
+    # Estados de un trabajo
+    STATUS_PENDING = 'pending'
+    STATUS_PRINTING = 'printing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    # Errores de los datos del trabajo: reintentar no los corrige
+    PERMANENT_ERRORS = (ValueError, KeyError, TypeError)
+    
+    def __init__(self, spool_path, base_delay=1.0, max_delay=60.0, max_attempts=None):
+        """
+        Inicializar cola de impresión
+        
+        Args:
+            spool_path: Ruta al archivo SQLite de la cola
+            base_delay: Espera inicial entre reintentos, en segundos
+            max_delay: Espera máxima entre reintentos, en segundos
+            max_attempts: Intentos antes de marcar un trabajo como fallido
+                (None = reintentar mientras la impresora no responda)
+        """
+        self.logger = logging.getLogger('pos.devices.spooler')
+        self.spool_path = spool_path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        
+        # Funciones de impresión por tipo de trabajo: handler(payload) -> bool
+        self.handlers = {}
+        
+        # Callbacks opcionales: on_job_done(job_id, job_type) y
+        # on_job_failed(job_id, job_type, error, attempts)
+        self.on_job_done = None
+        self.on_job_failed = None
+        
+        self.conn = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._running = False
+    
+    def open(self):
+        """
+        Abrir (o crear) el archivo de la cola
+        
+        Returns:
+            True si se abrió correctamente, False en caso contrario
+        """
+        try:
+            directory = os.path.dirname(self.spool_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            self.conn = sqlite3.connect(self.spool_path, isolation_level=None, check_same_thread=False)
+            self.conn.row_factory = sqlite3.Row
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS print_jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    printed_at TIMESTAMP
+                )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_print_jobs_status ON print_jobs(status, job_id)")
+            
+            self.logger.info(f"Cola de impresión abierta: {self.spool_path}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error al abrir la cola de impresión: {e}")
+            return False
+    
+    def register_handler(self, job_type, handler):
+        """
+        Registrar la función que imprime un tipo de trabajo
+        
+        Args:
+            job_type: Tipo de trabajo (por ejemplo 'receipt')
+            handler: Función handler(payload) que devuelve True si imprimió
+        """
+        self.handlers[job_type] = handler
+    
+    def enqueue(self, job_type, payload):
+        """
+        Guardar un trabajo en la cola y avisar al hilo de impresión
+        
+        Args:
+            job_type: Tipo de trabajo
+            payload: Datos del trabajo (serializables a JSON)
+        
+        Returns:
+            ID del trabajo o None si hay error
+        """
+        try:
+            data = json.dumps(payload, ensure_ascii=False, default=str)
+            
+            with self._wakeup:
+                cursor = self.conn.execute(
+                    "INSERT INTO print_jobs (job_type, payload, status, next_attempt_at) VALUES (?, ?, ?, ?)",
+                    [job_type, data, self.STATUS_PENDING, time.time()]
+                )
+                self._wakeup.notify()
+            
+            return cursor.lastrowid
+        except Exception as e:
+            self.logger.error(f"Error al encolar trabajo de impresión: {e}")
+            return None
+    
+    def start(self):
+        """
+        Iniciar el hilo de impresión y retomar los trabajos pendientes
+        
+        Returns:
+            True si se inició correctamente, False en caso contrario
+        """
+        if self._running:
+            return True
+        
+        if not self.conn and not self.open():
+            return False
+        
+        with self._lock:
+            # Un trabajo en curso al cerrarse la aplicación se vuelve a imprimir
+            self.conn.execute(
+                "UPDATE print_jobs SET status = ?, next_attempt_at = ? WHERE status IN (?, ?)",
+                [self.STATUS_PENDING, time.time(), self.STATUS_PENDING, self.STATUS_PRINTING]
+            )
+            pending = self.conn.execute(
+                "SELECT COUNT(*) FROM print_jobs WHERE status = ?", [self.STATUS_PENDING]
+            ).fetchone()[0]
+        
+        if pending:
+            self.logger.info(f"Retomando {pending} trabajos de impresión pendientes")
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="print-spooler", daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, timeout=5):
+        """
+        Detener el hilo de impresión (los trabajos pendientes quedan en disco)
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+        """
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify_all()
+        
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def close(self):
+        """Detener el hilo y cerrar el archivo de la cola"""
+        self.stop()
+        
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+    
+    def retry_now(self):
+        """Reintentar de inmediato los trabajos en espera (p. ej. al reponer el papel)"""
+        with self._wakeup:
+            self.conn.execute(
+                "UPDATE print_jobs SET next_attempt_at = ? WHERE status = ?",
+                [time.time(), self.STATUS_PENDING]
+            )
+            self._wakeup.notify()
+    
+    def discard(self, job_id):
+        """
+        Descartar un trabajo pendiente o fallido sin imprimirlo
+        
+        Args:
+            job_id: ID del trabajo
+        
+        Returns:
+            True si se descartó, False si no existe o se está imprimiendo
+        """
+        with self._wakeup:
+            cursor = self.conn.execute(
+                "DELETE FROM print_jobs WHERE job_id = ? AND status IN (?, ?)",
+                [job_id, self.STATUS_PENDING, self.STATUS_FAILED]
+            )
+            self._wakeup.notify()
+        
+        if cursor.rowcount:
+            self.logger.info(f"Trabajo de impresión #{job_id} descartado")
+        return cursor.rowcount > 0
+    
+    def get_pending_jobs(self):
+        """
+        Obtener los trabajos pendientes y fallidos (con su estado y último error)
+        
+        Returns:
+            Lista de diccionarios con los trabajos no impresos
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM print_jobs WHERE status != ? ORDER BY job_id", [self.STATUS_DONE]
+            ).fetchall()
+        
+        return [dict(row) for row in rows]
+    
+    def get_stats(self):
+        """
+        Obtener estadísticas de la cola
+        
+        Returns:
+            Diccionario con trabajos pendientes, fallidos, impresos y el último error
+        """
+        with self._lock:
+            pending = self.conn.execute(
+                "SELECT COUNT(*) FROM print_jobs WHERE status IN (?, ?)",
+                [self.STATUS_PENDING, self.STATUS_PRINTING]
+            ).fetchone()[0]
+            failed = self.conn.execute(
+                "SELECT COUNT(*) FROM print_jobs WHERE status = ?", [self.STATUS_FAILED]
+            ).fetchone()[0]
+            done = self.conn.execute(
+                "SELECT COUNT(*) FROM print_jobs WHERE status = ?", [self.STATUS_DONE]
+            ).fetchone()[0]
+            last_error = self.conn.execute(
+                "SELECT last_error FROM print_jobs WHERE status != ? AND last_error IS NOT NULL ORDER BY job_id LIMIT 1",
+                [self.STATUS_DONE]
+            ).fetchone()
+        
+        return {
+            'pending': pending,
+            'failed': failed,
+            'done': done,
+            'last_error': last_error[0] if last_error else None
+        }
+    
+    def purge_completed(self, days=7):
+        """
+        Eliminar trabajos impresos hace más de cierto número de días
+        
+        Args:
+            days: Antigüedad mínima en días
+        
+        Returns:
+            Número de trabajos eliminados
+        """
+        limit = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM print_jobs WHERE status = ? AND printed_at < ?",
+                [self.STATUS_DONE, limit]
+            )
+        
+        return cursor.rowcount
+    
+    def _next_job(self):
+        """
+        Esperar al siguiente trabajo a imprimir
+        
+        Se respeta el orden de llegada: si el trabajo más antiguo está en espera
+        de reintento, los siguientes también esperan. Los trabajos fallidos se
+        omiten.
+        
+        Returns:
+            Fila del trabajo o None si el hilo debe terminar
+        """
+        with self._wakeup:
+            while self._running:
+                job = self.conn.execute(
+                    "SELECT * FROM print_jobs WHERE status = ? ORDER BY job_id LIMIT 1",
+                    [self.STATUS_PENDING]
+                ).fetchone()
+                
+                if job is None:
+                    self._wakeup.wait()
+                    continue
+                
+                delay = job['next_attempt_at'] - time.time()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+                
+                self.conn.execute(
+                    "UPDATE print_jobs SET status = ? WHERE job_id = ?",
+                    [self.STATUS_PRINTING, job['job_id']]
+                )
+                return job
+        
+        return None
+    
+    def _run(self):
+        """Bucle principal del hilo de impresión"""
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            
+            self._process(job)
+    
+    def _process(self, job):
+        """Imprimir un trabajo y registrar el resultado"""
+        job_id = job['job_id']
+        job_type = job['job_type']
+        error = None
+        permanent = False
+        
+        try:
+            handler = self.handlers.get(job_type)
+            if handler is None:
+                permanent = True
+                raise Exception(f"Tipo de trabajo sin controlador: {job_type}")
+            
+            if not handler(json.loads(job['payload'])):
+                error = "La impresora no respondió"
+        except self.PERMANENT_ERRORS as e:
+            # Datos del trabajo inválidos (JSON dañado, campos faltantes o de otro tipo)
+            permanent = True
+            error = f"Datos del trabajo inválidos: {e!r}"
+        except Exception as e:
+            error = str(e)
+        
+        if error is None:
+            with self._lock:
+                self.conn.execute(
+                    "UPDATE print_jobs SET status = ?, attempts = attempts + 1, last_error = NULL, printed_at = ? WHERE job_id = ?",
+                    [self.STATUS_DONE, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), job_id]
+                )
+            
+            self.logger.info(f"Trabajo de impresión #{job_id} completado")
+            self._notify(self.on_job_done, job_id, job_type)
+            return
+        
+        attempts = job['attempts'] + 1
+        
+        # Un error permanente o sin intentos restantes no debe bloquear la cola
+        if permanent or (self.max_attempts is not None and attempts >= self.max_attempts):
+            with self._lock:
+                self.conn.execute(
+                    "UPDATE print_jobs SET status = ?, attempts = ?, last_error = ? WHERE job_id = ?",
+                    [self.STATUS_FAILED, attempts, error, job_id]
+                )
+            
+            self.logger.error(f"Trabajo de impresión #{job_id} marcado como fallido: {error}")
+            self._notify(self.on_job_failed, job_id, job_type, error, attempts)
+            return
+        
+        # Reintentar con espera exponencial
+        delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+        
+        with self._lock:
+            self.conn.execute(
+                "UPDATE print_jobs SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ? WHERE job_id = ?",
+                [self.STATUS_PENDING, attempts, error, time.time() + delay, job_id]
+            )
+        
+        self.logger.warning(f"Trabajo de impresión #{job_id} falló ({error}), reintento en {delay:.1f} s")
+        self._notify(self.on_job_failed, job_id, job_type, error, attempts)
+    
+    def _notify(self, callback, *args):
+        """Invocar un callback sin que sus errores detengan el hilo"""
+        if callback is None:
+            return
+        
+        try:
+            callback(*args)
+        except Exception as e:
+            self.logger.error(f"Error en el callback de la cola de impresión: {e}")
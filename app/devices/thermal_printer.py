@@ -2,7 +2,11 @@
 import cups
 import os
 import logging
+import tempfile
+import threading
 from datetime import datetime
+from .escpos_renderer import EscposReceiptRenderer
+from ..utils.money import Money
 try:
     from escpos.printer import Usb, File, Network
 except ImportError:
@@ -17,12 +21,22 @@ except ImportError:
         def __init__(self, *args, **kwargs):
             pass
 
+# Importar librería opcional para verificar la conexión USB
+try:
+    import usb.core
+except ImportError:
+    usb = None
+
 class ThermalPrinter:
     """Controlador para la impresora térmica WPRP-260 de 58mm"""
     
     # Ancho de papel en caracteres (para 58mm suele ser 32 caracteres)
     PAPER_WIDTH_CHARS = 32
     
+    # Formatos de documento para CUPS
+    CUPS_FORMAT_TEXT = 'text/plain'
+    CUPS_FORMAT_RAW = 'application/vnd.cups-raw'
+    
     def __init__(self, config=None):
         """
         Inicializar controlador de impresora
@@ -37,6 +51,12 @@ class ThermalPrinter:
         self.connection_type = 'cups'  # 'cups', 'usb', 'file', 'network'
         self.printer = None
         
+        # Conexión CUPS reutilizable y modo de envío de trabajos:
+        # 'stream' envía el documento desde memoria, 'file' usa un archivo temporal
+        self.cups_connection = None
+        self.cups_submit_mode = 'stream'
+        self._cups_lock = threading.RLock()
+        
         # Parámetros para conexión USB
         self.usb_vendor_id = None
         self.usb_product_id = None
@@ -50,6 +70,9 @@ class ThermalPrinter:
         self.network_host = None
         self.network_port = 9100
         
+        # Generador del flujo ESC/POS (un solo envío por recibo)
+        self.renderer = EscposReceiptRenderer(self.PAPER_WIDTH_CHARS)
+        
         # Cargar configuración si se proporciona
         if config:
             self._load_config(config)
@@ -71,6 +94,7 @@ class ThermalPrinter:
         # Parámetros según el tipo de conexión
         if self.connection_type == 'cups':
             self.printer_name = config.get('printer_name')
+            self.cups_submit_mode = config.get('cups_submit_mode', 'stream').lower()
         elif self.connection_type == 'usb':
             self.usb_vendor_id = config.get('usb_vendor_id')
             self.usb_product_id = config.get('usb_product_id')
@@ -139,8 +163,10 @@ class ThermalPrinter:
             return False
             
         try:
-            conn = cups.Connection()
-            printers = conn.getPrinters()
+            with self._cups_lock:
+                # Nueva conexión al (re)conectar; se reutiliza en los trabajos siguientes
+                self.cups_connection = cups.Connection()
+                printers = self.cups_connection.getPrinters()
             
             if self.printer_name not in printers:
                 self.logger.error(f"Impresora no encontrada en CUPS: {self.printer_name}")
@@ -227,7 +253,10 @@ class ThermalPrinter:
                 - custom_text: Texto personalizado (opcional)
                 
         Returns:
-            True si se imprimió correctamente, False en caso contrario
+            True si se imprimió correctamente, False si la impresora falló
+        
+        Raises:
+            KeyError, ValueError, TypeError: Si los datos del recibo no son válidos
         """
         if self.connection_type == 'cups':
             return self._print_cups(receipt_data)
@@ -239,29 +268,14 @@ class ThermalPrinter:
         if not self.printer_name:
             self.logger.error("Nombre de impresora no especificado para impresión CUPS")
             return False
+        
+        # Generar contenido del recibo; los errores en los datos se propagan
+        # (reintentar no los corrige) y solo los de la impresora devuelven False
+        content = self._format_receipt_text(receipt_data)
+        title = f"Recibo #{receipt_data.get('receipt_number', datetime.now().strftime('%Y%m%d%H%M%S'))}"
             
         try:
-            # Generar contenido del recibo
-            content = self._format_receipt_text(receipt_data)
-            
-            # Crear archivo temporal
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            temp_file = f"/tmp/pos_receipt_{timestamp}.txt"
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Imprimir usando CUPS
-            conn = cups.Connection()
-            job_id = conn.printFile(
-                self.printer_name,
-                temp_file,
-                f"Recibo #{receipt_data.get('receipt_number', timestamp)}",
-                {}
-            )
-            
-            # Eliminar archivo temporal
-            os.unlink(temp_file)
+            job_id = self._submit_cups_job(content.encode('utf-8'), title, self.CUPS_FORMAT_TEXT)
             
             if job_id:
                 self.logger.info(f"Recibo impreso con CUPS - Job ID: {job_id}")
@@ -274,141 +288,79 @@ class ThermalPrinter:
             self.logger.error(f"Error al imprimir recibo con CUPS: {e}")
             return False
     
+    def _get_cups_connection(self):
+        """Obtener la conexión CUPS reutilizable (se crea la primera vez)"""
+        if self.cups_connection is None:
+            self.cups_connection = cups.Connection()
+        return self.cups_connection
+    
+    def _submit_cups_job(self, data, title, document_format):
+        """
+        Enviar un trabajo a CUPS
+        
+        En modo 'stream' el documento se envía desde memoria por la conexión
+        reutilizable, sin archivos temporales. En modo 'file' se usa printFile
+        con un archivo temporal de nombre único.
+        
+        Args:
+            data: Bytes del documento
+            title: Título del trabajo
+            document_format: CUPS_FORMAT_TEXT o CUPS_FORMAT_RAW
+        
+        Returns:
+            ID del trabajo creado (0 o None si no se creó)
+        """
+        with self._cups_lock:
+            conn = self._get_cups_connection()
+            
+            try:
+                if self.cups_submit_mode == 'file':
+                    return self._submit_cups_file(conn, data, title, document_format)
+                
+                job_id = conn.createJob(self.printer_name, title, {})
+                if not job_id:
+                    return job_id
+                
+                conn.startDocument(self.printer_name, job_id, title, document_format, 1)
+                conn.writeRequestData(data, len(data))
+                conn.finishDocument(self.printer_name)
+                return job_id
+            except Exception:
+                # Conexión posiblemente caída: se crea una nueva en el siguiente trabajo
+                self.cups_connection = None
+                raise
+    
+    def _submit_cups_file(self, conn, data, title, document_format):
+        """Enviar un trabajo a CUPS a través de un archivo temporal"""
+        fd, temp_file = tempfile.mkstemp(prefix='pos_job_', suffix='.prn')
+        
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            
+            options = {"raw": "true"} if document_format == self.CUPS_FORMAT_RAW else {}
+            return conn.printFile(self.printer_name, temp_file, title, options)
+        finally:
+            os.unlink(temp_file)
+    
     def _print_escpos(self, receipt_data):
-        """Imprimir usando python-escpos"""
+        """
+        Imprimir usando python-escpos
+        
+        El recibo completo se genera en memoria y se envía en una sola escritura,
+        en lugar de una transferencia por cada línea o cambio de estilo.
+        """
         if not self.printer:
             self.logger.error("Impresora no conectada para impresión ESC/POS")
             return False
+        
+        # Los errores en los datos del recibo se propagan; solo los de la impresora devuelven False
+        data = self.renderer.render(receipt_data)
             
         try:
-            p = self.printer
-            
-            # Encabezado
-            p.set(align='center', text_type='b')
-            p.text(receipt_data.get('store_name', 'Mi Tienda') + '\n')
-            p.set(align='center', text_type='normal')
-            p.text(receipt_data.get('store_address', '') + '\n')
-            p.text(receipt_data.get('store_phone', '') + '\n')
-            p.text('-' * self.PAPER_WIDTH_CHARS + '\n')
-            
-            # Fecha y número de recibo
-            p.set(align='left')
-            p.text(f"Fecha: {receipt_data.get('date', datetime.now().strftime('%d/%m/%Y %H:%M'))}\n")
-            p.text(f"Recibo: #{receipt_data.get('receipt_number', '')}\n")
-            p.text(f"Cajero: {receipt_data.get('cashier_name', '')}\n")
-            p.text('-' * self.PAPER_WIDTH_CHARS + '\n')
-            
-            # Encabezados de columnas
-            p.text('CANT  DESCRIPCION            PRECIO   TOTAL\n')
-            p.text('-' * self.PAPER_WIDTH_CHARS + '\n')
-            
-            # Productos
-            for item in receipt_data.get('items', []):
-                name = item.get('name', '')
-                quantity = item.get('quantity', 1)
-                price = item.get('price', 0)
-                subtotal = item.get('subtotal', 0)
-                
-                # Formatear para que quepa en el ancho del papel
-                if isinstance(quantity, str):
-                    try:
-                        quantity = float(quantity.replace(',', '.'))
-                    except:
-                        quantity = 1
-                
-                # Convertir precio y subtotal a float si son strings
-                if isinstance(price, str):
-                    try:
-                        price = float(price.replace('$', '').replace(',', '.'))
-                    except:
-                        price = 0
-                        
-                if isinstance(subtotal, str):
-                    try:
-                        subtotal = float(subtotal.replace('$', '').replace(',', '.'))
-                    except:
-                        subtotal = 0
-                
-                # Formatear nombre para que quepa en el ancho disponible
-                if len(name) > 20:
-                    name = name[:17] + '...'
-                
-                # Imprimir producto
-                p.text(f"{quantity:<5}{name:<20}${price:<7.2f}${subtotal:.2f}\n")
-            
-            p.text('-' * self.PAPER_WIDTH_CHARS + '\n')
-            
-            # Totales
-            p.set(align='right')
-            
-            # Convertir valores a float si son strings
-            subtotal = receipt_data.get('subtotal', 0)
-            if isinstance(subtotal, str):
-                try:
-                    subtotal = float(subtotal.replace('$', '').replace(',', '.'))
-                except:
-                    subtotal = 0
-                    
-            tax = receipt_data.get('tax', 0)
-            if isinstance(tax, str):
-                try:
-                    tax = float(tax.replace('$', '').replace(',', '.'))
-                except:
-                    tax = 0
-                    
-            total = receipt_data.get('total', 0)
-            if isinstance(total, str):
-                try:
-                    total = float(total.replace('$', '').replace(',', '.'))
-                except:
-                    total = 0
-            
-            p.text(f"SUBTOTAL: ${subtotal:.2f}\n")
-            p.text(f"IMPUESTO: ${tax:.2f}\n")
-            p.set(text_type='b')
-            p.text(f"TOTAL:    ${total:.2f}\n")
-            p.set(text_type='normal')
+            self.printer._raw(data)
             
-            # Método de pago
-            payment_method = receipt_data.get('payment_method', 'Efectivo')
-            p.text(f"PAGO:     {payment_method}\n")
-            
-            # Si es pago en efectivo, mostrar monto y cambio
-            if payment_method.lower() == 'efectivo' or payment_method.lower() == 'cash':
-                amount_received = receipt_data.get('amount_received', 0)
-                if isinstance(amount_received, str):
-                    try:
-                        amount_received = float(amount_received.replace('$', '').replace(',', '.'))
-                    except:
-                        amount_received = 0
-                        
-                change = receipt_data.get('change', 0)
-                if isinstance(change, str):
-                    try:
-                        change = float(change.replace('$', '').replace(',', '.'))
-                    except:
-                        change = 0
-                
-                if amount_received > 0:
-                    p.text(f"RECIBIDO: ${amount_received:.2f}\n")
-                    p.text(f"CAMBIO:   ${change:.2f}\n")
-            
-            # Pie de página
-            p.set(align='center')
-            p.text('\n')
-            p.text(receipt_data.get('custom_text', '¡Gracias por su compra!') + '\n')
-            p.text('\n')
-            
-            # Código de barras o QR (opcional)
-            if 'qr_data' in receipt_data:
-                p.qr(receipt_data['qr_data'])
-            elif 'barcode_data' in receipt_data:
-                p.barcode(receipt_data['barcode_data'], 'CODE39')
-            
-            # Cortar papel
-            p.cut()
-            
-            self.logger.info("Recibo impreso con ESC/POS")
+            self.logger.info(f"Recibo impreso con ESC/POS ({len(data)} bytes)")
             return True
             
         except Exception as e:
@@ -457,8 +409,8 @@ class ThermalPrinter:
         for item in receipt_data.get('items', []):
             name = item.get('name', '')
             quantity = item.get('quantity', 1)
-            price = item.get('price', 0)
-            subtotal = item.get('subtotal', 0)
+            price = Money.parse(item.get('price', 0), default=Money())
+            subtotal = Money.parse(item.get('subtotal', 0), default=Money())
             
             # Formatear para que quepa en el ancho del papel
             if len(name) > 20:
@@ -471,51 +423,21 @@ class ThermalPrinter:
                 except:
                     quantity = 1
             
-            if isinstance(price, str):
-                try:
-                    price = float(price.replace('$', '').replace(',', '.'))
-                except:
-                    price = 0
-                    
-            if isinstance(subtotal, str):
-                try:
-                    subtotal = float(subtotal.replace('$', '').replace(',', '.'))
-                except:
-                    subtotal = 0
-            
             # Formatear línea del producto
-            lines.append(f"{quantity:<5}{name:<20}${price:<7.2f}${subtotal:.2f}")
+            lines.append(f"{quantity:<5}{name:<20}${price:<7.2f}{subtotal}")
         
         lines.append('-' * width)
         
         # Totales
-        subtotal = receipt_data.get('subtotal', 0)
-        tax = receipt_data.get('tax', 0)
-        total = receipt_data.get('total', 0)
-        
-        # Convertir a valores numéricos si son strings
-        if isinstance(subtotal, str):
-            try:
-                subtotal = float(subtotal.replace('$', '').replace(',', '.'))
-            except:
-                subtotal = 0
-                
-        if isinstance(tax, str):
-            try:
-                tax = float(tax.replace('$', '').replace(',', '.'))
-            except:
-                tax = 0
-                
-        if isinstance(total, str):
-            try:
-                total = float(total.replace('$', '').replace(',', '.'))
-            except:
-                total = 0
+        # Los importes pueden venir como Money, número o texto ("$12.50")
+        subtotal = Money.parse(receipt_data.get('subtotal', 0), default=Money())
+        tax = Money.parse(receipt_data.get('tax', 0), default=Money())
+        total = Money.parse(receipt_data.get('total', 0), default=Money())
         
         # Alinear a la derecha
-        lines.append(f"{'SUBTOTAL:':<{width-9}} ${subtotal:.2f}")
-        lines.append(f"{'IMPUESTO:':<{width-9}} ${tax:.2f}")
-        lines.append(f"{'TOTAL:':<{width-9}} ${total:.2f}")
+        lines.append(f"{'SUBTOTAL:':<{width-9}} {subtotal}")
+        lines.append(f"{'IMPUESTO:':<{width-9}} {tax}")
+        lines.append(f"{'TOTAL:':<{width-9}} {total}")
         
         # Método de pago
         payment_method = receipt_data.get('payment_method', 'Efectivo')
@@ -523,25 +445,12 @@ class ThermalPrinter:
         
         # Si es pago en efectivo, mostrar monto y cambio
         if payment_method.lower() == 'efectivo' or payment_method.lower() == 'cash':
-            amount_received = receipt_data.get('amount_received', 0)
-            change = receipt_data.get('change', 0)
+            amount_received = Money.parse(receipt_data.get('amount_received', 0), default=Money())
+            change = Money.parse(receipt_data.get('change', 0), default=Money())
             
-            # Convertir a valores numéricos si son strings
-            if isinstance(amount_received, str):
-                try:
-                    amount_received = float(amount_received.replace('$', '').replace(',', '.'))
-                except:
-                    amount_received = 0
-                    
-            if isinstance(change, str):
-                try:
-                    change = float(change.replace('$', '').replace(',', '.'))
-                except:
-                    change = 0
-            
-            if amount_received > 0:
-                lines.append(f"{'RECIBIDO:':<{width-9}} ${amount_received:.2f}")
-                lines.append(f"{'CAMBIO:':<{width-9}} ${change:.2f}")
+            if amount_received.cents > 0:
+                lines.append(f"{'RECIBIDO:':<{width-9}} {amount_received}")
+                lines.append(f"{'CAMBIO:':<{width-9}} {change}")
         
         # Pie de página
         lines.append('')
@@ -599,24 +508,8 @@ class ThermalPrinter:
                 # ESC p m t1 t2 - donde m es el pin (0 o 1), t1 y t2 son tiempos
                 drawer_command = b'\x1B\x70\x00\x19\x19'  # 25ms de pulso en pin 0
                 
-                # Crear archivo temporal con el comando
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                temp_file = f"/tmp/pos_drawer_{timestamp}.bin"
-                
-                with open(temp_file, 'wb') as f:
-                    f.write(drawer_command)
-                
-                # Enviar comando a la impresora
-                conn = cups.Connection()
-                job_id = conn.printFile(
-                    self.printer_name,
-                    temp_file,
-                    "Abrir cajón",
-                    {"raw": "true"}  # Importante: enviar como comando raw
-                )
-                
-                # Eliminar archivo temporal
-                os.unlink(temp_file)
+                # Enviar comando a la impresora (importante: como trabajo raw)
+                job_id = self._submit_cups_job(drawer_command, "Abrir cajón", self.CUPS_FORMAT_RAW)
                 
                 if job_id:
                     self.logger.info(f"Comando para abrir cajón enviado usando CUPS - Job ID: {job_id}")
@@ -651,24 +544,8 @@ class ThermalPrinter:
                 # Comando ESC/POS para cortar papel
                 cut_command = b'\x1D\x56\x41\x00'  # GS V A 0 - corte completo
                 
-                # Crear archivo temporal con el comando
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                temp_file = f"/tmp/pos_cut_{timestamp}.bin"
-                
-                with open(temp_file, 'wb') as f:
-                    f.write(cut_command)
-                
-                # Enviar comando a la impresora
-                conn = cups.Connection()
-                job_id = conn.printFile(
-                    self.printer_name,
-                    temp_file,
-                    "Cortar papel",
-                    {"raw": "true"}  # Importante: enviar como comando raw
-                )
-                
-                # Eliminar archivo temporal
-                os.unlink(temp_file)
+                # Enviar comando a la impresora (importante: como trabajo raw)
+                job_id = self._submit_cups_job(cut_command, "Cortar papel", self.CUPS_FORMAT_RAW)
                 
                 if job_id:
                     self.logger.info(f"Comando para cortar papel enviado usando CUPS - Job ID: {job_id}")
@@ -693,14 +570,21 @@ class ThermalPrinter:
         """
         try:
             if self.connection_type == 'cups' and self.printer_name:
-                conn = cups.Connection()
-                printers = conn.getPrinters()
+                with self._cups_lock:
+                    conn = self._get_cups_connection()
+                    
+                    try:
+                        printers = conn.getPrinters()
+                        jobs = conn.getJobs(which_jobs='not-completed')
+                    except Exception:
+                        # Conexión caída: se crea una nueva en la siguiente consulta
+                        self.cups_connection = None
+                        raise
                 
                 if self.printer_name in printers:
                     printer_info = printers[self.printer_name]
                     
-                    # Obtener trabajos de impresión pendientes
-                    jobs = conn.getJobs(which_jobs='not-completed')
+                    # Trabajos de impresión pendientes
                     printer_jobs = [j for j in jobs.values() if j['printer'] == self.printer_name]
                     
                     status = {
@@ -729,4 +613,30 @@ class ThermalPrinter:
             
         except Exception as e:
             self.logger.error(f"Error al obtener estado de la impresora: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def is_available(self):
+        """
+        Verificar si la impresora sigue disponible sin volver a conectar
+        
+        Returns:
+            True si la impresora responde o el dispositivo sigue presente
+        """
+        try:
+            if self.connection_type == 'cups':
+                status = self.get_status()
+                return bool(status) and bool(status.get('is_accepting_jobs', True))
+            
+            if not self.printer:
+                return False
+            
+            if self.connection_type == 'file':
+                return os.path.exists(self.device_path)
+            
+            if self.connection_type == 'usb' and usb:
+                return usb.core.find(idVendor=self.usb_vendor_id, idProduct=self.usb_product_id) is not None
+            
+            return True
+        except Exception as e:
+            self.logger.error(f"Error al verificar la impresora: {e}")
+            return False
@@ -8,22 +8,46 @@ from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt, QTimer
 
 # Importar componentes del sistema
-from views.login_view import LoginView
-from views.pos_view import POSView
-from views.admin_view import AdminView
-from controllers.user_controller import UserController
-from controllers.sales_controller import SalesController
-from controllers.product_controller import ProductController
-from models.database import Database
-from devices.barcode_scanner import BarcodeScanner
-from devices.thermal_printer import ThermalPrinter
-from devices.cash_drawer import CashDrawer
-from utils.config import Config
-from utils.logger import setup_logger
+from .views.login_view import LoginView
+from .views.pos_view import POSView
+from .views.admin_view import AdminView
+from .controllers.user_controller import UserController
+from .controllers.sales_controller import SalesController
+from .controllers.product_controller import ProductController
+from .controllers.bulk_update_controller import BulkUpdateController
+from .models.database import Database
+from .models.barcode_index import BarcodeIndex
+from .models.product_search_index import ProductSearchIndex
+from .models.trigram_index import TrigramIndex
+from .models.pricing_engine import PricingEngine, DEFAULT_TAX_RATE
+from .models.register_counters import RegisterReconciler
+from .models.cart import Cart
+from .devices.barcode_scanner import BarcodeScanner
+from .devices.thermal_printer import ThermalPrinter
+from .devices.cash_drawer import CashDrawer
+from .devices.device_worker import DeviceWorker
+from .devices.print_spooler import PrintSpooler
+from .devices.device_manager import DeviceManager
+from .utils.config import Config
+from .utils.money import Money
+from .utils.logger import setup_logger
 
 class POSApplication:
     """Aplicación principal del sistema POS"""
     
+    # Descripción de las tareas de dispositivos para los mensajes de estado
+    DEVICE_TASKS = {
+        'print_receipt': "Impresión del recibo",
+        'open_drawer': "Apertura de la caja"
+    }
+    
+    # Nombre de los dispositivos para los mensajes de estado
+    DEVICE_NAMES = {
+        'scanner': "Lectora de códigos",
+        'printer': "Impresora",
+        'drawer': "Caja registradora"
+    }
+    
     def __init__(self):
         # Inicializar la aplicación Qt
         self.app = QApplication(sys.argv)
@@ -87,6 +111,9 @@ class POSApplication:
             if self.database.is_new_database():
                 self.logger.info("Nueva base de datos detectada, inicializando...")
                 self.database.init_schema()
+            else:
+                # Actualizar el esquema de bases de datos existentes
+                self.database.migrate()
         except Exception as e:
             self.logger.error(f"Error al conectar a la base de datos: {e}")
             QMessageBox.critical(None, "Error de base de datos", 
@@ -95,9 +122,48 @@ class POSApplication:
     
     def init_controllers(self):
         """Inicializar controladores del sistema"""
+        # Índice de códigos de barras residente en memoria para el escaneo
+        max_entries = self.config.get("barcode_index_max_entries")
+        self.barcode_index = BarcodeIndex(self.database, max_entries)
+        self.barcode_index.load()
+        
+        # Índice de prefijos para buscar productos por nombre o código mientras se escribe
+        self.product_search_index = ProductSearchIndex(self.database)
+        self.product_search_index.load()
+        
+        # Índice de trigramas para encontrar productos aunque el nombre esté mal escrito
+        self.trigram_index = TrigramIndex(self.database, self.config.get("trigram_index_max_entries"))
+        self.trigram_index.load()
+        
+        # Reglas de impuestos compiladas; la caja y el registro de ventas usan las mismas tasas
+        self.pricing_engine = PricingEngine(self.database, self.config.get("tax_rate", DEFAULT_TAX_RATE))
+        self.pricing_engine.load()
+        
         self.user_controller = UserController(self.database)
-        self.sales_controller = SalesController(self.database)
-        self.product_controller = ProductController(self.database)
+        self.sales_controller = SalesController(self.database, self.pricing_engine)
+        self.product_controller = ProductController(
+            self.database,
+            barcode_index=self.barcode_index,
+            trigram_index=self.trigram_index
+        )
+        
+        self.product_controller.register_index(self.product_search_index)
+        # Un producto que cambia de categoría puede cambiar de tasa
+        self.product_controller.register_index(self.pricing_engine)
+        
+        # Las ventas y cancelaciones modifican el stock de los productos indexados
+        self.sales_controller.register_index(self.barcode_index)
+        self.sales_controller.register_index(self.product_search_index)
+        
+        # Cambios masivos de precios y atributos (mantiene sincronizados los índices registrados)
+        self.bulk_update_controller = BulkUpdateController(self.database, self.product_controller)
+        
+        # Verificación en segundo plano de los contadores de caja contra las ventas
+        self.register_reconciler = RegisterReconciler(
+            self.sales_controller.register_counters,
+            self.config.get("register_verify_interval", 300)
+        )
+        self.register_reconciler.start()
     
     def init_devices(self):
         """Inicializar dispositivos de hardware"""
@@ -113,30 +179,51 @@ class POSApplication:
             except Exception as e:
                 self.logger.error(f"Error al cargar configuración de dispositivos: {e}")
         
+        # Ejecutor en segundo plano para no bloquear la caja con la impresora o el cajón
+        self.device_worker = DeviceWorker()
+        self.device_worker.start()
+        
+        # Cola de impresión persistente: los recibos no se pierden si la impresora falla
+        spool_path = self.config.get("print_spool_path", "../database/print_spool.db")
+        self.print_spooler = PrintSpooler(spool_path,
+                                          max_attempts=self.config.get("print_max_attempts", 10))
+        self.print_spooler.register_handler('receipt', self.print_receipt)
+        self.print_spooler.on_job_done = self._on_print_job_done
+        self.print_spooler.on_job_failed = self._on_print_job_failed
+        
+        # Administrador de conexiones y revisión de estado de los dispositivos
+        check_interval = self.config.get("device_check_interval", 5)
+        self.device_manager = DeviceManager(check_interval)
+        
         # Inicializar dispositivos
         try:
             self.barcode_scanner = BarcodeScanner(device_config.get('barcode_scanner'))
             self.thermal_printer = ThermalPrinter(device_config.get('thermal_printer'))
             self.cash_drawer = CashDrawer(device_config.get('cash_drawer'))
             
-            # Conectar dispositivos
-            scanner_ok = self.barcode_scanner.connect()
-            printer_ok = self.thermal_printer.connect()
-            
             # La caja registradora suele conectarse a través de la impresora
             self.cash_drawer.set_printer(self.thermal_printer)
-            drawer_ok = self.cash_drawer.connect()
             
-            self.logger.info(f"Estado de dispositivos - Scanner: {scanner_ok}, " +
-                           f"Impresora: {printer_ok}, Caja: {drawer_ok}")
+            # Conexiones persistentes: se conectan una vez y se reutilizan en cada venta
+            self.device_manager.register('scanner', self.barcode_scanner)
+            self.device_manager.register('printer', self.thermal_printer)
+            self.device_manager.register('drawer', self.cash_drawer)
+            status = self.device_manager.connect_all()
+            
+            self.logger.info(f"Estado de dispositivos - Scanner: {status['scanner']}, " +
+                           f"Impresora: {status['printer']}, Caja: {status['drawer']}")
         
         except Exception as e:
             self.logger.error(f"Error al inicializar dispositivos: {e}")
+        
+        # Retomar los recibos que quedaron pendientes en la sesión anterior (aunque
+        # algún dispositivo haya fallado, los recibos nuevos se siguen encolando)
+        self.print_spooler.start()
     
     def init_views(self):
         """Inicializar vistas de la aplicación"""
         self.login_view = LoginView()
-        self.pos_view = POSView()
+        self.pos_view = POSView(cart=Cart(pricing=self.pricing_engine))
         self.admin_view = AdminView()
         
         # Configurar vistas
@@ -151,12 +238,20 @@ class POSApplication:
         # POS View
         self.pos_view.barcode_scanned.connect(self.on_barcode_scanned)
         self.pos_view.product_selected.connect(self.on_product_selected)
+        self.pos_view.product_search_requested.connect(self.on_product_search)
         self.pos_view.checkout_requested.connect(self.on_checkout)
-        self.pos_view.open_drawer_requested.connect(self.open_cash_drawer)
+        self.pos_view.open_drawer_requested.connect(self.request_open_drawer)
+        
+        # Administración
+        self.admin_view.settings_updated.connect(self.on_settings_updated)
         
         # Escaneo de código de barras
         if self.barcode_scanner.is_connected:
             self.barcode_scanner.start_listening(self.on_barcode_scanned)
+        
+        # Estado de los dispositivos (desconexiones y reconexiones)
+        self.device_manager.add_status_listener(self._on_device_status_changed)
+        self.device_manager.start()
     
     def show_login(self):
         """Mostrar pantalla de inicio de sesión"""
@@ -183,6 +278,15 @@ class POSApplication:
         
         self.login_view.hide()
     
+    def on_settings_updated(self, settings):
+        """Guardar la configuración del sistema y aplicar la nueva tasa de IVA"""
+        self.config.update(settings)
+        
+        # El motor guarda la tasa en system_config y vuelve a tasar el carrito abierto
+        if "tax_rate" in settings and not self.pricing_engine.set_default_rate(settings["tax_rate"]):
+            QMessageBox.warning(self.admin_view, "Configuración",
+                              "No se pudo guardar la tasa de impuesto")
+    
     def on_barcode_scanned(self, barcode):
         """Manejar escaneo de código de barras"""
         self.logger.info(f"Código escaneado: {barcode}")
@@ -198,6 +302,11 @@ class POSApplication:
             QMessageBox.warning(self.pos_view, "Producto no encontrado", 
                               f"No se encontró un producto con el código: {barcode}")
     
+    def on_product_search(self, text):
+        """Mostrar sugerencias de productos para el texto escrito (sin consultar la base de datos)"""
+        limit = self.config.get("product_search_max_results", 20)
+        self.pos_view.show_product_suggestions(self.product_search_index.search(text, limit))
+    
     def on_product_selected(self, product_id):
         """Manejar selección de producto desde la interfaz"""
         product = self.product_controller.get_product_by_id(product_id)
@@ -213,8 +322,8 @@ class POSApplication:
                 user_id=self.current_user['user_id'],
                 items=sale_data['items'],
                 payment_method=sale_data['payment']['method'],
-                total_amount=float(sale_data['total'].replace('$', '')),
-                tax_amount=float(sale_data['tax'].replace('$', ''))
+                total_amount=sale_data['total'],
+                tax_amount=sale_data['tax']
             )
             
             if sale_id:
@@ -235,21 +344,19 @@ class POSApplication:
                 
                 # Si es pago en efectivo, agregar información de cambio
                 if sale_data['payment']['method'] == 'Efectivo':
-                    receipt_data['amount_received'] = sale_data['payment'].get('amount_received', '0.00')
-                    receipt_data['change'] = sale_data['payment'].get('change', '$0.00')
-                
-                # Imprimir recibo
-                self.print_receipt(receipt_data)
+                    receipt_data['amount_received'] = sale_data['payment'].get('amount_received', Money())
+                    receipt_data['change'] = sale_data['payment'].get('change', Money())
                 
-                # Abrir caja registradora
-                self.open_cash_drawer()
+                # Encolar el recibo en la cola persistente y abrir la caja en segundo plano
+                if not self.print_spooler.enqueue('receipt', receipt_data):
+                    self.submit_device_task('print_receipt', self.print_receipt, receipt_data)
+                self.request_open_drawer()
                 
-                # Limpiar carrito
+                # Limpiar carrito para atender al siguiente cliente
                 self.pos_view.clear_cart()
                 
                 # Mostrar mensaje de éxito
-                QMessageBox.information(self.pos_view, "Venta completada", 
-                                      f"Venta #{sale_id} registrada correctamente.")
+                self.pos_view.show_sale_completed(sale_id)
             else:
                 raise Exception("No se pudo registrar la venta")
                 
@@ -258,16 +365,88 @@ class POSApplication:
             QMessageBox.critical(self.pos_view, "Error en la venta", 
                                f"No se pudo completar la venta: {e}")
     
+    def submit_device_task(self, task_name, func, *args):
+        """
+        Encolar una tarea de dispositivo y notificar su resultado a la vista POS
+        
+        Args:
+            task_name: Nombre de la tarea (clave de DEVICE_TASKS)
+            func: Función a ejecutar en segundo plano
+            *args: Argumentos para la función
+        """
+        queued = self.device_worker.submit(
+            task_name, func, *args,
+            on_finished=self._on_device_task_finished,
+            on_failed=self._on_device_task_failed
+        )
+        
+        if not queued:
+            self._on_device_task_failed(task_name, "ejecutor de dispositivos detenido")
+    
+    def request_open_drawer(self):
+        """Abrir la caja registradora en segundo plano"""
+        self.submit_device_task('open_drawer', self.open_cash_drawer)
+    
+    def _on_device_task_finished(self, task_name, result):
+        """Resultado de una tarea de dispositivo (se llama desde el hilo del ejecutor)"""
+        description = self.DEVICE_TASKS.get(task_name, task_name)
+        
+        # print_receipt y open_cash_drawer devuelven False si el dispositivo no respondió
+        if result is False:
+            self.pos_view.device_task_failed.emit(task_name, f"{description}: el dispositivo no respondió")
+        else:
+            self.pos_view.device_task_finished.emit(task_name, f"{description}: completada")
+    
+    def _on_device_task_failed(self, task_name, error):
+        """Error en una tarea de dispositivo (se llama desde el hilo del ejecutor)"""
+        description = self.DEVICE_TASKS.get(task_name, task_name)
+        self.pos_view.device_task_failed.emit(task_name, f"{description}: {error}")
+    
+    def _on_device_status_changed(self, name, connected, message):
+        """Cambio de estado de un dispositivo (se llama desde el hilo que lo detecta)"""
+        description = self.DEVICE_NAMES.get(name, name)
+        
+        if connected:
+            # La lectora conectada después del inicio empieza a escuchar al reconectarse
+            if name == 'scanner' and not self.barcode_scanner.running:
+                self.barcode_scanner.start_listening(self.on_barcode_scanned)
+            
+            self.pos_view.device_task_finished.emit(name, f"{description}: {message}")
+        else:
+            self.pos_view.device_task_failed.emit(name, f"{description}: {message}")
+    
+    def _on_print_job_done(self, job_id, job_type):
+        """Trabajo de la cola de impresión completado (desde el hilo de la cola)"""
+        self.pos_view.device_task_finished.emit('print_receipt', f"Recibo impreso (trabajo #{job_id})")
+    
+    def _on_print_job_failed(self, job_id, job_type, error, attempts):
+        """Trabajo de la cola de impresión fallido (desde el hilo de la cola)"""
+        pending = self.print_spooler.get_stats()['pending']
+        self.pos_view.device_task_failed.emit(
+            'print_receipt',
+            f"Impresión del recibo: {error}. Reintento {attempts}, {pending} recibos en cola"
+        )
+    
     def print_receipt(self, receipt_data):
-        """Imprimir recibo"""
+        """
+        Imprimir recibo
+        
+        Los errores en los datos del recibo (KeyError, ValueError, TypeError) se
+        propagan para que la cola de impresión marque el trabajo como fallido en
+        lugar de reintentarlo; los fallos de la impresora devuelven False.
+        """
+        receipt_number = receipt_data['receipt_number']
+        
         try:
-            if self.thermal_printer.connect():
-                self.thermal_printer.print_receipt(receipt_data)
-                self.logger.info(f"Recibo impreso para la venta #{receipt_data['receipt_number']}")
+            # Usa la conexión persistente; solo se reconecta si la impresora se había caído
+            if self.device_manager.run('printer', lambda printer: printer.print_receipt(receipt_data)):
+                self.logger.info(f"Recibo impreso para la venta #{receipt_number}")
                 return True
             else:
-                self.logger.warning("No se pudo conectar con la impresora")
+                self.logger.warning("No se pudo imprimir con la impresora")
                 return False
+        except PrintSpooler.PERMANENT_ERRORS:
+            raise
         except Exception as e:
             self.logger.error(f"Error al imprimir recibo: {e}")
             return False
@@ -275,27 +454,36 @@ class POSApplication:
     def open_cash_drawer(self):
         """Abrir la caja registradora"""
         try:
-            if self.cash_drawer.connect():
-                result = self.cash_drawer.open_drawer()
-                if result:
-                    self.logger.info("Caja registradora abierta")
-                else:
-                    self.logger.warning("No se pudo abrir la caja registradora")
-                return result
+            result = self.device_manager.run('drawer', lambda drawer: drawer.open_drawer())
+            if result:
+                self.logger.info("Caja registradora abierta")
             else:
-                self.logger.warning("No se pudo conectar con la caja registradora")
-                return False
+                self.logger.warning("No se pudo abrir la caja registradora")
+            return result
         except Exception as e:
             self.logger.error(f"Error al abrir la caja: {e}")
             return False
     
     def run(self):
         """Ejecutar la aplicación"""
-        return self.app.exec()
+        result = self.app.exec()
+        
+        # Terminar las tareas de dispositivos; los recibos pendientes quedan en la cola
+        self.device_worker.stop()
+        self.print_spooler.close()
+        self.device_manager.stop()
+        self.register_reconciler.stop()
+        
+        return result
 
 
-# Punto de entrada al programa
-if __name__ == "__main__":
+def main():
+    """Punto de entrada (python -m app.main o el comando pos_system)"""
     # Crear y ejecutar la aplicación
     pos_app = POSApplication()
-    sys.exit(pos_app.run())
\ No newline at end of file
+    return pos_app.run()
+
+
+# Punto de entrada al programa
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
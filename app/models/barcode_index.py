@@ -0,0 +1,188 @@
+# app/models/barcode_index.py
+import logging
+import threading
+from collections import OrderedDict
+
+class BarcodeIndex:
+    """Índice en memoria código de barras → producto para el escaneo en caja"""
+    
+    def __init__(self, database, max_entries=None):
+        """
+        Inicializar índice
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            max_entries: Número máximo de productos residentes (opcional).
+                Si es None o 0 se mantiene todo el catálogo en memoria; si se
+                indica un límite, el índice funciona como caché LRU y consulta
+                la base de datos cuando el código no está residente.
+        """
+        self.db = database
+        self.max_entries = max_entries or None
+        self.logger = logging.getLogger('pos.models.barcode_index')
+        
+        # barcode -> datos del producto (el orden se usa como LRU en modo acotado)
+        self._products = OrderedDict()
+        # product_id -> barcode, para aplicar cambios de stock y bajas
+        self._barcodes = {}
+        self._lock = threading.Lock()
+        
+        # Contadores de uso
+        self.hits = 0
+        self.misses = 0
+        self.loaded = False
+    
+    @property
+    def is_bounded(self):
+        """True si el índice tiene límite de memoria"""
+        return self.max_entries is not None
+    
+    def load(self):
+        """
+        Cargar el índice desde la base de datos
+        
+        En modo acotado solo se cargan los productos modificados más recientemente.
+        
+        Returns:
+            Número de productos cargados
+        """
+        query = """
+            SELECT * FROM products
+            WHERE is_active = 1 AND barcode IS NOT NULL AND barcode != ''
+        """
+        params = []
+        
+        if self.is_bounded:
+            query += " ORDER BY updated_at DESC LIMIT ?"
+            params.append(self.max_entries)
+        
+        rows = self.db.fetch_all(query, params)
+        
+        with self._lock:
+            self._products.clear()
+            self._barcodes.clear()
+            
+            # En modo acotado insertar del menos al más reciente para respetar el LRU
+            for product in reversed(rows) if self.is_bounded else rows:
+                self._store(product)
+            
+            self.loaded = True
+        
+        self.logger.info(f"Índice de códigos de barras cargado: {len(rows)} productos")
+        return len(rows)
+    
+    def get(self, barcode):
+        """
+        Obtener producto por código de barras
+        
+        Args:
+            barcode: Código de barras
+        
+        Returns:
+            Diccionario con datos del producto o None si no existe
+        """
+        with self._lock:
+            product = self._products.get(barcode)
+            
+            if product is not None:
+                self.hits += 1
+                if self.is_bounded:
+                    self._products.move_to_end(barcode)
+                return dict(product)
+            
+            self.misses += 1
+            
+            # Con el catálogo completo residente, un fallo significa que no existe
+            if not self.is_bounded:
+                return None
+        
+        # Modo acotado: recurrir a la base de datos y guardar el resultado
+        product = self.db.fetch_one(
+            "SELECT * FROM products WHERE barcode = ? AND is_active = 1",
+            [barcode]
+        )
+        
+        if product:
+            with self._lock:
+                self._store(product)
+        
+        return product
+    
+    def on_product_saved(self, product):
+        """
+        Actualizar el índice tras crear o modificar un producto
+        
+        Args:
+            product: Diccionario con los datos actuales del producto
+        """
+        with self._lock:
+            resident = self._discard(product['product_id'])
+            
+            # En modo acotado solo se refrescan los productos ya residentes; los demás
+            # se cargan al escanearlos, sin expulsar a los que se usan en caja
+            if product.get('is_active') and product.get('barcode') and (resident or not self.is_bounded):
+                self._store(product)
+    
+    def on_product_removed(self, product_id):
+        """
+        Quitar un producto del índice
+        
+        Args:
+            product_id: ID del producto
+        """
+        with self._lock:
+            self._discard(product_id)
+    
+    def on_stock_changed(self, product_id, quantity_change):
+        """
+        Aplicar un movimiento de stock al producto residente
+        
+        Args:
+            product_id: ID del producto
+            quantity_change: Cambio en la cantidad (positivo o negativo)
+        """
+        with self._lock:
+            barcode = self._barcodes.get(product_id)
+            if barcode is None:
+                return
+            
+            product = self._products[barcode]
+            product['stock_quantity'] = (product.get('stock_quantity') or 0) + quantity_change
+    
+    def get_stats(self):
+        """
+        Obtener estadísticas de uso del índice
+        
+        Returns:
+            Diccionario con entradas, aciertos, fallos y tasa de aciertos
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._products),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+    
+    def _store(self, product):
+        """Guardar un producto en el índice (requiere tener el bloqueo)"""
+        barcode = product['barcode']
+        
+        self._products[barcode] = dict(product)
+        self._products.move_to_end(barcode)
+        self._barcodes[product['product_id']] = barcode
+        
+        # Expulsar los productos menos usados si se supera el límite
+        if self.is_bounded:
+            while len(self._products) > self.max_entries:
+                _, evicted = self._products.popitem(last=False)
+                self._barcodes.pop(evicted['product_id'], None)
+    
+    def _discard(self, product_id):
+        """Quitar un producto por ID (requiere tener el bloqueo); True si estaba residente"""
+        barcode = self._barcodes.pop(product_id, None)
+        if barcode is not None:
+            self._products.pop(barcode, None)
+        return barcode is not None
@@ -0,0 +1,366 @@
+# app/models/cart.py
+import logging
+
+from ..utils.money import Money, to_cents, apply_rate
+from .pricing_engine import DEFAULT_TAX_RATE
+
+class CartLine:
+    """Línea del carrito: un producto con su precio unitario, cantidad y tasa de IVA"""
+    
+    __slots__ = ('product_id', 'name', 'unit_price_cents', 'quantity', 'subtotal_cents',
+                 'category_id', 'tax_rate')
+    
+    def __init__(self, product_id, name, unit_price_cents, quantity, category_id=None, tax_rate=0):
+        self.product_id = product_id
+        self.name = name
+        self.unit_price_cents = unit_price_cents
+        self.quantity = quantity
+        self.subtotal_cents = unit_price_cents * quantity
+        self.category_id = category_id
+        self.tax_rate = tax_rate
+    
+    def to_dict(self):
+        """Datos de la línea con los importes como Money, como los espera SalesController"""
+        return {
+            'product_id': self.product_id,
+            'name': self.name,
+            'price': Money(self.unit_price_cents),
+            'quantity': self.quantity,
+            'subtotal': Money(self.subtotal_cents),
+            'tax_rate': self.tax_rate
+        }
+
+class Cart:
+    """
+    Carrito de la venta en curso, independiente de la interfaz
+    
+    Las líneas se buscan por product_id en un diccionario y el subtotal se
+    actualiza con la diferencia de cada cambio, así que agregar un producto o
+    cambiar una cantidad cuesta lo mismo con 3 que con 300 líneas. Los importes
+    se guardan en centavos enteros para no acumular errores de redondeo.
+    
+    El IVA se lleva por tasa: cada línea tiene la tasa que le da el motor de
+    impuestos (PricingEngine) o, sin motor, la tasa del carrito, y el carrito
+    guarda el subtotal y el impuesto de cada tasa. Un cambio de línea solo
+    recalcula el impuesto de su tasa; un cambio de reglas avisado por el motor
+    solo vuelve a tasar las líneas afectadas.
+    
+    Los cambios se avisan a los listeners registrados con add_listener, que
+    reciben (evento, fila, línea) con evento 'added', 'changed', 'removed',
+    'cleared' (fila y línea None) o 'totals' (solo cambiaron las tasas de IVA).
+    """
+    
+    def __init__(self, tax_rate=DEFAULT_TAX_RATE, pricing=None):
+        """
+        Inicializar carrito
+        
+        Args:
+            tax_rate: Tasa de IVA sobre el subtotal (0.16 = 16%) si no hay motor
+                de impuestos
+            pricing: Motor de impuestos que da la tasa de cada producto (opcional)
+        """
+        self.logger = logging.getLogger('pos.models.cart')
+        self._tax_rate = tax_rate
+        self.pricing = None
+        
+        # product_id -> línea, y orden de las líneas (fila de la tabla)
+        self._lines = {}
+        self._order = []
+        # product_id -> fila, para avisar a la vista sin recorrer las líneas
+        self._rows = {}
+        
+        self._subtotal_cents = 0
+        # tasa -> subtotal y tasa -> impuesto en centavos
+        self._rate_subtotals = {}
+        self._rate_taxes = {}
+        self._tax_cents = 0
+        self._listeners = []
+        
+        if pricing is not None:
+            self.set_pricing(pricing)
+    
+    def add_listener(self, listener):
+        """
+        Registrar una función que recibe los cambios del carrito
+        
+        Args:
+            listener: Función listener(evento, fila, línea)
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """Dejar de avisar a un listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    @property
+    def tax_rate(self):
+        """Tasa general de IVA del carrito (la del motor si hay uno)"""
+        return self.pricing.default_rate if self.pricing is not None else self._tax_rate
+    
+    def set_tax_rate(self, tax_rate):
+        """
+        Cambiar la tasa de IVA de las líneas cuando no hay motor de impuestos
+        
+        Args:
+            tax_rate: Tasa de IVA sobre el subtotal (0.16 = 16%)
+        """
+        self._tax_rate = tax_rate
+        self.reprice()
+    
+    def set_pricing(self, pricing):
+        """
+        Cambiar el motor de impuestos y volver a tasar las líneas
+        
+        Args:
+            pricing: PricingEngine o None para usar la tasa del carrito
+        """
+        if self.pricing is not None:
+            self.pricing.remove_listener(self._on_pricing_changed)
+        self.pricing = pricing
+        if pricing is not None:
+            pricing.add_listener(self._on_pricing_changed)
+        self.reprice()
+    
+    def reprice(self, product_id=None):
+        """
+        Volver a calcular la tasa de IVA de las líneas
+        
+        Args:
+            product_id: Solo la línea de este producto (None = todas)
+        """
+        lines = self._order if product_id is None else [self._lines.get(product_id)]
+        changed = False
+        
+        for line in lines:
+            if line is None:
+                continue
+            rate = self._rate_for(line.product_id, line.category_id)
+            if rate != line.tax_rate:
+                self._move(line.tax_rate, -line.subtotal_cents)
+                line.tax_rate = rate
+                self._move(rate, line.subtotal_cents)
+                changed = True
+        
+        if changed or product_id is None:
+            self._notify('totals', None, None)
+    
+    @property
+    def subtotal_cents(self):
+        """Subtotal en centavos"""
+        return self._subtotal_cents
+    
+    @property
+    def tax_cents(self):
+        """IVA en centavos (redondeado una vez por tasa)"""
+        return self._tax_cents
+    
+    @property
+    def tax_breakdown(self):
+        """Diccionario tasa -> (subtotal, impuesto) como Money, para el recibo"""
+        return {rate: (Money(cents), Money(self._rate_taxes[rate]))
+                for rate, cents in self._rate_subtotals.items()}
+    
+    @property
+    def total_cents(self):
+        """Total en centavos (subtotal más IVA)"""
+        return self._subtotal_cents + self.tax_cents
+    
+    @property
+    def subtotal(self):
+        """Subtotal como Money"""
+        return Money(self._subtotal_cents)
+    
+    @property
+    def tax(self):
+        """IVA como Money"""
+        return Money(self.tax_cents)
+    
+    @property
+    def total(self):
+        """Total como Money"""
+        return Money(self.total_cents)
+    
+    @property
+    def item_count(self):
+        """Número de unidades en el carrito"""
+        return sum(line.quantity for line in self._lines.values())
+    
+    def __len__(self):
+        return len(self._order)
+    
+    def __iter__(self):
+        return iter(self._order)
+    
+    def __contains__(self, product_id):
+        return product_id in self._lines
+    
+    def line(self, row):
+        """
+        Obtener la línea de una fila
+        
+        Args:
+            row: Número de fila
+        
+        Returns:
+            CartLine o None si la fila no existe
+        """
+        return self._order[row] if 0 <= row < len(self._order) else None
+    
+    def get_line(self, product_id):
+        """
+        Obtener la línea de un producto
+        
+        Args:
+            product_id: ID del producto
+        
+        Returns:
+            CartLine o None si el producto no está en el carrito
+        """
+        return self._lines.get(product_id)
+    
+    def row_of(self, product_id):
+        """Fila de un producto o -1 si no está en el carrito"""
+        return self._rows.get(product_id, -1)
+    
+    def add_product(self, product, quantity=1):
+        """
+        Agregar un producto o sumar cantidad si ya está en el carrito
+        
+        Args:
+            product: Diccionario con product_id (o id), name, price y
+                category_id (para las reglas de impuestos por categoría)
+            quantity: Cantidad a agregar
+        
+        Returns:
+            CartLine del producto
+        """
+        product_id = product.get('product_id', product.get('id'))
+        line = self._lines.get(product_id)
+        
+        if line is not None:
+            self._set_quantity(line, line.quantity + quantity)
+            return line
+        
+        category_id = product.get('category_id')
+        line = CartLine(product_id, product['name'], to_cents(product['price']), quantity,
+                        category_id, self._rate_for(product_id, category_id))
+        self._lines[product_id] = line
+        self._rows[product_id] = len(self._order)
+        self._order.append(line)
+        self._move(line.tax_rate, line.subtotal_cents)
+        
+        self._notify('added', len(self._order) - 1, line)
+        return line
+    
+    def set_quantity(self, product_id, quantity):
+        """
+        Cambiar la cantidad de un producto; con 0 o menos se quita del carrito
+        
+        Args:
+            product_id: ID del producto
+            quantity: Nueva cantidad
+        
+        Returns:
+            True si el producto estaba en el carrito, False en caso contrario
+        """
+        line = self._lines.get(product_id)
+        if line is None:
+            return False
+        
+        if quantity <= 0:
+            return self.remove(product_id)
+        
+        self._set_quantity(line, quantity)
+        return True
+    
+    def remove(self, product_id):
+        """
+        Quitar un producto del carrito
+        
+        Args:
+            product_id: ID del producto
+        
+        Returns:
+            True si el producto estaba en el carrito, False en caso contrario
+        """
+        line = self._lines.pop(product_id, None)
+        if line is None:
+            return False
+        
+        row = self._rows.pop(product_id)
+        del self._order[row]
+        self._move(line.tax_rate, -line.subtotal_cents)
+        
+        # Las filas siguientes suben una posición
+        for following in self._order[row:]:
+            self._rows[following.product_id] -= 1
+        
+        self._notify('removed', row, line)
+        return True
+    
+    def clear(self):
+        """Vaciar el carrito"""
+        self._lines.clear()
+        self._order.clear()
+        self._rows.clear()
+        self._subtotal_cents = 0
+        self._rate_subtotals.clear()
+        self._rate_taxes.clear()
+        self._tax_cents = 0
+        
+        self._notify('cleared', None, None)
+    
+    def to_sale_items(self):
+        """
+        Obtener las líneas para registrar la venta
+        
+        Returns:
+            Lista de diccionarios con product_id, name, price, quantity,
+            subtotal (importes como Money) y tax_rate
+        """
+        return [line.to_dict() for line in self._order]
+    
+    def _set_quantity(self, line, quantity):
+        subtotal_cents = line.unit_price_cents * quantity
+        self._move(line.tax_rate, subtotal_cents - line.subtotal_cents)
+        line.quantity = quantity
+        line.subtotal_cents = subtotal_cents
+        
+        self._notify('changed', self._rows[line.product_id], line)
+    
+    def _move(self, rate, delta_cents):
+        # Sumar al subtotal de una tasa y recalcular solo el impuesto de esa tasa
+        self._subtotal_cents += delta_cents
+        subtotal = self._rate_subtotals.get(rate, 0) + delta_cents
+        tax = apply_rate(subtotal, rate) if rate else 0
+        self._tax_cents += tax - self._rate_taxes.get(rate, 0)
+        
+        if subtotal:
+            self._rate_subtotals[rate] = subtotal
+            self._rate_taxes[rate] = tax
+        else:
+            self._rate_subtotals.pop(rate, None)
+            self._rate_taxes.pop(rate, None)
+    
+    def _rate_for(self, product_id, category_id):
+        if self.pricing is not None:
+            return self.pricing.rate_for(product_id, category_id)
+        return self._tax_rate
+    
+    def _on_pricing_changed(self, product):
+        if product is None:
+            self.reprice()
+            return
+        
+        line = self._lines.get(product['product_id'])
+        if line is not None:
+            line.category_id = product.get('category_id', line.category_id)
+            self.reprice(line.product_id)
+    
+    def _notify(self, event, row, line):
+        for listener in self._listeners:
+            try:
+                listener(event, row, line)
+            except Exception as e:
+                self.logger.error(f"Error al notificar cambio del carrito: {e}")
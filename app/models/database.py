@@ -1,11 +1,38 @@
 # app/models/database.py
 import os
+import re
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+from .migrations import MIGRATIONS, PRODUCTS_FTS_TRIGGERS, PRODUCTS_FTS_VERSION
+
+# ALTER TABLE ... ADD COLUMN no admite IF NOT EXISTS; migrate() la omite si la columna ya existe
+ADD_COLUMN_PATTERN = re.compile(r'^\s*ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)', re.IGNORECASE)
+
+# Palabras que pueden seguir al nombre de una tabla y no son un alias
+SQL_KEYWORDS = {
+    'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'ON', 'USING',
+    'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'UNION', 'NATURAL', 'SET', 'AS'
+}
+
 class Database:
-    """Clase para gestionar la conexión y operaciones con la base de datos SQLite"""
+    """
+    Clase para gestionar la conexión y operaciones con la base de datos SQLite
+    
+    Usa journaling WAL con una única conexión de escritura (protegida por un
+    bloqueo durante cada transacción) y una conexión de solo lectura por hilo,
+    de modo que las consultas de reportes no bloquean el registro de ventas.
+    """
+    
+    # Caché de páginas por conexión en KiB (valor negativo para SQLite)
+    CACHE_SIZE_KB = 16384
+    # Tamaño máximo del mapeo en memoria del archivo de base de datos
+    MMAP_SIZE = 256 * 1024 * 1024
+    # Espera máxima ante bloqueos de otros procesos, en milisegundos
+    BUSY_TIMEOUT_MS = 5000
     
     def __init__(self, db_path):
         """
@@ -18,6 +45,18 @@ class Database:
         self.conn = None
         self.cursor = None
         self.logger = logging.getLogger('pos.database')
+        
+        # Profundidad de transacciones anidadas (0 = sin transacción abierta)
+        self._transaction_depth = 0
+        self._transaction_owner = None
+        
+        # La conexión de escritura se reserva durante toda la transacción
+        self._write_lock = threading.RLock()
+        
+        # Conexiones de solo lectura, una por hilo
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
     
     def connect(self):
         """
@@ -30,12 +69,23 @@ class Database:
             # Asegurarse de que el directorio exista
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            # Conectar a la base de datos
-            self.conn = sqlite3.connect(self.db_path)
+            # Conectar a la base de datos. Las transacciones se controlan de forma
+            # explícita con transaction(); fuera de ellas cada sentencia se confirma sola.
+            # La conexión de escritura se comparte entre hilos bajo _write_lock
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            self._transaction_depth = 0
             
             # Configurar para devolver resultados como diccionarios
             self.conn.row_factory = sqlite3.Row
             
+            # WAL permite que los lectores trabajen mientras se escribe
+            if not self._is_memory_database():
+                self.conn.execute("PRAGMA journal_mode = WAL")
+            
+            # Con WAL, NORMAL solo sincroniza en los checkpoints y sigue siendo seguro ante caídas
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self._apply_connection_pragmas(self.conn)
+            
             # Crear cursor
             self.cursor = self.conn.cursor()
             
@@ -80,15 +130,186 @@ class Database:
                 self.conn.executescript(sql_script)
             else:
                 # Si no existe, crear las tablas básicas manualmente
-                self._create_basic_schema()
+                with self.transaction():
+                    self._create_basic_schema()
             
             self.conn.commit()
             self.logger.info("Esquema de base de datos inicializado")
-            return True
+            
+            # Aplicar las migraciones sobre el esquema recién creado
+            return self.migrate()
         except Exception as e:
             self.logger.error(f"Error al inicializar el esquema: {e}")
             return False
     
+    def get_schema_version(self):
+        """
+        Obtener la versión del esquema aplicada a la base de datos
+        
+        Returns:
+            Número de versión guardado en PRAGMA user_version
+        """
+        with self._write_lock:
+            return self.conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def migrate(self):
+        """
+        Aplicar las migraciones pendientes según PRAGMA user_version
+        
+        Cada migración se ejecuta en su propia transacción junto con la
+        actualización de la versión, por lo que una falla no deja cambios a medias.
+        
+        Returns:
+            True si el esquema quedó actualizado, False en caso contrario
+        """
+        try:
+            current_version = self.get_schema_version()
+            
+            for version, description, statements in MIGRATIONS:
+                if version <= current_version:
+                    continue
+                
+                self.logger.info(f"Aplicando migración {version}: {description}")
+                
+                with self.transaction():
+                    for statement in statements:
+                        if self._adds_existing_column(statement):
+                            continue
+                        self.execute(statement)
+                    self.execute(f"PRAGMA user_version = {int(version)}")
+                
+                current_version = version
+            
+            # Una carga masiva interrumpida puede dejar el índice de búsqueda sin disparadores
+            if current_version >= PRODUCTS_FTS_VERSION and not self._has_search_index_triggers():
+                self.logger.warning("Índice de búsqueda sin disparadores; reconstruyendo")
+                self.restore_search_index()
+            
+            return True
+        except Exception as e:
+            self.logger.error(f"Error al aplicar migraciones: {e}")
+            return False
+    
+    @contextmanager
+    def suspend_search_index(self):
+        """
+        Suspender la actualización del índice de texto completo durante una carga masiva
+        
+        Actualizar products_fts fila a fila es mucho más lento que reconstruirlo
+        una sola vez. Dentro del bloque los cambios en products no se reflejan en
+        la búsqueda; al salir se recrean los disparadores y se reconstruye el
+        índice. Si el proceso se interrumpe, migrate() lo repara al iniciar.
+        
+        Ejemplo:
+            with db.suspend_search_index():
+                db.execute_many(...)
+        """
+        with self.transaction():
+            for name in PRODUCTS_FTS_TRIGGERS:
+                self.execute(f"DROP TRIGGER IF EXISTS {name}")
+        
+        try:
+            yield self
+        finally:
+            self.restore_search_index()
+    
+    def restore_search_index(self):
+        """Recrear los disparadores del índice de texto completo y reconstruirlo"""
+        with self.transaction():
+            for statement in PRODUCTS_FTS_TRIGGERS.values():
+                self.execute(statement)
+            self.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    
+    def _adds_existing_column(self, statement):
+        """True si la sentencia agrega una columna que ya existe (migración repetida)"""
+        match = ADD_COLUMN_PATTERN.match(statement)
+        if not match:
+            return False
+        
+        table, column = match.groups()
+        columns = self.fetch_all(f"PRAGMA table_info({table})")
+        return any(row['name'] == column for row in columns)
+    
+    def _has_search_index_triggers(self):
+        """True si existen todos los disparadores del índice de texto completo"""
+        rows = self.fetch_all("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        return set(PRODUCTS_FTS_TRIGGERS) <= {row['name'] for row in rows}
+    
+    def explain_query_plan(self, query, params=None):
+        """
+        Obtener el plan de ejecución de una consulta
+        
+        Args:
+            query: Consulta SQL
+            params: Parámetros para la consulta (opcional)
+            
+        Returns:
+            Lista con el detalle de cada paso del plan
+        """
+        rows = self.fetch_all(f"EXPLAIN QUERY PLAN {query}", params)
+        return [row['detail'] for row in rows]
+    
+    def find_table_scans(self, query, params=None):
+        """
+        Detectar recorridos completos de tablas en el plan de una consulta
+        
+        Se consideran recorridos los pasos "SCAN <tabla>" que no usan un índice.
+        Las subconsultas, CTE, filas constantes y búsquedas en tablas virtuales
+        (FTS5) no cuentan.
+        
+        Args:
+            query: Consulta SQL
+            params: Parámetros para la consulta (opcional)
+            
+        Returns:
+            Lista con los pasos del plan que recorren tablas completas
+        """
+        tables = {
+            row['name'].lower()
+            for row in self.fetch_all("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        
+        # El plan muestra los alias ("SCAN p"), así que se resuelven a su tabla
+        names = set(tables)
+        for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', query, re.IGNORECASE):
+            if table.lower() in tables and alias and alias.upper() not in SQL_KEYWORDS:
+                names.add(alias.lower())
+        
+        scans = []
+        for detail in self.explain_query_plan(query, params):
+            words = detail.split()
+            if len(words) < 2 or words[0] != 'SCAN' or 'USING' in words or 'VIRTUAL' in words:
+                continue
+            
+            if words[1].lower() in names:
+                scans.append(detail)
+        
+        return scans
+    
+    @staticmethod
+    def build_match_expression(term, min_length=2):
+        """
+        Convertir un término de búsqueda en una expresión MATCH de FTS5
+        
+        Cada palabra se busca como prefijo ("agua min" -> "agua"* "min"*) y todas
+        deben coincidir. Solo se conservan letras y números y cada palabra va entre
+        comillas, de modo que los símbolos o palabras reservadas de FTS5 (AND, OR,
+        NEAR) escritos por el usuario no generan errores.
+        
+        Args:
+            term: Término escrito por el usuario
+            min_length: Longitud mínima del término para usar el índice
+            
+        Returns:
+            Expresión MATCH o None si el término es demasiado corto o no tiene
+            palabras (en ese caso se debe usar LIKE)
+        """
+        words = re.findall(r'\w+', term or '')
+        if not words or len(''.join(words)) < min_length:
+            return None
+        
+        return ' '.join(f'"{word}"*' for word in words)
+    
     def _create_basic_schema(self):
         """Crear esquema básico si no existe el archivo de esquema"""
         # Tabla de usuarios
@@ -228,10 +449,89 @@ class Database:
     
     def close(self):
         """Cerrar la conexión a la base de datos"""
+        with self._readers_lock:
+            for reader in self._readers:
+                try:
+                    reader.close()
+                except Exception:
+                    pass
+            self._readers = []
+        self._local = threading.local()
+        
         if self.conn:
+            # Cerrar el cursor antes para finalizar sus sentencias pendientes
+            if self.cursor:
+                self.cursor.close()
+                self.cursor = None
+            
             self.conn.close()
+            self.conn = None
             self.logger.info("Conexión a la base de datos cerrada")
     
+    def _is_memory_database(self):
+        """True si la base de datos es en memoria (no admite conexiones adicionales)"""
+        return self.db_path == ':memory:' or self.db_path.startswith('file::memory:')
+    
+    def _apply_connection_pragmas(self, conn):
+        """Aplicar los ajustes de rendimiento comunes a una conexión"""
+        conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+    
+    def _get_reader(self):
+        """
+        Obtener la conexión de lectura del hilo actual
+        
+        Dentro de una transacción propia se lee con la conexión de escritura para
+        ver los cambios aún no confirmados.
+        
+        Returns:
+            Conexión SQLite a usar para la consulta
+        """
+        if self.owns_transaction or self._is_memory_database():
+            return self.conn
+        
+        reader = getattr(self._local, 'reader', None)
+        
+        if reader is None:
+            reader = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            reader.row_factory = sqlite3.Row
+            self._apply_connection_pragmas(reader)
+            reader.execute("PRAGMA query_only = 1")
+            
+            self._local.reader = reader
+            with self._readers_lock:
+                self._readers.append(reader)
+        
+        return reader
+    
+    def _query(self, query, params, fetch_all):
+        """Ejecutar una consulta de lectura con un cursor propio"""
+        conn = self._get_reader()
+        
+        if conn is self.conn:
+            # La conexión de escritura no se usa mientras otro hilo tiene una transacción
+            with self._write_lock:
+                return self._run_query(conn, query, params, fetch_all)
+        
+        return self._run_query(conn, query, params, fetch_all)
+    
+    def _run_query(self, conn, query, params, fetch_all):
+        """Ejecutar la consulta y cerrar el cursor para no retener la instantánea de lectura"""
+        cursor = conn.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            if fetch_all:
+                return cursor.fetchall()
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+    
     def execute(self, query, params=None):
         """
         Ejecutar una consulta SQL que modifica datos
@@ -244,20 +544,41 @@ class Database:
             ID del último registro insertado o número de filas afectadas
         """
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            self.conn.commit()
+            with self._write_lock:
+                if params:
+                    self.cursor.execute(query, params)
+                else:
+                    self.cursor.execute(query)
+                
+                # Dentro de una transacción la confirmación se hace al cerrarla;
+                # fuera de ella SQLite confirma la sentencia automáticamente
+                
+                # Si es una inserción, devolver el ID del último registro insertado
+                if query.strip().upper().startswith("INSERT"):
+                    return self.cursor.lastrowid
+                else:
+                    return self.cursor.rowcount
+        except Exception as e:
+            self.logger.error(f"Error al ejecutar consulta: {e}\nQuery: {query}\nParams: {params}")
+            raise
+    
+    def execute_many(self, query, params_list):
+        """
+        Ejecutar una consulta SQL que modifica datos para varios juegos de parámetros
+        
+        Args:
+            query: Consulta SQL
+            params_list: Lista de parámetros, uno por fila
             
-            # Si es una inserción, devolver el ID del último registro insertado
-            if query.strip().upper().startswith("INSERT"):
-                return self.cursor.lastrowid
-            else:
+        Returns:
+            Número total de filas afectadas
+        """
+        try:
+            with self._write_lock:
+                self.cursor.executemany(query, params_list)
                 return self.cursor.rowcount
         except Exception as e:
-            self.logger.error(f"Error al ejecutar consulta: {e}\nQuery: {query}\nParams: {params}")
+            self.logger.error(f"Error al ejecutar consulta en lote: {e}\nQuery: {query}")
             raise
     
     def fetch_one(self, query, params=None):
@@ -272,12 +593,7 @@ class Database:
             Diccionario con el resultado o None si no hay resultados
         """
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            row = self.cursor.fetchone()
+            row = self._query(query, params, fetch_all=False)
             
             if row:
                 return dict(row)
@@ -298,12 +614,7 @@ class Database:
             Lista de diccionarios con los resultados
         """
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            rows = self.cursor.fetchall()
+            rows = self._query(query, params, fetch_all=True)
             
             # Convertir cada fila a diccionario
             return [dict(row) for row in rows]
@@ -311,14 +622,163 @@ class Database:
             self.logger.error(f"Error al ejecutar consulta: {e}\nQuery: {query}\nParams: {params}")
             raise
     
+    def fetch_page(self, columns, source, order_by, conditions=None, params=None,
+                   cursor=None, limit=100, descending=False):
+        """
+        Obtener una página de resultados con paginación por cursor (keyset)
+        
+        Cada página continúa después de los valores de orden de la última fila
+        de la anterior, así que su costo no depende de la posición (a diferencia
+        de OFFSET, que recorre todas las filas previas).
+        
+        Args:
+            columns: Columnas del SELECT
+            source: Cláusula FROM (tablas y JOIN)
+            order_by: Lista de expresiones de orden; la última debe ser única
+                (normalmente el ID) y ninguna debe ser NULL (usar IFNULL)
+            conditions: Lista de condiciones WHERE (opcional)
+            params: Parámetros de las condiciones (opcional)
+            cursor: None para la primera página o el next_cursor de la anterior
+            limit: Número máximo de filas de la página
+            descending: Si es True, ordena de mayor a menor
+        
+        Returns:
+            Diccionario con 'rows' y 'next_cursor' (None en la última página);
+            el cursor es un valor si se ordena por una sola expresión o una
+            tupla con un valor por expresión
+        """
+        conditions = list(conditions or [])
+        params = list(params or [])
+        
+        if cursor is not None:
+            values = list(cursor) if len(order_by) > 1 else [cursor]
+            placeholders = ', '.join('?' for _ in order_by)
+            conditions.append(f"({', '.join(order_by)}) {'<' if descending else '>'} ({placeholders})")
+            params.extend(values)
+        
+        # Los valores de orden se seleccionan aparte para armar el siguiente cursor
+        keys = [f"_page_key{i}" for i in range(len(order_by))]
+        direction = " DESC" if descending else ""
+        
+        query = f"SELECT {columns}, " + ", ".join(f"{expr} AS {key}" for expr, key in zip(order_by, keys))
+        query += f" FROM {source}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY " + ", ".join(f"{expr}{direction}" for expr in order_by)
+        
+        # Una fila extra indica si hay otra página
+        query += " LIMIT ?"
+        params.append(int(limit) + 1)
+        
+        rows = self.fetch_all(query, params)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        next_cursor = None
+        if has_more and rows:
+            values = tuple(rows[-1][key] for key in keys)
+            next_cursor = values if len(values) > 1 else values[0]
+        
+        for row in rows:
+            for key in keys:
+                del row[key]
+        
+        return {'rows': rows, 'next_cursor': next_cursor}
+    
+    @property
+    def in_transaction(self):
+        """True si hay una transacción abierta"""
+        return self._transaction_depth > 0
+    
+    @property
+    def owns_transaction(self):
+        """True si el hilo actual tiene una transacción abierta"""
+        return self._transaction_depth > 0 and self._transaction_owner == threading.get_ident()
+    
     def begin_transaction(self):
-        """Iniciar una transacción"""
-        self.conn.execute("BEGIN TRANSACTION")
+        """
+        Iniciar una transacción
+        
+        Si ya hay una transacción abierta se crea un punto de guardado (SAVEPOINT),
+        de modo que las operaciones pueden anidarse y solo la más externa confirma.
+        Otros hilos esperan a que la transacción termine para escribir.
+        """
+        self._write_lock.acquire()
+        
+        try:
+            if self._transaction_depth == 0:
+                # IMMEDIATE reserva la escritura desde el inicio y evita bloqueos al escalar
+                self.conn.execute("BEGIN IMMEDIATE")
+                self._transaction_owner = threading.get_ident()
+            else:
+                self.conn.execute(f"SAVEPOINT sp_{self._transaction_depth}")
+        except Exception:
+            self._write_lock.release()
+            raise
+        
+        self._transaction_depth += 1
     
     def commit_transaction(self):
-        """Confirmar una transacción"""
-        self.conn.commit()
+        """
+        Confirmar una transacción (o liberar el punto de guardado si está anidada)
+        
+        Si el COMMIT falla la transacción se revierte y se vuelve a lanzar el error.
+        """
+        if not self.owns_transaction:
+            return
+        
+        self._transaction_depth -= 1
+        
+        try:
+            if self._transaction_depth == 0:
+                try:
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    # Un COMMIT fallido (disco lleno, error de E/S, clave foránea diferida)
+                    # deja la transacción abierta: revertirla para que la conexión siga usable
+                    if self.conn.in_transaction:
+                        self.conn.execute("ROLLBACK")
+                    raise
+            else:
+                self.conn.execute(f"RELEASE SAVEPOINT sp_{self._transaction_depth}")
+        finally:
+            self._write_lock.release()
     
     def rollback_transaction(self):
-        """Revertir una transacción"""
-        self.conn.rollback()
\ No newline at end of file
+        """Revertir una transacción (o volver al punto de guardado si está anidada)"""
+        if not self.owns_transaction:
+            return
+        
+        self._transaction_depth -= 1
+        
+        try:
+            if self._transaction_depth == 0:
+                self.conn.execute("ROLLBACK")
+            else:
+                savepoint = f"sp_{self._transaction_depth}"
+                self.conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                self.conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+        finally:
+            self._write_lock.release()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Ejecutar un bloque como una unidad de trabajo
+        
+        Confirma al salir del bloque y revierte si se produce una excepción,
+        que se vuelve a lanzar. Los bloques anidados usan puntos de guardado.
+        
+        Ejemplo:
+            with db.transaction():
+                db.execute(...)
+                db.execute(...)
+        """
+        self.begin_transaction()
+        try:
+            yield self
+        except BaseException:
+            self.rollback_transaction()
+            raise
+        else:
+            self.commit_transaction()
@@ -110,54 +110,48 @@ class Inventory:
             ID del movimiento creado o None si hay error
         """
         try:
-            # Iniciar transacción
-            self.db.begin_transaction()
-            
-            # Registrar movimiento
-            movement_query = """
-                INSERT INTO inventory_movements (
-                    product_id, user_id, movement_type, quantity, reference_id, notes
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """
-            
-            movement_params = [
-                product_id,
-                user_id,
-                movement_type,
-                quantity,
-                reference_id,
-                notes
-            ]
-            
-            movement_id = self.db.execute(movement_query, movement_params)
-            
-            if not movement_id:
-                raise Exception("No se pudo registrar el movimiento")
-            
-            # Actualizar stock del producto
-            stock_query = """
-                UPDATE products
-                SET stock_quantity = stock_quantity + ?,
-                    updated_at = ?
-                WHERE product_id = ?
-            """
-            
-            stock_params = [
-                quantity,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                product_id
-            ]
-            
-            self.db.execute(stock_query, stock_params)
-            
-            # Confirmar transacción
-            self.db.commit_transaction()
+            # Ejecutar como una única transacción
+            with self.db.transaction():
+                # Registrar movimiento
+                movement_query = """
+                    INSERT INTO inventory_movements (
+                        product_id, user_id, movement_type, quantity, reference_id, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """
+                
+                movement_params = [
+                    product_id,
+                    user_id,
+                    movement_type,
+                    quantity,
+                    reference_id,
+                    notes
+                ]
+                
+                movement_id = self.db.execute(movement_query, movement_params)
+                
+                if not movement_id:
+                    raise Exception("No se pudo registrar el movimiento")
+                
+                # Actualizar stock del producto
+                stock_query = """
+                    UPDATE products
+                    SET stock_quantity = stock_quantity + ?,
+                        updated_at = ?
+                    WHERE product_id = ?
+                """
+                
+                stock_params = [
+                    quantity,
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    product_id
+                ]
+                
+                self.db.execute(stock_query, stock_params)
             
             return movement_id
             
         except Exception as e:
-            # Revertir transacción en caso de error
-            self.db.rollback_transaction()
             print(f"Error al registrar movimiento: {e}")
             return None
     
@@ -0,0 +1,402 @@
+# app/models/migrations.py
+"""
+Migraciones del esquema de la base de datos
+
+Cada migración tiene un número de versión, una descripción y la lista de
+sentencias SQL a ejecutar. La versión aplicada se guarda en PRAGMA user_version,
+de modo que las bases de datos existentes se actualizan en el lugar al iniciar.
+Las migraciones nuevas se agregan al final con el siguiente número de versión.
+Las sentencias deben poder repetirse (IF NOT EXISTS); los ALTER TABLE ... ADD
+COLUMN se omiten si la columna ya existe.
+"""
+
+# Disparadores que mantienen products_fts sincronizado con la tabla products.
+# Se definen aparte porque la carga masiva del catálogo los quita y los vuelve
+# a crear (ver Database.suspend_search_index).
+PRODUCTS_FTS_TRIGGERS = {
+    'products_fts_insert': """CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description, barcode)
+        VALUES (new.product_id, new.name, new.description, new.barcode);
+    END""",
+    'products_fts_delete': """CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, barcode)
+        VALUES ('delete', old.product_id, old.name, old.description, old.barcode);
+    END""",
+    'products_fts_update': """CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, barcode ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, barcode)
+        VALUES ('delete', old.product_id, old.name, old.description, old.barcode);
+        INSERT INTO products_fts (rowid, name, description, barcode)
+        VALUES (new.product_id, new.name, new.description, new.barcode);
+    END"""
+}
+
+# Versión que crea el índice de texto completo
+PRODUCTS_FTS_VERSION = 2
+
+# Contadores de cada caja (cash_registers) y su cálculo a partir de las ventas,
+# con una columna por contador. Los importes van en centavos enteros. La migración los usa para llenar las
+# cajas existentes y RegisterCounters para verificarlos.
+REGISTER_COUNTER_COLUMNS = (
+    'paid_count', 'canceled_count', 'cash_cents', 'card_cents',
+    'transfer_cents', 'other_cents', 'canceled_cents'
+)
+REGISTER_COUNTER_AGGREGATES = """
+    COUNT(CASE WHEN payment_status = 'paid' THEN 1 END) AS paid_count,
+    COUNT(CASE WHEN payment_status = 'canceled' THEN 1 END) AS canceled_count,
+    COALESCE(SUM(CASE WHEN payment_status = 'paid' AND payment_method = 'cash'
+                      THEN CAST(ROUND(total_amount * 100) AS INTEGER) END), 0) AS cash_cents,
+    COALESCE(SUM(CASE WHEN payment_status = 'paid' AND payment_method = 'card'
+                      THEN CAST(ROUND(total_amount * 100) AS INTEGER) END), 0) AS card_cents,
+    COALESCE(SUM(CASE WHEN payment_status = 'paid' AND payment_method = 'transfer'
+                      THEN CAST(ROUND(total_amount * 100) AS INTEGER) END), 0) AS transfer_cents,
+    COALESCE(SUM(CASE WHEN payment_status = 'paid' AND payment_method NOT IN ('cash', 'card', 'transfer')
+                      THEN CAST(ROUND(total_amount * 100) AS INTEGER) END), 0) AS other_cents,
+    COALESCE(SUM(CASE WHEN payment_status = 'canceled'
+                      THEN CAST(ROUND(total_amount * 100) AS INTEGER) END), 0) AS canceled_cents
+"""
+
+# Resúmenes de ventas materializados: columnas clave, medidas y cálculo a
+# partir de las ventas (SELECT, columna de fecha para limitar un rango y
+# GROUP BY). La migración los usa para llenarlos y SalesRollup para
+# recalcularlos y verificarlos.
+ROLLUP_SOURCES = {
+    'sales_daily_rollup': {
+        'keys': ('sale_day', 'payment_method', 'payment_status'),
+        'measures': ('sales_count', 'total_cents', 'tax_cents', 'discount_cents'),
+        'select': """DATE(sale_date), payment_method, payment_status, COUNT(*),
+            SUM(CAST(ROUND(total_amount * 100) AS INTEGER)),
+            SUM(CAST(ROUND(COALESCE(tax_amount, 0) * 100) AS INTEGER)),
+            SUM(CAST(ROUND(COALESCE(discount_amount, 0) * 100) AS INTEGER))
+            FROM sales""",
+        'date_column': 'sale_date',
+        'group_by': 'DATE(sale_date), payment_method, payment_status'
+    },
+    'sales_hourly_rollup': {
+        'keys': ('sale_day', 'sale_hour', 'payment_status'),
+        'measures': ('sales_count', 'total_cents'),
+        'select': """DATE(sale_date), CAST(strftime('%H', sale_date) AS INTEGER), payment_status, COUNT(*),
+            SUM(CAST(ROUND(total_amount * 100) AS INTEGER))
+            FROM sales""",
+        'date_column': 'sale_date',
+        'group_by': "DATE(sale_date), CAST(strftime('%H', sale_date) AS INTEGER), payment_status"
+    },
+    'product_daily_rollup': {
+        'keys': ('sale_day', 'product_id', 'payment_status'),
+        'measures': ('quantity', 'total_cents'),
+        'select': """DATE(s.sale_date), si.product_id, s.payment_status, SUM(si.quantity),
+            SUM(CAST(ROUND(si.subtotal * 100) AS INTEGER))
+            FROM sale_items si
+            JOIN sales s ON si.sale_id = s.sale_id""",
+        'date_column': 's.sale_date',
+        'group_by': 'DATE(s.sale_date), si.product_id, s.payment_status'
+    }
+}
+
+def rollup_fill_query(table, where=None):
+    """
+    Obtener la sentencia que llena un resumen a partir de las ventas
+    
+    Args:
+        table: Nombre del resumen (clave de ROLLUP_SOURCES)
+        where: Condición sobre las ventas a incluir (opcional)
+    
+    Returns:
+        Sentencia INSERT ... SELECT
+    """
+    source = ROLLUP_SOURCES[table]
+    columns = ', '.join(source['keys'] + source['measures'])
+    where_clause = f"WHERE {where}" if where else ""
+    return f"""INSERT INTO {table} ({columns})
+            SELECT {source['select']}
+            {where_clause}
+            GROUP BY {source['group_by']}"""
+
+def _rollup_upsert(table, rows):
+    # Sumar filas (VALUES o SELECT con las claves y las medidas, con signo) a un resumen
+    source = ROLLUP_SOURCES[table]
+    keys = ', '.join(source['keys'])
+    columns = ', '.join(source['keys'] + source['measures'])
+    updates = ', '.join(f"{measure} = {measure} + excluded.{measure}" for measure in source['measures'])
+    return f"""INSERT INTO {table} ({columns})
+        {rows}
+        ON CONFLICT ({keys}) DO UPDATE SET {updates};"""
+
+def _sales_rollup_upsert(row, sign):
+    # Sumar (sign = '+') o restar (sign = '-') una venta a su fila del resumen diario
+    return _rollup_upsert('sales_daily_rollup', f"""VALUES (
+            DATE({row}.sale_date), {row}.payment_method, {row}.payment_status, {sign}1,
+            {sign}CAST(ROUND({row}.total_amount * 100) AS INTEGER),
+            {sign}CAST(ROUND(COALESCE({row}.tax_amount, 0) * 100) AS INTEGER),
+            {sign}CAST(ROUND(COALESCE({row}.discount_amount, 0) * 100) AS INTEGER)
+        )""")
+
+def _hourly_rollup_upsert(row, sign):
+    # Sumar o restar una venta a su fila del resumen por hora
+    return _rollup_upsert('sales_hourly_rollup', f"""VALUES (
+            DATE({row}.sale_date), CAST(strftime('%H', {row}.sale_date) AS INTEGER), {row}.payment_status,
+            {sign}1, {sign}CAST(ROUND({row}.total_amount * 100) AS INTEGER)
+        )""")
+
+def _product_rollup_item_upsert(row, sign):
+    # Sumar o restar un detalle de venta a la fila de su producto, con el día
+    # y el estado de la venta (si la venta ya no existe no se hace nada)
+    return _rollup_upsert('product_daily_rollup', f"""SELECT
+            DATE(sale_date), {row}.product_id, payment_status,
+            {sign}{row}.quantity, {sign}CAST(ROUND({row}.subtotal * 100) AS INTEGER)
+        FROM sales
+        WHERE sale_id = {row}.sale_id""")
+
+def _product_rollup_sale_upsert(row, sign):
+    # Sumar o restar todos los detalles de una venta (al cambiar su estado o fecha)
+    return _rollup_upsert('product_daily_rollup', f"""SELECT
+            DATE({row}.sale_date), product_id, {row}.payment_status,
+            {sign}SUM(quantity), {sign}SUM(CAST(ROUND(subtotal * 100) AS INTEGER))
+        FROM sale_items
+        WHERE sale_id = {row}.sale_id
+        GROUP BY product_id""")
+
+# Disparadores que mantienen sales_daily_rollup en la misma transacción que
+# cada venta, cancelación o corrección de la tabla sales
+SALES_ROLLUP_TRIGGERS = {
+    'sales_rollup_insert': f"""CREATE TRIGGER IF NOT EXISTS sales_rollup_insert AFTER INSERT ON sales BEGIN
+        {_sales_rollup_upsert('new', '+')}
+    END""",
+    'sales_rollup_delete': f"""CREATE TRIGGER IF NOT EXISTS sales_rollup_delete AFTER DELETE ON sales BEGIN
+        {_sales_rollup_upsert('old', '-')}
+    END""",
+    'sales_rollup_update': f"""CREATE TRIGGER IF NOT EXISTS sales_rollup_update
+    AFTER UPDATE OF sale_date, payment_method, payment_status, total_amount, tax_amount, discount_amount
+    ON sales BEGIN
+        {_sales_rollup_upsert('old', '-')}
+        {_sales_rollup_upsert('new', '+')}
+    END"""
+}
+
+# Disparadores de los resúmenes por hora y por producto. Los detalles se
+# suman con el estado de su venta al insertarlos y se mueven todos juntos
+# cuando la venta se cancela o cambia de fecha.
+DRILLDOWN_ROLLUP_TRIGGERS = {
+    'hourly_rollup_insert': f"""CREATE TRIGGER IF NOT EXISTS hourly_rollup_insert AFTER INSERT ON sales BEGIN
+        {_hourly_rollup_upsert('new', '+')}
+    END""",
+    'hourly_rollup_delete': f"""CREATE TRIGGER IF NOT EXISTS hourly_rollup_delete AFTER DELETE ON sales BEGIN
+        {_hourly_rollup_upsert('old', '-')}
+    END""",
+    'hourly_rollup_update': f"""CREATE TRIGGER IF NOT EXISTS hourly_rollup_update
+    AFTER UPDATE OF sale_date, payment_status, total_amount ON sales BEGIN
+        {_hourly_rollup_upsert('old', '-')}
+        {_hourly_rollup_upsert('new', '+')}
+    END""",
+    'product_rollup_item_insert': f"""CREATE TRIGGER IF NOT EXISTS product_rollup_item_insert
+    AFTER INSERT ON sale_items BEGIN
+        {_product_rollup_item_upsert('new', '+')}
+    END""",
+    'product_rollup_item_delete': f"""CREATE TRIGGER IF NOT EXISTS product_rollup_item_delete
+    AFTER DELETE ON sale_items BEGIN
+        {_product_rollup_item_upsert('old', '-')}
+    END""",
+    'product_rollup_item_update': f"""CREATE TRIGGER IF NOT EXISTS product_rollup_item_update
+    AFTER UPDATE OF sale_id, product_id, quantity, subtotal ON sale_items BEGIN
+        {_product_rollup_item_upsert('old', '-')}
+        {_product_rollup_item_upsert('new', '+')}
+    END""",
+    'product_rollup_sale_update': f"""CREATE TRIGGER IF NOT EXISTS product_rollup_sale_update
+    AFTER UPDATE OF sale_date, payment_status ON sales BEGIN
+        {_product_rollup_sale_upsert('old', '-')}
+        {_product_rollup_sale_upsert('new', '+')}
+    END""",
+    'product_rollup_sale_delete': f"""CREATE TRIGGER IF NOT EXISTS product_rollup_sale_delete
+    AFTER DELETE ON sales BEGIN
+        {_product_rollup_sale_upsert('old', '-')}
+    END"""
+}
+
+MIGRATIONS = [
+    (
+        1,
+        "Índices para los filtros frecuentes de ventas, inventario y catálogo",
+        [
+            # Ventas por fecha, estado y cajero
+            "CREATE INDEX IF NOT EXISTS idx_sales_sale_date ON sales(sale_date)",
+            "CREATE INDEX IF NOT EXISTS idx_sales_status_date ON sales(payment_status, sale_date, total_amount)",
+            "CREATE INDEX IF NOT EXISTS idx_sales_user_date ON sales(user_id, sale_date)",
+            
+            # Detalles de venta por venta y por producto
+            "CREATE INDEX IF NOT EXISTS idx_sale_items_sale ON sale_items(sale_id)",
+            "CREATE INDEX IF NOT EXISTS idx_sale_items_product ON sale_items(product_id, sale_id, quantity, subtotal)",
+            
+            # Movimientos de inventario
+            "CREATE INDEX IF NOT EXISTS idx_movements_product_date ON inventory_movements(product_id, movement_date)",
+            "CREATE INDEX IF NOT EXISTS idx_movements_date ON inventory_movements(movement_date)",
+            "CREATE INDEX IF NOT EXISTS idx_movements_type ON inventory_movements(movement_type, movement_date, quantity)",
+            
+            # Catálogo
+            "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_id, name)",
+            "CREATE INDEX IF NOT EXISTS idx_products_active_name ON products(is_active, name)",
+            "CREATE INDEX IF NOT EXISTS idx_products_name ON products(name)",
+            "CREATE INDEX IF NOT EXISTS idx_categories_name ON categories(name)",
+            
+            # Usuarios y cajas
+            "CREATE INDEX IF NOT EXISTS idx_users_active_username ON users(is_active, username)",
+            "CREATE INDEX IF NOT EXISTS idx_cash_registers_user_status ON cash_registers(user_id, status)"
+        ]
+    ),
+    (
+        PRODUCTS_FTS_VERSION,
+        "Índice de texto completo (FTS5) para la búsqueda de productos",
+        [
+            # Índice sin copia de los datos: el contenido se lee de la tabla products.
+            # remove_diacritics ignora los acentos ("cafe" encuentra "Café") y los
+            # índices de prefijo aceleran la búsqueda mientras se escribe.
+            """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, barcode,
+                content='products', content_rowid='product_id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3 4'
+            )""",
+            
+            # Mantener el índice sincronizado con el catálogo
+            *PRODUCTS_FTS_TRIGGERS.values(),
+            
+            # Relevancia por defecto (columna rank): bm25 con más peso para el
+            # nombre y el código de barras que para la descripción
+            "INSERT INTO products_fts (products_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')",
+            
+            # Indexar los productos existentes
+            "INSERT INTO products_fts (products_fts) VALUES ('rebuild')"
+        ]
+    ),
+    (
+        3,
+        "Reglas de impuestos por producto y por categoría",
+        [
+            # Una regla por producto o por categoría (product_id NULL); is_exempt
+            # marca los productos exentos. Sin regla se usa system_config.tax_rate
+            """CREATE TABLE IF NOT EXISTS tax_rules (
+                rule_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id INTEGER,
+                category_id INTEGER,
+                rate DECIMAL(6,4) NOT NULL DEFAULT 0,
+                is_exempt BOOLEAN DEFAULT 0,
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                CHECK (product_id IS NOT NULL OR category_id IS NOT NULL),
+                FOREIGN KEY (product_id) REFERENCES products(product_id),
+                FOREIGN KEY (category_id) REFERENCES categories(category_id)
+            )""",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tax_rules_product ON tax_rules(product_id) WHERE product_id IS NOT NULL",
+            """CREATE UNIQUE INDEX IF NOT EXISTS idx_tax_rules_category ON tax_rules(category_id)
+            WHERE product_id IS NULL""",
+            
+            # Bases de datos creadas sin la tasa general en la configuración
+            """INSERT OR IGNORE INTO system_config (config_key, config_value, description)
+            VALUES ('tax_rate', '0.16', 'Tasa de impuesto por defecto (IVA)')"""
+        ]
+    ),
+    (
+        4,
+        "Contadores de ventas por caja para los reportes X y Z",
+        [
+            # Cada venta queda asociada a la caja abierta del cajero
+            "ALTER TABLE sales ADD COLUMN register_id INTEGER REFERENCES cash_registers(register_id)",
+            *[f"ALTER TABLE cash_registers ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+              for column in REGISTER_COUNTER_COLUMNS],
+            
+            # Métodos de pago con el nombre de la interfaz ("Efectivo") a su clave
+            """UPDATE sales SET payment_method = CASE lower(payment_method)
+                WHEN 'efectivo' THEN 'cash'
+                WHEN 'tarjeta' THEN 'card'
+                WHEN 'transferencia' THEN 'transfer'
+                ELSE payment_method END
+            WHERE lower(payment_method) IN ('efectivo', 'tarjeta', 'transferencia')""",
+            
+            # Asociar las ventas existentes a la caja abierta en ese momento
+            """UPDATE sales SET register_id = (
+                SELECT r.register_id FROM cash_registers r
+                WHERE r.user_id = sales.user_id
+                  AND sales.sale_date >= r.opening_time
+                  AND (r.closing_time IS NULL OR sales.sale_date <= r.closing_time)
+                ORDER BY r.opening_time DESC
+                LIMIT 1
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_sales_register ON sales(register_id, payment_status, payment_method, total_amount)",
+            
+            # Llenar los contadores de las cajas existentes
+            f"""UPDATE cash_registers SET ({', '.join(REGISTER_COUNTER_COLUMNS)}) = (
+                SELECT {REGISTER_COUNTER_AGGREGATES}
+                FROM sales WHERE sales.register_id = cash_registers.register_id
+            )"""
+        ]
+    ),
+    (
+        5,
+        "Resumen diario de ventas materializado (sales_daily_rollup)",
+        [
+            # Una fila por día, método de pago y estado; importes en centavos
+            """CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+                sale_day TEXT NOT NULL,
+                payment_method TEXT NOT NULL,
+                payment_status TEXT NOT NULL,
+                sales_count INTEGER NOT NULL DEFAULT 0,
+                total_cents INTEGER NOT NULL DEFAULT 0,
+                tax_cents INTEGER NOT NULL DEFAULT 0,
+                discount_cents INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (sale_day, payment_method, payment_status)
+            ) WITHOUT ROWID""",
+            
+            # Totales por período de las ventas pagadas sin leer las demás filas
+            """CREATE INDEX IF NOT EXISTS idx_sales_daily_rollup_status
+            ON sales_daily_rollup(payment_status, sale_day, sales_count, total_cents, tax_cents)""",
+            
+            # Mantener el resumen con cada cambio de la tabla sales
+            *SALES_ROLLUP_TRIGGERS.values(),
+            
+            # Resumen de las ventas existentes
+            "DELETE FROM sales_daily_rollup",
+            rollup_fill_query('sales_daily_rollup')
+        ]
+    ),
+    (
+        6,
+        "Resúmenes de ventas por hora y por producto y día",
+        [
+            # Una fila por día, hora y estado
+            """CREATE TABLE IF NOT EXISTS sales_hourly_rollup (
+                sale_day TEXT NOT NULL,
+                sale_hour INTEGER NOT NULL,
+                payment_status TEXT NOT NULL,
+                sales_count INTEGER NOT NULL DEFAULT 0,
+                total_cents INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (sale_day, sale_hour, payment_status)
+            ) WITHOUT ROWID""",
+            
+            # Una fila por día, producto y estado de la venta
+            """CREATE TABLE IF NOT EXISTS product_daily_rollup (
+                sale_day TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                payment_status TEXT NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                total_cents INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (sale_day, product_id, payment_status)
+            ) WITHOUT ROWID""",
+            
+            *DRILLDOWN_ROLLUP_TRIGGERS.values(),
+            
+            # Resúmenes de las ventas existentes
+            "DELETE FROM sales_hourly_rollup",
+            rollup_fill_query('sales_hourly_rollup'),
+            "DELETE FROM product_daily_rollup",
+            rollup_fill_query('product_daily_rollup')
+        ]
+    ),
+]
+
+def get_latest_version():
+    """
+    Obtener la versión más reciente del esquema
+    
+    Returns:
+        Número de la última migración definida
+    """
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
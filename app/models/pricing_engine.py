@@ -0,0 +1,387 @@
+# app/models/pricing_engine.py
+import logging
+import threading
+
+from ..utils.money import Money, to_cents, apply_rate
+
+# Tasa de IVA predeterminada si system_config no tiene tax_rate
+DEFAULT_TAX_RATE = 0.16
+
+def group_tax_cents(subtotals):
+    """
+    Calcular el impuesto de una canasta agrupada por tasa
+    
+    El impuesto se redondea una vez por tasa (no por línea), de modo que una
+    canasta con una sola tasa da lo mismo que aplicar la tasa al subtotal.
+    
+    Args:
+        subtotals: Diccionario tasa -> subtotal en centavos
+    
+    Returns:
+        Impuesto total en centavos
+    """
+    return sum(apply_rate(cents, rate) for rate, cents in subtotals.items() if rate)
+
+class PricingEngine:
+    """
+    Reglas de impuestos compiladas en memoria para la caja y el registro de ventas
+    
+    La tasa de un producto es, en orden: la de su regla por producto, la de la
+    regla de su categoría o la tasa general (system_config.tax_rate). Las
+    reglas de la tabla tax_rules se cargan una vez en diccionarios y la tasa
+    resuelta de cada producto se guarda hasta que cambian las reglas, la
+    configuración o el producto, así que cobrar un producto no consulta la
+    base de datos.
+    
+    Se registra en ProductController como los índices de productos
+    (on_product_saved, on_product_removed, on_stock_changed, load). Los
+    cambios se avisan a los listeners registrados con add_listener, que
+    reciben el producto afectado (diccionario con product_id y, si cambió
+    de categoría, category_id) o None si cambiaron las reglas de categoría o
+    la tasa general.
+    """
+    
+    def __init__(self, database, default_rate=DEFAULT_TAX_RATE):
+        """
+        Inicializar motor
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            default_rate: Tasa general si system_config no tiene tax_rate
+        """
+        self.db = database
+        self.logger = logging.getLogger('pos.models.pricing_engine')
+        self._default_rate = default_rate
+        
+        # Reglas compiladas: product_id -> tasa y category_id -> tasa
+        self._product_rates = {}
+        self._category_rates = {}
+        # product_id -> (category_id, tasa resuelta)
+        self._resolved = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        
+        # Aumenta con cada cambio de reglas o configuración
+        self.version = 0
+        self.loaded = False
+    
+    @property
+    def default_rate(self):
+        """Tasa general de IVA"""
+        return self._default_rate
+    
+    def add_listener(self, listener):
+        """
+        Registrar una función que recibe los cambios de tasas
+        
+        Args:
+            listener: Función listener(producto) (producto None = todas las tasas)
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """Dejar de avisar a un listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def load(self):
+        """
+        Cargar la tasa general y las reglas desde la base de datos
+        
+        Returns:
+            Número de reglas cargadas
+        """
+        config = self.db.fetch_one(
+            "SELECT config_value FROM system_config WHERE config_key = 'tax_rate'"
+        )
+        rules = self.db.fetch_all("SELECT product_id, category_id, rate, is_exempt FROM tax_rules")
+        
+        product_rates = {}
+        category_rates = {}
+        for rule in rules:
+            rate = 0 if rule['is_exempt'] else self._parse_rate(rule['rate'])
+            if rule['product_id'] is not None:
+                product_rates[rule['product_id']] = rate
+            else:
+                category_rates[rule['category_id']] = rate
+        
+        with self._lock:
+            if config:
+                self._default_rate = self._parse_rate(config['config_value'], self._default_rate)
+            self._product_rates = product_rates
+            self._category_rates = category_rates
+            self._resolved.clear()
+            self.version += 1
+            self.loaded = True
+        
+        self.logger.info(f"Reglas de impuestos cargadas: {len(rules)} (tasa general {self._default_rate})")
+        self._notify(None)
+        return len(rules)
+    
+    def rate_for(self, product_id, category_id=None):
+        """
+        Obtener la tasa de IVA de un producto
+        
+        Args:
+            product_id: ID del producto
+            category_id: Categoría del producto (opcional)
+        
+        Returns:
+            Tasa de IVA (0 si el producto está exento)
+        """
+        with self._lock:
+            resolved = self._resolved.get(product_id)
+            if resolved is not None and resolved[0] == category_id:
+                return resolved[1]
+            
+            rate = self._product_rates.get(product_id)
+            if rate is None:
+                rate = self._category_rates.get(category_id, self._default_rate)
+            
+            if product_id is not None:
+                self._resolved[product_id] = (category_id, rate)
+            return rate
+    
+    def rate_for_product(self, product):
+        """
+        Obtener la tasa de IVA a partir de los datos de un producto
+        
+        Args:
+            product: Diccionario con product_id (o id) y category_id
+        
+        Returns:
+            Tasa de IVA
+        """
+        product_id = product.get('product_id', product.get('id'))
+        
+        if 'category_id' in product:
+            category_id = product['category_id']
+        elif self._category_rates:
+            # Líneas de venta sin categoría: se lee una vez y queda resuelta
+            with self._lock:
+                resolved = self._resolved.get(product_id)
+            if resolved is not None:
+                return resolved[1]
+            row = self.db.fetch_one("SELECT category_id FROM products WHERE product_id = ?", [product_id])
+            category_id = row['category_id'] if row else None
+        else:
+            category_id = None
+        
+        return self.rate_for(product_id, category_id)
+    
+    def quote(self, items):
+        """
+        Calcular subtotal, IVA y total de una lista de líneas de venta
+        
+        Usa la tasa de cada línea si la trae (tax_rate, como las del carrito),
+        de modo que el resultado coincide con los totales mostrados en caja.
+        
+        Args:
+            items: Líneas con product_id, subtotal y opcionalmente tax_rate y category_id
+        
+        Returns:
+            Diccionario con subtotal, tax y total como Money
+        """
+        subtotals = {}
+        for item in items:
+            rate = item.get('tax_rate')
+            if rate is None:
+                rate = self.rate_for_product(item)
+            subtotals[rate] = subtotals.get(rate, 0) + to_cents(item.get('subtotal', 0))
+        
+        subtotal = sum(subtotals.values())
+        tax = group_tax_cents(subtotals)
+        return {'subtotal': Money(subtotal), 'tax': Money(tax), 'total': Money(subtotal + tax)}
+    
+    def set_default_rate(self, rate):
+        """
+        Cambiar la tasa general de IVA y guardarla en system_config
+        
+        Args:
+            rate: Tasa de IVA (0.16 = 16%)
+        
+        Returns:
+            True si se guardó correctamente, False en caso contrario
+        """
+        rate = self._parse_rate(rate, None)
+        if rate is None or rate < 0:
+            return False
+        
+        try:
+            self.db.execute(
+                """
+                INSERT INTO system_config (config_key, config_value, description)
+                VALUES ('tax_rate', ?, 'Tasa de impuesto por defecto (IVA)')
+                ON CONFLICT(config_key) DO UPDATE SET config_value = excluded.config_value
+                """,
+                [str(rate)]
+            )
+        except Exception as e:
+            self.logger.error(f"Error al guardar la tasa de IVA: {e}")
+            return False
+        
+        with self._lock:
+            self._default_rate = rate
+            self._resolved.clear()
+            self.version += 1
+        
+        self._notify(None)
+        return True
+    
+    def set_product_rule(self, product_id, rate=0, exempt=False, description=None):
+        """
+        Fijar la tasa de un producto (reemplaza la regla anterior)
+        
+        Args:
+            product_id: ID del producto
+            rate: Tasa de IVA
+            exempt: True si el producto está exento
+            description: Descripción de la regla (opcional)
+        
+        Returns:
+            True si se guardó correctamente, False en caso contrario
+        """
+        return self._save_rule('product_id', product_id, rate, exempt, description)
+    
+    def set_category_rule(self, category_id, rate=0, exempt=False, description=None):
+        """
+        Fijar la tasa de una categoría (reemplaza la regla anterior)
+        
+        Args:
+            category_id: ID de la categoría
+            rate: Tasa de IVA
+            exempt: True si los productos de la categoría están exentos
+            description: Descripción de la regla (opcional)
+        
+        Returns:
+            True si se guardó correctamente, False en caso contrario
+        """
+        return self._save_rule('category_id', category_id, rate, exempt, description)
+    
+    def remove_rule(self, product_id=None, category_id=None):
+        """
+        Quitar la regla de un producto o de una categoría
+        
+        Args:
+            product_id: ID del producto (o None)
+            category_id: ID de la categoría (o None)
+        
+        Returns:
+            True si se quitó correctamente, False en caso contrario
+        """
+        if product_id is not None:
+            query, params = "DELETE FROM tax_rules WHERE product_id = ?", [product_id]
+        elif category_id is not None:
+            query, params = "DELETE FROM tax_rules WHERE category_id = ? AND product_id IS NULL", [category_id]
+        else:
+            return False
+        
+        try:
+            self.db.execute(query, params)
+        except Exception as e:
+            self.logger.error(f"Error al quitar regla de impuestos: {e}")
+            return False
+        
+        self._apply_rule(product_id, category_id, None)
+        return True
+    
+    def get_rules(self):
+        """
+        Obtener las reglas de impuestos
+        
+        Returns:
+            Lista de diccionarios con las reglas y el nombre del producto o categoría
+        """
+        return self.db.fetch_all("""
+            SELECT r.*, p.name AS product_name, c.name AS category_name
+            FROM tax_rules r
+            LEFT JOIN products p ON r.product_id = p.product_id
+            LEFT JOIN categories c ON r.category_id = c.category_id
+            ORDER BY r.category_id, r.product_id
+        """)
+    
+    def on_product_saved(self, product):
+        """
+        Olvidar la tasa resuelta de un producto modificado (puede cambiar de categoría)
+        
+        Args:
+            product: Diccionario con los datos actuales del producto
+        """
+        with self._lock:
+            resolved = self._resolved.pop(product['product_id'], None)
+        
+        # Solo cambia la tasa si cambió la categoría de un producto ya cobrado
+        if resolved is not None and resolved[0] != product.get('category_id'):
+            self._notify(product)
+    
+    def on_product_removed(self, product_id):
+        """
+        Olvidar la tasa resuelta de un producto dado de baja
+        
+        Args:
+            product_id: ID del producto
+        """
+        with self._lock:
+            self._resolved.pop(product_id, None)
+    
+    def on_stock_changed(self, product_id, quantity_change):
+        """El stock no afecta las tasas"""
+    
+    def _save_rule(self, column, target_id, rate, exempt, description):
+        rate = 0 if exempt else self._parse_rate(rate, None)
+        if target_id is None or rate is None or rate < 0:
+            return False
+        
+        scope = "product_id = ?" if column == 'product_id' else "category_id = ? AND product_id IS NULL"
+        
+        try:
+            with self.db.transaction():
+                self.db.execute(f"DELETE FROM tax_rules WHERE {scope}", [target_id])
+                self.db.execute(
+                    f"INSERT INTO tax_rules ({column}, rate, is_exempt, description) VALUES (?, ?, ?, ?)",
+                    [target_id, rate, 1 if exempt else 0, description]
+                )
+        except Exception as e:
+            self.logger.error(f"Error al guardar regla de impuestos: {e}")
+            return False
+        
+        if column == 'product_id':
+            self._apply_rule(target_id, None, rate)
+        else:
+            self._apply_rule(None, target_id, rate)
+        return True
+    
+    def _apply_rule(self, product_id, category_id, rate):
+        # Actualizar las reglas compiladas sin volver a leer la tabla
+        with self._lock:
+            if product_id is not None:
+                rates, key = self._product_rates, product_id
+            else:
+                rates, key = self._category_rates, category_id
+            
+            if rate is None:
+                rates.pop(key, None)
+            else:
+                rates[key] = rate
+            
+            if product_id is not None:
+                self._resolved.pop(product_id, None)
+            else:
+                self._resolved.clear()
+            self.version += 1
+        
+        self._notify({'product_id': product_id} if product_id is not None else None)
+    
+    def _notify(self, product):
+        for listener in list(self._listeners):
+            try:
+                listener(product)
+            except Exception as e:
+                self.logger.error(f"Error al notificar cambio de impuestos: {e}")
+    
+    @staticmethod
+    def _parse_rate(value, default=0):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
@@ -97,31 +97,106 @@ class Product:
         
         return self.db.fetch_all(query, [category_id])
     
-    def search(self, term, active_only=True):
+    def get_page(self, cursor=None, limit=100, order_by='name', category_id=None,
+                 active_only=True, low_stock_only=False):
+        """
+        Obtener una página de productos con paginación por cursor (keyset)
+        
+        En lugar de OFFSET, cada página continúa después de la última fila de la
+        anterior, de modo que el costo de una página no depende de su posición
+        en el catálogo.
+        
+        Args:
+            cursor: Posición donde continuar: None para la primera página o el
+                next_cursor devuelto por la página anterior
+            limit: Número máximo de productos de la página
+            order_by: 'name' (nombre y luego ID) o 'product_id'
+            category_id: ID de la categoría a filtrar (opcional)
+            active_only: Si es True, solo devuelve productos activos
+            low_stock_only: Si es True, solo devuelve productos con stock bajo
+        
+        Returns:
+            Diccionario con 'products' (lista de productos) y 'next_cursor'
+            (None si no hay más páginas)
+        """
+        if order_by not in ('name', 'product_id'):
+            raise ValueError(f"Orden no soportado: {order_by}")
+        
+        conditions = []
+        params = []
+        
+        # El "+" evita que SQLite elija el índice de is_active cuando hay uno
+        # que ya entrega las filas en el orden pedido (idx_products_category
+        # para una categoría por nombre, la clave primaria por ID)
+        if active_only:
+            conditions.append("+p.is_active = 1" if category_id is not None or order_by == 'product_id'
+                              else "p.is_active = 1")
+        
+        if category_id is not None:
+            conditions.append("p.category_id = ?" if order_by == 'name' else "+p.category_id = ?")
+            params.append(category_id)
+        
+        if low_stock_only:
+            conditions.append("p.stock_quantity <= p.min_stock_level")
+        
+        page = self.db.fetch_page(
+            "p.*, c.name as category_name",
+            "products p LEFT JOIN categories c ON p.category_id = c.category_id",
+            ['p.name', 'p.product_id'] if order_by == 'name' else ['p.product_id'],
+            conditions, params, cursor=cursor, limit=limit
+        )
+        
+        return {'products': page['rows'], 'next_cursor': page['next_cursor']}
+    
+    def search(self, term, active_only=True, limit=None):
         """
         Buscar productos por nombre, descripción o código de barras
         
+        Usa el índice de texto completo (prefijos, sin distinguir acentos) y
+        ordena por relevancia. Los términos de un solo carácter se buscan como
+        subcadena con LIKE.
+        
         Args:
             term: Término de búsqueda
             active_only: Si es True, solo devuelve productos activos
+            limit: Número máximo de resultados (opcional, los más relevantes)
             
         Returns:
             Lista de diccionarios con datos de productos
         """
-        query = """
-            SELECT p.*, c.name as category_name
-            FROM products p
-            LEFT JOIN categories c ON p.category_id = c.category_id
-            WHERE (p.name LIKE ? OR p.description LIKE ? OR p.barcode LIKE ?)
-        """
+        match = self.db.build_match_expression(term)
+        
+        if match is None:
+            query = """
+                SELECT p.*, c.name as category_name
+                FROM products p
+                LEFT JOIN categories c ON p.category_id = c.category_id
+                WHERE (p.name LIKE ? OR p.description LIKE ? OR p.barcode LIKE ?)
+            """
+            search_term = f"%{(term or '').strip()}%"
+            params = [search_term, search_term, search_term]
+        else:
+            query = """
+                SELECT p.*, c.name as category_name
+                FROM products_fts
+                JOIN products p ON p.product_id = products_fts.rowid
+                LEFT JOIN categories c ON p.category_id = c.category_id
+                WHERE products_fts MATCH ?
+            """
+            params = [match]
         
         if active_only:
             query += " AND p.is_active = 1"
-            
-        query += " ORDER BY p.name"
         
-        search_term = f"%{term}%"
-        params = [search_term, search_term, search_term]
+        # Por relevancia (bm25 configurado en la migración del índice)
+        if match is None:
+            query += " ORDER BY p.name"
+        else:
+            query += " ORDER BY products_fts.rank"
+        
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
         
         return self.db.fetch_all(query, params)
     
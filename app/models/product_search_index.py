@@ -0,0 +1,262 @@
+# app/models/product_search_index.py
+import re
+import heapq
+import logging
+import threading
+import unicodedata
+
+# Campos del producto que se guardan en el índice (lo necesario para las sugerencias)
+SUGGESTION_FIELDS = ('product_id', 'name', 'barcode', 'price', 'stock_quantity')
+
+# Acentos y diacríticos que quedan separados al descomponer el texto (NFKD)
+COMBINING_MARKS = re.compile(r'[\u0300-\u036f]')
+
+def normalize_text(text):
+    """
+    Normalizar texto para la búsqueda: minúsculas y sin acentos
+    
+    Args:
+        text: Texto original
+    
+    Returns:
+        Texto normalizado ("Café" -> "cafe")
+    """
+    text = text or ''
+    if text.isascii():
+        return text.lower()
+    
+    return COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text)).lower()
+
+def tokenize(text):
+    """Dividir un texto normalizado en palabras"""
+    return re.findall(r'\w+', normalize_text(text))
+
+class _TrieNode:
+    """Nodo del árbol de prefijos"""
+    
+    __slots__ = ('children', 'product_ids')
+    
+    def __init__(self):
+        self.children = {}
+        # Productos con una palabra que termina en este nodo
+        self.product_ids = set()
+
+class ProductSearchIndex:
+    """
+    Índice en memoria de prefijos sobre nombres y códigos de productos
+    
+    Permite buscar productos mientras el cajero escribe sin consultar SQLite
+    en cada tecla. Cada palabra del nombre y el código de barras se guardan en
+    un árbol de prefijos; una búsqueda devuelve los productos que tienen, para
+    cada palabra escrita, alguna palabra que empieza por ella.
+    """
+    
+    def __init__(self, database):
+        """
+        Inicializar índice
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+        """
+        self.db = database
+        self.logger = logging.getLogger('pos.models.product_search_index')
+        
+        self._root = _TrieNode()
+        # product_id -> datos del producto para las sugerencias
+        self._products = {}
+        # product_id -> palabras indexadas, para poder quitarlas al cambiar el producto
+        self._tokens = {}
+        # product_id -> nombre normalizado, para ordenar los resultados
+        self._names = {}
+        self._lock = threading.Lock()
+        
+        self.loaded = False
+    
+    def __len__(self):
+        return len(self._products)
+    
+    def load(self):
+        """
+        Cargar el índice con los productos activos
+        
+        Returns:
+            Número de productos cargados
+        """
+        rows = self.db.fetch_all(
+            f"SELECT {', '.join(SUGGESTION_FIELDS)} FROM products WHERE is_active = 1"
+        )
+        
+        with self._lock:
+            self._root = _TrieNode()
+            self._products.clear()
+            self._tokens.clear()
+            self._names.clear()
+            
+            for product in rows:
+                self._store(product)
+            
+            self.loaded = True
+        
+        self.logger.info(f"Índice de búsqueda de productos cargado: {len(rows)} productos")
+        return len(rows)
+    
+    def search(self, text, limit=20):
+        """
+        Buscar productos cuyo nombre o código empiece por las palabras escritas
+        
+        Args:
+            text: Texto escrito por el cajero
+            limit: Número máximo de resultados
+        
+        Returns:
+            Lista de diccionarios con los datos de los productos. Primero los que
+            coinciden con el código de barras o empiezan por la primera palabra,
+            luego en orden alfabético.
+        """
+        words = tokenize(text)
+        if not words:
+            return []
+        
+        # Buscar primero las palabras más largas: suelen tener menos candidatos
+        words_by_length = sorted(set(words), key=len, reverse=True)
+        
+        with self._lock:
+            candidates = None
+            for word in words_by_length:
+                matches = self._collect(word, candidates)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+            
+            first_word = words[0]
+            query = ''.join(words)
+            
+            def sort_key(product_id):
+                name = self._names[product_id]
+                return (
+                    self._products[product_id]['barcode'] != query,
+                    not name.startswith(first_word),
+                    name
+                )
+            
+            best = heapq.nsmallest(limit, candidates, key=sort_key)
+            return [dict(self._products[product_id]) for product_id in best]
+    
+    def on_product_saved(self, product):
+        """
+        Actualizar el índice tras crear o modificar un producto
+        
+        Args:
+            product: Diccionario con los datos actuales del producto
+        """
+        with self._lock:
+            self._discard(product['product_id'])
+            
+            if product.get('is_active'):
+                self._store(product)
+    
+    def on_product_removed(self, product_id):
+        """
+        Quitar un producto del índice
+        
+        Args:
+            product_id: ID del producto
+        """
+        with self._lock:
+            self._discard(product_id)
+    
+    def on_stock_changed(self, product_id, quantity_change):
+        """
+        Actualizar el stock mostrado en las sugerencias
+        
+        Args:
+            product_id: ID del producto
+            quantity_change: Cambio en la cantidad (positivo o negativo)
+        """
+        with self._lock:
+            product = self._products.get(product_id)
+            if product is not None:
+                product['stock_quantity'] = (product.get('stock_quantity') or 0) + quantity_change
+    
+    def _collect(self, prefix, candidates=None):
+        """
+        Obtener los productos con alguna palabra que empieza por el prefijo
+        (requiere tener el bloqueo)
+        
+        Args:
+            prefix: Prefijo normalizado
+            candidates: Conjunto de productos ya filtrados (opcional). Si es
+                pequeño, se verifica cada candidato en lugar de recorrer el árbol.
+        
+        Returns:
+            Conjunto de IDs de productos
+        """
+        if candidates is not None and len(candidates) < 64:
+            return {
+                product_id for product_id in candidates
+                if any(token.startswith(prefix) for token in self._tokens[product_id])
+            }
+        
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        
+        # Recorrer el subárbol bajo el prefijo
+        result = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            result.update(node.product_ids)
+            stack.extend(node.children.values())
+        
+        return result
+    
+    def _store(self, product):
+        """Agregar un producto al índice (requiere tener el bloqueo)"""
+        product_id = product['product_id']
+        tokens = set(tokenize(product.get('name')))
+        
+        barcode = product.get('barcode')
+        if barcode:
+            tokens.add(normalize_text(barcode))
+        
+        for token in tokens:
+            node = self._root
+            for char in token:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _TrieNode()
+                node = child
+            node.product_ids.add(product_id)
+        
+        self._products[product_id] = {field: product.get(field) for field in SUGGESTION_FIELDS}
+        self._tokens[product_id] = tokens
+        self._names[product_id] = normalize_text(product.get('name'))
+    
+    def _discard(self, product_id):
+        """Quitar un producto del índice (requiere tener el bloqueo)"""
+        tokens = self._tokens.pop(product_id, None)
+        self._products.pop(product_id, None)
+        self._names.pop(product_id, None)
+        
+        if not tokens:
+            return
+        
+        for token in tokens:
+            # Guardar el camino para podar los nodos que quedan vacíos
+            path = [self._root]
+            for char in token:
+                node = path[-1].children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                path[-1].product_ids.discard(product_id)
+                
+                for depth in range(len(token), 0, -1):
+                    node = path[depth]
+                    if node.product_ids or node.children:
+                        break
+                    del path[depth - 1].children[token[depth - 1]]
@@ -0,0 +1,293 @@
+# app/models/register_counters.py
+import logging
+import threading
+
+from ..utils.money import to_cents
+from .migrations import REGISTER_COUNTER_COLUMNS, REGISTER_COUNTER_AGGREGATES
+
+# Nombres de método de pago aceptados -> clave guardada en sales.payment_method
+PAYMENT_METHOD_ALIASES = {
+    'cash': 'cash',
+    'efectivo': 'cash',
+    'card': 'card',
+    'tarjeta': 'card',
+    'transfer': 'transfer',
+    'transferencia': 'transfer'
+}
+
+def normalize_payment_method(method):
+    """
+    Obtener la clave de un método de pago
+    
+    Args:
+        method: Método de pago ('cash', 'Efectivo', 'Tarjeta', ...)
+    
+    Returns:
+        'cash', 'card', 'transfer' o el nombre recibido en minúsculas
+    """
+    key = (method or '').strip().lower()
+    return PAYMENT_METHOD_ALIASES.get(key, key or 'other')
+
+class RegisterCounters:
+    """
+    Totales acumulados de cada caja (cash_registers)
+    
+    Cada venta y cancelación suma a los contadores de su caja dentro de la
+    misma transacción que la registra, así que los reportes X y Z leen una
+    sola fila en vez de recorrer las ventas del turno. verify() los compara
+    con la tabla sales y corrige cualquier diferencia.
+    """
+    
+    # Columna del importe de cada método de pago; los demás van a other_cents
+    AMOUNT_COLUMNS = {'cash': 'cash_cents', 'card': 'card_cents', 'transfer': 'transfer_cents'}
+    
+    def __init__(self, database):
+        """
+        Inicializar contadores
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+        """
+        self.db = database
+        self.logger = logging.getLogger('pos.models.register_counters')
+    
+    def open_register_id(self, user_id):
+        """
+        Obtener la caja abierta de un cajero
+        
+        Args:
+            user_id: ID del usuario
+        
+        Returns:
+            ID de la caja o None si el cajero no tiene caja abierta
+        """
+        row = self.db.fetch_one(
+            "SELECT register_id FROM cash_registers WHERE user_id = ? AND status = 'open'",
+            [user_id]
+        )
+        return row['register_id'] if row else None
+    
+    def record_sale(self, register_id, payment_method, total_cents):
+        """
+        Sumar una venta a los contadores (llamar dentro de la transacción de la venta)
+        
+        Args:
+            register_id: ID de la caja (si es None no se hace nada)
+            payment_method: Clave del método de pago
+            total_cents: Total de la venta en centavos
+        """
+        if register_id is None:
+            return
+        
+        column = self._amount_column(payment_method)
+        self.db.execute(
+            f"""UPDATE cash_registers
+                SET paid_count = paid_count + 1, {column} = {column} + ?
+                WHERE register_id = ?""",
+            [total_cents, register_id]
+        )
+    
+    def record_cancel(self, register_id, payment_method, total_cents):
+        """
+        Pasar una venta pagada a canceladas (llamar dentro de la transacción de la cancelación)
+        
+        Args:
+            register_id: ID de la caja de la venta (si es None no se hace nada)
+            payment_method: Clave del método de pago de la venta
+            total_cents: Total de la venta en centavos
+        """
+        if register_id is None:
+            return
+        
+        column = self._amount_column(payment_method)
+        self.db.execute(
+            f"""UPDATE cash_registers
+                SET paid_count = paid_count - 1, {column} = {column} - ?,
+                    canceled_count = canceled_count + 1, canceled_cents = canceled_cents + ?
+                WHERE register_id = ?""",
+            [total_cents, total_cents, register_id]
+        )
+    
+    def report(self, register_id):
+        """
+        Generar el reporte de una caja a partir de sus contadores
+        
+        Sirve como reporte X (caja abierta) y como base del reporte Z (cierre).
+        
+        Args:
+            register_id: ID de la caja
+        
+        Returns:
+            Diccionario con los totales del reporte o None si la caja no existe
+        """
+        register = self.db.fetch_one("""
+            SELECT r.*, u.username, u.full_name
+            FROM cash_registers r
+            JOIN users u ON r.user_id = u.user_id
+            WHERE r.register_id = ?
+        """, [register_id])
+        
+        if not register:
+            return None
+        
+        sales_cents = register['cash_cents'] + register['card_cents'] + register['transfer_cents']
+        expected_cents = to_cents(register['opening_amount']) + register['cash_cents']
+        closing_amount = register['closing_amount']
+        
+        return {
+            'register': register,
+            'sales_count': register['paid_count'],
+            'canceled_count': register['canceled_count'],
+            'total_cash': register['cash_cents'] / 100,
+            'total_card': register['card_cents'] / 100,
+            'total_transfer': register['transfer_cents'] / 100,
+            'total_other': register['other_cents'] / 100,
+            'total_sales': sales_cents / 100,
+            'total_canceled': register['canceled_cents'] / 100,
+            'opening_amount': register['opening_amount'],
+            'closing_amount': closing_amount,
+            'expected_amount': expected_cents / 100,
+            'difference': (to_cents(closing_amount) - expected_cents) / 100 if closing_amount is not None else None,
+            'opening_time': register['opening_time'],
+            'closing_time': register['closing_time']
+        }
+    
+    def recompute(self, register_id):
+        """
+        Calcular los contadores de una caja a partir de la tabla sales
+        
+        Args:
+            register_id: ID de la caja
+        
+        Returns:
+            Diccionario columna -> valor
+        """
+        row = self.db.fetch_one(
+            f"SELECT {REGISTER_COUNTER_AGGREGATES} FROM sales WHERE register_id = ?",
+            [register_id]
+        )
+        return row
+    
+    def verify(self, register_ids=None, repair=True):
+        """
+        Comparar los contadores con las ventas y corregir las diferencias
+        
+        Args:
+            register_ids: Cajas a verificar (por defecto las abiertas)
+            repair: Si es True se guardan los valores calculados
+        
+        Returns:
+            Lista de diferencias: diccionarios con register_id, stored y actual
+        """
+        if register_ids is None:
+            rows = self.db.fetch_all("SELECT register_id FROM cash_registers WHERE status = 'open'")
+            register_ids = [row['register_id'] for row in rows]
+        
+        columns = ', '.join(REGISTER_COUNTER_COLUMNS)
+        mismatches = []
+        
+        for register_id in register_ids:
+            # En una transacción para que ninguna venta se registre entre la
+            # lectura y la corrección
+            with self.db.transaction():
+                stored = self.db.fetch_one(
+                    f"SELECT {columns} FROM cash_registers WHERE register_id = ?", [register_id]
+                )
+                if not stored:
+                    continue
+                
+                actual = self.recompute(register_id)
+                if stored == actual:
+                    continue
+                
+                mismatches.append({'register_id': register_id, 'stored': stored, 'actual': actual})
+                self.logger.warning(f"Contadores de la caja {register_id} no coinciden con las ventas: "
+                                    f"{stored} != {actual}")
+                
+                if repair:
+                    assignments = ', '.join(f"{column} = ?" for column in REGISTER_COUNTER_COLUMNS)
+                    self.db.execute(
+                        f"UPDATE cash_registers SET {assignments} WHERE register_id = ?",
+                        [actual[column] for column in REGISTER_COUNTER_COLUMNS] + [register_id]
+                    )
+        
+        return mismatches
+    
+    def _amount_column(self, payment_method):
+        return self.AMOUNT_COLUMNS.get(normalize_payment_method(payment_method), 'other_cents')
+
+class RegisterReconciler:
+    """
+    Hilo que verifica periódicamente los contadores de las cajas abiertas
+    
+    Los contadores se actualizan en la misma transacción que cada venta, así
+    que no deberían desviarse; la verificación detecta cambios hechos por
+    fuera de los controladores (por ejemplo ediciones manuales de la base de
+    datos) y los corrige antes del cierre.
+    """
+    
+    def __init__(self, counters, interval=300):
+        """
+        Inicializar verificador
+        
+        Args:
+            counters: RegisterCounters a verificar
+            interval: Segundos entre verificaciones
+        """
+        self.counters = counters
+        self.interval = interval
+        self.logger = logging.getLogger('pos.models.register_reconciler')
+        
+        # Diferencias encontradas en la última verificación
+        self.last_mismatches = []
+        
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """
+        Iniciar el hilo de verificación
+        
+        Returns:
+            True si se inició (o ya estaba en marcha)
+        """
+        if self._thread and self._thread.is_alive():
+            return True
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="register-reconciler", daemon=True)
+        self._thread.start()
+        
+        self.logger.info("Verificación de contadores de caja iniciada")
+        return True
+    
+    def stop(self, timeout=5):
+        """
+        Detener el hilo de verificación
+        
+        Args:
+            timeout: Tiempo máximo de espera en segundos
+        """
+        self._stop_event.set()
+        
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def check_now(self):
+        """
+        Verificar y corregir los contadores de las cajas abiertas
+        
+        Returns:
+            Lista de diferencias encontradas
+        """
+        self.last_mismatches = self.counters.verify()
+        return self.last_mismatches
+    
+    def _run(self):
+        """Bucle del hilo de verificación"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_now()
+            except Exception as e:
+                self.logger.error(f"Error al verificar los contadores de caja: {e}")
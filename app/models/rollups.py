@@ -0,0 +1,377 @@
+# app/models/rollups.py
+import sys
+import logging
+import argparse
+
+from ..utils.money import amounts_from_cents
+from .migrations import ROLLUP_SOURCES, rollup_fill_query
+
+# Agrupación de cada período sobre sale_day (texto YYYY-MM-DD)
+PERIOD_EXPRESSIONS = {
+    'day': ('sale_day', 'Día'),
+    'week': ("strftime('%Y-%W', sale_day)", 'Semana'),
+    'month': ('substr(sale_day, 1, 7)', 'Mes'),
+    'year': ('substr(sale_day, 1, 4)', 'Año')
+}
+
+# Límites de fecha cuando no se indica un rango
+FIRST_DAY = '0000-01-01'
+LAST_DAY = '9999-12-31'
+
+class SalesRollup:
+    """
+    Resúmenes de ventas materializados
+    
+    - sales_daily_rollup: ventas por día, método de pago y estado
+    - sales_hourly_rollup: ventas por día, hora y estado
+    - product_daily_rollup: cantidades e importes por día, producto y estado
+    
+    Cada fila acumula conteos e importes en centavos. Los disparadores de
+    las tablas sales y sale_items (SALES_ROLLUP_TRIGGERS y
+    DRILLDOWN_ROLLUP_TRIGGERS) los actualizan en la misma transacción que
+    cada venta, cancelación o corrección, así que los reportes leen unas
+    pocas filas por día en vez de agrupar las ventas por DATE(sale_date),
+    que no puede usar índices, o recorrer los detalles de venta. rebuild()
+    los vuelve a calcular a partir de las ventas y verify() los compara.
+    """
+    
+    # Columnas en centavos que se devuelven en pesos
+    SUMMARY_AMOUNTS = ('total_amount', 'total_tax', 'cash_amount', 'card_amount', 'transfer_amount')
+    CASH_FLOW_AMOUNTS = ('cash_sales', 'card_sales', 'transfer_sales', 'total_sales')
+    PERIOD_AMOUNTS = ('total_amount', 'total_tax', 'average_sale')
+    
+    def __init__(self, database):
+        """
+        Inicializar resumen
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+        """
+        self.db = database
+        self.logger = logging.getLogger('pos.models.rollups')
+    
+    def rebuild(self, start_date=None, end_date=None, tables=None):
+        """
+        Volver a calcular los resúmenes a partir de las ventas
+        
+        Args:
+            start_date: Primer día a recalcular (YYYY-MM-DD, por defecto todo)
+            end_date: Último día a recalcular (YYYY-MM-DD, por defecto todo)
+            tables: Resúmenes a recalcular (por defecto todos)
+        
+        Returns:
+            Diccionario resumen -> número de filas escritas
+        """
+        start_day = start_date or FIRST_DAY
+        end_day = end_date or LAST_DAY
+        result = {}
+        
+        with self.db.transaction():
+            for table in tables or ROLLUP_SOURCES:
+                date_column = ROLLUP_SOURCES[table]['date_column']
+                self.db.execute(f"DELETE FROM {table} WHERE sale_day BETWEEN ? AND ?", [start_day, end_day])
+                self.db.execute(
+                    rollup_fill_query(table, f"{date_column} BETWEEN ? AND ?"),
+                    [f"{start_day} 00:00:00", f"{end_day} 23:59:59"]
+                )
+                row = self.db.fetch_one(
+                    f"SELECT COUNT(*) AS rows FROM {table} WHERE sale_day BETWEEN ? AND ?",
+                    [start_day, end_day]
+                )
+                result[table] = row['rows']
+        
+        self.logger.info(f"Resúmenes de ventas recalculados de {start_day} a {end_day}: {result}")
+        return result
+    
+    def verify(self, start_date=None, end_date=None, repair=False):
+        """
+        Comparar los resúmenes con las ventas
+        
+        Args:
+            start_date: Primer día a verificar (YYYY-MM-DD, por defecto todo)
+            end_date: Último día a verificar (YYYY-MM-DD, por defecto todo)
+            repair: Si es True se recalculan los resúmenes con diferencias
+        
+        Returns:
+            Lista de diferencias: diccionarios con table, key, stored y actual
+            (medidas guardadas y calculadas; None si la fila no existe)
+        """
+        start_day = start_date or FIRST_DAY
+        end_day = end_date or LAST_DAY
+        mismatches = []
+        
+        # En una transacción para comparar las dos versiones del mismo estado
+        with self.db.transaction():
+            for table, source in ROLLUP_SOURCES.items():
+                stored = self._rows_by_key(table, self.db.fetch_all(
+                    f"SELECT * FROM {table} WHERE sale_day BETWEEN ? AND ?", [start_day, end_day]
+                ))
+                
+                columns = ', '.join(source['keys'] + source['measures'])
+                actual = self._rows_by_key(table, self.db.fetch_all(
+                    f"""WITH actual ({columns}) AS (
+                        SELECT {source['select']}
+                        WHERE {source['date_column']} BETWEEN ? AND ?
+                        GROUP BY {source['group_by']}
+                    )
+                    SELECT * FROM actual""",
+                    [f"{start_day} 00:00:00", f"{end_day} 23:59:59"]
+                ))
+                
+                for key in sorted(stored.keys() | actual.keys()):
+                    if stored.get(key) != actual.get(key):
+                        mismatches.append({'table': table, 'key': key,
+                                           'stored': stored.get(key), 'actual': actual.get(key)})
+        
+        if mismatches:
+            tables = sorted({mismatch['table'] for mismatch in mismatches})
+            self.logger.warning(f"{len(mismatches)} filas de resúmenes no coinciden con las ventas ({', '.join(tables)})")
+            if repair:
+                self.rebuild(start_date, end_date, tables)
+        
+        return mismatches
+    
+    def summary_by_day(self, start_date, end_date):
+        """
+        Obtener resumen de ventas pagadas agrupadas por día
+        
+        Args:
+            start_date: Fecha de inicio (YYYY-MM-DD)
+            end_date: Fecha de fin (YYYY-MM-DD)
+        
+        Returns:
+            Lista de diccionarios con date, total_sales e importes en pesos
+        """
+        query = """
+            SELECT
+                sale_day as date,
+                SUM(sales_count) as total_sales,
+                SUM(total_cents) as total_amount,
+                SUM(tax_cents) as total_tax,
+                SUM(CASE WHEN payment_method = 'cash' THEN total_cents ELSE 0 END) as cash_amount,
+                SUM(CASE WHEN payment_method = 'card' THEN total_cents ELSE 0 END) as card_amount,
+                SUM(CASE WHEN payment_method = 'transfer' THEN total_cents ELSE 0 END) as transfer_amount
+            FROM sales_daily_rollup
+            WHERE sale_day BETWEEN ? AND ?
+            AND payment_status = 'paid'
+            GROUP BY sale_day
+            HAVING SUM(sales_count) > 0
+            ORDER BY sale_day
+        """
+        
+        return amounts_from_cents(self.db.fetch_all(query, [start_date, end_date]), self.SUMMARY_AMOUNTS)
+    
+    def cash_flow(self, date):
+        """
+        Obtener el flujo de caja de un día
+        
+        Args:
+            date: Fecha (YYYY-MM-DD)
+        
+        Returns:
+            Diccionario con ventas por método de pago, total y transacciones
+        """
+        query = """
+            SELECT
+                SUM(CASE WHEN payment_method = 'cash' THEN total_cents ELSE 0 END) as cash_sales,
+                SUM(CASE WHEN payment_method = 'card' THEN total_cents ELSE 0 END) as card_sales,
+                SUM(CASE WHEN payment_method = 'transfer' THEN total_cents ELSE 0 END) as transfer_sales,
+                SUM(total_cents) as total_sales,
+                COALESCE(SUM(sales_count), 0) as total_transactions
+            FROM sales_daily_rollup
+            WHERE sale_day = ?
+            AND payment_status = 'paid'
+        """
+        
+        cash_flow = self.db.fetch_one(query, [date])
+        if cash_flow:
+            amounts_from_cents([cash_flow], self.CASH_FLOW_AMOUNTS)
+        return cash_flow
+    
+    def totals_by_period(self, period='day', limit=30):
+        """
+        Obtener totales de ventas pagadas por período
+        
+        Args:
+            period: Período de agrupación ('day', 'week', 'month', 'year')
+            limit: Número de períodos más recientes
+        
+        Returns:
+            Lista con period, period_type, total_sales e importes en pesos
+        """
+        # Período no válido: usar día por defecto
+        expression, period_name = PERIOD_EXPRESSIONS.get(period, PERIOD_EXPRESSIONS['day'])
+        
+        query = f"""
+            SELECT
+                {expression} as period,
+                '{period_name}' as period_type,
+                SUM(sales_count) as total_sales,
+                SUM(total_cents) as total_amount,
+                SUM(tax_cents) as total_tax,
+                CAST(SUM(total_cents) AS REAL) / SUM(sales_count) as average_sale
+            FROM sales_daily_rollup
+            WHERE payment_status = 'paid'
+            GROUP BY {expression}
+            HAVING SUM(sales_count) > 0
+            ORDER BY {expression} DESC
+            LIMIT ?
+        """
+        
+        return amounts_from_cents(self.db.fetch_all(query, [limit]), self.PERIOD_AMOUNTS)
+    
+    def sales_by_hour(self, start_date, end_date):
+        """
+        Obtener la distribución por hora de las ventas pagadas
+        
+        Args:
+            start_date: Fecha de inicio (YYYY-MM-DD)
+            end_date: Fecha de fin (YYYY-MM-DD)
+        
+        Returns:
+            Lista con hour, total_sales y total_amount (en pesos) por hora con ventas
+        """
+        query = """
+            SELECT
+                sale_hour as hour,
+                SUM(sales_count) as total_sales,
+                SUM(total_cents) as total_amount
+            FROM sales_hourly_rollup
+            WHERE sale_day BETWEEN ? AND ?
+            AND payment_status = 'paid'
+            GROUP BY sale_hour
+            HAVING SUM(sales_count) > 0
+            ORDER BY sale_hour
+        """
+        
+        return amounts_from_cents(self.db.fetch_all(query, [start_date, end_date]), ('total_amount',))
+    
+    def top_products(self, start_date=None, end_date=None, limit=10):
+        """
+        Obtener los productos más vendidos (ventas pagadas)
+        
+        Args:
+            start_date: Fecha de inicio (YYYY-MM-DD, opcional)
+            end_date: Fecha de fin (YYYY-MM-DD, opcional)
+            limit: Límite de resultados
+        
+        Returns:
+            Lista con product_id, product_name, barcode, total_quantity y total_amount
+        """
+        query = """
+            SELECT
+                p.product_id,
+                p.name as product_name,
+                p.barcode,
+                r.total_quantity,
+                r.total_amount
+            FROM (
+                SELECT product_id, SUM(quantity) as total_quantity, SUM(total_cents) as total_amount
+                FROM product_daily_rollup
+                WHERE sale_day BETWEEN ? AND ?
+                AND payment_status = 'paid'
+                GROUP BY product_id
+                HAVING SUM(quantity) > 0
+            ) r
+            JOIN products p ON r.product_id = p.product_id
+            ORDER BY r.total_quantity DESC
+            LIMIT ?
+        """
+        
+        params = [start_date or FIRST_DAY, end_date or LAST_DAY, limit]
+        return amounts_from_cents(self.db.fetch_all(query, params), ('total_amount',))
+    
+    def category_mix(self, start_date=None, end_date=None):
+        """
+        Obtener las ventas pagadas por categoría de producto
+        
+        Los productos se agrupan por su categoría actual.
+        
+        Args:
+            start_date: Fecha de inicio (YYYY-MM-DD, opcional)
+            end_date: Fecha de fin (YYYY-MM-DD, opcional)
+        
+        Returns:
+            Lista con category_id, category_name, total_quantity, total_amount
+            y share (fracción del importe total), de mayor a menor importe
+        """
+        query = """
+            SELECT
+                p.category_id,
+                COALESCE(c.name, 'Sin categoría') as category_name,
+                SUM(r.total_quantity) as total_quantity,
+                SUM(r.total_amount) as total_amount
+            FROM (
+                SELECT product_id, SUM(quantity) as total_quantity, SUM(total_cents) as total_amount
+                FROM product_daily_rollup
+                WHERE sale_day BETWEEN ? AND ?
+                AND payment_status = 'paid'
+                GROUP BY product_id
+            ) r
+            JOIN products p ON r.product_id = p.product_id
+            LEFT JOIN categories c ON p.category_id = c.category_id
+            GROUP BY p.category_id
+            HAVING SUM(r.total_quantity) > 0
+            ORDER BY total_amount DESC
+        """
+        
+        rows = self.db.fetch_all(query, [start_date or FIRST_DAY, end_date or LAST_DAY])
+        total_cents = sum(row['total_amount'] for row in rows)
+        for row in rows:
+            row['share'] = row['total_amount'] / total_cents if total_cents else 0
+        
+        return amounts_from_cents(rows, ('total_amount',))
+    
+    def _rows_by_key(self, table, rows):
+        # Filas de un resumen como clave -> medidas, sin las filas en cero
+        source = ROLLUP_SOURCES[table]
+        result = {}
+        for row in rows:
+            measures = tuple(row[measure] or 0 for measure in source['measures'])
+            if any(measures):
+                result[tuple(row[key] for key in source['keys'])] = measures
+        return result
+
+def main(argv=None):
+    """Recalcular o verificar los resúmenes de ventas desde la línea de comandos"""
+    from .database import Database
+    from ..utils.config import Config
+    
+    parser = argparse.ArgumentParser(description="Recalcular o verificar los resúmenes de ventas materializados")
+    parser.add_argument("--db", help="Ruta de la base de datos (por defecto la de la configuración)")
+    parser.add_argument("--from", dest="start_date", help="Primer día (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end_date", help="Último día (YYYY-MM-DD)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Solo comparar los resúmenes con las ventas (sale con código 1 si hay diferencias)")
+    args = parser.parse_args(argv)
+    
+    db_path = args.db
+    if not db_path:
+        config = Config()
+        config.load_config()
+        db_path = config.get("database_path", "../database/pos_database.db")
+    
+    database = Database(db_path)
+    database.connect()
+    try:
+        if not database.migrate():
+            print("No se pudo actualizar el esquema de la base de datos", file=sys.stderr)
+            return 1
+        
+        rollup = SalesRollup(database)
+        if args.verify:
+            mismatches = rollup.verify(args.start_date, args.end_date)
+            for mismatch in mismatches:
+                print(f"{mismatch['table']} {mismatch['key']}: guardado {mismatch['stored']}, "
+                      f"ventas {mismatch['actual']}")
+            print(f"Diferencias: {len(mismatches)}")
+            return 1 if mismatches else 0
+        
+        for table, rows in rollup.rebuild(args.start_date, args.end_date).items():
+            print(f"{table}: {rows} filas")
+        return 0
+    finally:
+        database.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,16 @@
 # app/models/sale.py
 from datetime import datetime, timedelta
 
+from ..utils.money import to_cents
+from .register_counters import RegisterCounters, normalize_payment_method
+from .rollups import SalesRollup
+
 class Sale:
     """Modelo para ventas del sistema"""
     
+    # Máximo de productos por sentencia de actualización de stock (2 parámetros cada uno)
+    STOCK_UPDATE_CHUNK = 400
+    
     def __init__(self, database):
         """
         Inicializar modelo con una conexión a la base de datos
@@ -12,6 +19,8 @@ class Sale:
             database: Objeto de conexión a la base de datos
         """
         self.db = database
+        self.register_counters = RegisterCounters(database)
+        self.rollup = SalesRollup(database)
     
     def get_by_id(self, sale_id):
         """
@@ -62,7 +71,8 @@ class Sale:
         Args:
             user_id: ID del usuario que realiza la venta
             items: Lista de items a vender (cada uno con product_id, quantity, unit_price)
-            payment_method: Método de pago
+            payment_method: Método de pago ('cash', 'card', 'transfer' o su
+                nombre en la interfaz)
             total_amount: Monto total de la venta
             tax_amount: Monto de impuestos
             discount_amount: Monto de descuento
@@ -73,100 +83,89 @@ class Sale:
             ID de la venta creada o None si hay error
         """
         try:
-            # Iniciar transacción
-            self.db.begin_transaction()
-            
-            # Insertar cabecera de venta
-            sale_query = """
-                INSERT INTO sales (
-                    user_id, customer_name, total_amount, tax_amount, 
-                    discount_amount, payment_method, payment_status, notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """
+            payment_method = normalize_payment_method(payment_method)
+            total_cents = to_cents(total_amount)
             
-            sale_params = [
-                user_id,
-                customer_name,
-                total_amount,
-                tax_amount,
-                discount_amount,
-                payment_method,
-                'paid',  # Estado inicial
-                notes
-            ]
-            
-            sale_id = self.db.execute(sale_query, sale_params)
-            
-            if not sale_id:
-                raise Exception("No se pudo crear la venta")
-            
-            # Insertar items de venta
-            for item in items:
-                product_id = item['product_id']
-                quantity = item['quantity']
-                unit_price = item['unit_price']
-                discount = item.get('discount', 0)
-                subtotal = quantity * unit_price - discount
+            # Ejecutar como una única transacción
+            with self.db.transaction():
+                # La venta se asocia a la caja abierta del cajero
+                register_id = self.register_counters.open_register_id(user_id)
                 
-                item_query = """
-                    INSERT INTO sale_items (
-                        sale_id, product_id, quantity, unit_price, discount, subtotal
-                    ) VALUES (?, ?, ?, ?, ?, ?)
+                # Insertar cabecera de venta
+                sale_query = """
+                    INSERT INTO sales (
+                        user_id, customer_name, total_amount, tax_amount, 
+                        discount_amount, payment_method, payment_status, notes, register_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """
                 
-                item_params = [
-                    sale_id,
-                    product_id,
-                    quantity,
-                    unit_price,
-                    discount,
-                    subtotal
+                # Los importes se convierten una vez a centavos y se guardan en pesos
+                sale_params = [
+                    user_id,
+                    customer_name,
+                    total_cents / 100,
+                    to_cents(tax_amount) / 100,
+                    to_cents(discount_amount) / 100,
+                    payment_method,
+                    'paid',  # Estado inicial
+                    notes,
+                    register_id
                 ]
                 
-                self.db.execute(item_query, item_params)
+                sale_id = self.db.execute(sale_query, sale_params)
                 
-                # Actualizar stock del producto
-                stock_query = """
-                    UPDATE products
-                    SET stock_quantity = stock_quantity - ?,
-                        updated_at = ?
-                    WHERE product_id = ?
-                """
+                if not sale_id:
+                    raise Exception("No se pudo crear la venta")
                 
-                stock_params = [
-                    quantity,
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    product_id
-                ]
+                # Totales de la caja en la misma transacción que la venta
+                self.register_counters.record_sale(register_id, payment_method, total_cents)
                 
-                self.db.execute(stock_query, stock_params)
+                # Preparar items y movimientos para insertarlos en lote
+                item_rows = []
+                movement_rows = []
+                stock_changes = {}
                 
-                # Registrar movimiento de inventario
-                movement_query = """
-                    INSERT INTO inventory_movements (
-                        product_id, user_id, movement_type, quantity, reference_id, notes
+                for item in items:
+                    product_id = item['product_id']
+                    quantity = item['quantity']
+                    unit_price_cents = to_cents(item['unit_price'])
+                    discount_cents = to_cents(item.get('discount', 0))
+                    subtotal_cents = quantity * unit_price_cents - discount_cents
+                    
+                    item_rows.append((sale_id, product_id, quantity, unit_price_cents / 100,
+                                      discount_cents / 100, subtotal_cents / 100))
+                    movement_rows.append((
+                        product_id,
+                        user_id,
+                        'sale',
+                        -quantity,  # Negativo porque es una salida
+                        sale_id,
+                        f"Venta #{sale_id}"
+                    ))
+                    
+                    # Agrupar cantidades por producto
+                    stock_changes[product_id] = stock_changes.get(product_id, 0) - quantity
+                
+                # Insertar items de venta
+                self.db.execute_many("""
+                    INSERT INTO sale_items (
+                        sale_id, product_id, quantity, unit_price, discount, subtotal
                     ) VALUES (?, ?, ?, ?, ?, ?)
-                """
+                """, item_rows)
                 
-                movement_params = [
-                    product_id,
-                    user_id,
-                    'sale',
-                    -quantity,  # Negativo porque es una salida
-                    sale_id,
-                    f"Venta #{sale_id}"
-                ]
+                # Actualizar stock de los productos
+                self._apply_stock_changes(stock_changes)
                 
-                self.db.execute(movement_query, movement_params)
-            
-            # Confirmar transacción
-            self.db.commit_transaction()
+                # Registrar movimientos de inventario
+                self.db.execute_many("""
+                    INSERT INTO inventory_movements (
+                        product_id, user_id, movement_type, quantity, reference_id, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, movement_rows)
             
             return sale_id
             
         except Exception as e:
-            # Revertir transacción en caso de error
-            self.db.rollback_transaction()
             print(f"Error al crear venta: {e}")
             return None
     
@@ -183,96 +182,111 @@ class Sale:
             True si se canceló correctamente, False en caso contrario
         """
         try:
-            # Iniciar transacción
-            self.db.begin_transaction()
-            
-            # Verificar si la venta existe y no está cancelada
-            sale_query = """
-                SELECT payment_status, notes
-                FROM sales
-                WHERE sale_id = ?
-            """
-            
-            sale = self.db.fetch_one(sale_query, [sale_id])
-            
-            if not sale:
-                raise Exception("Venta no encontrada")
+            # Ejecutar como una única transacción
+            with self.db.transaction():
+                # Verificar si la venta existe y no está cancelada
+                sale_query = """
+                    SELECT payment_status, payment_method, total_amount, register_id, notes
+                    FROM sales
+                    WHERE sale_id = ?
+                """
                 
-            if sale['payment_status'] == 'canceled':
-                raise Exception("La venta ya está cancelada")
-            
-            # Actualizar estado de la venta
-            update_query = """
-                UPDATE sales
-                SET payment_status = 'canceled',
-                    notes = ?
-                WHERE sale_id = ?
-            """
-            
-            new_notes = f"{sale['notes'] or ''}\nCANCELADA: {reason or 'Sin motivo'} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
-            update_params = [new_notes, sale_id]
-            
-            self.db.execute(update_query, update_params)
-            
-            # Obtener items de la venta
-            items_query = """
-                SELECT product_id, quantity
-                FROM sale_items
-                WHERE sale_id = ?
-            """
-            
-            items = self.db.fetch_all(items_query, [sale_id])
-            
-            # Restaurar inventario
-            for item in items:
-                product_id = item['product_id']
-                quantity = item['quantity']
+                sale = self.db.fetch_one(sale_query, [sale_id])
                 
-                # Actualizar stock
-                stock_query = """
-                    UPDATE products
-                    SET stock_quantity = stock_quantity + ?,
-                        updated_at = ?
-                    WHERE product_id = ?
+                if not sale:
+                    raise Exception("Venta no encontrada")
+                    
+                if sale['payment_status'] == 'canceled':
+                    raise Exception("La venta ya está cancelada")
+                
+                # Actualizar estado de la venta
+                update_query = """
+                    UPDATE sales
+                    SET payment_status = 'canceled',
+                        notes = ?
+                    WHERE sale_id = ?
                 """
                 
-                stock_params = [
-                    quantity,
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    product_id
-                ]
+                new_notes = f"{sale['notes'] or ''}\nCANCELADA: {reason or 'Sin motivo'} ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+                update_params = [new_notes, sale_id]
                 
-                self.db.execute(stock_query, stock_params)
+                self.db.execute(update_query, update_params)
                 
-                # Registrar movimiento de inventario
-                movement_query = """
-                    INSERT INTO inventory_movements (
-                        product_id, user_id, movement_type, quantity, reference_id, notes
-                    ) VALUES (?, ?, ?, ?, ?, ?)
+                # Pasar la venta a canceladas en los totales de su caja
+                if sale['payment_status'] == 'paid':
+                    self.register_counters.record_cancel(sale['register_id'], sale['payment_method'],
+                                                         to_cents(sale['total_amount']))
+                
+                # Obtener items de la venta
+                items_query = """
+                    SELECT product_id, quantity
+                    FROM sale_items
+                    WHERE sale_id = ?
                 """
                 
-                movement_params = [
-                    product_id,
-                    user_id,
-                    'return',
-                    quantity,  # Positivo porque es una entrada
-                    sale_id,
-                    f"Cancelación de venta #{sale_id}: {reason or 'Sin motivo'}"
-                ]
+                items = self.db.fetch_all(items_query, [sale_id])
                 
-                self.db.execute(movement_query, movement_params)
-            
-            # Confirmar transacción
-            self.db.commit_transaction()
+                stock_changes = {}
+                for item in items:
+                    stock_changes[item['product_id']] = stock_changes.get(item['product_id'], 0) + item['quantity']
+                
+                # Restaurar inventario
+                self._apply_stock_changes(stock_changes)
+                
+                # Registrar movimientos de inventario
+                self.db.execute_many("""
+                    INSERT INTO inventory_movements (
+                        product_id, user_id, movement_type, quantity, reference_id, notes
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        item['product_id'],
+                        user_id,
+                        'return',
+                        item['quantity'],  # Positivo porque es una entrada
+                        sale_id,
+                        f"Cancelación de venta #{sale_id}: {reason or 'Sin motivo'}"
+                    )
+                    for item in items
+                ])
             
             return True
             
         except Exception as e:
-            # Revertir transacción en caso de error
-            self.db.rollback_transaction()
             print(f"Error al cancelar venta: {e}")
             return False
     
+    def _apply_stock_changes(self, stock_changes):
+        """
+        Aplicar cambios de stock de varios productos con una sola sentencia UPDATE
+        
+        Usa UPDATE ... FROM (SQLite 3.33 o superior): cada producto se localiza
+        por su clave primaria a partir de la canasta.
+        
+        Args:
+            stock_changes: Diccionario product_id -> cambio de cantidad
+        """
+        changes = list(stock_changes.items())
+        updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # Limitar el número de parámetros por sentencia
+        for start in range(0, len(changes), self.STOCK_UPDATE_CHUNK):
+            chunk = changes[start:start + self.STOCK_UPDATE_CHUNK]
+            values = ", ".join(["(?, ?)"] * len(chunk))
+            
+            query = f"""
+                WITH basket(product_id, quantity) AS (VALUES {values})
+                UPDATE products
+                SET stock_quantity = stock_quantity + basket.quantity,
+                    updated_at = ?
+                FROM basket
+                WHERE products.product_id = basket.product_id
+            """
+            
+            params = [value for change in chunk for value in change]
+            params.append(updated_at)
+            self.db.execute(query, params)
+    
     def get_all(self, start_date=None, end_date=None, user_id=None, 
                payment_method=None, payment_status=None, limit=100):
         """
@@ -328,6 +342,8 @@ class Sale:
         """
         Obtener resumen de ventas agrupadas por día
         
+        Se lee del resumen diario materializado (sales_daily_rollup).
+        
         Args:
             start_date: Fecha de inicio (formato: YYYY-MM-DD)
             end_date: Fecha de fin (formato: YYYY-MM-DD)
@@ -335,33 +351,14 @@ class Sale:
         Returns:
             Lista con resumen de ventas por día
         """
-        query = """
-            SELECT 
-                DATE(sale_date) as date,
-                COUNT(*) as total_sales,
-                SUM(total_amount) as total_amount,
-                SUM(tax_amount) as total_tax,
-                SUM(CASE WHEN payment_method = 'cash' THEN total_amount ELSE 0 END) as cash_amount,
-                SUM(CASE WHEN payment_method = 'card' THEN total_amount ELSE 0 END) as card_amount,
-                SUM(CASE WHEN payment_method = 'transfer' THEN total_amount ELSE 0 END) as transfer_amount
-            FROM sales
-            WHERE sale_date BETWEEN ? AND ?
-            AND payment_status = 'paid'
-            GROUP BY DATE(sale_date)
-            ORDER BY DATE(sale_date)
-        """
-        
-        params = [
-            f"{start_date} 00:00:00",
-            f"{end_date} 23:59:59"
-        ]
-        
-        return self.db.fetch_all(query, params)
+        return self.rollup.summary_by_day(start_date, end_date)
     
     def get_top_products(self, start_date=None, end_date=None, limit=10):
         """
         Obtener los productos más vendidos
         
+        Se lee del resumen por producto y día (product_daily_rollup).
+        
         Args:
             start_date: Fecha de inicio (formato: YYYY-MM-DD)
             end_date: Fecha de fin (formato: YYYY-MM-DD)
@@ -370,38 +367,33 @@ class Sale:
         Returns:
             Lista de productos más vendidos
         """
-        query = """
-            SELECT 
-                p.product_id,
-                p.name as product_name,
-                p.barcode,
-                SUM(si.quantity) as total_quantity,
-                SUM(si.subtotal) as total_amount
-            FROM sale_items si
-            JOIN products p ON si.product_id = p.product_id
-            JOIN sales s ON si.sale_id = s.sale_id
-            WHERE s.payment_status = 'paid'
+        return self.rollup.top_products(start_date, end_date, limit)
+    
+    def get_sales_by_hour(self, start_date, end_date):
         """
+        Obtener la distribución de ventas por hora del día
         
-        params = []
-        
-        if start_date:
-            query += " AND s.sale_date >= ?"
-            params.append(f"{start_date} 00:00:00")
-            
-        if end_date:
-            query += " AND s.sale_date <= ?"
-            params.append(f"{end_date} 23:59:59")
+        Args:
+            start_date: Fecha de inicio (formato: YYYY-MM-DD)
+            end_date: Fecha de fin (formato: YYYY-MM-DD)
             
-        query += """
-            GROUP BY p.product_id, p.name, p.barcode
-            ORDER BY total_quantity DESC
-            LIMIT ?
+        Returns:
+            Lista con hour, total_sales y total_amount
         """
+        return self.rollup.sales_by_hour(start_date, end_date)
+    
+    def get_sales_by_category(self, start_date=None, end_date=None):
+        """
+        Obtener las ventas por categoría de producto
         
-        params.append(limit)
-        
-        return self.db.fetch_all(query, params)
+        Args:
+            start_date: Fecha de inicio (formato: YYYY-MM-DD)
+            end_date: Fecha de fin (formato: YYYY-MM-DD)
+            
+        Returns:
+            Lista con category_id, category_name, total_quantity, total_amount y share
+        """
+        return self.rollup.category_mix(start_date, end_date)
     
     def get_total_by_period(self, period='day'):
         """
@@ -413,40 +405,7 @@ class Sale:
         Returns:
             Lista con totales por período
         """
-        # Definir formato de fecha según el período
-        if period == 'day':
-            date_format = 'DATE(sale_date)'
-            period_name = 'Día'
-        elif period == 'week':
-            date_format = "strftime('%Y-%W', sale_date)"
-            period_name = 'Semana'
-        elif period == 'month':
-            date_format = "strftime('%Y-%m', sale_date)"
-            period_name = 'Mes'
-        elif period == 'year':
-            date_format = "strftime('%Y', sale_date)"
-            period_name = 'Año'
-        else:
-            # Período no válido, usar día por defecto
-            date_format = 'DATE(sale_date)'
-            period_name = 'Día'
-            
-        query = f"""
-            SELECT 
-                {date_format} as period,
-                '{period_name}' as period_type,
-                COUNT(*) as total_sales,
-                SUM(total_amount) as total_amount,
-                SUM(tax_amount) as total_tax,
-                AVG(total_amount) as average_sale
-            FROM sales
-            WHERE payment_status = 'paid'
-            GROUP BY {date_format}
-            ORDER BY {date_format} DESC
-            LIMIT 30
-        """
-        
-        return self.db.fetch_all(query)
+        return self.rollup.totals_by_period(period)
     
     def get_today_sales(self):
         """
@@ -502,7 +461,7 @@ class Sale:
         return self.db.execute(query, params)
     
     def close_cash_register(self, register_id, user_id, closing_amount, 
-                           cash_sales, card_sales, other_sales, notes=None):
+                           cash_sales=None, card_sales=None, other_sales=None, notes=None):
         """
         Cerrar caja registradora
         
@@ -510,9 +469,9 @@ class Sale:
             register_id: ID del registro de caja
             user_id: ID del usuario que cierra la caja
             closing_amount: Monto final
-            cash_sales: Ventas en efectivo
-            card_sales: Ventas con tarjeta
-            other_sales: Otras ventas
+            cash_sales: Ventas en efectivo (por defecto las de los contadores de la caja)
+            card_sales: Ventas con tarjeta (por defecto las de los contadores)
+            other_sales: Otras ventas (por defecto transferencias y otros métodos)
             notes: Notas adicionales
             
         Returns:
@@ -520,16 +479,24 @@ class Sale:
         """
         # Verificar si la caja existe y está abierta
         check_query = """
-            SELECT register_id
+            SELECT *
             FROM cash_registers
             WHERE register_id = ? AND user_id = ? AND status = 'open'
         """
         
-        check_result = self.db.fetch_one(check_query, [register_id, user_id])
+        register = self.db.fetch_one(check_query, [register_id, user_id])
         
-        if not check_result:
+        if not register:
             return False  # No hay caja abierta o no pertenece al usuario
-            
+        
+        # Los totales por método de pago salen de los contadores de la caja
+        if cash_sales is None:
+            cash_sales = register['cash_cents'] / 100
+        if card_sales is None:
+            card_sales = register['card_cents'] / 100
+        if other_sales is None:
+            other_sales = (register['transfer_cents'] + register['other_cents']) / 100
+        
         query = """
             UPDATE cash_registers
             SET closing_amount = ?,
@@ -601,84 +568,43 @@ class Sale:
         Returns:
             Lista de ventas realizadas durante la apertura de la caja
         """
-        # Obtener datos del registro
-        register = self.get_cash_register_by_id(register_id)
-        
-        if not register:
-            return []
-            
-        # Determinar período
-        closing_time = register['closing_time'] or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
         query = """
             SELECT s.*, u.username, u.full_name as cashier_name
             FROM sales s
             JOIN users u ON s.user_id = u.user_id
-            WHERE s.user_id = ?
-              AND s.sale_date BETWEEN ? AND ?
+            WHERE s.register_id = ?
             ORDER BY s.sale_date
         """
         
-        params = [
-            register['user_id'],
-            register['opening_time'],
-            closing_time
-        ]
+        return self.db.fetch_all(query, [register_id])
+    
+    def generate_x_report(self, register_id):
+        """
+        Generar reporte X (corte parcial sin cerrar la caja)
         
-        return self.db.fetch_all(query, params)
+        Args:
+            register_id: ID del registro de caja
+            
+        Returns:
+            Diccionario con los totales de la caja o None si no existe
+        """
+        return self.register_counters.report(register_id)
         
-    def generate_z_report(self, register_id):
+    def generate_z_report(self, register_id, include_sales=False):
         """
         Generar reporte Z (cierre de caja)
         
         Args:
             register_id: ID del registro de caja
+            include_sales: Si es True agrega la lista de ventas del turno
             
         Returns:
             Diccionario con información del reporte Z
         """
-        # Obtener datos del registro
-        register_query = """
-            SELECT r.*, u.username, u.full_name
-            FROM cash_registers r
-            JOIN users u ON r.user_id = u.user_id
-            WHERE r.register_id = ?
-        """
-        
-        register = self.db.fetch_one(register_query, [register_id])
-        
-        if not register:
-            return None
-        
-        # Obtener ventas en el período
-        sales = self.get_sales_by_register(register_id)
-        
-        # Calcular totales
-        total_cash = sum(s['total_amount'] for s in sales if s['payment_method'] == 'cash' and s['payment_status'] == 'paid')
-        total_card = sum(s['total_amount'] for s in sales if s['payment_method'] == 'card' and s['payment_status'] == 'paid')
-        total_transfer = sum(s['total_amount'] for s in sales if s['payment_method'] == 'transfer' and s['payment_status'] == 'paid')
-        total_sales = total_cash + total_card + total_transfer
+        # Los totales salen de los contadores de la caja (una sola fila)
+        result = self.register_counters.report(register_id)
         
-        # Calcular cancelaciones
-        total_canceled = sum(s['total_amount'] for s in sales if s['payment_status'] == 'canceled')
+        if result is not None and include_sales:
+            result['sales'] = self.get_sales_by_register(register_id)
         
-        # Preparar resultado
-        result = {
-            'register': register,
-            'sales_count': len([s for s in sales if s['payment_status'] == 'paid']),
-            'canceled_count': len([s for s in sales if s['payment_status'] == 'canceled']),
-            'total_cash': total_cash,
-            'total_card': total_card,
-            'total_transfer': total_transfer,
-            'total_sales': total_sales,
-            'total_canceled': total_canceled,
-            'opening_amount': register['opening_amount'],
-            'closing_amount': register['closing_amount'],
-            'expected_amount': register['opening_amount'] + total_cash,
-            'difference': (register['closing_amount'] or 0) - (register['opening_amount'] + total_cash),
-            'opening_time': register['opening_time'],
-            'closing_time': register['closing_time'],
-            'sales': sales
-        }
-        
-        return result
\ No newline at end of file
+        return result
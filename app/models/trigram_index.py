@@ -0,0 +1,274 @@
+# app/models/trigram_index.py
+import heapq
+import logging
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+
+from .product_search_index import tokenize
+
+# Las descripciones (y muchos nombres) se repiten en el catálogo
+@lru_cache(maxsize=4096)
+def trigrams(text, max_chars=None):
+    """
+    Obtener los trigramas de un texto
+    
+    El texto se normaliza (minúsculas, sin acentos) y se unen las palabras, de
+    modo que "Coca Cola" y "cocacola" generan los mismos trigramas.
+    
+    Args:
+        text: Texto original
+        max_chars: Número máximo de caracteres a considerar (opcional)
+    
+    Returns:
+        Conjunto inmutable de trigramas
+    """
+    compact = ''.join(tokenize(text))
+    if max_chars:
+        compact = compact[:max_chars]
+    if not compact:
+        return frozenset()
+    
+    padded = f"  {compact} "
+    return frozenset({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+class _TrigramTable:
+    """
+    Listas invertidas de trigramas para un campo del producto
+    
+    Los productos con el mismo conjunto de trigramas (nombres repetidos,
+    descripciones iguales o vacías) comparten un grupo, así que cada trigrama
+    apunta a grupos y no a productos: ocupa menos memoria y se cuenta menos.
+    """
+    
+    __slots__ = ('postings', 'groups')
+    
+    def __init__(self):
+        # trigrama -> conjunto de grupos (cada grupo es un frozenset de trigramas)
+        self.postings = {}
+        # grupo -> conjunto de product_id
+        self.groups = {}
+    
+    def clear(self):
+        self.postings.clear()
+        self.groups.clear()
+    
+    def add(self, grams, product_id):
+        """Agregar un producto con sus trigramas"""
+        product_ids = self.groups.get(grams)
+        if product_ids is None:
+            product_ids = self.groups[grams] = set()
+            for gram in grams:
+                keys = self.postings.get(gram)
+                if keys is None:
+                    keys = self.postings[gram] = set()
+                keys.add(grams)
+        product_ids.add(product_id)
+    
+    def remove(self, grams, product_id):
+        """Quitar un producto; los grupos y trigramas vacíos se eliminan"""
+        product_ids = self.groups.get(grams)
+        if product_ids is None:
+            return
+        
+        product_ids.discard(product_id)
+        if product_ids:
+            return
+        
+        del self.groups[grams]
+        for gram in grams:
+            keys = self.postings.get(gram)
+            if keys is None:
+                continue
+            
+            keys.discard(grams)
+            if not keys:
+                del self.postings[gram]
+    
+    def count_shared(self, query):
+        """Contar los trigramas de la consulta que comparte cada grupo (conteo en C)"""
+        counts = Counter()
+        for gram in query:
+            keys = self.postings.get(gram)
+            if keys:
+                counts.update(keys)
+        return counts
+
+class TrigramIndex:
+    """
+    Índice de trigramas para la búsqueda de productos tolerante a errores
+    
+    Encuentra productos aunque el nombre esté mal escrito, sin acentos o con
+    los espacios cambiados ("cocacola" encuentra "Coca Cola"). La similitud con
+    el nombre es el coeficiente de Dice entre los trigramas; la descripción
+    cuenta con menos peso.
+    """
+    
+    # Peso de la coincidencia con la descripción frente al nombre
+    DESCRIPTION_WEIGHT = 0.6
+    # Caracteres de la descripción que se indexan (limita la memoria)
+    DESCRIPTION_MAX_CHARS = 120
+    
+    def __init__(self, database, max_entries=None):
+        """
+        Inicializar índice
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            max_entries: Número máximo de productos indexados (opcional). Si es
+                None o 0 se indexa todo el catálogo; si no, se conservan los
+                productos modificados más recientemente.
+        """
+        self.db = database
+        self.max_entries = max_entries or None
+        self.logger = logging.getLogger('pos.models.trigram_index')
+        
+        # product_id -> (nombre, trigramas del nombre, trigramas de la descripción);
+        # el orden se usa para expulsar los más antiguos en modo acotado
+        self._products = OrderedDict()
+        self._names = _TrigramTable()
+        self._descriptions = _TrigramTable()
+        self._lock = threading.Lock()
+        
+        self.loaded = False
+    
+    def __len__(self):
+        return len(self._products)
+    
+    def load(self):
+        """
+        Cargar el índice desde la base de datos
+        
+        Returns:
+            Número de productos cargados
+        """
+        query = "SELECT product_id, name, description FROM products WHERE is_active = 1"
+        params = []
+        
+        if self.max_entries:
+            query += " ORDER BY updated_at DESC LIMIT ?"
+            params.append(self.max_entries)
+        
+        rows = self.db.fetch_all(query, params)
+        
+        with self._lock:
+            self._products.clear()
+            self._names.clear()
+            self._descriptions.clear()
+            
+            # Insertar del menos al más reciente para respetar el orden de expulsión
+            for product in reversed(rows) if self.max_entries else rows:
+                self._store(product)
+            
+            self.loaded = True
+        
+        self.logger.info(f"Índice de trigramas cargado: {len(rows)} productos")
+        return len(rows)
+    
+    def search(self, text, limit=10, min_score=0.3):
+        """
+        Buscar los productos más parecidos al texto
+        
+        Args:
+            text: Texto a buscar (puede tener errores de escritura)
+            limit: Número máximo de resultados
+            min_score: Similitud mínima (0 a 1)
+        
+        Returns:
+            Lista de diccionarios con product_id, name y score, de mayor a menor
+            similitud
+        """
+        query = trigrams(text)
+        if not query:
+            return []
+        
+        with self._lock:
+            name_counts = self._names.count_shared(query)
+            description_counts = self._descriptions.count_shared(query)
+            
+            # Con Dice >= min_score hacen falta al menos min_score * |q| / (2 - min_score)
+            # trigramas compartidos; los grupos con menos se descartan sin calcular
+            min_name_shared = min_score * len(query) / (2 - min_score)
+            min_description_shared = min_score * len(query) / self.DESCRIPTION_WEIGHT
+            
+            scores = {}
+            for grams, shared in name_counts.items():
+                if shared >= min_name_shared:
+                    score = 2.0 * shared / (len(query) + len(grams))
+                    for product_id in self._names.groups[grams]:
+                        scores[product_id] = score
+            
+            # En la descripción basta con que contenga el texto buscado
+            for grams, shared in description_counts.items():
+                if shared >= min_description_shared:
+                    score = self.DESCRIPTION_WEIGHT * shared / len(query)
+                    for product_id in self._descriptions.groups[grams]:
+                        if score > scores.get(product_id, 0.0):
+                            scores[product_id] = score
+            
+            best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            
+            # Mayor similitud primero; a igual similitud, en orden alfabético
+            results = sorted(
+                ((score, self._products[product_id][0], product_id)
+                 for product_id, score in best if score >= min_score),
+                key=lambda item: (-item[0], item[1] or '')
+            )
+        
+        return [
+            {'product_id': product_id, 'name': name, 'score': round(score, 3)}
+            for score, name, product_id in results
+        ]
+    
+    def on_product_saved(self, product):
+        """
+        Actualizar el índice tras crear o modificar un producto
+        
+        Args:
+            product: Diccionario con los datos actuales del producto
+        """
+        with self._lock:
+            self._discard(product['product_id'])
+            
+            if product.get('is_active'):
+                self._store(product)
+    
+    def on_product_removed(self, product_id):
+        """
+        Quitar un producto del índice
+        
+        Args:
+            product_id: ID del producto
+        """
+        with self._lock:
+            self._discard(product_id)
+    
+    def on_stock_changed(self, product_id, quantity_change):
+        """Los movimientos de stock no afectan al índice"""
+    
+    def _store(self, product):
+        """Agregar un producto al índice (requiere tener el bloqueo)"""
+        product_id = product['product_id']
+        name_grams = trigrams(product.get('name'))
+        description_grams = trigrams(product.get('description'), self.DESCRIPTION_MAX_CHARS)
+        
+        self._names.add(name_grams, product_id)
+        self._descriptions.add(description_grams, product_id)
+        
+        self._products[product_id] = (product.get('name'), name_grams, description_grams)
+        
+        # Expulsar los productos más antiguos si se supera el límite
+        if self.max_entries:
+            while len(self._products) > self.max_entries:
+                self._discard(next(iter(self._products)))
+    
+    def _discard(self, product_id):
+        """Quitar un producto del índice (requiere tener el bloqueo)"""
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        
+        _, name_grams, description_grams = entry
+        self._names.remove(name_grams, product_id)
+        self._descriptions.remove(description_grams, product_id)
@@ -0,0 +1,437 @@
+# app/utils/catalog_importer.py
+import io
+import os
+import re
+import csv
+import math
+import logging
+import unicodedata
+from contextlib import ExitStack
+
+from .helpers import validate_barcode
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Nombres de columna admitidos (sin acentos, en minúsculas) -> campo del producto
+COLUMN_ALIASES = {
+    'barcode': 'barcode', 'codigo': 'barcode', 'codigo de barras': 'barcode',
+    'codigo_barras': 'barcode', 'ean': 'barcode',
+    'name': 'name', 'nombre': 'name', 'producto': 'name',
+    'description': 'description', 'descripcion': 'description',
+    'category': 'category', 'categoria': 'category',
+    'price': 'price', 'precio': 'price', 'precio de venta': 'price', 'precio_venta': 'price',
+    'cost': 'cost', 'costo': 'cost', 'precio de compra': 'cost', 'precio_compra': 'cost',
+    'stock': 'stock_quantity', 'stock_quantity': 'stock_quantity', 'cantidad': 'stock_quantity',
+    'min_stock': 'min_stock_level', 'min_stock_level': 'min_stock_level',
+    'stock minimo': 'min_stock_level', 'stock_minimo': 'min_stock_level',
+    'active': 'is_active', 'is_active': 'is_active', 'activo': 'is_active'
+}
+
+# Columnas obligatorias en el archivo
+REQUIRED_COLUMNS = ('barcode', 'name', 'price')
+
+# Orden de las columnas en la consulta de inserción
+PRODUCT_COLUMNS = (
+    'barcode', 'name', 'description', 'category_id', 'price', 'cost',
+    'stock_quantity', 'min_stock_level', 'is_active'
+)
+
+# Caracteres que se conservan al leer un número con formato ("$ 1.234,50")
+NUMBER_NOISE = re.compile(r'[^\d,.\-]')
+
+TRUE_VALUES = {'1', 'si', 'sí', 'yes', 'true', 'verdadero', 'x'}
+FALSE_VALUES = {'0', 'no', 'false', 'falso'}
+
+class CatalogImporter:
+    """
+    Importador masivo de catálogos de productos desde CSV o XLSX
+    
+    Lee el archivo fila a fila (sin cargarlo completo en memoria), valida cada
+    fila y crea o actualiza los productos por código de barras en lotes, cada
+    uno en su propia transacción. Las filas con errores se omiten y se informan
+    con su número de fila. El stock del archivo solo se usa para los productos
+    nuevos; el de los existentes no se modifica.
+    """
+    
+    def __init__(self, database, indexes=None, batch_size=1000, max_errors=1000, bulk_threshold=5000):
+        """
+        Inicializar importador
+        
+        Args:
+            database: Objeto de conexión a la base de datos
+            indexes: Índices en memoria del catálogo (opcional). Se recargan con
+                load() al terminar la importación.
+            batch_size: Filas por transacción
+            max_errors: Número máximo de errores que se guardan en el resultado
+                (los demás solo se cuentan)
+            bulk_threshold: Filas a partir de las cuales se suspende el índice de
+                texto completo y se reconstruye una sola vez al terminar
+        """
+        self.db = database
+        self.indexes = list(indexes or [])
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.bulk_threshold = bulk_threshold
+        self.logger = logging.getLogger('pos.utils.catalog_importer')
+    
+    def import_file(self, filepath, progress=None):
+        """
+        Importar un catálogo
+        
+        Args:
+            filepath: Ruta del archivo (.csv o .xlsx)
+            progress: Función progress(filas_procesadas, fracción) que se llama
+                después de cada lote. La fracción va de 0 a 1 (o None si no se
+                conoce). Si devuelve False la importación se cancela; los lotes
+                ya confirmados se conservan.
+        
+        Returns:
+            Diccionario con success, message, total_rows, imported, error_count,
+            errors (lista de {'row', 'barcode', 'message'}) y cancelled
+        """
+        result = {
+            'success': False,
+            'message': '',
+            'total_rows': 0,
+            'imported': 0,
+            'error_count': 0,
+            'errors': [],
+            'cancelled': False
+        }
+        
+        extension = os.path.splitext(filepath)[1].lower()
+        if extension == '.csv':
+            reader = self._read_csv
+        elif extension in ('.xlsx', '.xlsm'):
+            if openpyxl is None:
+                result['message'] = "Se requiere openpyxl para importar archivos de Excel"
+                return result
+            reader = self._read_xlsx
+        else:
+            result['message'] = f"Formato de archivo no soportado: {extension}"
+            return result
+        
+        rows = reader(filepath)
+        search_index = ExitStack()
+        try:
+            header = next(rows, None)
+            columns = self._map_columns(header[1] if header else None)
+            missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+            if missing:
+                result['message'] = f"Faltan columnas obligatorias: {', '.join(missing)}"
+                return result
+            
+            query = self._build_upsert(columns)
+            categories = self._load_categories() if 'category' in columns else None
+            
+            batch = []
+            fraction = None
+            bulk_mode = False
+            for row_number, values, fraction in rows:
+                # Omitir filas vacías
+                if not any(value not in (None, '') for value in values):
+                    continue
+                
+                result['total_rows'] += 1
+                try:
+                    batch.append((row_number, self._parse_row(values, columns, categories)))
+                except ValueError as e:
+                    self._add_error(result, row_number, self._cell(values, columns, 'barcode'), str(e))
+                
+                if len(batch) >= self.batch_size:
+                    # Catálogo grande: reconstruir el índice de búsqueda al final
+                    # en lugar de actualizarlo fila a fila
+                    if result['total_rows'] >= self.bulk_threshold and not bulk_mode:
+                        search_index.enter_context(self.db.suspend_search_index())
+                        bulk_mode = True
+                    
+                    self._flush(query, batch, result)
+                    batch = []
+                    
+                    if progress and progress(result['total_rows'], fraction) is False:
+                        result['cancelled'] = True
+                        break
+            
+            if batch and not result['cancelled']:
+                self._flush(query, batch, result)
+            
+            if progress and not result['cancelled']:
+                progress(result['total_rows'], 1.0)
+        except Exception as e:
+            self.logger.error(f"Error al importar el catálogo {filepath}: {e}")
+            result['message'] = f"Error al leer el archivo: {e}"
+            return result
+        finally:
+            rows.close()
+            search_index.close()
+            if result['imported']:
+                self._reload_indexes()
+        
+        result['success'] = True
+        result['message'] = (
+            f"{result['imported']} productos importados, {result['error_count']} filas con errores"
+            + (" (importación cancelada)" if result['cancelled'] else "")
+        )
+        self.logger.info(f"Catálogo importado desde {filepath}: {result['message']}")
+        return result
+    
+    def _read_csv(self, filepath):
+        """
+        Leer un CSV fila a fila
+        
+        Genera (número de fila, valores, fracción leída del archivo). El
+        separador (coma, punto y coma o tabulador) se detecta automáticamente.
+        """
+        total_size = os.path.getsize(filepath) or 1
+        
+        with open(filepath, 'rb') as raw:
+            text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+            
+            sample = text.read(4096)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            
+            for row_number, values in enumerate(csv.reader(text, dialect), start=1):
+                yield row_number, values, raw.tell() / total_size
+    
+    def _read_xlsx(self, filepath):
+        """
+        Leer la primera hoja de un XLSX fila a fila (modo de solo lectura)
+        
+        Genera (número de fila, valores, fracción de filas leídas).
+        """
+        workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+        
+        try:
+            sheet = workbook.active
+            total_rows = sheet.max_row
+            
+            for row_number, values in enumerate(sheet.iter_rows(values_only=True), start=1):
+                yield row_number, values, row_number / total_rows if total_rows else None
+        finally:
+            workbook.close()
+    
+    def _map_columns(self, header):
+        """
+        Relacionar las columnas del archivo con los campos del producto
+        
+        Returns:
+            Diccionario campo -> posición de la columna
+        """
+        columns = {}
+        
+        for position, title in enumerate(header or []):
+            key = self._normalize(title)
+            field = COLUMN_ALIASES.get(key) or COLUMN_ALIASES.get(key.replace('_', ' '))
+            if field and field not in columns:
+                columns[field] = position
+        
+        return columns
+    
+    def _build_upsert(self, columns):
+        """Construir la consulta que crea o actualiza un producto por código de barras"""
+        fields = [
+            field for field in PRODUCT_COLUMNS
+            if field in columns or (field == 'category_id' and 'category' in columns)
+        ]
+        # El stock solo se asigna a los productos nuevos: en los existentes sus
+        # cambios deben registrarse como movimientos de inventario
+        updates = [f"{field} = excluded.{field}" for field in fields if field not in ('barcode', 'stock_quantity')]
+        
+        return f"""
+            INSERT INTO products ({', '.join(fields)})
+            VALUES ({', '.join('?' for _ in fields)})
+            ON CONFLICT(barcode) DO UPDATE SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP
+        """
+    
+    def _parse_row(self, values, columns, categories):
+        """
+        Validar una fila y obtener los parámetros de la consulta
+        
+        Raises:
+            ValueError: Si la fila no es válida (el mensaje describe el error)
+        """
+        barcode = self._text(self._cell(values, columns, 'barcode'))
+        if not barcode:
+            raise ValueError("El código de barras es obligatorio")
+        if not validate_barcode(barcode):
+            raise ValueError(f"Código de barras inválido: {barcode}")
+        
+        name = self._text(self._cell(values, columns, 'name'))
+        if not name:
+            raise ValueError("El nombre del producto es obligatorio")
+        
+        price = self._number(self._cell(values, columns, 'price'), 'precio')
+        if price is None or price <= 0:
+            raise ValueError("El precio de venta debe ser mayor que cero")
+        
+        row = {'barcode': barcode, 'name': name, 'price': price}
+        
+        if 'description' in columns:
+            row['description'] = self._text(self._cell(values, columns, 'description')) or None
+        
+        if 'cost' in columns:
+            cost = self._number(self._cell(values, columns, 'cost'), 'costo')
+            if cost is not None and cost < 0:
+                raise ValueError("El costo no puede ser negativo")
+            row['cost'] = cost
+        
+        for field, label, default in (('stock_quantity', 'stock', 0), ('min_stock_level', 'stock mínimo', 5)):
+            if field in columns:
+                quantity = self._number(self._cell(values, columns, field), label)
+                if quantity is not None and quantity != int(quantity):
+                    raise ValueError(f"El {label} debe ser un número entero")
+                row[field] = default if quantity is None else int(quantity)
+        
+        if 'is_active' in columns:
+            row['is_active'] = self._flag(self._cell(values, columns, 'is_active'))
+        
+        # Al final: las categorías nuevas solo se crean para filas válidas
+        if 'category' in columns:
+            row['category_id'] = self._category_id(self._cell(values, columns, 'category'), categories)
+        
+        return [row[field] for field in PRODUCT_COLUMNS if field in row]
+    
+    def _flush(self, query, batch, result):
+        """Guardar un lote de filas en una sola transacción"""
+        try:
+            with self.db.transaction():
+                self.db.execute_many(query, [params for _, params in batch])
+            result['imported'] += len(batch)
+        except Exception:
+            # Repetir fila por fila para identificar las que fallan
+            with self.db.transaction():
+                for row_number, params in batch:
+                    try:
+                        with self.db.transaction():
+                            self.db.execute(query, params)
+                        result['imported'] += 1
+                    except Exception as e:
+                        self._add_error(result, row_number, params[0], str(e))
+    
+    def _add_error(self, result, row_number, barcode, message):
+        """Registrar el error de una fila (hasta max_errors)"""
+        result['error_count'] += 1
+        if len(result['errors']) < self.max_errors:
+            result['errors'].append({'row': row_number, 'barcode': barcode, 'message': message})
+    
+    def _load_categories(self):
+        """Obtener las categorías existentes (nombre normalizado -> ID)"""
+        rows = self.db.fetch_all("SELECT category_id, name FROM categories")
+        return {self._normalize(row['name']): row['category_id'] for row in rows}
+    
+    def _category_id(self, value, categories):
+        """Obtener el ID de una categoría por nombre, creándola si no existe"""
+        name = self._text(value)
+        if not name:
+            return None
+        
+        # Los nombres ya vistos se resuelven sin normalizar de nuevo
+        category_id = categories.get(name)
+        if category_id is not None:
+            return category_id
+        
+        key = self._normalize(name)
+        if key not in categories:
+            categories[key] = self.db.execute("INSERT INTO categories (name) VALUES (?)", [name])
+        
+        categories[name] = categories[key]
+        return categories[key]
+    
+    def _reload_indexes(self):
+        """Recargar los índices en memoria después de la importación"""
+        for index in self.indexes:
+            try:
+                index.load()
+            except Exception as e:
+                self.logger.error(f"Error al recargar el índice {type(index).__name__}: {e}")
+    
+    @staticmethod
+    def _cell(values, columns, field):
+        """Valor de una columna en la fila (None si la fila es más corta)"""
+        position = columns.get(field)
+        if position is None or position >= len(values):
+            return None
+        return values[position]
+    
+    @staticmethod
+    def _text(value):
+        """Convertir una celda a texto sin espacios sobrantes"""
+        if value is None:
+            return ''
+        
+        # Excel guarda los códigos numéricos como números (7701234567890.0)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        
+        return str(value).strip()
+    
+    @staticmethod
+    def _number(value, label):
+        """
+        Convertir una celda a número
+        
+        Admite símbolos de moneda y separadores de miles ("$ 1.234,50" o
+        "1,234.50"). Una sola coma se toma como separador decimal.
+        """
+        if value is None or value == '':
+            return None
+        
+        if isinstance(value, (int, float)):
+            number = float(value)
+        else:
+            number = CatalogImporter._parse_number(str(value))
+        
+        if number is None or not math.isfinite(number):
+            raise ValueError(f"Valor numérico inválido para {label}: {value}")
+        
+        return number
+    
+    @staticmethod
+    def _parse_number(text):
+        """Interpretar un número escrito con o sin formato (None si no es válido)"""
+        # Caso más común: número sin formato
+        try:
+            return float(text)
+        except ValueError:
+            pass
+        
+        text = NUMBER_NOISE.sub('', text)
+        if ',' in text and '.' in text:
+            if text.rfind(',') > text.rfind('.'):
+                text = text.replace('.', '').replace(',', '.')
+            else:
+                text = text.replace(',', '')
+        else:
+            text = text.replace(',', '.')
+        
+        try:
+            return float(text)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _flag(value):
+        """Convertir una celda a 1 o 0 (vacía = activo)"""
+        if value is None or value == '':
+            return 1
+        
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return 1
+        if text in FALSE_VALUES:
+            return 0
+        
+        raise ValueError(f"Valor inválido para activo: {value}")
+    
+    @staticmethod
+    def _normalize(text):
+        """Texto en minúsculas y sin acentos para comparar nombres"""
+        text = unicodedata.normalize('NFKD', str(text or '').strip().lower())
+        return ''.join(char for char in text if not unicodedata.combining(char))
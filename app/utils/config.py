@@ -57,6 +57,8 @@ class Config:
             "tax_rate": 0.16,
             "currency_symbol": "$",
             "database_path": "../database/pos_database.db",
+            "print_spool_path": "../database/print_spool.db",
+            "print_max_attempts": 10,  # Intentos por recibo antes de marcarlo como fallido
             "language": "es",
             "theme": "light",
             "receipt_header": "Gracias por su compra",
@@ -64,7 +66,12 @@ class Config:
             "backup_path": "../backups",
             "auto_backup": True,
             "backup_frequency": "daily",  # daily, weekly, monthly
-            "log_level": "INFO"
+            "log_level": "INFO",
+            "barcode_index_max_entries": 0,  # 0 = todo el catálogo en memoria
+            "trigram_index_max_entries": 0,  # 0 = todo el catálogo en memoria
+            "product_search_max_results": 20,
+            "device_check_interval": 5,  # Segundos entre revisiones de los dispositivos
+            "register_verify_interval": 300  # Segundos entre verificaciones de los contadores de caja
         }
     
     def save_config(self):
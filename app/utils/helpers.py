@@ -9,6 +9,9 @@ import hashlib
 from datetime import datetime, timedelta
 import logging
 
+from .money import Money, apply_rate, to_cents
+from ..models.pricing_engine import DEFAULT_TAX_RATE
+
 logger = logging.getLogger('pos.utils')
 
 def format_currency(amount, symbol='$'):
@@ -22,27 +25,27 @@ def format_currency(amount, symbol='$'):
     Returns:
         String con el valor formateado como moneda
     """
-    try:
-        return f"{symbol}{float(amount):.2f}"
-    except (ValueError, TypeError):
-        return f"{symbol}0.00"
+    money = Money.parse(amount, default=Money())
+    return str(money).replace('$', symbol, 1)
 
 def parse_currency(currency_str):
     """
     Convertir una cadena de moneda a float
     
+    Para sumar o comparar importes es mejor Money.parse, que no pasa por float.
+    
     Args:
         currency_str: String con formato de moneda (por ejemplo: "$123.45")
         
     Returns:
         Valor numérico (float)
     """
-    try:
-        # Eliminar símbolo de moneda y otros caracteres no numéricos excepto punto y signo
-        clean_str = re.sub(r'[^\d.-]', '', currency_str)
-        return float(clean_str)
-    except (ValueError, TypeError):
-        return 0.0
+    if not isinstance(currency_str, str):
+        return float(Money.parse(currency_str, default=Money()))
+    
+    # Eliminar símbolo de moneda y otros caracteres no numéricos excepto separadores y signo
+    clean_str = re.sub(r'[^\d.,-]', '', currency_str)
+    return float(Money.parse(clean_str, default=Money()))
 
 def generate_receipt_number():
     """
@@ -55,19 +58,20 @@ def generate_receipt_number():
     random_chars = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
     return f"{timestamp}-{random_chars}"
 
-def calculate_tax(amount, tax_rate=0.16):
+def calculate_tax(amount, tax_rate=DEFAULT_TAX_RATE):
     """
     Calcular impuesto sobre un monto
     
     Args:
         amount: Monto base
-        tax_rate: Tasa de impuesto (por defecto 16%)
+        tax_rate: Tasa de impuesto (por defecto la general; las tasas por
+            producto o categoría las da PricingEngine)
         
     Returns:
-        Monto del impuesto
+        Monto del impuesto, redondeado al centavo
     """
     try:
-        return float(amount) * tax_rate
+        return apply_rate(to_cents(amount), tax_rate) / 100
     except (ValueError, TypeError):
         return 0.0
 
@@ -0,0 +1,287 @@
+# app/utils/money.py
+import math
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from functools import total_ordering
+
+def to_cents(value):
+    """
+    Convertir un importe a centavos enteros
+    
+    Args:
+        value: Money, número (en pesos) o texto ("$1,234.50", "12,50")
+    
+    Returns:
+        Importe en centavos (redondeado a la mitad hacia arriba)
+    
+    Raises:
+        ValueError: Si el texto no es un importe
+    """
+    # Buscar el conversor por tipo es más rápido que encadenar isinstance
+    convert = _CONVERTERS.get(type(value))
+    if convert is not None:
+        return convert(value)
+    
+    if value is None:
+        return 0
+    if isinstance(value, Money):
+        return value.cents
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        return _float_to_cents(value)
+    if isinstance(value, str):
+        return _text_to_cents(value)
+    
+    return _decimal_to_cents(value)
+
+def format_cents(cents, symbol='$'):
+    """
+    Dar formato de moneda a un importe en centavos
+    
+    Args:
+        cents: Importe en centavos
+        symbol: Símbolo de moneda
+    
+    Returns:
+        Texto con el formato "$1234.50"
+    """
+    sign = "-" if cents < 0 else ""
+    units, remainder = divmod(abs(cents), 100)
+    return f"{sign}{symbol}{units}.{remainder:02d}"
+
+def apply_rate(cents, rate):
+    """
+    Aplicar una tasa (impuesto, descuento) a un importe en centavos
+    
+    Args:
+        cents: Importe en centavos
+        rate: Tasa (0.16 = 16%)
+    
+    Returns:
+        Resultado en centavos, redondeado a la mitad hacia arriba
+    """
+    return _round_cents(Decimal(cents) * Decimal(str(rate)))
+
+def cents_from_amounts(values):
+    """
+    Convertir una lista de importes a centavos
+    
+    Args:
+        values: Importes (números, textos o Money); None cuenta como 0
+    
+    Returns:
+        Lista de centavos enteros
+    """
+    convert = _float_to_cents
+    return [convert(value) if type(value) is float else to_cents(value) for value in values]
+
+def sum_amounts(values):
+    """
+    Sumar importes sin acumular errores de redondeo
+    
+    Args:
+        values: Importes (números, textos o Money)
+    
+    Returns:
+        Money con la suma
+    """
+    return Money(sum(cents_from_amounts(values)))
+
+def amounts_from_cents(rows, keys):
+    """
+    Convertir a pesos las columnas en centavos de filas de un reporte
+    
+    Las consultas de reportes suman centavos enteros en SQL; esta función deja
+    esas columnas en pesos exactos a dos decimales.
+    
+    Args:
+        rows: Lista de diccionarios (se modifican en el lugar)
+        keys: Columnas con importes en centavos
+    
+    Returns:
+        La misma lista de filas
+    """
+    for row in rows:
+        for key in keys:
+            value = row.get(key)
+            if value is not None:
+                row[key] = value / 100
+    return rows
+
+@total_ordering
+class Money:
+    """
+    Importe de dinero en centavos enteros
+    
+    Los importes se manejan como Money desde que entran al sistema (precio del
+    producto, texto escrito por el cajero, recibo leído de la cola de
+    impresión) hasta que se guardan o imprimen, así que se convierten una sola
+    vez y las sumas no acumulan errores de redondeo de float. La base de datos
+    sigue guardando DECIMAL(10,2); los reportes suman centavos en SQL
+    (SUM(CAST(ROUND(columna * 100) AS INTEGER))) y los pasan a pesos con
+    amounts_from_cents.
+    
+    Es inmutable: las operaciones devuelven un Money nuevo. Se puede sumar y
+    restar con otro Money, multiplicar por una cantidad y comparar. float()
+    da el importe en pesos (para guardarlo en columnas DECIMAL) y str() el
+    texto con formato "$12.50".
+    """
+    
+    __slots__ = ('cents',)
+    
+    def __init__(self, cents=0):
+        """
+        Inicializar importe
+        
+        Args:
+            cents: Importe en centavos enteros
+        """
+        object.__setattr__(self, 'cents', int(cents))
+    
+    @classmethod
+    def parse(cls, value, default=None):
+        """
+        Crear un importe a partir de un número, texto o Money
+        
+        Args:
+            value: Importe en pesos (12.5, "$12.50", "12,50") o Money
+            default: Valor a devolver si no es un importe (si es None se
+                lanza ValueError)
+        
+        Returns:
+            Money con el importe
+        """
+        if isinstance(value, cls):
+            return value
+        try:
+            return cls(to_cents(value))
+        except (ValueError, TypeError):
+            if default is None:
+                raise ValueError(f"Importe no válido: {value!r}")
+            return default
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Money es inmutable")
+    
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        return NotImplemented
+    
+    def __radd__(self, other):
+        # Permite sum() sobre una lista de Money
+        if other == 0:
+            return self
+        return self.__add__(other)
+    
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        return NotImplemented
+    
+    def __neg__(self):
+        return Money(-self.cents)
+    
+    def __mul__(self, quantity):
+        if isinstance(quantity, int):
+            return Money(self.cents * quantity)
+        if isinstance(quantity, (float, Decimal)):
+            return Money(_round_cents(Decimal(self.cents) * Decimal(str(quantity))))
+        return NotImplemented
+    
+    __rmul__ = __mul__
+    
+    def apply_rate(self, rate):
+        """
+        Calcular una tasa sobre el importe (por ejemplo el IVA)
+        
+        Args:
+            rate: Tasa (0.16 = 16%)
+        
+        Returns:
+            Money con el resultado redondeado al centavo
+        """
+        return Money(apply_rate(self.cents, rate))
+    
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        return NotImplemented
+    
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash(self.cents)
+    
+    def __bool__(self):
+        return self.cents != 0
+    
+    def __float__(self):
+        return self.cents / 100
+    
+    def __str__(self):
+        return format_cents(self.cents)
+    
+    def __repr__(self):
+        return f"Money('{format_cents(self.cents, symbol='')}')"
+    
+    def __format__(self, spec):
+        # f"{money}" da "$12.50"; con especificación se formatea el valor en pesos
+        return str(self) if not spec else format(self.cents / 100, spec)
+
+def _float_to_cents(value):
+    cents = value * 100
+    rounded = round(cents)
+    
+    # round() lleva los medios al par y value * 100 arrastra el error de
+    # representación (2.675 * 100 = 267.49999999999997); solo los importes con
+    # medio centavo se redondean con Decimal a partir del texto del float
+    if abs(abs(cents - rounded) - 0.5) > 1e-6:
+        return rounded
+    return _decimal_to_cents(Decimal(repr(value)))
+
+def _text_to_cents(text):
+    text = text.replace('$', '').strip()
+    
+    # La coma es decimal si es el último separador y le siguen 1 o 2 dígitos
+    # ("12,50"); en otro caso separa miles ("1,234.50", "1,234")
+    if ',' in text or ' ' in text:
+        text = text.replace(' ', '')
+        comma = text.rfind(',')
+        if text.rfind('.') < comma and 0 < len(text) - comma - 1 <= 2:
+            text = text[:comma].replace(',', '').replace('.', '') + '.' + text[comma + 1:]
+        else:
+            text = text.replace(',', '')
+    
+    if not text:
+        return 0
+    
+    # Con a lo sumo dos decimales float() es exacto al centavo
+    try:
+        amount = float(text)
+    except ValueError:
+        raise ValueError(f"Importe no válido: {text!r}")
+    if not math.isfinite(amount):
+        raise ValueError(f"Importe no válido: {text!r}")
+    
+    return _float_to_cents(amount)
+
+def _decimal_to_cents(value):
+    try:
+        amount = value if isinstance(value, Decimal) else Decimal(str(value))
+        return _round_cents(amount * 100)
+    except InvalidOperation:
+        raise ValueError(f"Importe no válido: {value!r}")
+
+def _round_cents(cents):
+    return int(cents.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+_CONVERTERS = {
+    str: _text_to_cents,
+    float: _float_to_cents,
+    int: lambda value: value * 100,
+    Money: lambda value: value.cents,
+}
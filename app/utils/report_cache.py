@@ -0,0 +1,247 @@
+# app/utils/report_cache.py
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+# Tamaño máximo predeterminado de la caché de reportes
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+class ReportCache:
+    """
+    Caché en disco de los reportes generados (PDF, CSV, JSON)
+    
+    Cada reporte se guarda con una clave (tipo de reporte, parámetros y
+    formato) y una marca de agua de los datos que cubre (por ejemplo el
+    último sale_id y los totales por estado del rango). Mientras la marca no
+    cambia, el archivo guardado se sirve sin volver a consultar ni dibujar
+    el reporte. Los reportes de períodos cerrados se marcan como inmutables
+    y ya no se vuelven a verificar ni a generar.
+    
+    Los archivos más antiguos (por último uso) se eliminan cuando el tamaño
+    total supera max_bytes. El índice se guarda en index.json dentro del
+    directorio de la caché. Varios procesos pueden compartir el directorio si
+    usan el mismo lock (por ejemplo multiprocessing.Lock); en ese caso el
+    índice se vuelve a leer en cada operación.
+    """
+    
+    INDEX_FILE = 'index.json'
+    
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, lock=None):
+        """
+        Inicializar caché
+        
+        Args:
+            cache_dir: Directorio donde se guardan los reportes
+            max_bytes: Tamaño máximo total de los archivos guardados
+            lock: Lock compartido con otros procesos que usan el mismo
+                directorio (None si la caché es solo de este proceso)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger('pos.report_cache')
+        
+        # clave -> {'file', 'size', 'watermark', 'immutable'} (el orden es el de uso)
+        self._entries = OrderedDict()
+        self._lock = lock if lock is not None else threading.Lock()
+        self._shared = lock is not None
+        self._loaded = False
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(report_type, params, format):
+        """
+        Obtener la clave de un reporte
+        
+        Args:
+            report_type: Tipo de reporte ('daily_sales', 'top_products', ...)
+            params: Diccionario de parámetros del reporte
+            format: Formato ('pdf', 'csv', 'json')
+        
+        Returns:
+            Clave (texto hexadecimal)
+        """
+        payload = json.dumps([report_type, params, format], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    @property
+    def total_bytes(self):
+        """Tamaño total de los reportes guardados"""
+        with self._lock:
+            self._load()
+            return sum(entry['size'] for entry in self._entries.values())
+    
+    def get(self, key, watermark=None, freeze=False):
+        """
+        Obtener la ruta de un reporte guardado si sigue vigente
+        
+        Args:
+            key: Clave del reporte (make_key)
+            watermark: Marca de agua actual de los datos, o función que la
+                calcula (solo se llama si la entrada no es inmutable)
+            freeze: Si es True y el reporte está vigente se marca como
+                inmutable (período cerrado)
+        
+        Returns:
+            Ruta del archivo guardado o None si no está o cambiaron los datos
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            path = os.path.join(self.cache_dir, entry['file']) if entry else None
+            
+            if entry and not os.path.exists(path):
+                self._remove(key)
+                entry = None
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        if not entry['immutable']:
+            current = watermark() if callable(watermark) else watermark
+            if self._normalize(current) != entry['watermark']:
+                with self._lock:
+                    self._load()
+                    self._remove(key)
+                    self._save()
+                self.misses += 1
+                return None
+        
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                if freeze:
+                    self._entries[key]['immutable'] = True
+                self._save()
+        
+        self.hits += 1
+        return path
+    
+    def put(self, key, source_path, watermark=None, immutable=False):
+        """
+        Guardar una copia de un reporte generado
+        
+        Args:
+            key: Clave del reporte (make_key)
+            source_path: Archivo generado
+            watermark: Marca de agua de los datos con que se generó
+            immutable: True si cubre un período cerrado
+        
+        Returns:
+            Ruta de la copia guardada o None si no se pudo guardar
+        """
+        try:
+            size = os.path.getsize(source_path)
+            if size > self.max_bytes:
+                return None
+            
+            os.makedirs(self.cache_dir, exist_ok=True)
+            filename = key + os.path.splitext(source_path)[1]
+            path = os.path.join(self.cache_dir, filename)
+            shutil.copyfile(source_path, path)
+        except OSError as e:
+            self.logger.error(f"Error al guardar reporte en caché: {e}")
+            return None
+        
+        with self._lock:
+            self._load()
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                'file': filename,
+                'size': size,
+                'watermark': self._normalize(watermark),
+                'immutable': immutable
+            }
+            self._evict()
+            self._save()
+        
+        return path
+    
+    def serve(self, cached_path, target_path):
+        """
+        Copiar un reporte guardado a la ruta donde se espera el reporte
+        
+        Args:
+            cached_path: Ruta devuelta por get
+            target_path: Ruta del reporte solicitado
+        
+        Returns:
+            target_path o None si no se pudo copiar
+        """
+        try:
+            shutil.copyfile(cached_path, target_path)
+            return target_path
+        except OSError as e:
+            self.logger.error(f"Error al copiar reporte de la caché: {e}")
+            return None
+    
+    def invalidate(self, key=None):
+        """
+        Quitar un reporte de la caché (o todos)
+        
+        Args:
+            key: Clave del reporte o None para vaciar la caché
+        """
+        with self._lock:
+            self._load()
+            keys = [key] if key is not None else list(self._entries)
+            for item in keys:
+                self._remove(item)
+            self._save()
+    
+    @staticmethod
+    def _normalize(watermark):
+        # La marca se guarda como JSON: así tuplas y listas se comparan igual al leer el índice
+        return json.loads(json.dumps(watermark, default=str))
+    
+    def _load(self):
+        # Leer el índice la primera vez que se usa la caché (o siempre, si otros procesos la comparten)
+        if self._loaded and not self._shared:
+            return
+        self._loaded = True
+        self._entries = OrderedDict()
+        
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        for key, entry in entries:
+            if os.path.exists(os.path.join(self.cache_dir, entry['file'])):
+                self._entries[key] = entry
+    
+    def _save(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        
+        try:
+            index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+            with open(index_path + '.tmp', 'w') as f:
+                json.dump(list(self._entries.items()), f)
+            os.replace(index_path + '.tmp', index_path)
+        except OSError as e:
+            self.logger.error(f"Error al guardar el índice de la caché de reportes: {e}")
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except OSError:
+                pass
+    
+    def _evict(self):
+        # Quitar los reportes usados hace más tiempo hasta respetar el tamaño máximo
+        total = sum(entry['size'] for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            total -= self._entries[key]['size']
+            self._remove(key)
@@ -0,0 +1,110 @@
+# app/views/cart_table_model.py
+from PySide6.QtCore import QAbstractTableModel, QModelIndex
+
+from .lazy_table_model import (DISPLAY_ROLE, ALIGNMENT_ROLE, USER_ROLE,
+                               HORIZONTAL, ALIGN_CENTER)
+from ..utils.money import format_cents
+
+class CartTableModel(QAbstractTableModel):
+    """
+    Modelo de la tabla del carrito
+    
+    Solo muestra el carrito (models.cart.Cart): escucha sus cambios y avisa a
+    la vista de la fila afectada, sin recorrer ni volver a leer las demás.
+    """
+    
+    COLUMNS = [
+        ("name", "Producto"),
+        ("price", "Precio"),
+        ("quantity", "Cantidad"),
+        ("subtotal", "Subtotal"),
+        ("remove", ""),
+    ]
+    # Columna que quita la línea al hacer clic
+    REMOVE_COLUMN = 4
+    
+    def __init__(self, cart=None, parent=None):
+        """
+        Inicializar el modelo
+        
+        Args:
+            cart: Carrito a mostrar (opcional)
+            parent: Objeto padre de Qt (opcional)
+        """
+        super().__init__(parent)
+        self.cart = None
+        # Filas que conoce la vista; cambia entre begin* y end* como espera Qt
+        self._row_count = 0
+        self.set_cart(cart)
+    
+    def set_cart(self, cart):
+        """Cambiar el carrito mostrado"""
+        self.beginResetModel()
+        if self.cart is not None:
+            self.cart.remove_listener(self._on_cart_changed)
+        self.cart = cart
+        self._row_count = 0
+        if cart is not None:
+            cart.add_listener(self._on_cart_changed)
+            self._row_count = len(cart)
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def data(self, index, role=DISPLAY_ROLE):
+        if not index.isValid() or self.cart is None:
+            return None
+        
+        line = self.cart.line(index.row())
+        if line is None:
+            return None
+        
+        column = index.column()
+        
+        if role == DISPLAY_ROLE:
+            if column == 0:
+                return line.name
+            if column == 1:
+                return format_cents(line.unit_price_cents)
+            if column == 2:
+                return str(line.quantity)
+            if column == 3:
+                return format_cents(line.subtotal_cents)
+            return "X"
+        if role == ALIGNMENT_ROLE:
+            return None if column == 0 else ALIGN_CENTER
+        if role == USER_ROLE:
+            return line.product_id
+        
+        return None
+    
+    def headerData(self, section, orientation, role=DISPLAY_ROLE):
+        if role == DISPLAY_ROLE and orientation == HORIZONTAL:
+            return self.COLUMNS[section][1]
+        return super().headerData(section, orientation, role)
+    
+    def product_id(self, row):
+        """ID del producto de una fila o None si la fila no existe"""
+        line = self.cart.line(row) if self.cart is not None else None
+        return line.product_id if line is not None else None
+    
+    def _on_cart_changed(self, event, row, line):
+        if event == 'added':
+            # El carrito ya tiene la línea; basta con avisar de la fila nueva
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._row_count += 1
+            self.endInsertRows()
+        elif event == 'changed':
+            self.dataChanged.emit(self.index(row, 2), self.index(row, 3))
+        elif event == 'removed':
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._row_count -= 1
+            self.endRemoveRows()
+        elif event == 'cleared':
+            self.beginResetModel()
+            self._row_count = 0
+            self.endResetModel()
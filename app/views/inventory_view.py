@@ -1,15 +1,20 @@
 # app/views/inventory_view.py
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-                              QTableWidgetItem, QPushButton, QLabel, QLineEdit,
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+                              QAbstractItemView, QPushButton, QLabel, QLineEdit,
                               QComboBox, QDialog, QDialogButtonBox, QFormLayout,
                               QSpinBox, QDoubleSpinBox, QMessageBox, QTabWidget,
                               QHeaderView, QGroupBox, QRadioButton, QTreeWidget,
-                              QTreeWidgetItem, QSplitter, QStackedWidget, QFrame)
+                              QTreeWidgetItem, QSplitter, QStackedWidget, QFrame,
+                              QFileDialog, QProgressDialog)
 from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QIcon, QFont, QColor
+from PySide6.QtGui import QIcon, QFont
 
+import os
 import logging
 
+from .product_table_model import ProductTableModel
+from .movement_table_model import MovementTableModel
+
 class InventoryView(QWidget):
     """Vista para la gestión de inventario"""
     
@@ -21,6 +26,11 @@ class InventoryView(QWidget):
     category_created = Signal(str, str)
     category_updated = Signal(int, str, str)
     category_deleted = Signal(int)
+    catalog_import_requested = Signal(str)
+    # Progreso y resultado de la importación (pueden emitirse desde otro hilo);
+    # la fracción es -1 si no se conoce
+    import_progress = Signal(int, float)
+    import_finished = Signal(dict)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -28,6 +38,12 @@ class InventoryView(QWidget):
         # Configuración básica
         self.logger = logging.getLogger('pos.views.inventory')
         
+        # Diálogo de progreso de la importación de catálogos
+        self.import_progress_dialog = None
+        self.import_cancelled = False
+        self.import_progress.connect(self._on_import_progress)
+        self.import_finished.connect(self._on_import_finished)
+        
         # Inicializar la interfaz
         self.setup_ui()
     
@@ -114,21 +130,49 @@ class InventoryView(QWidget):
         new_product_button.clicked.connect(self.show_new_product_dialog)
         header_layout.addWidget(new_product_button)
         
+        # Botón para importar el catálogo de un proveedor
+        import_button = QPushButton("Importar Catálogo")
+        import_button.clicked.connect(self.show_import_catalog_dialog)
+        header_layout.addWidget(import_button)
+        
         layout.addLayout(header_layout)
         
-        # Tabla de productos
-        self.products_table = QTableWidget(0, 8)  # Filas, Columnas
-        self.products_table.setHorizontalHeaderLabels([
-            "ID", "Código", "Nombre", "Categoría", "Precio", "Costo", "Stock", "Acciones"
-        ])
+        # Tabla de productos: el modelo carga páginas a medida que se desplaza
+        self.product_model = ProductTableModel(self._sample_products_page, parent=self)
+        self.products_table = QTableView()
+        self.products_table.setModel(self.product_model)
         self.products_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.products_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.products_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.products_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.products_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.products_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self._enable_sql_sorting(self.products_table, self.product_model)
+        self.products_table.doubleClicked.connect(
+            lambda index: self.show_edit_product_dialog(self.product_model.product(index.row())["product_id"])
+        )
         
         layout.addWidget(self.products_table)
         
-        # Cargar datos de productos (simulado)
-        self.load_sample_products()
+        # Acciones sobre el producto seleccionado
+        actions_layout = QHBoxLayout()
+        actions_layout.addStretch()
+        
+        edit_button = QPushButton("Editar")
+        edit_button.clicked.connect(lambda: self._on_product_action(self.show_edit_product_dialog))
+        
+        stock_button = QPushButton("Stock")
+        stock_button.clicked.connect(lambda: self._on_product_action(self.show_adjust_stock_dialog))
+        
+        delete_button = QPushButton("Eliminar")
+        delete_button.clicked.connect(lambda: self._on_product_action(self.confirm_delete_product))
+        
+        actions_layout.addWidget(edit_button)
+        actions_layout.addWidget(stock_button)
+        actions_layout.addWidget(delete_button)
+        
+        layout.addLayout(actions_layout)
+        
+        # Cargar la primera página de productos
+        self.reload_products()
         
         return tab
     
@@ -284,103 +328,69 @@ class InventoryView(QWidget):
         
         layout.addLayout(header_layout)
         
-        # Tabla de movimientos
-        self.movements_table = QTableWidget(0, 7)  # Filas, Columnas
-        self.movements_table.setHorizontalHeaderLabels([
-            "ID", "Fecha", "Producto", "Tipo", "Cantidad", "Usuario", "Notas"
-        ])
+        # Tabla de movimientos: bloques leídos a demanda, ordenados en SQL
+        self.movement_model = MovementTableModel(self._sample_movements_page, parent=self)
+        self.movements_table = QTableView()
+        self.movements_table.setModel(self.movement_model)
         self.movements_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
         self.movements_table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Stretch)
-        self.movements_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.movements_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.movements_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.movements_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._enable_sql_sorting(self.movements_table, self.movement_model)
         
         layout.addWidget(self.movements_table)
         
-        # Cargar datos de movimientos (simulado)
-        self.load_sample_movements()
+        # Cargar el primer bloque de movimientos
+        self.reload_movements()
         
         return tab
     
-    def load_sample_products(self):
-        """Cargar datos de ejemplo de productos (para demostración)"""
-        # Limpiar tabla
-        self.products_table.setRowCount(0)
+    def set_product_loader(self, loader):
+        """
+        Establecer la función que obtiene las páginas de productos
         
+        Args:
+            loader: Función loader(cursor, limit, **filtros) que devuelve un
+                diccionario con 'products' y 'next_cursor', por ejemplo
+                ProductController.get_products_page
+        """
+        self.product_model.set_loader(loader)
+    
+    def reload_products(self):
+        """Volver a cargar la tabla de productos desde la primera página"""
+        self.product_model.reload(
+            category_id=self.category_filter_combo.currentData(),
+            low_stock_only=self.low_stock_check.isChecked()
+        )
+    
+    def _on_product_action(self, action):
+        """Ejecutar una acción sobre el producto seleccionado en la tabla"""
+        rows = self.products_table.selectionModel().selectedRows()
+        if not rows:
+            QMessageBox.information(self, "Productos", "Seleccione un producto")
+            return
+        
+        action(self.product_model.product(rows[0].row())["product_id"])
+    
+    def _sample_products_page(self, cursor=None, limit=100, order_by="name", descending=False,
+                              category_id=None, low_stock_only=False, **filters):
+        """Obtener una página de los datos de ejemplo de productos (para demostración)"""
         # Datos de ejemplo
         products = [
-            {"product_id": 1, "barcode": "7501055310209", "name": "Agua 500ml", "category": "Bebidas", "price": 10.0, "cost": 5.0, "stock": 24},
-            {"product_id": 2, "barcode": "7501055310216", "name": "Refresco", "category": "Bebidas", "price": 15.0, "cost": 8.0, "stock": 35},
-            {"product_id": 3, "barcode": "7501055310223", "name": "Pan", "category": "Alimentos", "price": 20.0, "cost": 12.0, "stock": 8},
-            {"product_id": 4, "barcode": "7501055310230", "name": "Leche", "category": "Lácteos", "price": 25.0, "cost": 18.0, "stock": 16},
-            {"product_id": 5, "barcode": "7501055310247", "name": "Huevos", "category": "Alimentos", "price": 30.0, "cost": 22.0, "stock": 4}
+            {"product_id": 1, "barcode": "7501055310209", "name": "Agua 500ml", "category_id": 1, "category_name": "Bebidas", "price": 10.0, "cost": 5.0, "stock_quantity": 24, "min_stock_level": 5},
+            {"product_id": 2, "barcode": "7501055310216", "name": "Refresco", "category_id": 1, "category_name": "Bebidas", "price": 15.0, "cost": 8.0, "stock_quantity": 35, "min_stock_level": 5},
+            {"product_id": 3, "barcode": "7501055310223", "name": "Pan", "category_id": 2, "category_name": "Alimentos", "price": 20.0, "cost": 12.0, "stock_quantity": 8, "min_stock_level": 5},
+            {"product_id": 4, "barcode": "7501055310230", "name": "Leche", "category_id": 3, "category_name": "Lácteos", "price": 25.0, "cost": 18.0, "stock_quantity": 16, "min_stock_level": 5},
+            {"product_id": 5, "barcode": "7501055310247", "name": "Huevos", "category_id": 2, "category_name": "Alimentos", "price": 30.0, "cost": 22.0, "stock_quantity": 4, "min_stock_level": 5}
         ]
         
-        # Agregar datos a la tabla
-        for product in products:
-            row_position = self.products_table.rowCount()
-            self.products_table.insertRow(row_position)
-            
-            # ID
-            id_item = QTableWidgetItem(str(product["product_id"]))
-            id_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row_position, 0, id_item)
-            
-            # Código de barras
-            barcode_item = QTableWidgetItem(product["barcode"])
-            barcode_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row_position, 1, barcode_item)
-            
-            # Nombre
-            name_item = QTableWidgetItem(product["name"])
-            self.products_table.setItem(row_position, 2, name_item)
-            
-            # Categoría
-            category_item = QTableWidgetItem(product["category"])
-            category_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row_position, 3, category_item)
-            
-            # Precio
-            price_item = QTableWidgetItem(f"${product['price']:.2f}")
-            price_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row_position, 4, price_item)
-            
-            # Costo
-            cost_item = QTableWidgetItem(f"${product['cost']:.2f}")
-            cost_item.setTextAlignment(Qt.AlignCenter)
-            self.products_table.setItem(row_position, 5, cost_item)
-            
-            # Stock
-            stock_item = QTableWidgetItem(str(product["stock"]))
-            stock_item.setTextAlignment(Qt.AlignCenter)
-            
-            # Colorear stock bajo
-            if product["stock"] <= 5:
-                stock_item.setBackground(QColor(255, 200, 200))  # Rojo claro
-            
-            self.products_table.setItem(row_position, 6, stock_item)
-            
-            # Botones de acción
-            actions_widget = QWidget()
-            actions_layout = QHBoxLayout(actions_widget)
-            actions_layout.setContentsMargins(0, 0, 0, 0)
-            
-            edit_button = QPushButton("Editar")
-            edit_button.setProperty("product_id", product["product_id"])
-            edit_button.clicked.connect(lambda checked, product_id=product["product_id"]: self.show_edit_product_dialog(product_id))
-            
-            stock_button = QPushButton("Stock")
-            stock_button.setProperty("product_id", product["product_id"])
-            stock_button.clicked.connect(lambda checked, product_id=product["product_id"]: self.show_adjust_stock_dialog(product_id))
-            
-            delete_button = QPushButton("Eliminar")
-            delete_button.setProperty("product_id", product["product_id"])
-            delete_button.clicked.connect(lambda checked, product_id=product["product_id"]: self.confirm_delete_product(product_id))
-            
-            actions_layout.addWidget(edit_button)
-            actions_layout.addWidget(stock_button)
-            actions_layout.addWidget(delete_button)
-            
-            self.products_table.setCellWidget(row_position, 7, actions_widget)
+        if category_id is not None:
+            products = [product for product in products if product["category_id"] == category_id]
+        if low_stock_only:
+            products = [product for product in products if product["stock_quantity"] <= product["min_stock_level"]]
+        
+        page = self._sample_page(products, "product_id", cursor, limit, order_by, descending)
+        return {"products": page["rows"], "next_cursor": page["next_cursor"]}
     
     def load_sample_categories(self):
         """Cargar datos de ejemplo de categorías (para demostración)"""
@@ -406,82 +416,63 @@ class InventoryView(QWidget):
             
             self.categories_tree.addTopLevelItem(item)
     
-    def load_sample_movements(self):
-        """Cargar datos de ejemplo de movimientos (para demostración)"""
-        # Limpiar tabla
-        self.movements_table.setRowCount(0)
+    def set_movement_loader(self, loader):
+        """
+        Establecer la función que obtiene los bloques de movimientos
         
+        Args:
+            loader: Función como ProductController.get_stock_movements_page
+        """
+        self.movement_model.set_loader(loader)
+    
+    def reload_movements(self):
+        """Volver a cargar la tabla de movimientos desde el primer bloque"""
+        self.movement_model.reload(
+            product_id=self.product_filter_combo.currentData(),
+            movement_type=self.movement_type_combo.currentData()
+        )
+    
+    def _enable_sql_sorting(self, table, model):
+        """Ordenar desde los encabezados de la tabla con el orden del modelo (en SQL)"""
+        order = Qt.DescendingOrder if model.descending else Qt.AscendingOrder
+        table.horizontalHeader().setSortIndicator(model.sort_column(), order)
+        table.setSortingEnabled(True)
+    
+    def _sample_movements_page(self, cursor=None, limit=100, order_by="movement_date", descending=True,
+                               product_id=None, movement_type=None, **filters):
+        """Obtener un bloque de los datos de ejemplo de movimientos (para demostración)"""
         # Datos de ejemplo
         movements = [
-            {"movement_id": 1, "date": "14/04/2025 08:30", "product": "Agua 500ml", "type": "purchase", "quantity": 50, "user": "admin", "notes": "Compra inicial"},
-            {"movement_id": 2, "date": "14/04/2025 09:15", "product": "Refresco", "type": "purchase", "quantity": 40, "user": "admin", "notes": "Compra inicial"},
-            {"movement_id": 3, "date": "14/04/2025 10:20", "product": "Agua 500ml", "type": "sale", "quantity": -2, "user": "cajero1", "notes": "Venta #1001"},
-            {"movement_id": 4, "date": "14/04/2025 11:05", "product": "Pan", "type": "sale", "quantity": -5, "user": "cajero1", "notes": "Venta #1002"},
-            {"movement_id": 5, "date": "14/04/2025 11:30", "product": "Refresco", "type": "sale", "quantity": -3, "user": "cajero1", "notes": "Venta #1003"},
-            {"movement_id": 6, "date": "14/04/2025 12:15", "product": "Huevos", "type": "adjustment", "quantity": -2, "user": "admin", "notes": "Ajuste por daño"}
+            {"movement_id": 1, "movement_date": "2025-04-14 08:30:00", "product_id": 1, "product_name": "Agua 500ml", "movement_type": "purchase", "quantity": 50, "user_name": "admin", "notes": "Compra inicial"},
+            {"movement_id": 2, "movement_date": "2025-04-14 09:15:00", "product_id": 2, "product_name": "Refresco", "movement_type": "purchase", "quantity": 40, "user_name": "admin", "notes": "Compra inicial"},
+            {"movement_id": 3, "movement_date": "2025-04-14 10:20:00", "product_id": 1, "product_name": "Agua 500ml", "movement_type": "sale", "quantity": -2, "user_name": "cajero1", "notes": "Venta #1001"},
+            {"movement_id": 4, "movement_date": "2025-04-14 11:05:00", "product_id": 3, "product_name": "Pan", "movement_type": "sale", "quantity": -5, "user_name": "cajero1", "notes": "Venta #1002"},
+            {"movement_id": 5, "movement_date": "2025-04-14 11:30:00", "product_id": 2, "product_name": "Refresco", "movement_type": "sale", "quantity": -3, "user_name": "cajero1", "notes": "Venta #1003"},
+            {"movement_id": 6, "movement_date": "2025-04-14 12:15:00", "product_id": 5, "product_name": "Huevos", "movement_type": "adjustment", "quantity": -2, "user_name": "admin", "notes": "Ajuste por daño"}
         ]
         
-        # Agregar datos a la tabla
-        for movement in movements:
-            row_position = self.movements_table.rowCount()
-            self.movements_table.insertRow(row_position)
-            
-            # ID
-            id_item = QTableWidgetItem(str(movement["movement_id"]))
-            id_item.setTextAlignment(Qt.AlignCenter)
-            self.movements_table.setItem(row_position, 0, id_item)
-            
-            # Fecha
-            date_item = QTableWidgetItem(movement["date"])
-            date_item.setTextAlignment(Qt.AlignCenter)
-            self.movements_table.setItem(row_position, 1, date_item)
-            
-            # Producto
-            product_item = QTableWidgetItem(movement["product"])
-            self.movements_table.setItem(row_position, 2, product_item)
-            
-            # Tipo
-            type_name = ""
-            type_color = QColor(255, 255, 255)  # Blanco por defecto
-            
-            if movement["type"] == "purchase":
-                type_name = "Entrada"
-                type_color = QColor(200, 255, 200)  # Verde claro
-            elif movement["type"] == "sale":
-                type_name = "Salida"
-                type_color = QColor(255, 200, 200)  # Rojo claro
-            elif movement["type"] == "adjustment":
-                type_name = "Ajuste"
-                type_color = QColor(255, 255, 200)  # Amarillo claro
-            elif movement["type"] == "return":
-                type_name = "Devolución"
-                type_color = QColor(200, 200, 255)  # Azul claro
-            
-            type_item = QTableWidgetItem(type_name)
-            type_item.setTextAlignment(Qt.AlignCenter)
-            type_item.setBackground(type_color)
-            self.movements_table.setItem(row_position, 3, type_item)
-            
-            # Cantidad
-            quantity_item = QTableWidgetItem(str(movement["quantity"]))
-            quantity_item.setTextAlignment(Qt.AlignCenter)
-            
-            # Colorear según el tipo
-            if movement["quantity"] > 0:
-                quantity_item.setForeground(QColor(0, 128, 0))  # Verde
-            else:
-                quantity_item.setForeground(QColor(255, 0, 0))  # Rojo
-            
-            self.movements_table.setItem(row_position, 4, quantity_item)
-            
-            # Usuario
-            user_item = QTableWidgetItem(movement["user"])
-            user_item.setTextAlignment(Qt.AlignCenter)
-            self.movements_table.setItem(row_position, 5, user_item)
-            
-            # Notas
-            notes_item = QTableWidgetItem(movement["notes"])
-            self.movements_table.setItem(row_position, 6, notes_item)
+        if product_id is not None:
+            movements = [movement for movement in movements if movement["product_id"] == product_id]
+        if movement_type is not None:
+            movements = [movement for movement in movements if movement["movement_type"] == movement_type]
+        
+        page = self._sample_page(movements, "movement_id", cursor, limit, order_by, descending)
+        return {"movements": page["rows"], "next_cursor": page["next_cursor"]}
+    
+    @staticmethod
+    def _sample_page(rows, id_key, cursor, limit, order_by, descending):
+        """Paginar datos de ejemplo con el mismo orden (columna e ID) que la base de datos"""
+        def sort_key(row):
+            return (row[order_by], row[id_key])
+        
+        rows = sorted(rows, key=sort_key, reverse=descending)
+        if cursor is not None:
+            rows = [row for row in rows if (sort_key(row) < tuple(cursor) if descending else sort_key(row) > tuple(cursor))]
+        
+        page = rows[:limit]
+        next_cursor = sort_key(page[-1]) if len(rows) > limit else None
+        
+        return {"rows": page, "next_cursor": next_cursor}
     
     def search_products(self):
         """Buscar productos según el texto ingresado"""
@@ -492,7 +483,7 @@ class InventoryView(QWidget):
         
         if not search_text:
             # Si no hay texto, mostrar todos los productos
-            self.load_sample_products()
+            self.reload_products()
             return
             
         # Filtrar los productos (simulado)
@@ -503,14 +494,11 @@ class InventoryView(QWidget):
     
     def filter_products(self):
         """Filtrar productos según categoría y estado de stock"""
-        # En un sistema real, invocaríamos al controlador para el filtrado
-        
-        # Para demostración, simulamos el filtrado
         category_id = self.category_filter_combo.currentData()
         low_stock_only = self.low_stock_check.isChecked()
         
-        # Recargar productos (simulado)
-        self.load_sample_products()
+        # Recargar la tabla con los filtros (el loader los aplica en la consulta)
+        self.reload_products()
         
         # Mostrar mensaje de filtrado
         if category_id is not None:
@@ -522,14 +510,11 @@ class InventoryView(QWidget):
     
     def filter_movements(self):
         """Filtrar movimientos según producto y tipo"""
-        # En un sistema real, invocaríamos al controlador para el filtrado
-        
-        # Para demostración, simulamos el filtrado
         product_id = self.product_filter_combo.currentData()
         movement_type = self.movement_type_combo.currentData()
         
-        # Recargar movimientos (simulado)
-        self.load_sample_movements()
+        # Recargar la tabla con los filtros (el loader los aplica en la consulta)
+        self.reload_movements()
         
         # Mostrar mensaje de filtrado
         filters = []
@@ -654,8 +639,8 @@ class InventoryView(QWidget):
             # Emitir señal (en un sistema real, esto invocaría al controlador)
             self.product_created.emit(product_data)
 
-            # Para demostración, recargar los productos
-            self.load_sample_products()
+            # Recargar la tabla desde la primera página
+            self.reload_products()
 
             QMessageBox.information(self, "Producto Creado", f"Producto '{product_data['name']}' creado correctamente")
     
@@ -668,19 +653,7 @@ class InventoryView(QWidget):
         """
         # En un sistema real, obtendríamos los datos del producto desde el controlador
         # Para demostración, usamos datos de ejemplo
-        product_data = None
-        for row in range(self.products_table.rowCount()):
-            if int(self.products_table.item(row, 0).text()) == product_id:
-                product_data = {
-                    "product_id": product_id,
-                    "barcode": self.products_table.item(row, 1).text(),
-                    "name": self.products_table.item(row, 2).text(),
-                    "category": self.products_table.item(row, 3).text(),
-                    "price": float(self.products_table.item(row, 4).text().replace('$', '')),
-                    "cost": float(self.products_table.item(row, 5).text().replace('$', '')),
-                    "stock_quantity": int(self.products_table.item(row, 6).text())
-                }
-                break
+        product_data = self.product_model.find_product(product_id)
                 
         if not product_data:
             QMessageBox.warning(self, "Error", f"Producto con ID {product_id} no encontrado")
@@ -695,7 +668,7 @@ class InventoryView(QWidget):
         # Formulario
         form_layout = QFormLayout()
         
-        barcode_input = QLineEdit(product_data["barcode"])
+        barcode_input = QLineEdit(product_data["barcode"] or "")
         
         name_input = QLineEdit(product_data["name"])
         
@@ -712,7 +685,7 @@ class InventoryView(QWidget):
         category_combo.addItem("Higiene Personal", 5)
         
         # Seleccionar la categoría actual
-        category_index = category_combo.findText(product_data["category"])
+        category_index = category_combo.findText(product_data["category_name"] or "")
         if category_index >= 0:
             category_combo.setCurrentIndex(category_index)
         
@@ -779,8 +752,8 @@ class InventoryView(QWidget):
             # Emitir señal (en un sistema real, esto invocaría al controlador)
             self.product_updated.emit(product_id, updated_data)
             
-            # Para demostración, recargar los productos
-            self.load_sample_products()
+            # Recargar la tabla desde la primera página
+            self.reload_products()
             
             QMessageBox.information(self, "Producto Actualizado", f"Producto '{updated_data['name']}' actualizado correctamente")
     
@@ -793,15 +766,7 @@ class InventoryView(QWidget):
         """
         # En un sistema real, obtendríamos los datos del producto desde el controlador
         # Para demostración, usamos datos de ejemplo
-        product_data = None
-        for row in range(self.products_table.rowCount()):
-            if int(self.products_table.item(row, 0).text()) == product_id:
-                product_data = {
-                    "product_id": product_id,
-                    "name": self.products_table.item(row, 2).text(),
-                    "stock_quantity": int(self.products_table.item(row, 6).text())
-                }
-                break
+        product_data = self.product_model.find_product(product_id)
                 
         if not product_data:
             QMessageBox.warning(self, "Error", f"Producto con ID {product_id} no encontrado")
@@ -899,8 +864,8 @@ class InventoryView(QWidget):
             # Emitir señal (en un sistema real, esto invocaría al controlador)
             self.stock_adjusted.emit(product_id, quantity, adjustment_type)
             
-            # Para demostración, recargar los productos
-            self.load_sample_products()
+            # Recargar la tabla desde la primera página
+            self.reload_products()
             
             # Mensaje según el tipo de ajuste
             if adjustment_type == "add":
@@ -920,11 +885,8 @@ class InventoryView(QWidget):
             product_id: ID del producto a eliminar
         """
         # Obtener nombre del producto
-        product_name = ""
-        for row in range(self.products_table.rowCount()):
-            if int(self.products_table.item(row, 0).text()) == product_id:
-                product_name = self.products_table.item(row, 2).text()
-                break
+        product = self.product_model.find_product(product_id)
+        product_name = product["name"] if product else ""
                 
         reply = QMessageBox.question(
             self,
@@ -938,8 +900,8 @@ class InventoryView(QWidget):
             # Emitir señal (en un sistema real, esto invocaría al controlador)
             self.product_deleted.emit(product_id)
             
-            # Para demostración, recargar los productos
-            self.load_sample_products()
+            # Recargar la tabla desde la primera página
+            self.reload_products()
             
             QMessageBox.information(self, "Producto Eliminado", f"Producto '{product_name}' eliminado correctamente")
     
@@ -1173,8 +1135,8 @@ class InventoryView(QWidget):
             
             # En un sistema real, invocaríamos al controlador para registrar el movimiento
             
-            # Para demostración, recargar los movimientos
-            self.load_sample_movements()
+            # Recargar la tabla desde el primer bloque
+            self.reload_movements()
             
             QMessageBox.information(
                 self, 
@@ -1183,6 +1145,67 @@ class InventoryView(QWidget):
                 f"para el producto '{product_name}' con cantidad {abs(quantity)}."
             )
     
+    def show_import_catalog_dialog(self):
+        """Seleccionar un catálogo (CSV o XLSX) y solicitar su importación"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Seleccionar catálogo de productos",
+            os.path.expanduser("~"),
+            "Catálogos (*.csv *.xlsx)"
+        )
+        
+        if not file_path:
+            return
+        
+        self.import_cancelled = False
+        self.import_progress_dialog = QProgressDialog("Importando catálogo...", "Cancelar", 0, 100, self)
+        self.import_progress_dialog.setWindowTitle("Importar Catálogo")
+        self.import_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.import_progress_dialog.setMinimumDuration(0)
+        self.import_progress_dialog.canceled.connect(self._on_import_cancel)
+        self.import_progress_dialog.setValue(0)
+        
+        # La importación se ejecuta fuera de la vista y avisa con import_progress/import_finished
+        self.catalog_import_requested.emit(file_path)
+    
+    def _on_import_cancel(self):
+        """Marcar la importación como cancelada (el importador la detiene tras el lote actual)"""
+        self.import_cancelled = True
+    
+    @Slot(int, float)
+    def _on_import_progress(self, rows, fraction):
+        """Actualizar el diálogo de progreso de la importación"""
+        if self.import_progress_dialog is None:
+            return
+        
+        self.import_progress_dialog.setLabelText(f"Importando catálogo... {rows} filas procesadas")
+        if fraction >= 0:
+            self.import_progress_dialog.setValue(int(fraction * 100))
+    
+    @Slot(dict)
+    def _on_import_finished(self, result):
+        """Mostrar el resultado de la importación"""
+        if self.import_progress_dialog is not None:
+            self.import_progress_dialog.close()
+            self.import_progress_dialog = None
+        
+        if not result.get('success'):
+            QMessageBox.warning(self, "Error", f"No se pudo importar el catálogo: {result.get('message')}")
+            return
+        
+        message = result['message']
+        
+        # Mostrar las primeras filas con errores
+        errors = result.get('errors', [])[:10]
+        if errors:
+            details = "\n".join(f"Fila {error['row']}: {error['message']}" for error in errors)
+            message += f"\n\n{details}"
+            if result['error_count'] > len(errors):
+                message += f"\n... y {result['error_count'] - len(errors)} más"
+        
+        QMessageBox.information(self, "Catálogo Importado", message)
+        self.reload_products()
+    
     def statusBar(self):
         """Obtener la barra de estado de la ventana principal"""
         # Buscar la ventana principal (QMainWindow)
@@ -0,0 +1,236 @@
+# app/views/lazy_table_model.py
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from collections import OrderedDict
+import logging
+
+# PySide6 resuelve Qt.<nombre> en cada acceso, lo que es lento en data() (se
+# llama por cada celda visible); los valores usados se leen una sola vez
+DISPLAY_ROLE = Qt.DisplayRole
+ALIGNMENT_ROLE = Qt.TextAlignmentRole
+BACKGROUND_ROLE = Qt.BackgroundRole
+FOREGROUND_ROLE = Qt.ForegroundRole
+USER_ROLE = Qt.UserRole
+HORIZONTAL = Qt.Horizontal
+ALIGN_CENTER = int(Qt.AlignCenter)
+
+class LazyTableModel(QAbstractTableModel):
+    """
+    Modelo de tabla que lee las filas de la base de datos por bloques
+    
+    Las filas se agregan por bloques cuando la vista (QTableView) llega al final
+    (canFetchMore/fetchMore). Solo se guardan en memoria los últimos bloques
+    usados; de cada bloque se conserva el cursor donde empieza, así que un
+    bloque descartado se vuelve a leer con una sola consulta (keyset) al
+    desplazarse de nuevo hasta él. El orden y los filtros se aplican en SQL.
+    
+    Las filas se obtienen con una función loader(cursor, limit, order_by,
+    descending, **filtros) que devuelve un diccionario con la lista de filas
+    (bajo ROWS_KEY) y 'next_cursor', como ProductController.get_products_page.
+    
+    Las subclases definen COLUMNS, ROWS_KEY, DEFAULT_SORT y, si lo necesitan,
+    display_value, alignment, background y foreground.
+    """
+    
+    # (clave de la fila, encabezado, columna de orden del loader o None)
+    COLUMNS = []
+    # Clave con la lista de filas en el resultado del loader
+    ROWS_KEY = 'rows'
+    # (columna de orden, descendente) inicial
+    DEFAULT_SORT = (None, False)
+    
+    def __init__(self, loader=None, block_size=200, max_blocks=10, parent=None):
+        """
+        Inicializar el modelo
+        
+        Args:
+            loader: Función que obtiene un bloque de filas (opcional)
+            block_size: Número de filas por bloque (una consulta por bloque)
+            max_blocks: Número máximo de bloques guardados en memoria
+            parent: Objeto padre de Qt (opcional)
+        """
+        super().__init__(parent)
+        
+        self.logger = logging.getLogger('pos.views.table_model')
+        self.loader = loader
+        self.block_size = block_size
+        self.max_blocks = max(2, max_blocks)
+        self.filters = {}
+        self.order_by, self.descending = self.DEFAULT_SORT
+        
+        self._reset_state()
+    
+    def _reset_state(self):
+        self._row_count = 0
+        # Cursor donde empieza cada bloque conocido y el del bloque siguiente
+        self._block_cursors = [None]
+        self._blocks = OrderedDict()
+        self._has_more = self.loader is not None
+    
+    def set_loader(self, loader):
+        """Cambiar la función que obtiene las filas y recargar"""
+        self.loader = loader
+        self.reload(**self.filters)
+    
+    def reload(self, **filters):
+        """
+        Descartar las filas cargadas y volver al primer bloque
+        
+        Args:
+            **filters: Filtros para el loader
+        """
+        self.beginResetModel()
+        self.filters = filters
+        self._reset_state()
+        self.endResetModel()
+        
+        # Cargar el primer bloque aunque la vista aún no esté visible
+        self.fetchMore()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """Leer el bloque siguiente y agregar sus filas al final de la tabla"""
+        if parent.isValid() or not self._has_more:
+            return
+        
+        block = len(self._block_cursors) - 1
+        page = self._load(self._block_cursors[block])
+        if page is None:
+            self._has_more = False
+            return
+        
+        rows, next_cursor = page
+        if rows:
+            self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+            self._store_block(block, rows)
+            self._row_count += len(rows)
+            self.endInsertRows()
+        
+        self._has_more = next_cursor is not None
+        if self._has_more:
+            self._block_cursors.append(next_cursor)
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Ordenar en la base de datos por la columna indicada"""
+        order_by = self.COLUMNS[column][2]
+        if order_by is None:
+            return
+        
+        self.order_by = order_by
+        self.descending = order == Qt.DescendingOrder
+        self.reload(**self.filters)
+    
+    def sort_column(self):
+        """Índice de la columna del orden actual (-1 si no se muestra)"""
+        for column, (_, _, order_by) in enumerate(self.COLUMNS):
+            if order_by == self.order_by:
+                return column
+        return -1
+    
+    def row_data(self, row):
+        """
+        Obtener los datos de una fila, leyendo su bloque si no está en memoria
+        
+        Args:
+            row: Número de fila
+        
+        Returns:
+            Diccionario con los datos de la fila o None si no existe
+        """
+        if not 0 <= row < self._row_count:
+            return None
+        
+        block, offset = divmod(row, self.block_size)
+        rows = self._blocks.get(block)
+        
+        if rows is None:
+            page = self._load(self._block_cursors[block])
+            if page is None:
+                return None
+            rows = page[0]
+            self._store_block(block, rows)
+        else:
+            self._blocks.move_to_end(block)
+        
+        # Si el bloque cambió en la base de datos puede tener menos filas
+        return rows[offset] if offset < len(rows) else None
+    
+    def cached_rows(self):
+        """Recorrer las filas de los bloques que están en memoria"""
+        for rows in self._blocks.values():
+            yield from rows
+    
+    def data(self, index, role=DISPLAY_ROLE):
+        if not index.isValid():
+            return None
+        
+        row = self.row_data(index.row())
+        if row is None:
+            return None
+        
+        key = self.COLUMNS[index.column()][0]
+        
+        if role == DISPLAY_ROLE:
+            return self.display_value(row, key)
+        if role == ALIGNMENT_ROLE:
+            return self.alignment(key)
+        if role == BACKGROUND_ROLE:
+            return self.background(row, key)
+        if role == FOREGROUND_ROLE:
+            return self.foreground(row, key)
+        if role == USER_ROLE:
+            return row
+        
+        return None
+    
+    def headerData(self, section, orientation, role=DISPLAY_ROLE):
+        if role == DISPLAY_ROLE and orientation == HORIZONTAL:
+            return self.COLUMNS[section][1]
+        return super().headerData(section, orientation, role)
+    
+    def display_value(self, row, key):
+        """Texto de una celda"""
+        value = row.get(key)
+        return "" if value is None else str(value)
+    
+    def alignment(self, key):
+        """Alineación de una columna (None para la predeterminada)"""
+        return ALIGN_CENTER
+    
+    def background(self, row, key):
+        """Color de fondo de una celda (None para el predeterminado)"""
+        return None
+    
+    def foreground(self, row, key):
+        """Color del texto de una celda (None para el predeterminado)"""
+        return None
+    
+    def _load(self, cursor):
+        """Leer un bloque desde un cursor; devuelve (filas, siguiente cursor) o None"""
+        if self.loader is None:
+            return None
+        
+        try:
+            page = self.loader(cursor=cursor, limit=self.block_size, order_by=self.order_by,
+                               descending=self.descending, **self.filters)
+        except Exception as e:
+            self.logger.error(f"Error al cargar filas: {e}")
+            return None
+        
+        return page[self.ROWS_KEY], page['next_cursor']
+    
+    def _store_block(self, block, rows):
+        self._blocks[block] = rows
+        self._blocks.move_to_end(block)
+        
+        # Descartar los bloques usados hace más tiempo
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
@@ -17,6 +17,7 @@ from .pos_view import POSView
 from .admin_view import AdminView
 from .inventory_view import InventoryView
 from .reports_view import ReportsView
+from ..models.cart import Cart
 
 class MainWindow(QMainWindow):
     """Ventana principal del sistema"""
@@ -195,7 +196,7 @@ class MainWindow(QMainWindow):
     def create_tabs(self):
         """Crear las pestañas del sistema"""
         # Pestaña de ventas (POS)
-        self.pos_view = POSView(self)
+        self.pos_view = POSView(self, cart=Cart())
         self.tab_widget.addTab(self.pos_view, "Ventas")
         
         # Pestaña de inventario
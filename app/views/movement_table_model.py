@@ -0,0 +1,66 @@
+# app/views/movement_table_model.py
+from PySide6.QtGui import QColor
+
+from .lazy_table_model import LazyTableModel, ALIGN_CENTER
+
+class MovementTableModel(LazyTableModel):
+    """
+    Modelo de la tabla de movimientos de inventario
+    
+    Lee los movimientos por bloques con un loader como
+    ProductController.get_stock_movements_page (los más recientes primero) y
+    guarda en memoria solo los bloques usados últimamente, así que recorrer
+    cientos de miles de movimientos no crece en memoria.
+    """
+    
+    COLUMNS = [
+        ("movement_id", "ID", "movement_id"),
+        ("movement_date", "Fecha", "movement_date"),
+        ("product_name", "Producto", "product_name"),
+        ("movement_type", "Tipo", "movement_type"),
+        ("quantity", "Cantidad", "quantity"),
+        ("user_name", "Usuario", "user_name"),
+        ("notes", "Notas", "notes"),
+    ]
+    ROWS_KEY = 'movements'
+    DEFAULT_SORT = ('movement_date', True)
+    
+    # Nombre y color de cada tipo de movimiento
+    TYPE_NAMES = {
+        "purchase": "Entrada",
+        "sale": "Salida",
+        "adjustment": "Ajuste",
+        "return": "Devolución",
+    }
+    TYPE_COLORS = {
+        "purchase": QColor(200, 255, 200),  # Verde claro
+        "sale": QColor(255, 200, 200),  # Rojo claro
+        "adjustment": QColor(255, 255, 200),  # Amarillo claro
+        "return": QColor(200, 200, 255),  # Azul claro
+    }
+    POSITIVE_COLOR = QColor(0, 128, 0)  # Verde
+    NEGATIVE_COLOR = QColor(255, 0, 0)  # Rojo
+    
+    def display_value(self, row, key):
+        if key == "movement_type":
+            return self.TYPE_NAMES.get(row["movement_type"], row["movement_type"])
+        
+        # "AAAA-MM-DD HH:MM:SS" a "DD/MM/AAAA HH:MM" sin convertir a datetime
+        date = row.get("movement_date")
+        if key == "movement_date" and date and len(date) >= 16:
+            return f"{date[8:10]}/{date[5:7]}/{date[:4]} {date[11:16]}"
+        
+        return super().display_value(row, key)
+    
+    def alignment(self, key):
+        return None if key in ("product_name", "notes") else ALIGN_CENTER
+    
+    def background(self, row, key):
+        if key == "movement_type":
+            return self.TYPE_COLORS.get(row["movement_type"])
+        return None
+    
+    def foreground(self, row, key):
+        if key == "quantity":
+            return self.POSITIVE_COLOR if row["quantity"] > 0 else self.NEGATIVE_COLOR
+        return None
@@ -1,10 +1,13 @@
 # app/views/pos_view.py
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                              QPushButton, QLabel, QTableWidget, QTableWidgetItem,
+                              QPushButton, QLabel, QTableView, QAbstractItemView,
                               QLineEdit, QGridLayout, QFrame, QDialog, QComboBox,
-                              QMessageBox, QHeaderView, QSplitter, QTabWidget)
-from PySide6.QtCore import Qt, Signal, Slot, QTimer
-from PySide6.QtGui import QFont, QIcon, QKeySequence, QShortcut
+                              QMessageBox, QHeaderView, QSplitter, QTabWidget, QCompleter)
+from PySide6.QtCore import Qt, Signal, Slot, QTimer, QModelIndex
+from PySide6.QtGui import QFont, QIcon, QKeySequence, QShortcut, QStandardItemModel, QStandardItem
+
+from .cart_table_model import CartTableModel
+from ..utils.money import Money
 
 class POSView(QMainWindow):
     """Vista principal del punto de venta"""
@@ -13,15 +16,34 @@ class POSView(QMainWindow):
     product_selected = Signal(int)  # Señal cuando se selecciona un producto de la lista
     checkout_requested = Signal(dict)  # Señal cuando se solicita finalizar la venta
     open_drawer_requested = Signal()  # Señal para abrir la caja
+    device_task_finished = Signal(str, str)  # Tarea de dispositivo completada (tarea, mensaje)
+    device_task_failed = Signal(str, str)  # Error en una tarea de dispositivo (tarea, mensaje)
+    product_search_requested = Signal(str)  # Texto a buscar mientras el cajero escribe
+    
+    # Espera desde la última tecla antes de buscar y mínimo de caracteres
+    SEARCH_DEBOUNCE_MS = 150
+    SEARCH_MIN_CHARS = 2
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, cart=None):
+        """
+        Inicializar la vista
+        
+        Args:
+            parent: Widget padre (opcional)
+            cart: Carrito de la venta (models.cart.Cart); la tabla y los
+                totales solo lo muestran
+        """
         super().__init__(parent)
         self.setWindowTitle("Sistema POS")
         self.resize(1024, 768)  # Tamaño inicial
+        self.cart = None
         
         # Configurar la interfaz principal
         self.setup_ui()
         
+        if cart is not None:
+            self.set_cart(cart)
+        
         # Conectar señales internas
         self._connect_signals()
         
@@ -65,6 +87,20 @@ class POSView(QMainWindow):
         self.barcode_input = QLineEdit()
         self.barcode_input.setPlaceholderText("Escanear código o buscar producto...")
         self.barcode_input.returnPressed.connect(self._on_barcode_entered)
+        self.barcode_input.textEdited.connect(self._on_search_text_edited)
+        
+        # Sugerencias de productos mientras se escribe (nombre o código)
+        self.suggestion_model = QStandardItemModel(self)
+        self.product_completer = QCompleter(self.suggestion_model, self)
+        self.product_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.product_completer.setWidget(self.barcode_input)
+        self.product_completer.activated[QModelIndex].connect(self._on_suggestion_activated)
+        
+        # La búsqueda espera a que el cajero deje de escribir (y no se dispara con el escáner)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self._request_product_search)
         
         search_button = QPushButton("Buscar")
         search_button.clicked.connect(self._on_barcode_entered)
@@ -75,10 +111,16 @@ class POSView(QMainWindow):
         cart_layout.addWidget(search_frame)
         
         # Tabla del carrito
-        self.cart_table = QTableWidget(0, 5)  # Filas, Columnas
-        self.cart_table.setHorizontalHeaderLabels(["Producto", "Precio", "Cantidad", "Subtotal", ""])
+        self.cart_model = CartTableModel(parent=self)
+        self.cart_table = QTableView()
+        self.cart_table.setModel(self.cart_model)
         self.cart_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.cart_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.cart_table.horizontalHeader().setSectionResizeMode(CartTableModel.REMOVE_COLUMN,
+                                                                QHeaderView.ResizeToContents)
+        self.cart_table.verticalHeader().setVisible(False)
+        self.cart_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.cart_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.cart_table.clicked.connect(self._on_cart_table_clicked)
         
         cart_layout.addWidget(self.cart_table, 1)
         
@@ -204,6 +246,10 @@ class POSView(QMainWindow):
         """Conectar señales internas"""
         self.checkout_button.clicked.connect(self._on_checkout_clicked)
         self.cancel_button.clicked.connect(self._on_cancel_clicked)
+        
+        # Las tareas de dispositivos terminan en otro hilo; las señales las traen a la interfaz
+        self.device_task_finished.connect(self._on_device_task_finished)
+        self.device_task_failed.connect(self._on_device_task_failed)
     
     def _setup_shortcuts(self):
         """Configurar atajos de teclado"""
@@ -232,33 +278,88 @@ class POSView(QMainWindow):
         """Manejar entrada de código de barras"""
         barcode = self.barcode_input.text().strip()
         if barcode:
+            self._hide_suggestions()
             self.barcode_scanned.emit(barcode)
             self.barcode_input.clear()
     
+    @Slot(str)
+    def _on_search_text_edited(self, text):
+        """Reiniciar la espera de la búsqueda con cada tecla"""
+        if len(text.strip()) < self.SEARCH_MIN_CHARS:
+            self._hide_suggestions()
+            return
+        
+        self.search_timer.start()
+    
+    @Slot()
+    def _request_product_search(self):
+        """Solicitar las sugerencias para el texto actual"""
+        text = self.barcode_input.text().strip()
+        if len(text) >= self.SEARCH_MIN_CHARS:
+            self.product_search_requested.emit(text)
+    
+    def show_product_suggestions(self, products):
+        """
+        Mostrar las sugerencias de productos bajo el campo de búsqueda
+        
+        Args:
+            products: Lista de diccionarios con product_id, name, barcode, price
+                y stock_quantity
+        """
+        self.suggestion_model.clear()
+        
+        for product in products:
+            text = f"{product['name']}  -  ${product.get('price') or 0:.2f}"
+            if product.get('barcode'):
+                text += f"  ({product['barcode']})"
+            
+            item = QStandardItem(text)
+            item.setData(product['product_id'], Qt.UserRole)
+            self.suggestion_model.appendRow(item)
+        
+        if products and self.barcode_input.hasFocus():
+            self.product_completer.complete()
+        else:
+            self._hide_suggestions()
+    
+    @Slot(QModelIndex)
+    def _on_suggestion_activated(self, index):
+        """Agregar al carrito el producto elegido en las sugerencias"""
+        product_id = index.data(Qt.UserRole)
+        if product_id is not None:
+            self.barcode_input.clear()
+            self._hide_suggestions()
+            self.product_selected.emit(int(product_id))
+    
+    def _hide_suggestions(self):
+        """Ocultar las sugerencias y cancelar la búsqueda pendiente"""
+        self.search_timer.stop()
+        self.product_completer.popup().hide()
+    
     @Slot()
     def _on_checkout_clicked(self):
         """Iniciar proceso de cobro"""
         # Verificar si hay productos en el carrito
-        if self.cart_table.rowCount() == 0:
+        if self.cart is None or len(self.cart) == 0:
             QMessageBox.warning(self, "Carrito vacío", "No hay productos en el carrito.")
             return
         
         # Mostrar diálogo de pago
-        payment_dialog = PaymentDialog(self.subtotal_value.text(), 
-                                      self.tax_value.text(), 
-                                      self.total_value.text(), 
+        payment_dialog = PaymentDialog(self.cart.subtotal, 
+                                      self.cart.tax, 
+                                      self.cart.total, 
                                       parent=self)
         
         if payment_dialog.exec() == QDialog.Accepted:
             # Obtener datos del pago
             payment_data = payment_dialog.get_payment_data()
             
-            # Recopilar información de la venta
+            # Recopilar información de la venta (importes como Money)
             sale_data = {
                 'items': self._get_cart_items(),
-                'subtotal': self.subtotal_value.text(),
-                'tax': self.tax_value.text(),
-                'total': self.total_value.text(),
+                'subtotal': self.cart.subtotal,
+                'tax': self.cart.tax,
+                'total': self.cart.total,
                 'payment': payment_data
             }
             
@@ -267,22 +368,12 @@ class POSView(QMainWindow):
     
     def _get_cart_items(self):
         """Obtener items del carrito"""
-        items = []
-        for row in range(self.cart_table.rowCount()):
-            item = {
-                'product_id': self.cart_table.item(row, 0).data(Qt.UserRole),
-                'name': self.cart_table.item(row, 0).text(),
-                'price': self.cart_table.item(row, 1).text(),
-                'quantity': self.cart_table.item(row, 2).text(),
-                'subtotal': self.cart_table.item(row, 3).text()
-            }
-            items.append(item)
-        return items
+        return self.cart.to_sale_items() if self.cart is not None else []
     
     @Slot()
     def _on_cancel_clicked(self):
         """Cancelar la venta actual"""
-        if self.cart_table.rowCount() > 0:
+        if self.cart is not None and len(self.cart) > 0:
             confirm = QMessageBox.question(
                 self, 
                 "Cancelar venta", 
@@ -294,89 +385,76 @@ class POSView(QMainWindow):
             if confirm == QMessageBox.Yes:
                 self.clear_cart()
     
+    @Slot(str, str)
+    def _on_device_task_finished(self, task_name, message):
+        """Mostrar el resultado de una tarea de dispositivo sin bloquear la venta"""
+        self.statusBar().showMessage(message, 5000)
+    
+    @Slot(str, str)
+    def _on_device_task_failed(self, task_name, message):
+        """Avisar de un error de dispositivo sin interrumpir el escaneo"""
+        self.statusBar().showMessage(f"ATENCIÓN: {message}", 15000)
+    
+    def show_sale_completed(self, sale_id):
+        """Informar que la venta se registró (sin diálogo modal)"""
+        self.statusBar().showMessage(f"Venta #{sale_id} registrada correctamente", 5000)
+        self.barcode_input.setFocus()
+    
+    def set_cart(self, cart):
+        """
+        Cambiar el carrito que muestra la vista
+        
+        Args:
+            cart: Carrito de la venta (models.cart.Cart)
+        """
+        if self.cart is not None:
+            self.cart.remove_listener(self._on_cart_changed)
+        
+        self.cart = cart
+        cart.add_listener(self._on_cart_changed)
+        self.cart_model.set_cart(cart)
+        self._update_cart_totals()
+    
     def clear_cart(self):
         """Limpiar el carrito"""
-        self.cart_table.setRowCount(0)
-        self.update_totals(0, 0, 0)
+        if self.cart is not None:
+            self.cart.clear()
     
     def add_product_to_cart(self, product_data):
-        """Añadir producto al carrito"""
-        # Verificar si el producto ya está en el carrito
-        for row in range(self.cart_table.rowCount()):
-            if self.cart_table.item(row, 0).data(Qt.UserRole) == product_data['id']:
-                # Actualizar cantidad
-                quantity_item = self.cart_table.item(row, 2)
-                current_quantity = int(quantity_item.text())
-                new_quantity = current_quantity + 1
-                quantity_item.setText(str(new_quantity))
-                
-                # Actualizar subtotal
-                price = float(product_data['price'])
-                subtotal = price * new_quantity
-                self.cart_table.item(row, 3).setText(f"${subtotal:.2f}")
-                
-                self._update_cart_totals()
-                return
-        
-        # Si no existe, agregar nueva fila
-        row_position = self.cart_table.rowCount()
-        self.cart_table.insertRow(row_position)
-        
-        # Producto
-        product_item = QTableWidgetItem(product_data['name'])
-        product_item.setData(Qt.UserRole, product_data['id'])
-        self.cart_table.setItem(row_position, 0, product_item)
-        
-        # Precio
-        price_item = QTableWidgetItem(f"${float(product_data['price']):.2f}")
-        self.cart_table.setItem(row_position, 1, price_item)
-        
-        # Cantidad
-        quantity_item = QTableWidgetItem("1")
-        self.cart_table.setItem(row_position, 2, quantity_item)
-        
-        # Subtotal
-        subtotal = float(product_data['price'])
-        subtotal_item = QTableWidgetItem(f"${subtotal:.2f}")
-        self.cart_table.setItem(row_position, 3, subtotal_item)
-        
-        # Botón eliminar
-        remove_button = QPushButton("X")
-        remove_button.setMaximumWidth(30)
-        remove_button.clicked.connect(lambda: self._remove_cart_item(row_position))
-        self.cart_table.setCellWidget(row_position, 4, remove_button)
+        """
+        Añadir producto al carrito (o sumar una unidad si ya está)
         
-        self._update_cart_totals()
+        Args:
+            product_data: Diccionario con product_id, name y price
+        """
+        if self.cart is not None:
+            self.cart.add_product(product_data)
+    
+    @Slot(QModelIndex)
+    def _on_cart_table_clicked(self, index):
+        """Quitar la línea al hacer clic en su columna X"""
+        if index.column() == CartTableModel.REMOVE_COLUMN:
+            self._remove_cart_item(index.row())
     
     def _remove_cart_item(self, row):
         """Eliminar item del carrito"""
-        self.cart_table.removeRow(row)
+        product_id = self.cart_model.product_id(row)
+        if product_id is not None:
+            self.cart.remove(product_id)
+    
+    def _on_cart_changed(self, event, row, line):
+        """Actualizar los totales con cada cambio del carrito"""
         self._update_cart_totals()
     
     def _update_cart_totals(self):
-        """Actualizar totales del carrito"""
-        subtotal = 0
-        
-        for row in range(self.cart_table.rowCount()):
-            # Obtener el texto del subtotal y convertirlo a número
-            subtotal_text = self.cart_table.item(row, 3).text()
-            if subtotal_text.startswith('$'):
-                subtotal_text = subtotal_text[1:]  # Quitar el símbolo $
-            
-            subtotal += float(subtotal_text)
-        
-        # Calcular impuestos (16% IVA)
-        tax = subtotal * 0.16
-        total = subtotal + tax
-        
-        # Actualizar las etiquetas
-        self.update_totals(subtotal, tax, total)
+        """Actualizar totales del carrito (el carrito ya los mantiene)"""
+        self.update_totals(self.cart.subtotal, self.cart.tax, self.cart.total)
     
     def update_totals(self, subtotal, tax, total):
-        """Actualizar etiquetas de totales"""
-        self.subtotal_value.setText(f"${subtotal:.2f}")
-        self.tax_value.setText(f"${tax:.2f}")
-        self.total_value.setText(f"${total:.2f}")
+        """Actualizar etiquetas de totales (Money o importes en pesos)"""
+        self.subtotal_value.setText(str(Money.parse(subtotal)))
+        self.tax_value.setText(str(Money.parse(tax)))
+        self.total_value.setText(str(Money.parse(total)))
     
     def _show_help(self):
         """Mostrar ayuda rápida"""
@@ -398,17 +476,28 @@ class PaymentDialog(QDialog):
     """Diálogo para procesar el pago"""
     
     def __init__(self, subtotal, tax, total, parent=None):
+        """
+        Inicializar el diálogo
+        
+        Args:
+            subtotal: Subtotal de la venta (Money o importe)
+            tax: Impuestos de la venta (Money o importe)
+            total: Total a cobrar (Money o importe)
+            parent: Widget padre (opcional)
+        """
         super().__init__(parent)
         self.setWindowTitle("Procesar pago")
         self.resize(400, 300)
         
-        # Guardar valores
-        self.subtotal = subtotal
-        self.tax = tax
-        self.total = total
+        # Guardar valores (el texto de las etiquetas sale de str(Money))
+        self.subtotal = str(Money.parse(subtotal))
+        self.tax = str(Money.parse(tax))
+        self.total = str(Money.parse(total))
         
-        # Eliminar el símbolo $ y convertir a float
-        self.total_value = float(total.replace('$', ''))
+        # Total a cobrar, convertido una sola vez
+        self.total_value = Money.parse(total)
+        self.amount_received = Money()
+        self.change = Money()
         
         # Configurar la interfaz
         self.setup_ui()
@@ -529,4 +618,57 @@ class PaymentDialog(QDialog):
         """Cambiar los campos según el método de pago"""
         # Ocultar todos los frames
         self.cash_frame.setVisible(False)
-        self.card_frame.setVisible(False)
\ No newline at end of file
+        self.card_frame.setVisible(False)
+        self.transfer_frame.setVisible(False)
+        
+        # Mostrar el del método elegido
+        if index == 0:
+            self.cash_frame.setVisible(True)
+            self.amount_input.setFocus()
+        elif index == 1:
+            self.card_frame.setVisible(True)
+        elif index == 2:
+            self.transfer_frame.setVisible(True)
+    
+    def _calculate_change(self, text):
+        """Calcular el cambio con el monto escrito por el cajero"""
+        self.amount_received = Money.parse(text, default=Money())
+        self.change = self.amount_received - self.total_value
+        
+        if self.change.cents < 0:
+            self.change_value.setText("Falta " + str(-self.change))
+            self.change_value.setStyleSheet("font-size: 14pt; font-weight: bold; color: red;")
+        else:
+            self.change_value.setText(str(self.change))
+            self.change_value.setStyleSheet("font-size: 14pt; font-weight: bold;")
+    
+    def accept(self):
+        """Completar la venta si el pago en efectivo cubre el total"""
+        if self.payment_method.currentIndex() == 0 and self.amount_received < self.total_value:
+            QMessageBox.warning(self, "Monto insuficiente",
+                                f"El monto recibido no cubre el total de {self.total}.")
+            self.amount_input.setFocus()
+            return
+        
+        super().accept()
+    
+    def get_payment_data(self):
+        """
+        Obtener los datos del pago
+        
+        Returns:
+            Diccionario con method y, según el método, amount_received y
+            change (Money), card_last_digits y auth_code, o reference
+        """
+        payment_data = {'method': self.payment_method.currentText()}
+        
+        if self.payment_method.currentIndex() == 0:
+            payment_data['amount_received'] = self.amount_received
+            payment_data['change'] = self.change
+        elif self.payment_method.currentIndex() == 1:
+            payment_data['card_last_digits'] = self.card_number_input.text().strip()
+            payment_data['auth_code'] = self.auth_code_input.text().strip()
+        else:
+            payment_data['reference'] = self.reference_input.text().strip()
+        
+        return payment_data
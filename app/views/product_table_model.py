@@ -0,0 +1,79 @@
+# app/views/product_table_model.py
+from PySide6.QtGui import QColor
+
+from .lazy_table_model import LazyTableModel, ALIGN_CENTER
+
+class ProductTableModel(LazyTableModel):
+    """
+    Modelo de la tabla de productos del inventario
+    
+    Lee los productos por bloques con un loader como
+    ProductController.get_products_page, de modo que abrir la tabla solo
+    consulta el primer bloque sin importar el tamaño del catálogo.
+    """
+    
+    COLUMNS = [
+        ("product_id", "ID", "product_id"),
+        ("barcode", "Código", "barcode"),
+        ("name", "Nombre", "name"),
+        ("category_name", "Categoría", "category_name"),
+        ("price", "Precio", "price"),
+        ("cost", "Costo", "cost"),
+        ("stock_quantity", "Stock", "stock_quantity"),
+    ]
+    ROWS_KEY = 'products'
+    DEFAULT_SORT = ('name', False)
+    
+    # Nivel mínimo de stock si el producto no trae el suyo
+    DEFAULT_MIN_STOCK = 5
+    LOW_STOCK_COLOR = QColor(255, 200, 200)  # Rojo claro
+    
+    def __init__(self, loader=None, block_size=100, max_blocks=10, parent=None):
+        super().__init__(loader, block_size, max_blocks, parent)
+    
+    def display_value(self, row, key):
+        value = row.get(key)
+        if value is not None and key in ("price", "cost"):
+            return f"${value:.2f}"
+        return super().display_value(row, key)
+    
+    def alignment(self, key):
+        return None if key == "name" else ALIGN_CENTER
+    
+    def background(self, row, key):
+        if key == "stock_quantity" and self._is_low_stock(row):
+            return self.LOW_STOCK_COLOR
+        return None
+    
+    def product(self, row):
+        """
+        Obtener el producto de una fila
+        
+        Args:
+            row: Número de fila
+        
+        Returns:
+            Diccionario con datos del producto o None si la fila no existe
+        """
+        return self.row_data(row)
+    
+    def find_product(self, product_id):
+        """
+        Buscar un producto entre los bloques que están en memoria
+        
+        Args:
+            product_id: ID del producto
+        
+        Returns:
+            Diccionario con datos del producto o None si no está cargado
+        """
+        for product in self.cached_rows():
+            if product["product_id"] == product_id:
+                return product
+        return None
+    
+    def _is_low_stock(self, product):
+        min_stock = product.get("min_stock_level")
+        if min_stock is None:
+            min_stock = self.DEFAULT_MIN_STOCK
+        return (product.get("stock_quantity") or 0) <= min_stock
@@ -5,11 +5,13 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
                               QLineEdit, QGroupBox, QFormLayout, QSpinBox,
                               QRadioButton, QButtonGroup, QMessageBox,
                               QFileDialog, QDialog, QDialogButtonBox,
-                              QStackedWidget, QCheckBox, QFrame, QSplitter)
-from PySide6.QtCore import Qt, Signal, QDate
+                              QStackedWidget, QCheckBox, QFrame, QSplitter,
+                              QInputDialog, QProgressDialog)
+from PySide6.QtCore import Qt, Signal, Slot, QDate
 from PySide6.QtGui import QIcon, QFont
 
 import os
+import shutil
 import logging
 from datetime import datetime, timedelta
 
@@ -18,6 +20,18 @@ class ReportsView(QWidget):
     
     # Señales
     report_requested = Signal(str, dict)
+    # Avance y resultado de un reporte en segundo plano (job_id, ...); pueden emitirse
+    # desde otro hilo, por ejemplo como callbacks de ReportJobController.submit
+    report_progress = Signal(int, float)
+    report_finished = Signal(int, dict)
+    report_cancel_requested = Signal(int)
+    
+    # Reportes de ventas que se exportan -> tipo de reporte de ReportJobController
+    EXPORT_REPORTS = {
+        'sales_summary': 'period_sales',
+        'top_products': 'top_products',
+        'sales_by_payment': 'period_sales'
+    }
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -25,6 +39,14 @@ class ReportsView(QWidget):
         # Configuración básica
         self.logger = logging.getLogger('pos.views.reports')
         
+        # Reporte que se está exportando (job_id se conoce con su primer avance)
+        self.report_progress_dialog = None
+        self.report_job_id = None
+        self.report_cancelled = False
+        self.report_output_path = None
+        self.report_progress.connect(self._on_report_progress)
+        self.report_finished.connect(self._on_report_finished)
+        
         # Inicializar la interfaz
         self.setup_ui()
     
@@ -690,7 +712,7 @@ class ReportsView(QWidget):
             return
             
         # Mostrar diálogo para seleccionar formato
-        formats = ["PDF", "CSV", "Excel"]
+        formats = ["PDF", "CSV", "JSON"]
         selected_format, ok = QInputDialog.getItem(
             self, "Exportar Reporte", "Seleccione el formato:", formats, 0, False
         )
@@ -699,13 +721,7 @@ class ReportsView(QWidget):
             return
             
         # Mostrar diálogo para guardar archivo
-        file_extension = ""
-        if selected_format == "PDF":
-            file_extension = "pdf"
-        elif selected_format == "CSV":
-            file_extension = "csv"
-        elif selected_format == "Excel":
-            file_extension = "xlsx"
+        file_extension = selected_format.lower()
             
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -716,14 +732,84 @@ class ReportsView(QWidget):
         
         if not file_path:
             return
-            
-        # En un sistema real, invocaríamos al controlador para exportar el reporte
         
-        # Para demostración, mostrar mensaje de éxito
+        report_type = {1: "sales_summary", 2: "top_products", 3: "sales_by_payment"}.get(
+            self.report_type_group.checkedId(), "sales_summary"
+        )
+        report_params = {
+            "start_date": self.start_date_edit.date().toString("yyyy-MM-dd"),
+            "end_date": self.end_date_edit.date().toString("yyyy-MM-dd"),
+            "format": file_extension
+        }
+        if self.EXPORT_REPORTS[report_type] == 'period_sales':
+            report_params["period"] = self.grouping_combo.currentData()
+        
+        self.report_job_id = None
+        self.report_cancelled = False
+        self.report_output_path = file_path
+        self.report_progress_dialog = QProgressDialog("Generando reporte...", "Cancelar", 0, 100, self)
+        self.report_progress_dialog.setWindowTitle("Exportar Reporte")
+        self.report_progress_dialog.setWindowModality(Qt.WindowModal)
+        self.report_progress_dialog.setMinimumDuration(0)
+        self.report_progress_dialog.canceled.connect(self._on_report_cancel)
+        self.report_progress_dialog.setValue(0)
+        
+        # El reporte se genera fuera de la vista y avisa con report_progress/report_finished
+        self.report_requested.emit(self.EXPORT_REPORTS[report_type], report_params)
+    
+    def _on_report_cancel(self):
+        """Cancelar el reporte que se está exportando"""
+        self.report_cancelled = True
+        if self.report_job_id is not None:
+            self.report_cancel_requested.emit(self.report_job_id)
+    
+    @Slot(int, float)
+    def _on_report_progress(self, job_id, fraction):
+        """Actualizar el diálogo de progreso del reporte"""
+        if self.report_progress_dialog is None:
+            return
+        
+        if self.report_job_id is None:
+            self.report_job_id = job_id
+            # Se pidió cancelar antes de que el reporte empezara
+            if self.report_cancelled:
+                self.report_cancel_requested.emit(job_id)
+                return
+        
+        if job_id == self.report_job_id:
+            self.report_progress_dialog.setValue(int(fraction * 100))
+    
+    @Slot(int, dict)
+    def _on_report_finished(self, job_id, result):
+        """Copiar el reporte generado al archivo elegido y mostrar el resultado"""
+        if self.report_job_id not in (None, job_id):
+            return
+        
+        # Al cerrarse el diálogo emite canceled: se suelta el trabajo antes de cerrarlo
+        dialog = self.report_progress_dialog
+        self.report_progress_dialog = None
+        self.report_job_id = None
+        if dialog is not None:
+            dialog.close()
+        
+        if result.get('cancelled'):
+            return
+        
+        if not result.get('success'):
+            QMessageBox.warning(self, "Error", f"No se pudo generar el reporte: {result.get('message')}")
+            return
+        
+        try:
+            shutil.copyfile(result['path'], self.report_output_path)
+        except OSError as e:
+            self.logger.error(f"Error al exportar reporte: {e}")
+            QMessageBox.warning(self, "Error", f"No se pudo guardar el reporte: {e}")
+            return
+        
         QMessageBox.information(
             self,
             "Reporte Exportado",
-            f"El reporte ha sido exportado correctamente a {file_path}"
+            f"El reporte ha sido exportado correctamente a {self.report_output_path}"
         )
     
     def generate_inventory_report(self):
@@ -1311,256 +1397,3 @@ class ReportsView(QWidget):
             "Reporte Exportado",
             f"El reporte ha sido exportado correctamente a {file_path}"
         )
-        self,# app/views/reports_view.py
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, 
-                              QPushButton, QLabel, QDateEdit, QComboBox,
-                              QTableWidget, QTableWidgetItem, QHeaderView,
-                              QLineEdit, QGroupBox, QFormLayout, QSpinBox,
-                              QRadioButton, QButtonGroup, QMessageBox,
-                              QFileDialog, QDialog, QDialogButtonBox,
-                              QStackedWidget, QCheckBox, QFrame, QSplitter)
-from PySide6.QtCore import Qt, Signal, QDate
-from PySide6.QtGui import QIcon, QFont
-
-import os
-import logging
-from datetime import datetime, timedelta
-
-class ReportsView(QWidget):
-    """Vista para la generación y visualización de reportes"""
-    
-    # Señales
-    report_requested = Signal(str, dict)
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        
-        # Configuración básica
-        self.logger = logging.getLogger('pos.views.reports')
-        
-        # Inicializar la interfaz
-        self.setup_ui()
-    
-    def setup_ui(self):
-        """Configurar la interfaz de usuario"""
-        # Layout principal
-        main_layout = QVBoxLayout(self)
-        
-        # Pestañas de reportes
-        tab_widget = QTabWidget()
-        main_layout.addWidget(tab_widget)
-        
-        # Pestaña de ventas
-        sales_tab = self.create_sales_tab()
-        tab_widget.addTab(sales_tab, "Ventas")
-        
-        # Pestaña de inventario
-        inventory_tab = self.create_inventory_tab()
-        tab_widget.addTab(inventory_tab, "Inventario")
-        
-        # Pestaña de caja
-        cashier_tab = self.create_cashier_tab()
-        tab_widget.addTab(cashier_tab, "Caja")
-    
-    def create_sales_tab(self):
-        """Crear pestaña de reportes de ventas"""
-        tab = QWidget()
-        layout = QVBoxLayout(tab)
-        
-        # Sección de filtros
-        filters_group = QGroupBox("Filtros")
-        filters_layout = QHBoxLayout(filters_group)
-        
-        # Período
-        period_form = QFormLayout()
-        
-        # Fecha inicio
-        self.start_date_edit = QDateEdit()
-        self.start_date_edit.setCalendarPopup(True)
-        self.start_date_edit.setDate(QDate.currentDate().addDays(-30))  # Último mes por defecto
-        
-        # Fecha fin
-        self.end_date_edit = QDateEdit()
-        self.end_date_edit.setCalendarPopup(True)
-        self.end_date_edit.setDate(QDate.currentDate())
-        
-        period_form.addRow("Desde:", self.start_date_edit)
-        period_form.addRow("Hasta:", self.end_date_edit)
-        
-        filters_layout.addLayout(period_form)
-        
-        # Agrupación
-        grouping_form = QFormLayout()
-        
-        self.grouping_combo = QComboBox()
-        self.grouping_combo.addItem("Diario", "day")
-        self.grouping_combo.addItem("Semanal", "week")
-        self.grouping_combo.addItem("Mensual", "month")
-        
-        grouping_form.addRow("Agrupación:", self.grouping_combo)
-        
-        filters_layout.addLayout(grouping_form)
-        
-        # Tipo de reporte
-        report_type_group = QGroupBox("Tipo de Reporte")
-        report_type_layout = QVBoxLayout(report_type_group)
-        
-        self.report_type_group = QButtonGroup()
-        
-        self.sales_summary_radio = QRadioButton("Resumen de Ventas")
-        self.sales_summary_radio.setChecked(True)
-        
-        self.top_products_radio = QRadioButton("Productos Más Vendidos")
-        
-        self.sales_by_payment_radio = QRadioButton("Ventas por Método de Pago")
-        
-        self.report_type_group.addButton(self.sales_summary_radio, 1)
-        self.report_type_group.addButton(self.top_products_radio, 2)
-        self.report_type_group.addButton(self.sales_by_payment_radio, 3)
-        
-        report_type_layout.addWidget(self.sales_summary_radio)
-        report_type_layout.addWidget(self.top_products_radio)
-        report_type_layout.addWidget(self.sales_by_payment_radio)
-        
-        filters_layout.addWidget(report_type_group)
-        
-        # Botones de acción
-        actions_layout = QVBoxLayout()
-        
-        self.generate_report_button = QPushButton("Generar Reporte")
-        self.generate_report_button.clicked.connect(self.generate_sales_report)
-        
-        self.export_report_button = QPushButton("Exportar")
-        self.export_report_button.clicked.connect(self.export_sales_report)
-        self.export_report_button.setEnabled(False)  # Inicialmente deshabilitado
-        
-        actions_layout.addWidget(self.generate_report_button)
-        actions_layout.addWidget(self.export_report_button)
-        actions_layout.addStretch()
-        
-        filters_layout.addLayout(actions_layout)
-        
-        layout.addWidget(filters_group)
-        
-        # Área de visualización del reporte
-        self.sales_report_widget = QStackedWidget()
-        
-        # Widget para cuando no hay reporte generado
-        no_report_widget = QWidget()
-        no_report_layout = QVBoxLayout(no_report_widget)
-        no_report_label = QLabel("Configure los filtros y haga clic en 'Generar Reporte' para visualizar.")
-        no_report_label.setAlignment(Qt.AlignCenter)
-        no_report_layout.addWidget(no_report_label)
-        
-        self.sales_report_widget.addWidget(no_report_widget)
-        
-        # Tabla para mostrar resultados
-        report_table_widget = QWidget()
-        report_table_layout = QVBoxLayout(report_table_widget)
-        
-        # Etiqueta de título
-        self.report_title_label = QLabel("Reporte de Ventas")
-        self.report_title_label.setFont(QFont('Arial', 14, QFont.Bold))
-        self.report_title_label.setAlignment(Qt.AlignCenter)
-        report_table_layout.addWidget(self.report_title_label)
-        
-        # Tabla de resultados
-        self.report_table = QTableWidget()
-        self.report_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        report_table_layout.addWidget(self.report_table)
-        
-        self.sales_report_widget.addWidget(report_table_widget)
-        
-        layout.addWidget(self.sales_report_widget)
-        
-        return tab
-    
-    def create_inventory_tab(self):
-        """Crear pestaña de reportes de inventario"""
-        tab = QWidget()
-        layout = QVBoxLayout(tab)
-        
-        # Sección de filtros
-        filters_group = QGroupBox("Filtros")
-        filters_layout = QHBoxLayout(filters_group)
-        
-        # Categoría
-        category_form = QFormLayout()
-        
-        self.inventory_category_combo = QComboBox()
-        self.inventory_category_combo.addItem("Todas las categorías", None)
-        
-        # En un sistema real, cargaríamos las categorías desde el controlador
-        self.inventory_category_combo.addItem("Bebidas", 1)
-        self.inventory_category_combo.addItem("Alimentos", 2)
-        self.inventory_category_combo.addItem("Lácteos", 3)
-        
-        category_form.addRow("Categoría:", self.inventory_category_combo)
-        
-        filters_layout.addLayout(category_form)
-        
-        # Opciones de reporte
-        options_group = QGroupBox("Opciones")
-        options_layout = QVBoxLayout(options_group)
-        
-        self.low_stock_checkbox = QCheckBox("Solo productos con stock bajo")
-        self.include_cost_checkbox = QCheckBox("Incluir costos")
-        self.include_cost_checkbox.setChecked(True)
-        
-        options_layout.addWidget(self.low_stock_checkbox)
-        options_layout.addWidget(self.include_cost_checkbox)
-        
-        filters_layout.addWidget(options_group)
-        
-        # Tipo de reporte
-        report_type_group = QGroupBox("Tipo de Reporte")
-        report_type_layout = QVBoxLayout(report_type_group)
-        
-        self.inventory_report_type_group = QButtonGroup()
-        
-        self.inventory_summary_radio = QRadioButton("Resumen de Inventario")
-        self.inventory_summary_radio.setChecked(True)
-        
-        self.stock_value_radio = QRadioButton("Valor del Inventario")
-        
-        self.inventory_movements_radio = QRadioButton("Movimientos de Inventario")
-        
-        self.inventory_report_type_group.addButton(self.inventory_summary_radio, 1)
-        self.inventory_report_type_group.addButton(self.stock_value_radio, 2)
-        self.inventory_report_type_group.addButton(self.inventory_movements_radio, 3)
-        
-        report_type_layout.addWidget(self.inventory_summary_radio)
-        report_type_layout.addWidget(self.stock_value_radio)
-        report_type_layout.addWidget(self.inventory_movements_radio)
-        
-        filters_layout.addWidget(report_type_group)
-        
-        # Botones de acción
-        actions_layout = QVBoxLayout()
-        
-        self.generate_inventory_report_button = QPushButton("Generar Reporte")
-        self.generate_inventory_report_button.clicked.connect(self.generate_inventory_report)
-        
-        self.export_inventory_report_button = QPushButton("Exportar")
-        self.export_inventory_report_button.clicked.connect(self.export_inventory_report)
-        self.export_inventory_report_button.setEnabled(False)  # Inicialmente deshabilitado
-        
-        actions_layout.addWidget(self.generate_inventory_report_button)
-        actions_layout.addWidget(self.export_inventory_report_button)
-        actions_layout.addStretch()
-        
-        filters_layout.addLayout(actions_layout)
-        
-        layout.addWidget(filters_group)
-        
-        # Área de visualización del reporte
-        self.inventory_report_widget = QStackedWidget()
-        
-        # Widget para cuando no hay reporte generado
-        no_report_widget = QWidget()
-        no_report_layout = QVBoxLayout(no_report_widget)
-        no_report_label = QLabel("Configure los filtros y haga clic en 'Generar Reporte' para visualizar.")
-        no_report_label.setAlignment(Qt.AlignCenter)
-        no_report_layout.addWidget(no_report_label)
-        self.inventory_report_widget.addWidget(no_report_widget)
-        
\ No newline at end of file
@@ -0,0 +1,81 @@
+# benchmarks/bench_bulk_update.py
+"""
+Benchmark de actualización masiva de precios
+
+Mide el tiempo de subir un porcentaje los precios de una categoría con
+BulkUpdateController (un solo UPDATE en una transacción) frente a llamar
+Product.update para cada producto (implementación anterior, una sentencia y
+una confirmación por producto).
+
+Uso:
+    python benchmarks/bench_bulk_update.py [--products 100000] [--categories 5]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.models.product import Product
+from app.controllers.product_controller import ProductController
+from app.controllers.bulk_update_controller import BulkUpdateController
+
+def create_database(directory, product_count, category_count):
+    """Crear una base de datos con un catálogo repartido en categorías"""
+    db = Database(os.path.join(directory, f"bench_{time.time_ns()}.db"))
+    db.connect()
+    db.init_schema()
+
+    with db.transaction():
+        db.execute_many("INSERT INTO categories (name) VALUES (?)",
+                        [(f"Categoría {i}",) for i in range(category_count)])
+        db.execute_many(
+            "INSERT INTO products (barcode, name, category_id, price, cost) VALUES (?, ?, ?, ?, ?)",
+            [(f"77{i:011d}", f"Producto {i}", i % category_count + 1, 1000.0 + i % 500, 800.0)
+             for i in range(product_count)]
+        )
+
+    return db
+
+def update_per_product(db, category_id, percent):
+    """Referencia: Product.update para cada producto de la categoría"""
+    product_model = Product(db)
+    products = db.fetch_all("SELECT product_id, price FROM products WHERE category_id = ? AND is_active = 1",
+                            [category_id])
+
+    for product in products:
+        product_model.update(product['product_id'], {'price': round(product['price'] * (1 + percent / 100), 2)})
+
+    return len(products)
+
+def update_set_based(db, category_id, percent):
+    """Un solo UPDATE con BulkUpdateController"""
+    controller = BulkUpdateController(db, ProductController(db))
+    result = controller.update_products({'category_id': category_id}, {'price': {'percent': percent}})
+    return result['count']
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de actualización masiva de precios")
+    parser.add_argument("--products", type=int, default=100000, help="Productos en el catálogo")
+    parser.add_argument("--categories", type=int, default=5, help="Categorías del catálogo")
+    args = parser.parse_args()
+
+    print(f"{'modo':>12} {'productos':>10} {'segundos':>9}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, func in (('uno a uno', update_per_product), ('un UPDATE', update_set_based)):
+            db = create_database(directory, args.products, args.categories)
+
+            start = time.perf_counter()
+            count = func(db, 1, 5)
+            elapsed = time.perf_counter() - start
+            db.close()
+
+            print(f"{mode:>12} {count:>10} {elapsed:>9.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/bench_cart.py
+"""
+Benchmark del carrito con canastas grandes (ventas al mayoreo)
+
+Compara la implementación anterior del carrito (QTableWidget: buscar el
+producto recorriendo las filas y recalcular los totales leyendo el texto de
+cada subtotal) con Cart + CartTableModel (búsqueda por diccionario y totales
+incrementales en centavos). Mide el tiempo de escanear todos los productos,
+el de volver a escanear uno que ya está en el carrito al final de la canasta y
+el de serializar las líneas para la venta.
+
+Uso:
+    python benchmarks/bench_cart.py [--lines 300] [--rescans 200]
+"""
+import os
+import sys
+import time
+import argparse
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QTableWidget, QTableWidgetItem, QPushButton, QTableView
+from PySide6.QtCore import Qt
+
+from app.models.cart import Cart
+from app.views.cart_table_model import CartTableModel
+
+class TableWidgetCart:
+    """Implementación anterior de POSView: el QTableWidget guarda el carrito"""
+    
+    def __init__(self):
+        self.table = QTableWidget(0, 5)
+        self.totals = None
+    
+    def add(self, product):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).data(Qt.UserRole) == product['product_id']:
+                quantity_item = self.table.item(row, 2)
+                new_quantity = int(quantity_item.text()) + 1
+                quantity_item.setText(str(new_quantity))
+                self.table.item(row, 3).setText(f"${float(product['price']) * new_quantity:.2f}")
+                self.update_totals()
+                return
+        
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        product_item = QTableWidgetItem(product['name'])
+        product_item.setData(Qt.UserRole, product['product_id'])
+        self.table.setItem(row, 0, product_item)
+        self.table.setItem(row, 1, QTableWidgetItem(f"${float(product['price']):.2f}"))
+        self.table.setItem(row, 2, QTableWidgetItem("1"))
+        self.table.setItem(row, 3, QTableWidgetItem(f"${float(product['price']):.2f}"))
+        self.table.setCellWidget(row, 4, QPushButton("X"))
+        self.update_totals()
+    
+    def update_totals(self):
+        subtotal = 0
+        for row in range(self.table.rowCount()):
+            subtotal += float(self.table.item(row, 3).text().lstrip('$'))
+        tax = subtotal * 0.16
+        self.totals = (f"${subtotal:.2f}", f"${tax:.2f}", f"${subtotal + tax:.2f}")
+    
+    def items(self):
+        return [{
+            'product_id': self.table.item(row, 0).data(Qt.UserRole),
+            'name': self.table.item(row, 0).text(),
+            'price': self.table.item(row, 1).text(),
+            'quantity': self.table.item(row, 2).text(),
+            'subtotal': self.table.item(row, 3).text()
+        } for row in range(self.table.rowCount())]
+
+class ModelCart:
+    """Implementación nueva: Cart con CartTableModel como vista"""
+    
+    def __init__(self):
+        self.cart = Cart(tax_rate=0.16)
+        self.model = CartTableModel(self.cart)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.totals = None
+        self.cart.add_listener(lambda event, row, line: self.update_totals())
+    
+    def add(self, product):
+        self.cart.add_product(product)
+    
+    def update_totals(self):
+        self.totals = (f"${self.cart.subtotal_cents / 100:.2f}", f"${self.cart.tax_cents / 100:.2f}",
+                       f"${self.cart.total_cents / 100:.2f}")
+    
+    def items(self):
+        return self.cart.to_sale_items()
+
+def measure(cart, products, rescans):
+    """Escanear la canasta, volver a escanear el último producto y serializar"""
+    start = time.perf_counter()
+    for product in products:
+        cart.add(product)
+    fill = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for _ in range(rescans):
+        cart.add(products[-1])
+    rescan = (time.perf_counter() - start) / rescans
+    
+    start = time.perf_counter()
+    cart.items()
+    serialize = time.perf_counter() - start
+    
+    return fill * 1000, rescan * 1000, serialize * 1000, cart.totals[2]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del carrito con canastas grandes")
+    parser.add_argument("--lines", type=int, default=300, help="Productos distintos en la canasta")
+    parser.add_argument("--rescans", type=int, default=200, help="Escaneos repetidos del último producto")
+    args = parser.parse_args()
+    
+    app = QApplication.instance() or QApplication([])
+    products = [{'product_id': i, 'name': f"Producto {i}", 'price': 10 + i * 0.37}
+                for i in range(1, args.lines + 1)]
+    
+    print(f"{'implementación':>16} {'llenar (ms)':>12} {'escaneo (ms)':>13} {'serializar (ms)':>16} {'total':>12}")
+    for name, cart_class in (("QTableWidget", TableWidgetCart), ("Cart", ModelCart)):
+        fill, rescan, serialize, total = measure(cart_class(), products, args.rescans)
+        print(f"{name:>16} {fill:>12.1f} {rescan:>13.3f} {serialize:>16.2f} {total:>12}")
+    
+    sys.stdout.flush()
+    # PySide6 puede fallar al liberar los widgets al salir del intérprete
+    os._exit(0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# benchmarks/bench_catalog_import.py
+"""
+Benchmark de importación masiva de catálogos
+
+Mide el tiempo y la memoria máxima de CatalogImporter al importar un CSV (y
+opcionalmente un XLSX) grande, frente a crear los productos uno a uno con
+ProductController.create_product (implementación anterior), que se mide sobre
+una muestra y se extrapola.
+
+Uso:
+    python benchmarks/bench_catalog_import.py [--rows 200000] [--reference-rows 2000] [--xlsx] [--memory]
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.controllers.product_controller import ProductController
+from app.utils.catalog_importer import CatalogImporter
+
+HEADER = ["Código de barras", "Nombre", "Descripción", "Categoría", "Precio", "Costo", "Stock"]
+CATEGORIES = ["Bebidas", "Granos", "Aseo", "Lácteos", "Panadería", "Enlatados"]
+
+def catalog_rows(count):
+    """Generar filas de un catálogo de proveedor"""
+    for i in range(count):
+        yield [
+            f"77{i:011d}", f"Producto de prueba {i}", f"Presentación {i % 50}",
+            CATEGORIES[i % len(CATEGORIES)], f"{1000 + i % 9000}", f"{800 + i % 7000}", i % 100
+        ]
+
+def create_database(directory):
+    """Crear una base de datos vacía"""
+    db = Database(os.path.join(directory, f"bench_{time.time_ns()}.db"))
+    db.connect()
+    db.init_schema()
+    return db
+
+def measure_import(db, path):
+    """Importar un archivo y devolver (segundos, resultado)"""
+    start = time.perf_counter()
+    result = CatalogImporter(db).import_file(path)
+    return time.perf_counter() - start, result
+
+def measure_memory(db, path):
+    """Importar un archivo con tracemalloc y devolver la memoria máxima en MB"""
+    tracemalloc.start()
+    CatalogImporter(db).import_file(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak / (1024 * 1024)
+
+def measure_reference(db, rows):
+    """Referencia: crear los productos uno a uno con el controlador"""
+    controller = ProductController(db)
+
+    start = time.perf_counter()
+    for barcode, name, description, _, price, cost, stock in catalog_rows(rows):
+        controller.create_product({
+            'barcode': barcode, 'name': name, 'description': description,
+            'price': float(price), 'cost': float(cost), 'stock_quantity': stock
+        })
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importación masiva de catálogos")
+    parser.add_argument("--rows", type=int, default=200000, help="Filas del catálogo")
+    parser.add_argument("--reference-rows", type=int, default=2000, help="Filas para la referencia uno a uno")
+    parser.add_argument("--xlsx", action="store_true", help="Medir también la importación de XLSX")
+    parser.add_argument("--memory", action="store_true",
+                        help="Medir la memoria máxima (importación adicional con tracemalloc, más lenta)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "catalogo.csv")
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADER)
+            writer.writerows(catalog_rows(args.rows))
+
+        paths = [("csv", csv_path)]
+
+        if args.xlsx:
+            import openpyxl
+
+            xlsx_path = os.path.join(directory, "catalogo.xlsx")
+            workbook = openpyxl.Workbook(write_only=True)
+            sheet = workbook.create_sheet()
+            sheet.append(HEADER)
+            for row in catalog_rows(args.rows):
+                sheet.append(row)
+            workbook.save(xlsx_path)
+            paths.append(("xlsx", xlsx_path))
+
+        print(f"{'archivo':>8} {'filas':>8} {'segundos':>9} {'filas/s':>9} {'memoria MB':>11}")
+
+        for kind, path in paths:
+            db = create_database(directory)
+            elapsed, result = measure_import(db, path)
+            db.close()
+
+            if not result['success'] or result['imported'] != args.rows:
+                print(f"Importación incompleta: {result['message']}")
+                return 1
+
+            peak_mb = '-'
+            if args.memory:
+                db = create_database(directory)
+                peak_mb = f"{measure_memory(db, path):.1f}"
+                db.close()
+
+            print(f"{kind:>8} {args.rows:>8} {elapsed:>9.2f} {args.rows / elapsed:>9.0f} {peak_mb:>11}")
+
+        db = create_database(directory)
+        elapsed = measure_reference(db, args.reference_rows)
+        db.close()
+
+        rate = args.reference_rows / elapsed
+        print(f"{'uno a uno':>8} {args.reference_rows:>8} {elapsed:>9.2f} {rate:>9.0f} {'-':>11}"
+              f"  (estimado para {args.rows} filas: {args.rows / rate:.0f} s)")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
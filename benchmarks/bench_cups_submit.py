@@ -0,0 +1,91 @@
+# benchmarks/bench_cups_submit.py
+"""
+Benchmark de envío de recibos a CUPS
+
+Mide los recibos por segundo que acepta CUPS con el envío desde memoria
+(modo 'stream', conexión reutilizable) frente al envío anterior con archivo
+temporal y printFile (modo 'file', una conexión nueva por recibo).
+
+Requiere pycups y una cola de CUPS. Para no imprimir papel se puede crear una
+cola que descarte los trabajos, por ejemplo:
+    lpadmin -p pos-null -E -v file:///dev/null
+
+Uso:
+    python benchmarks/bench_cups_submit.py --printer pos-null [--receipts 200] [--items 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    import cups
+except ImportError:
+    cups = None
+
+def build_receipt(number, items):
+    """Construir datos de recibo con cierta cantidad de productos"""
+    return {
+        'store_name': 'Mi Tienda',
+        'receipt_number': number,
+        'cashier_name': 'Cajero',
+        'items': [
+            {'name': f'Producto {i}', 'quantity': 1, 'price': 10.0, 'subtotal': 10.0}
+            for i in range(1, items + 1)
+        ],
+        'subtotal': 10.0 * items,
+        'tax': 1.9 * items,
+        'total': 11.9 * items,
+        'payment_method': 'Efectivo'
+    }
+
+def measure(printer, receipts, items, reuse_connection):
+    """Enviar recibos y devolver recibos por segundo"""
+    start = time.perf_counter()
+
+    for number in range(receipts):
+        if not reuse_connection:
+            # Implementación anterior: una conexión nueva por recibo
+            printer.cups_connection = None
+
+        if not printer._print_cups(build_receipt(number, items)):
+            raise RuntimeError(f"No se pudo enviar el recibo #{number}")
+
+    return receipts / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de envío de recibos a CUPS")
+    parser.add_argument("--printer", required=True, help="Nombre de la cola de CUPS")
+    parser.add_argument("--receipts", type=int, default=200, help="Recibos por modo")
+    parser.add_argument("--items", type=int, default=20, help="Productos por recibo")
+    args = parser.parse_args()
+
+    if cups is None:
+        print("Se requiere pycups para este benchmark")
+        return 1
+
+    from app.devices.thermal_printer import ThermalPrinter
+
+    print(f"{'modo':>8} {'recibos/s':>10}")
+
+    for mode, reuse_connection in (('file', False), ('stream', True)):
+        printer = ThermalPrinter({
+            'connection_type': 'cups',
+            'printer_name': args.printer,
+            'cups_submit_mode': mode
+        })
+
+        if not printer.connect():
+            print(f"No se pudo conectar a la cola de CUPS: {args.printer}")
+            return 1
+
+        rate = measure(printer, args.receipts, args.items, reuse_connection)
+        print(f"{mode:>8} {rate:>10.1f}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
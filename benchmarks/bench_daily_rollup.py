@@ -0,0 +1,147 @@
+# benchmarks/bench_daily_rollup.py
+"""
+Benchmark del resumen diario de ventas (sales_daily_rollup)
+
+Compara los totales por mes y el resumen por día calculados agrupando la
+tabla sales por DATE(sale_date) (implementación anterior) con las mismas
+consultas sobre el resumen materializado, y mide lo que agregan los
+disparadores que lo mantienen a cada venta.
+
+Uso:
+    python benchmarks/bench_daily_rollup.py [--days 1825] [--sales-per-day 300] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.models.sale import Sale
+from app.models.migrations import SALES_ROLLUP_TRIGGERS, DRILLDOWN_ROLLUP_TRIGGERS
+from app.utils.money import amounts_from_cents
+
+def total_by_month_from_sales(db):
+    """Referencia: totales por mes agrupando la tabla sales (implementación anterior)"""
+    query = """
+        SELECT
+            strftime('%Y-%m', sale_date) as period,
+            'Mes' as period_type,
+            COUNT(*) as total_sales,
+            SUM(CAST(ROUND(total_amount * 100) AS INTEGER)) as total_amount,
+            SUM(CAST(ROUND(tax_amount * 100) AS INTEGER)) as total_tax
+        FROM sales
+        WHERE payment_status = 'paid'
+        GROUP BY strftime('%Y-%m', sale_date)
+        ORDER BY strftime('%Y-%m', sale_date) DESC
+        LIMIT 30
+    """
+    return amounts_from_cents(db.fetch_all(query), ('total_amount', 'total_tax'))
+
+def summary_by_day_from_sales(db, start_date, end_date):
+    """Referencia: resumen por día agrupando la tabla sales (implementación anterior)"""
+    query = """
+        SELECT
+            DATE(sale_date) as date,
+            COUNT(*) as total_sales,
+            SUM(CAST(ROUND(total_amount * 100) AS INTEGER)) as total_amount
+        FROM sales
+        WHERE sale_date BETWEEN ? AND ?
+        AND payment_status = 'paid'
+        GROUP BY DATE(sale_date)
+        ORDER BY DATE(sale_date)
+    """
+    rows = db.fetch_all(query, [f"{start_date} 00:00:00", f"{end_date} 23:59:59"])
+    return amounts_from_cents(rows, ('total_amount',))
+
+def measure(function, repeat):
+    """Tiempo promedio de una función en milisegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+def insert_sales(db, rows):
+    """Insertar ventas en lote"""
+    with db.transaction():
+        db.execute_many(
+            """INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date)
+               VALUES (1, ?, ?, ?, ?, ?)""",
+            rows
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del resumen diario de ventas")
+    parser.add_argument("--days", type=int, default=1825, help="Días de historial")
+    parser.add_argument("--sales-per-day", type=int, default=300, help="Ventas por día")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones de cada consulta")
+    args = parser.parse_args()
+
+    random.seed(42)
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+    try:
+        first_day = date.today() - timedelta(days=args.days)
+        rows = []
+        for offset in range(args.days):
+            day = (first_day + timedelta(days=offset)).isoformat()
+            for _ in range(args.sales_per_day):
+                amount = round(random.uniform(1, 900), 2)
+                rows.append((amount, round(amount * 0.16, 2), random.choice(('cash', 'card', 'transfer')),
+                             'canceled' if random.random() < 0.02 else 'paid',
+                             f"{day} {random.randint(8, 21):02d}:{random.randint(0, 59):02d}:00"))
+
+        # Costo de los disparadores: carga del historial con y sin ellos
+        sample = rows[:50000]
+        start = time.perf_counter()
+        insert_sales(db, sample)
+        with_triggers_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+        db.execute("DELETE FROM sales")
+        insert_triggers = {'sales_rollup_insert': SALES_ROLLUP_TRIGGERS['sales_rollup_insert'],
+                           'hourly_rollup_insert': DRILLDOWN_ROLLUP_TRIGGERS['hourly_rollup_insert']}
+        for name in insert_triggers:
+            db.execute(f"DROP TRIGGER {name}")
+        start = time.perf_counter()
+        insert_sales(db, sample)
+        without_triggers_us = (time.perf_counter() - start) / len(sample) * 1e6
+        insert_sales(db, rows[len(sample):])
+
+        sale_model = Sale(db)
+        start = time.perf_counter()
+        rollup_rows = sale_model.rollup.rebuild(tables=['sales_daily_rollup'])['sales_daily_rollup']
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        for statement in insert_triggers.values():
+            db.execute(statement)
+
+        old, old_ms = measure(lambda: total_by_month_from_sales(db), args.repeat)
+        new, new_ms = measure(lambda: sale_model.get_total_by_period('month'), args.repeat)
+        for old_row, new_row in zip(old, new):
+            for key in old_row:
+                assert old_row[key] == new_row[key], key
+
+        end_day = date.today().isoformat()
+        start_day = (date.today() - timedelta(days=90)).isoformat()
+        old_days, old_days_ms = measure(lambda: summary_by_day_from_sales(db, start_day, end_day), args.repeat)
+        new_days, new_days_ms = measure(lambda: sale_model.get_summary_by_day(start_day, end_day), args.repeat)
+        assert [(r['date'], r['total_sales'], r['total_amount']) for r in old_days] == \
+               [(r['date'], r['total_sales'], r['total_amount']) for r in new_days]
+
+        print(f"{len(rows)} ventas en {args.days} días -> {rollup_rows} filas de resumen "
+              f"(recalcular todo: {rebuild_ms:.0f} ms)")
+        print(f"insertar una venta: {without_triggers_us:.1f} µs sin resúmenes, {with_triggers_us:.1f} µs con disparadores (diario y por hora)")
+        print(f"totales por mes: agrupando sales {old_ms:.1f} ms, resumen {new_ms:.2f} ms")
+        print(f"resumen de 90 días: agrupando sales {old_days_ms:.1f} ms, resumen {new_days_ms:.2f} ms")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
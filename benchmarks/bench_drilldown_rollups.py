@@ -0,0 +1,189 @@
+# benchmarks/bench_drilldown_rollups.py
+"""
+Benchmark de los resúmenes por hora y por producto
+
+Compara los productos más vendidos, la mezcla por categoría y la
+distribución por hora calculados a partir de los detalles de venta
+(implementación anterior: sale_items × products × sales y un ciclo en Python
+por hora) con las consultas sobre product_daily_rollup y sales_hourly_rollup,
+y mide lo que agregan sus disparadores a cada venta y el costo de recalcular
+y verificar los resúmenes.
+
+Uso:
+    python benchmarks/bench_drilldown_rollups.py [--days 365] [--sales-per-day 200] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.models.sale import Sale
+from app.models.migrations import DRILLDOWN_ROLLUP_TRIGGERS
+from app.utils.money import amounts_from_cents
+
+ITEM_TRIGGERS = ('product_rollup_item_insert',)
+
+def top_products_from_items(db, start_date, end_date, limit=10):
+    """Referencia: productos más vendidos recorriendo los detalles de venta"""
+    query = """
+        SELECT
+            p.product_id,
+            p.name as product_name,
+            p.barcode,
+            SUM(si.quantity) as total_quantity,
+            SUM(CAST(ROUND(si.subtotal * 100) AS INTEGER)) as total_amount
+        FROM sale_items si
+        JOIN products p ON si.product_id = p.product_id
+        JOIN sales s ON si.sale_id = s.sale_id
+        WHERE s.payment_status = 'paid'
+        AND s.sale_date >= ? AND s.sale_date <= ?
+        GROUP BY p.product_id, p.name, p.barcode
+        ORDER BY total_quantity DESC, p.product_id
+        LIMIT ?
+    """
+    rows = db.fetch_all(query, [f"{start_date} 00:00:00", f"{end_date} 23:59:59", limit])
+    return amounts_from_cents(rows, ('total_amount',))
+
+def category_mix_from_items(db, start_date, end_date):
+    """Referencia: ventas por categoría recorriendo los detalles de venta"""
+    query = """
+        SELECT p.category_id, SUM(CAST(ROUND(si.subtotal * 100) AS INTEGER)) as total_amount
+        FROM sale_items si
+        JOIN products p ON si.product_id = p.product_id
+        JOIN sales s ON si.sale_id = s.sale_id
+        WHERE s.payment_status = 'paid'
+        AND s.sale_date >= ? AND s.sale_date <= ?
+        GROUP BY p.category_id
+    """
+    rows = db.fetch_all(query, [f"{start_date} 00:00:00", f"{end_date} 23:59:59"])
+    return {row['category_id']: row['total_amount'] / 100 for row in rows}
+
+def hourly_from_sales(db, day):
+    """Referencia: ventas por hora con un ciclo en Python (implementación anterior del reporte)"""
+    sales = db.fetch_all(
+        "SELECT sale_date, total_amount FROM sales WHERE sale_date BETWEEN ? AND ? AND payment_status = 'paid'",
+        [f"{day} 00:00:00", f"{day} 23:59:59"]
+    )
+    sales_by_hour = {}
+    for sale in sales:
+        hour = datetime.strptime(sale['sale_date'], "%Y-%m-%d %H:%M:%S").hour
+        bucket = sales_by_hour.setdefault(hour, [0, 0])
+        bucket[0] += 1
+        bucket[1] += round(sale['total_amount'] * 100)
+    return [(hour, count, cents / 100) for hour, (count, cents) in sorted(sales_by_hour.items())]
+
+def measure(function, repeat):
+    """Tiempo promedio de una función en milisegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+def insert_sales(db, sales, first_sale_id):
+    """Insertar ventas con sus detalles en lote"""
+    with db.transaction():
+        db.execute_many(
+            """INSERT INTO sales (sale_id, user_id, total_amount, payment_method, payment_status, sale_date)
+               VALUES (?, 1, ?, 'cash', ?, ?)""",
+            [(first_sale_id + i, total, status, sale_date) for i, (total, status, sale_date, _) in enumerate(sales)]
+        )
+        db.execute_many(
+            """INSERT INTO sale_items (sale_id, product_id, quantity, unit_price, subtotal)
+               VALUES (?, ?, ?, 10.0, ?)""",
+            [(first_sale_id + i, product_id, quantity, quantity * 10.0)
+             for i, (_, _, _, items) in enumerate(sales) for product_id, quantity in items]
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los resúmenes por hora y por producto")
+    parser.add_argument("--days", type=int, default=365, help="Días de historial")
+    parser.add_argument("--sales-per-day", type=int, default=200, help="Ventas por día")
+    parser.add_argument("--products", type=int, default=2000, help="Productos en el catálogo")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones de cada consulta")
+    args = parser.parse_args()
+
+    random.seed(42)
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+    try:
+        with db.transaction():
+            db.execute_many("INSERT INTO categories (name) VALUES (?)", [(f"Categoría {i}",) for i in range(1, 21)])
+            db.execute_many(
+                "INSERT INTO products (barcode, name, category_id, price) VALUES (?, ?, ?, 10.0)",
+                [(f"{i:013d}", f"Producto {i}", i % 20 + 1) for i in range(1, args.products + 1)]
+            )
+
+        first_day = date.today() - timedelta(days=args.days - 1)
+        sales = []
+        for offset in range(args.days):
+            day = (first_day + timedelta(days=offset)).isoformat()
+            for _ in range(args.sales_per_day):
+                items = [(random.randint(1, args.products), random.randint(1, 4)) for _ in range(3)]
+                sales.append((sum(quantity for _, quantity in items) * 10.0,
+                              'canceled' if random.random() < 0.02 else 'paid',
+                              f"{day} {random.randint(8, 21):02d}:{random.randint(0, 59):02d}:00", items))
+
+        # Costo de los disparadores por venta (con y sin los nuevos resúmenes)
+        sample = 20000
+        start = time.perf_counter()
+        insert_sales(db, sales[:sample], 1)
+        with_us = (time.perf_counter() - start) / sample * 1e6
+
+        dropped = ITEM_TRIGGERS + ('hourly_rollup_insert',)
+        for name in dropped:
+            db.execute(f"DROP TRIGGER {name}")
+        start = time.perf_counter()
+        insert_sales(db, sales[sample:2 * sample], sample + 1)
+        without_us = (time.perf_counter() - start) / sample * 1e6
+        for name in dropped:
+            db.execute(DRILLDOWN_ROLLUP_TRIGGERS[name])
+        insert_sales(db, sales[2 * sample:], 2 * sample + 1)
+
+        sale_model = Sale(db)
+        start = time.perf_counter()
+        rows = sale_model.rollup.rebuild(tables=['sales_hourly_rollup', 'product_daily_rollup'])
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        assert sale_model.rollup.verify() == []
+        verify_ms = (time.perf_counter() - start) * 1000
+
+        end_day = date.today().isoformat()
+        start_day = first_day.isoformat()
+        month_day = (date.today() - timedelta(days=29)).isoformat()
+
+        print(f"{len(sales)} ventas ({3 * len(sales)} detalles) en {args.days} días -> "
+              f"{rows['product_daily_rollup']} filas por producto, {rows['sales_hourly_rollup']} por hora")
+        print(f"insertar una venta con 3 detalles: {without_us:.1f} µs sin los nuevos resúmenes, {with_us:.1f} µs con ellos")
+        print(f"recalcular: {rebuild_ms:.0f} ms, verificar todo: {verify_ms:.0f} ms")
+
+        for label, since in (("30 días", month_day), (f"{args.days} días", start_day)):
+            old, old_ms = measure(lambda: top_products_from_items(db, since, end_day), args.repeat)
+            new, new_ms = measure(lambda: sale_model.get_top_products(since, end_day), args.repeat)
+            assert [p['total_quantity'] for p in old] == [p['total_quantity'] for p in new]
+            print(f"productos más vendidos ({label}): detalles {old_ms:.1f} ms, resumen {new_ms:.1f} ms")
+
+            old, old_ms = measure(lambda: category_mix_from_items(db, since, end_day), args.repeat)
+            new, new_ms = measure(lambda: sale_model.get_sales_by_category(since, end_day), args.repeat)
+            assert old == {row['category_id']: row['total_amount'] for row in new}
+            print(f"ventas por categoría ({label}): detalles {old_ms:.1f} ms, resumen {new_ms:.1f} ms")
+
+        old, old_ms = measure(lambda: hourly_from_sales(db, end_day), args.repeat * 20)
+        new, new_ms = measure(lambda: sale_model.get_sales_by_hour(end_day, end_day), args.repeat * 20)
+        assert old == [(row['hour'], row['total_sales'], row['total_amount']) for row in new]
+        print(f"ventas por hora de un día: ciclo en Python {old_ms:.2f} ms, resumen {new_ms:.2f} ms")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
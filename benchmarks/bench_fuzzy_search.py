@@ -0,0 +1,81 @@
+# benchmarks/bench_fuzzy_search.py
+"""
+Benchmark de búsqueda tolerante a errores
+
+Mide la carga y la latencia de TrigramIndex.search sobre un catálogo grande
+frente a comparar la consulta con cada producto (la misma similitud de
+trigramas, pero recorriendo todo el catálogo).
+
+Uso:
+    python benchmarks/bench_fuzzy_search.py [--products 100000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.trigram_index import TrigramIndex, trigrams
+
+from bench_product_search import create_database
+
+# Términos con errores de escritura, sin acentos o sin espacios
+TERMS = ["cafe organico", "lehce natral", "chocolte", "jabon clasico", "aguaight", "arros integrl 500g"]
+
+def search_scan(names, term, limit):
+    """Referencia: calcular la similitud con cada producto del catálogo"""
+    query = trigrams(term)
+    scored = []
+
+    for product_id, name_grams in names:
+        shared = len(query & name_grams)
+        if shared:
+            scored.append((2.0 * shared / (len(query) + len(name_grams)), product_id))
+
+    scored.sort(reverse=True)
+    return scored[:limit]
+
+def measure(func, repeat):
+    """Ejecutar una búsqueda varias veces y devolver la mediana en ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda tolerante a errores")
+    parser.add_argument("--products", type=int, default=100000, help="Productos en el catálogo")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por término")
+    parser.add_argument("--limit", type=int, default=10, help="Resultados por búsqueda")
+    args = parser.parse_args()
+
+    db, db_file = create_database(args.products)
+
+    try:
+        index = TrigramIndex(db)
+        start = time.perf_counter()
+        index.load()
+        print(f"Carga del índice: {time.perf_counter() - start:.2f} s, "
+              f"{len(index._names.postings) + len(index._descriptions.postings)} trigramas, "
+              f"{len(index._names.groups) + len(index._descriptions.groups)} grupos")
+
+        names = [(product_id, entry[1]) for product_id, entry in index._products.items()]
+
+        print(f"{'término':>20} {'recorrido ms':>13} {'índice ms':>10}  mejor resultado")
+        for term in TERMS:
+            scan_ms = measure(lambda: search_scan(names, term, args.limit), args.repeat)
+            index_ms = measure(lambda: index.search(term, args.limit), args.repeat)
+            results = index.search(term, args.limit)
+            best = results[0]['name'] if results else '-'
+            print(f"{term:>20} {scan_ms:>13.2f} {index_ms:>10.2f}  {best}")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_lazy_table.py
+"""
+Benchmark de la tabla de movimientos de inventario con carga por bloques
+
+Mide el tiempo de abrir la tabla de movimientos leyendo todo con
+get_stock_movements (implementación anterior) frente al primer bloque de
+MovementTableModel, el de cada bloque al desplazarse hasta el final (con una
+pantalla de filas mostrada), el de volver a un bloque ya descartado y el número
+máximo de filas en memoria.
+
+Uso:
+    python benchmarks/bench_lazy_table.py [--movements 500000] [--block-size 200] [--max-blocks 10]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PySide6.QtCore import Qt
+
+from app.models.database import Database
+from app.controllers.product_controller import ProductController
+from app.views.movement_table_model import MovementTableModel
+
+TYPES = ["sale", "sale", "sale", "purchase", "adjustment"]
+
+def create_database(directory, movement_count, product_count=2000):
+    """Crear una base de datos con movimientos repartidos en un año"""
+    db = Database(os.path.join(directory, f"bench_{time.time_ns()}.db"))
+    db.connect()
+    db.init_schema()
+    
+    with db.transaction():
+        db.execute_many("INSERT INTO products (barcode, name, price) VALUES (?, ?, ?)",
+                        [(f"77{i:011d}", f"Producto {i}", 1000.0) for i in range(product_count)])
+        db.execute_many(
+            """INSERT INTO inventory_movements (product_id, user_id, movement_type, quantity, movement_date, notes)
+               VALUES (?, 1, ?, ?, datetime('2025-01-01', ? || ' seconds'), ?)""",
+            [(i % product_count + 1, TYPES[i % len(TYPES)], -1 if i % 5 < 3 else 10,
+              str(i * 60), f"Venta #{i}" if i % 5 < 3 else None) for i in range(movement_count)]
+        )
+    
+    return db
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la tabla de movimientos por bloques")
+    parser.add_argument("--movements", type=int, default=500000, help="Movimientos de inventario")
+    parser.add_argument("--block-size", type=int, default=200, help="Filas por bloque")
+    parser.add_argument("--max-blocks", type=int, default=10, help="Bloques en memoria")
+    parser.add_argument("--visible-rows", type=int, default=30, help="Filas visibles en pantalla")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db = create_database(directory, args.movements)
+        controller = ProductController(db)
+        
+        print(f"{'medición':>32} {'valor':>12}")
+        
+        # Implementación anterior: todos los movimientos en memoria
+        start = time.perf_counter()
+        movements = controller.get_stock_movements()
+        elapsed = time.perf_counter() - start
+        print(f"{'leer todo (s)':>32} {elapsed:>12.3f}")
+        print(f"{'filas en memoria (todo)':>32} {len(movements):>12}")
+        del movements
+        
+        start = time.perf_counter()
+        model = MovementTableModel(controller.get_stock_movements_page,
+                                   block_size=args.block_size, max_blocks=args.max_blocks)
+        model.reload()
+        print(f"{'abrir la tabla (ms)':>32} {(time.perf_counter() - start) * 1000:>12.2f}")
+        
+        # Desplazarse hasta el final como la vista: pedir el bloque siguiente y
+        # mostrar una pantalla de filas
+        columns = model.columnCount()
+        fetch_times = []
+        peak_rows = 0
+        start = time.perf_counter()
+        while model.canFetchMore():
+            fetch_start = time.perf_counter()
+            model.fetchMore()
+            for row in range(max(0, model.rowCount() - args.visible_rows), model.rowCount()):
+                for column in range(columns):
+                    model.data(model.index(row, column), Qt.DisplayRole)
+            fetch_times.append((time.perf_counter() - fetch_start) * 1000)
+            peak_rows = max(peak_rows, sum(1 for _ in model.cached_rows()))
+        elapsed = time.perf_counter() - start
+        print(f"{'desplazarse hasta el final (s)':>32} {elapsed:>12.3f}")
+        print(f"{'bloque + pantalla, mediana (ms)':>32} {statistics.median(fetch_times):>12.2f}")
+        print(f"{'bloque + pantalla, máximo (ms)':>32} {max(fetch_times):>12.2f}")
+        print(f"{'filas recorridas':>32} {model.rowCount():>12}")
+        print(f"{'filas en memoria (máximo)':>32} {peak_rows:>12}")
+        
+        # Volver a una zona ya descartada (una consulta keyset por bloque)
+        start = time.perf_counter()
+        model.data(model.index(model.rowCount() // 2, 1), Qt.DisplayRole)
+        print(f"{'volver a un bloque (ms)':>32} {(time.perf_counter() - start) * 1000:>12.2f}")
+        
+        # Cambiar el orden (en SQL)
+        start = time.perf_counter()
+        model.sort(2, Qt.AscendingOrder)
+        print(f"{'ordenar por producto (ms)':>32} {(time.perf_counter() - start) * 1000:>12.2f}")
+        
+        # Liberar el modelo de Qt antes de cerrar la base de datos
+        del model
+        db.close()
+
+if __name__ == '__main__':
+    main()
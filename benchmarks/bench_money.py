@@ -0,0 +1,70 @@
+# benchmarks/bench_money.py
+"""
+Benchmark de los importes en centavos (Money)
+
+Compara el manejo anterior de importes (texto "$12.50" convertido con
+float(x.replace('$', '')) en cada capa y sumas de float) con
+app.utils.money: el tiempo de convertir los importes de las líneas de venta,
+el de convertir en lote una columna de reporte, y el tiempo y la diferencia
+acumulada del resumen diario sumando float o centavos en SQL.
+
+Uso:
+    python benchmarks/bench_money.py [--amounts 200000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import sqlite3
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.money import Money, to_cents, cents_from_amounts, format_cents
+
+def measure(function, *args):
+    """Ejecutar una función y devolver (resultado, milisegundos)"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importes en centavos")
+    parser.add_argument("--amounts", type=int, default=200000, help="Importes a convertir y sumar")
+    args = parser.parse_args()
+    
+    random.seed(42)
+    cents = [random.randint(50, 500000) for _ in range(args.amounts)]
+    texts = [format_cents(value) for value in cents]
+    floats = [value / 100 for value in cents]
+    money = [Money(value) for value in cents]
+    
+    print(f"{'medición':>42} {'anterior':>12} {'centavos':>12}")
+    
+    # Líneas de venta: antes llegaban como texto y se convertían en cada capa
+    _, old = measure(lambda: [float(text.replace('$', '')) for text in texts])
+    _, new = measure(lambda: [to_cents(value) for value in money])
+    print(f"{'convertir importes de líneas (ms)':>42} {old:>12.1f} {new:>12.1f}")
+    
+    # Columna de un reporte leída de la base de datos (float)
+    _, old = measure(lambda: [round(value * 100) for value in floats])
+    _, new = measure(cents_from_amounts, floats)
+    print(f"{'convertir columna de reporte (ms)':>42} {old:>12.1f} {new:>12.1f}")
+    
+    # Resumen del día en SQL: SUM de DECIMAL (float) frente a SUM de centavos
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE sales (total_amount DECIMAL(10,2))")
+    db.executemany("INSERT INTO sales VALUES (?)", [(value,) for value in floats])
+    float_total, old = measure(lambda: db.execute("SELECT SUM(total_amount) FROM sales").fetchone()[0])
+    cents_total, new = measure(lambda: db.execute(
+        "SELECT SUM(CAST(ROUND(total_amount * 100) AS INTEGER)) FROM sales").fetchone()[0])
+    db.close()
+    
+    exact = sum(cents)
+    print(f"{'resumen del día en SQL (ms)':>42} {old:>12.1f} {new:>12.1f}")
+    print(f"{'error del total (centavos)':>42} {float_total * 100 - exact:>12.6f} {cents_total - exact:>12}")
+    print(f"{'total':>42} {float_total:>12} {format_cents(cents_total):>12}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_pricing.py
+"""
+Benchmark del motor de impuestos
+
+Compara resolver la tasa de IVA de cada producto escaneado con una consulta a
+tax_rules/system_config (lo que haría la caja sin reglas compiladas) frente a
+PricingEngine.rate_for, y el costo de mantener el IVA del carrito al cambiar
+una cantidad (incremental por tasa) frente a recalcularlo línea por línea.
+
+Uso:
+    python benchmarks/bench_pricing.py [--products 5000] [--scans 20000] [--lines 300]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.models.pricing_engine import PricingEngine, group_tax_cents
+from app.models.cart import Cart
+
+def create_database(product_count, category_count):
+    """Crear una base de datos temporal con reglas por categoría y por producto"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+
+    with db.transaction():
+        db.execute_many("INSERT INTO categories (name) VALUES (?)",
+                        [(f"Categoría {i}",) for i in range(1, category_count + 1)])
+        db.execute_many(
+            "INSERT INTO products (barcode, name, category_id, price) VALUES (?, ?, ?, ?)",
+            [(f"{i:013d}", f"Producto {i}", i % category_count + 1, 10.0) for i in range(1, product_count + 1)]
+        )
+        # Una categoría exenta, otra con tasa reducida y algunos productos con regla propia
+        db.execute("INSERT INTO tax_rules (category_id, is_exempt) VALUES (1, 1)")
+        db.execute("INSERT INTO tax_rules (category_id, rate) VALUES (2, 0.08)")
+        db.execute_many("INSERT INTO tax_rules (product_id, rate) VALUES (?, 0)",
+                        [(i,) for i in range(1, product_count + 1, 50)])
+
+    return db, db_file
+
+def rate_from_database(db, product_id, category_id):
+    """Referencia: resolver la tasa con consultas en cada escaneo"""
+    rule = db.fetch_one("SELECT rate, is_exempt FROM tax_rules WHERE product_id = ?", [product_id])
+    if rule is None:
+        rule = db.fetch_one("SELECT rate, is_exempt FROM tax_rules WHERE category_id = ? AND product_id IS NULL",
+                            [category_id])
+    if rule is not None:
+        return 0 if rule['is_exempt'] else float(rule['rate'])
+    config = db.fetch_one("SELECT config_value FROM system_config WHERE config_key = 'tax_rate'")
+    return float(config['config_value'])
+
+def full_tax(cart):
+    """Referencia: recalcular el IVA del carrito recorriendo todas las líneas"""
+    subtotals = {}
+    for line in cart:
+        subtotals[line.tax_rate] = subtotals.get(line.tax_rate, 0) + line.unit_price_cents * line.quantity
+    return group_tax_cents(subtotals)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de impuestos")
+    parser.add_argument("--products", type=int, default=5000, help="Productos en el catálogo")
+    parser.add_argument("--scans", type=int, default=20000, help="Escaneos a simular")
+    parser.add_argument("--lines", type=int, default=300, help="Líneas del carrito")
+    args = parser.parse_args()
+
+    random.seed(42)
+    db, db_file = create_database(args.products, 20)
+    try:
+        products = db.fetch_all("SELECT product_id, name, price, category_id FROM products")
+        scans = [random.choice(products) for _ in range(args.scans)]
+
+        engine = PricingEngine(db)
+        start = time.perf_counter()
+        engine.load()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        expected = [rate_from_database(db, p['product_id'], p['category_id']) for p in scans]
+        query_us = (time.perf_counter() - start) / args.scans * 1e6
+
+        start = time.perf_counter()
+        rates = [engine.rate_for(p['product_id'], p['category_id']) for p in scans]
+        engine_us = (time.perf_counter() - start) / args.scans * 1e6
+        assert rates == expected
+
+        print(f"carga de reglas: {load_ms:.1f} ms")
+        print(f"tasa por escaneo: consulta {query_us:.1f} µs, motor {engine_us:.2f} µs")
+
+        # IVA del carrito al cambiar cantidades
+        cart = Cart(pricing=engine)
+        for product in products[:args.lines]:
+            cart.add_product(product)
+
+        changes = [(random.choice(products[:args.lines])['product_id'], random.randint(1, 9))
+                   for _ in range(2000)]
+
+        start = time.perf_counter()
+        for product_id, quantity in changes:
+            cart.set_quantity(product_id, quantity)
+            cart.tax_cents
+        incremental_us = (time.perf_counter() - start) / len(changes) * 1e6
+
+        start = time.perf_counter()
+        for product_id, quantity in changes:
+            cart.set_quantity(product_id, quantity)
+            full_tax(cart)
+        full_us = (time.perf_counter() - start) / len(changes) * 1e6
+        assert full_tax(cart) == cart.tax_cents
+
+        print(f"IVA del carrito ({args.lines} líneas) por cambio: recalcular {full_us:.1f} µs, "
+              f"incremental {incremental_us:.1f} µs")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_product_paging.py
+"""
+Benchmark del listado paginado de productos
+
+Mide el tiempo de abrir el inventario con get_all_products (implementación
+anterior, todo el catálogo) frente a la primera página de get_products_page, y
+el de una página profunda con cursor (keyset) frente a LIMIT/OFFSET.
+
+Uso:
+    python benchmarks/bench_product_paging.py [--products 100000] [--page-size 100] [--repeat 20]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.controllers.product_controller import ProductController
+
+def create_database(directory, product_count, category_count=20):
+    """Crear una base de datos con un catálogo repartido en categorías"""
+    db = Database(os.path.join(directory, f"bench_{time.time_ns()}.db"))
+    db.connect()
+    db.init_schema()
+    
+    with db.transaction():
+        db.execute_many("INSERT INTO categories (name) VALUES (?)",
+                        [(f"Categoría {i}",) for i in range(category_count)])
+        db.execute_many(
+            "INSERT INTO products (barcode, name, category_id, price, cost, stock_quantity) VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"77{i:011d}", f"Producto {i * 7919 % product_count:06d}", i % category_count + 1,
+              1000.0, 800.0, i % 50) for i in range(product_count)]
+        )
+    
+    return db
+
+def page_with_offset(db, offset, limit):
+    """Referencia: página con LIMIT/OFFSET (recorre las filas anteriores)"""
+    return db.fetch_all("""
+        SELECT p.*, c.name AS category_name FROM products p
+        LEFT JOIN categories c ON p.category_id = c.category_id
+        WHERE p.is_active = 1
+        ORDER BY p.name, p.product_id LIMIT ? OFFSET ?
+    """, [limit, offset])
+
+def measure(func, repeat):
+    """Mediana en milisegundos de varias ejecuciones"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del listado paginado de productos")
+    parser.add_argument("--products", type=int, default=100000, help="Productos en el catálogo")
+    parser.add_argument("--page-size", type=int, default=100, help="Productos por página")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones de cada medición")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db = create_database(directory, args.products)
+        controller = ProductController(db)
+        
+        # Cursor de una página cercana al final del catálogo
+        deep_offset = args.products - 2 * args.page_size
+        last = page_with_offset(db, deep_offset - 1, 1)[0]
+        deep_cursor = (last['name'], last['product_id'])
+        
+        cases = [
+            ("todo el catálogo", lambda: controller.get_all_products(), min(args.repeat, 5)),
+            ("primera página", lambda: controller.get_products_page(limit=args.page_size), args.repeat),
+            ("primera página (categoría)",
+             lambda: controller.get_products_page(limit=args.page_size, category_id=1), args.repeat),
+            ("página profunda OFFSET", lambda: page_with_offset(db, deep_offset, args.page_size), args.repeat),
+            ("página profunda cursor",
+             lambda: controller.get_products_page(cursor=deep_cursor, limit=args.page_size), args.repeat),
+        ]
+        
+        print(f"{'consulta':>28} {'ms':>9}")
+        for name, func, repeat in cases:
+            print(f"{name:>28} {measure(func, repeat):>9.2f}")
+        
+        db.close()
+
+if __name__ == '__main__':
+    main()
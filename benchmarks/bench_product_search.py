@@ -0,0 +1,107 @@
+# benchmarks/bench_product_search.py
+"""
+Benchmark de búsqueda de productos
+
+Mide la latencia de Product.search con el índice de texto completo (FTS5)
+frente a la búsqueda anterior con LIKE '%término%' sobre un catálogo grande.
+
+Uso:
+    python benchmarks/bench_product_search.py [--products 100000] [--repeat 50]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.models.product import Product
+
+WORDS = [
+    "agua", "café", "azúcar", "arroz", "leche", "pan", "jugo", "galletas", "aceite", "atún",
+    "jabón", "champú", "papel", "frijol", "lenteja", "harina", "sal", "panela", "chocolate", "té"
+]
+VARIANTS = ["natural", "light", "integral", "familiar", "orgánico", "clásico", "premium", "económico"]
+
+# Términos como los que escribe un cajero mientras busca
+TERMS = ["ca", "caf", "cafe", "leche nat", "choco", "agua light 5", "77000001", "jabon"]
+
+def create_database(product_count):
+    """Crear una base de datos temporal con un catálogo de prueba"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+
+    rng = random.Random(42)
+    rows = []
+    for i in range(1, product_count + 1):
+        name = f"{rng.choice(WORDS).capitalize()} {rng.choice(VARIANTS)} {rng.randint(100, 2000)}g"
+        rows.append((f"770{i:010d}", name, f"Presentación {rng.choice(VARIANTS)}", 10.0, 5.0, 100))
+
+    with db.transaction():
+        db.execute_many(
+            "INSERT INTO products (barcode, name, description, price, cost, stock_quantity) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    return db, db_file
+
+def search_like(db, term, limit):
+    """Referencia: búsqueda por subcadena con LIKE (implementación anterior)"""
+    search_term = f"%{term}%"
+    query = (
+        """SELECT p.*, c.name as category_name
+           FROM products p
+           LEFT JOIN categories c ON p.category_id = c.category_id
+           WHERE (p.name LIKE ? OR p.description LIKE ? OR p.barcode LIKE ?) AND p.is_active = 1
+           ORDER BY p.name"""
+    )
+    params = [search_term, search_term, search_term]
+
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+
+    return db.fetch_all(query, params)
+
+def measure(func, repeat):
+    """Ejecutar la función varias veces y devolver la mediana en milisegundos"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de productos")
+    parser.add_argument("--products", type=int, default=100000, help="Productos en el catálogo")
+    parser.add_argument("--repeat", type=int, default=50, help="Repeticiones por término")
+    parser.add_argument("--limit", type=int, default=50, help="Resultados mostrados por búsqueda (0 = todos)")
+    args = parser.parse_args()
+
+    db, db_file = create_database(args.products)
+
+    try:
+        product_model = Product(db)
+
+        print(f"{'término':>12} {'resultados':>11} {'LIKE (ms)':>10} {'FTS5 (ms)':>10}")
+
+        for term in TERMS:
+            results = len(product_model.search(term))
+            like_ms = measure(lambda: search_like(db, term, args.limit), args.repeat)
+            fts_ms = measure(lambda: product_model.search(term, limit=args.limit), args.repeat)
+
+            print(f"{term:>12} {results:>11} {like_ms:>10.3f} {fts_ms:>10.3f}")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
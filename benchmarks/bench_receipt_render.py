@@ -0,0 +1,150 @@
+# benchmarks/bench_receipt_render.py
+"""
+Benchmark de impresión de recibos ESC/POS
+
+Compara el envío del recibo comando por comando (p.set()/p.text(), una
+transferencia por llamada) con el envío en bloque generado por
+EscposReceiptRenderer. Se usa una impresora simulada que cuenta las
+transferencias y agrega una latencia fija por transferencia, similar a la de
+un envío USB o de red.
+
+Uso:
+    python benchmarks/bench_receipt_render.py [--receipts N] [--sizes 5,20,50] [--latency-ms 1.0]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from escpos.escpos import Escpos
+
+from app.devices.escpos_renderer import EscposReceiptRenderer
+
+WIDTH = 32
+
+class CountingPrinter(Escpos):
+    """Impresora simulada que cuenta transferencias y bytes enviados"""
+
+    def __init__(self, latency):
+        Escpos.__init__(self)
+        self.latency = latency
+        self.transfers = 0
+        self.bytes_sent = 0
+
+    def _raw(self, msg):
+        self.transfers += 1
+        self.bytes_sent += len(msg)
+        if self.latency:
+            time.sleep(self.latency)
+
+def build_receipt(size):
+    """Construir datos de recibo con cierta cantidad de productos"""
+    return {
+        'store_name': 'Mi Tienda',
+        'store_address': 'Calle 1 # 2-3',
+        'store_phone': '555-0100',
+        'date': '14/04/2025 10:00',
+        'receipt_number': '1001',
+        'cashier_name': 'Cajero',
+        'items': [
+            {'name': f'Producto {i}', 'quantity': 1, 'price': 10.0, 'subtotal': 10.0}
+            for i in range(1, size + 1)
+        ],
+        'subtotal': 10.0 * size,
+        'tax': 1.9 * size,
+        'total': 11.9 * size,
+        'payment_method': 'Efectivo',
+        'amount_received': 20.0 * size,
+        'change': 8.1 * size,
+        'barcode_data': '1001'
+    }
+
+def print_per_command(p, receipt_data):
+    """Referencia: una llamada a la impresora por línea o cambio de estilo (implementación anterior)"""
+    separator = '-' * WIDTH + '\n'
+
+    p.set(align='center', bold=True)
+    p.text(receipt_data['store_name'] + '\n')
+    p.set(align='center', bold=False)
+    p.text(receipt_data['store_address'] + '\n')
+    p.text(receipt_data['store_phone'] + '\n')
+    p.text(separator)
+
+    p.set(align='left')
+    p.text(f"Fecha: {receipt_data['date']}\n")
+    p.text(f"Recibo: #{receipt_data['receipt_number']}\n")
+    p.text(f"Cajero: {receipt_data['cashier_name']}\n")
+    p.text(separator)
+    p.text('CANT  DESCRIPCION            PRECIO   TOTAL\n')
+    p.text(separator)
+
+    for item in receipt_data['items']:
+        p.text(f"{item['quantity']:<5}{item['name']:<20}${item['price']:<7.2f}${item['subtotal']:.2f}\n")
+
+    p.text(separator)
+    p.set(align='right')
+    p.text(f"SUBTOTAL: ${receipt_data['subtotal']:.2f}\n")
+    p.text(f"IMPUESTO: ${receipt_data['tax']:.2f}\n")
+    p.set(bold=True)
+    p.text(f"TOTAL:    ${receipt_data['total']:.2f}\n")
+    p.set(bold=False)
+    p.text(f"PAGO:     {receipt_data['payment_method']}\n")
+    p.text(f"RECIBIDO: ${receipt_data['amount_received']:.2f}\n")
+    p.text(f"CAMBIO:   ${receipt_data['change']:.2f}\n")
+
+    p.set(align='center')
+    p.text('\n')
+    p.text('¡Gracias por su compra!\n')
+    p.text('\n')
+    p.barcode(receipt_data['barcode_data'], 'CODE39')
+    p.cut()
+
+def print_bulk(p, renderer, receipt_data):
+    """Recibo generado en memoria y enviado en una sola escritura"""
+    p._raw(renderer.render(receipt_data))
+
+def measure(func, latency, receipts):
+    """Imprimir varios recibos y devolver latencias (ms), transferencias y bytes por recibo"""
+    timings = []
+    transfers = 0
+    bytes_sent = 0
+
+    for _ in range(receipts):
+        printer = CountingPrinter(latency)
+        start = time.perf_counter()
+        func(printer)
+        timings.append((time.perf_counter() - start) * 1000)
+        transfers = printer.transfers
+        bytes_sent = printer.bytes_sent
+
+    return statistics.median(timings), transfers, bytes_sent
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de impresión de recibos ESC/POS")
+    parser.add_argument("--receipts", type=int, default=20, help="Recibos por tamaño")
+    parser.add_argument("--sizes", default="5,20,50", help="Productos por recibo separados por comas")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Latencia simulada por transferencia")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    renderer = EscposReceiptRenderer(WIDTH)
+
+    print(f"{'líneas':>7} {'modo':>10} {'envíos':>7} {'bytes/envío':>12} {'ms/recibo':>10}")
+
+    for size in [int(size) for size in args.sizes.split(",")]:
+        receipt_data = build_receipt(size)
+
+        results = [
+            ('comandos', measure(lambda p: print_per_command(p, receipt_data), latency, args.receipts)),
+            ('bloque', measure(lambda p: print_bulk(p, renderer, receipt_data), latency, args.receipts))
+        ]
+
+        for mode, (median_ms, transfers, bytes_sent) in results:
+            print(f"{size:>7} {mode:>10} {transfers:>7} {bytes_sent / transfers:>12.1f} {median_ms:>10.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/bench_register_report.py
+"""
+Benchmark de los reportes X/Z con contadores de caja
+
+Compara el reporte Z anterior (leer todas las ventas del turno y recorrerlas
+siete veces en Python) con el reporte a partir de los contadores de
+cash_registers, y mide lo que agrega actualizar los contadores a cada venta.
+
+Uso:
+    python benchmarks/bench_register_report.py [--sales 20000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.controllers.sales_controller import SalesController
+from app.utils.money import to_cents, cents_from_amounts
+
+def z_report_from_sales(controller, register_id):
+    """Referencia: reporte Z recorriendo las ventas del turno (implementación anterior)"""
+    register = controller.db.fetch_one("SELECT * FROM cash_registers WHERE register_id = ?", [register_id])
+    sales = controller.get_register_sales(register_id)
+
+    cash_cents = sum(cents_from_amounts(s['total_amount'] for s in sales if s['payment_method'] == 'cash' and s['payment_status'] == 'paid'))
+    card_cents = sum(cents_from_amounts(s['total_amount'] for s in sales if s['payment_method'] == 'card' and s['payment_status'] == 'paid'))
+    transfer_cents = sum(cents_from_amounts(s['total_amount'] for s in sales if s['payment_method'] == 'transfer' and s['payment_status'] == 'paid'))
+    canceled_cents = sum(cents_from_amounts(s['total_amount'] for s in sales if s['payment_status'] == 'canceled'))
+
+    return {
+        'sales_count': len([s for s in sales if s['payment_status'] == 'paid']),
+        'canceled_count': len([s for s in sales if s['payment_status'] == 'canceled']),
+        'total_sales': (cash_cents + card_cents + transfer_cents) / 100,
+        'total_canceled': canceled_cents / 100,
+        'expected_amount': (to_cents(register['opening_amount']) + cash_cents) / 100
+    }
+
+def measure(function, repeat):
+    """Tiempo promedio de una función en milisegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los reportes X/Z")
+    parser.add_argument("--sales", type=int, default=20000, help="Ventas en el turno")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones de cada reporte")
+    args = parser.parse_args()
+
+    random.seed(42)
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+    try:
+        db.execute("INSERT INTO products (name, price, stock_quantity) VALUES ('Producto', 1.0, 0)")
+        controller = SalesController(db)
+        register_id = controller.open_cash_register(1, 500.0)
+        items = [{'product_id': 1, 'quantity': 1, 'price': 1.0, 'subtotal': 1.0}]
+
+        # Registrar el turno con create_sale (actualiza los contadores)
+        start = time.perf_counter()
+        for _ in range(args.sales):
+            amount = round(random.uniform(1, 900), 2)
+            controller.create_sale(1, items, random.choice(('cash', 'card', 'transfer')), amount)
+        per_sale_ms = (time.perf_counter() - start) / args.sales * 1000
+
+        # Costo aislado del UPDATE de contadores por venta
+        start = time.perf_counter()
+        for _ in range(args.sales):
+            with db.transaction():
+                controller.register_counters.record_sale(register_id, 'cash', 0)
+        counter_ms = (time.perf_counter() - start) / args.sales * 1000
+
+        # La verificación corrige los contadores inflados por la medición anterior
+        start = time.perf_counter()
+        assert controller.verify_register_counters([register_id])
+        verify_ms = (time.perf_counter() - start) * 1000
+
+        sale_ids = [row['sale_id'] for row in db.fetch_all("SELECT sale_id FROM sales LIMIT 200")]
+        for sale_id in sale_ids:
+            controller.cancel_sale(sale_id, 1, "benchmark")
+
+        old, old_ms = measure(lambda: z_report_from_sales(controller, register_id), args.repeat)
+        new, new_ms = measure(lambda: controller.generate_z_report(register_id), args.repeat)
+        for key in old:
+            assert old[key] == new[key], key
+
+        print(f"venta con contadores: {per_sale_ms:.3f} ms (UPDATE de contadores {counter_ms:.3f} ms)")
+        print(f"reporte Z con {args.sales} ventas: recorriendo ventas {old_ms:.1f} ms, contadores {new_ms:.3f} ms")
+        print(f"verificación de la caja contra las ventas: {verify_ms:.1f} ms")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
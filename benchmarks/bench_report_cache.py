@@ -0,0 +1,101 @@
+# benchmarks/bench_report_cache.py
+"""
+Benchmark de la caché de reportes
+
+Mide el tiempo de generar los reportes de ventas diarias y por período
+(consultas y dibujo de PDF/CSV/JSON) frente a servirlos desde la caché, que
+solo calcula la marca de agua de las ventas del rango y copia el archivo
+guardado. Los reportes de un período cerrado ni siquiera calculan la marca.
+
+Uso:
+    python benchmarks/bench_report_cache.py [--sales-per-day 400] [--days 90] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.controllers.sales_controller import SalesController
+from app.controllers.product_controller import ProductController
+from app.controllers.user_controller import UserController
+from app.controllers.report_controller import ReportController
+from app.utils.report_cache import ReportCache
+
+def measure(function, repeat):
+    """Tiempo promedio de una función en milisegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la caché de reportes")
+    parser.add_argument("--sales-per-day", type=int, default=400, help="Ventas por día")
+    parser.add_argument("--days", type=int, default=90, help="Días de historial")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones de cada reporte")
+    args = parser.parse_args()
+
+    random.seed(42)
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    reports_dir = tempfile.mkdtemp()
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+    try:
+        first_day = date.today() - timedelta(days=args.days - 1)
+        rows = []
+        for offset in range(args.days):
+            day = (first_day + timedelta(days=offset)).isoformat()
+            for _ in range(args.sales_per_day):
+                amount = round(random.uniform(1, 900), 2)
+                rows.append((amount, round(amount * 0.16, 2), random.choice(('cash', 'card', 'transfer')),
+                             f"{day} {random.randint(8, 21):02d}:{random.randint(0, 59):02d}:00"))
+        with db.transaction():
+            db.execute_many(
+                """INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date)
+                   VALUES (1, ?, ?, ?, 'paid', ?)""",
+                rows
+            )
+
+        sales_controller = SalesController(db)
+        controller = ReportController(db, sales_controller, ProductController(db), UserController(db),
+                                      cache=ReportCache(os.path.join(reports_dir, 'cache')))
+        controller.reports_dir = reports_dir
+        # Referencia: el mismo controlador sin caché
+        no_cache = ReportController(db, sales_controller, ProductController(db), UserController(db),
+                                    reports_dir=reports_dir, use_cache=False)
+
+        today = date.today().isoformat()
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        cases = [
+            ("ventas del día (abierto), PDF", lambda c: c.generate_daily_sales_report(today, 'pdf')),
+            ("ventas del día (abierto), CSV", lambda c: c.generate_daily_sales_report(today, 'csv')),
+            ("ventas de ayer (cerrado), PDF", lambda c: c.generate_daily_sales_report(yesterday, 'pdf')),
+            (f"ventas de {args.days} días, PDF",
+             lambda c: c.generate_sales_by_period_report(first_day.isoformat(), today, 'day', 'pdf')),
+        ]
+
+        for label, report in cases:
+            _, generate_ms = measure(lambda: report(no_cache), args.repeat)
+            assert report(controller)
+            path, cached_ms = measure(lambda: report(controller), args.repeat * 4)
+            assert path and os.path.exists(path)
+            print(f"{label}: generar {generate_ms:.1f} ms, desde la caché {cached_ms:.2f} ms")
+
+        _, watermark_ms = measure(lambda: controller._sales_watermark(first_day.isoformat(), today), args.repeat * 4)
+        print(f"marca de agua de {args.days} días ({len(rows)} ventas): {watermark_ms:.2f} ms")
+    finally:
+        db.close()
+        os.remove(db_file)
+        shutil.rmtree(reports_dir)
+
+if __name__ == '__main__':
+    main()
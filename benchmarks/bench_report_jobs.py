@@ -0,0 +1,120 @@
+# benchmarks/bench_report_jobs.py
+"""
+Benchmark de la generación de reportes en el pool de procesos
+
+Genera varios reportes PDF de ventas por período en el hilo que los pide
+(como hacía ReportsView, bloqueando la interfaz) y con ReportJobController,
+y mide el tiempo total, el tiempo que el hilo que los pide queda bloqueado y
+la latencia de una cancelación. Sin caché, para medir solo la generación.
+
+Uso:
+    python benchmarks/bench_report_jobs.py [--sales-per-day 400] [--days 90] [--reports 4] [--workers N]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from datetime import date, timedelta
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.controllers.sales_controller import SalesController
+from app.controllers.product_controller import ProductController
+from app.controllers.user_controller import UserController
+from app.controllers.report_controller import ReportController, QUERY_PROGRESS
+from app.controllers.report_job_controller import ReportJobController
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la generación de reportes en el pool de procesos")
+    parser.add_argument("--sales-per-day", type=int, default=400, help="Ventas por día")
+    parser.add_argument("--days", type=int, default=90, help="Días de historial")
+    parser.add_argument("--reports", type=int, default=4, help="Reportes a generar")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del pool (por defecto uno por núcleo)")
+    args = parser.parse_args()
+
+    random.seed(42)
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    reports_dir = tempfile.mkdtemp()
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+    try:
+        first_day = date.today() - timedelta(days=args.days - 1)
+        rows = []
+        for offset in range(args.days):
+            day = (first_day + timedelta(days=offset)).isoformat()
+            for _ in range(args.sales_per_day):
+                amount = round(random.uniform(1, 900), 2)
+                rows.append((amount, round(amount * 0.16, 2), random.choice(('cash', 'card', 'transfer')),
+                             f"{day} {random.randint(8, 21):02d}:{random.randint(0, 59):02d}:00"))
+        with db.transaction():
+            db.execute_many(
+                """INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date)
+                   VALUES (1, ?, ?, ?, 'paid', ?)""",
+                rows
+            )
+
+        # Un reporte distinto por cada período que termina hoy (los mismos en ambos casos)
+        today = date.today().isoformat()
+        reports = [{'start_date': (date.today() - timedelta(days=args.days - 1 - i)).isoformat(),
+                    'end_date': today, 'format': 'pdf'} for i in range(args.reports)]
+
+        # Referencia: todos los reportes en el hilo que los pide
+        controller = ReportController(db, SalesController(db), ProductController(db), UserController(db),
+                                      reports_dir=reports_dir, use_cache=False)
+        start = time.perf_counter()
+        for params in reports:
+            assert controller.generate_sales_by_period_report(**params)
+        inline_s = time.perf_counter() - start
+
+        jobs = ReportJobController(db_file, reports_dir=reports_dir, max_workers=args.workers)
+        jobs.start()
+        try:
+            # Calentamiento: arrancar los procesos (importan matplotlib) fuera de la medición
+            for _ in range(jobs.max_workers):
+                jobs.submit('period_sales', dict(reports[0], format='csv'))
+            jobs.wait_idle()
+
+            results = {}
+            start = time.perf_counter()
+            blocked = 0.0
+            for params in reports:
+                submit_start = time.perf_counter()
+                jobs.submit('period_sales', params, on_finished=lambda job_id, result: results.__setitem__(job_id, result))
+                blocked += time.perf_counter() - submit_start
+            jobs.wait_idle()
+            pool_s = time.perf_counter() - start
+            assert len(results) == len(reports) and all(result['success'] for result in results.values())
+
+            # Cancelación de un reporte ya en el dibujo de sus páginas: tiempo hasta recibir su resultado
+            started = threading.Event()
+            finished = threading.Event()
+            job_id = jobs.submit('period_sales', reports[0],
+                                 on_progress=lambda job_id, fraction: fraction > QUERY_PROGRESS and started.set(),
+                                 on_finished=lambda job_id, result: finished.set())
+            started.wait()
+            cancel_start = time.perf_counter()
+            jobs.cancel(job_id)
+            finished.wait()
+            cancel_ms = (time.perf_counter() - cancel_start) * 1000
+        finally:
+            jobs.stop()
+
+        print(f"{len(rows)} ventas, {args.reports} reportes PDF por período, {jobs.max_workers} procesos "
+              f"({os.cpu_count()} núcleos)")
+        print(f"en el hilo que los pide: {inline_s * 1000:.0f} ms bloqueado")
+        print(f"en el pool: {pool_s * 1000:.0f} ms en total, {blocked * 1000:.2f} ms bloqueado al encolar")
+        print(f"cancelar un reporte a mitad del PDF: {cancel_ms:.0f} ms hasta recibir el resultado")
+    finally:
+        db.close()
+        os.remove(db_file)
+        shutil.rmtree(reports_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/bench_sale_persistence.py
+"""
+Benchmark de persistencia de ventas
+
+Mide la latencia por venta de SalesController.create_sale (escritura en lote)
+frente a la escritura línea por línea, para distintos tamaños de canasta.
+
+Uso:
+    python benchmarks/bench_sale_persistence.py [--sales N] [--sizes 1,10,50,200]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.database import Database
+from app.controllers.sales_controller import SalesController
+
+def create_database(product_count):
+    """Crear una base de datos temporal con un catálogo de prueba"""
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    db = Database(db_file)
+    db.connect()
+    db.init_schema()
+
+    with db.transaction():
+        db.execute_many(
+            "INSERT INTO products (barcode, name, price, cost, stock_quantity) VALUES (?, ?, ?, ?, ?)",
+            [(f"{i:013d}", f"Producto {i}", 10.0, 5.0, 1000000) for i in range(1, product_count + 1)]
+        )
+
+    return db, db_file
+
+def build_basket(size):
+    """Construir una canasta con productos distintos"""
+    return [
+        {"product_id": i, "quantity": 1, "price": 10.0, "subtotal": 10.0}
+        for i in range(1, size + 1)
+    ]
+
+def create_sale_per_line(db, user_id, items):
+    """Referencia: una sentencia por detalle, stock y movimiento (implementación anterior)"""
+    with db.transaction():
+        sale_id = db.execute(
+            """INSERT INTO sales (user_id, total_amount, payment_method, payment_status)
+               VALUES (?, ?, ?, ?)""",
+            [user_id, 10.0 * len(items), 'cash', 'paid']
+        )
+
+        for item in items:
+            db.execute(
+                """INSERT INTO sale_items (sale_id, product_id, quantity, unit_price, discount, subtotal)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [sale_id, item['product_id'], item['quantity'], item['price'], 0, item['subtotal']]
+            )
+            db.execute(
+                "UPDATE products SET stock_quantity = stock_quantity - ? WHERE product_id = ?",
+                [item['quantity'], item['product_id']]
+            )
+            db.execute(
+                """INSERT INTO inventory_movements (product_id, user_id, movement_type, quantity, reference_id, notes)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [item['product_id'], user_id, 'sale', -item['quantity'], sale_id, f"Venta #{sale_id}"]
+            )
+
+    return sale_id
+
+def measure(func, sales):
+    """Ejecutar la función varias veces y devolver latencias en milisegundos"""
+    timings = []
+    for _ in range(sales):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de persistencia de ventas")
+    parser.add_argument("--sales", type=int, default=50, help="Ventas por tamaño de canasta")
+    parser.add_argument("--sizes", default="1,10,50,200", help="Tamaños de canasta separados por comas")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    db, db_file = create_database(max(sizes))
+
+    try:
+        controller = SalesController(db)
+        user_id = 1  # Administrador creado con el esquema
+
+        print(f"{'líneas':>7} {'por línea (ms)':>16} {'en lote (ms)':>14} {'mejora':>8}")
+
+        for size in sizes:
+            items = build_basket(size)
+
+            per_line = measure(lambda: create_sale_per_line(db, user_id, items), args.sales)
+            batched = measure(
+                lambda: controller.create_sale(user_id, items, 'cash', 10.0 * size),
+                args.sales
+            )
+
+            per_line_median = statistics.median(per_line)
+            batched_median = statistics.median(batched)
+
+            print(f"{size:>7} {per_line_median:>16.3f} {batched_median:>14.3f} "
+                  f"{per_line_median / batched_median:>7.2f}x")
+    finally:
+        db.close()
+        os.remove(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -39,6 +39,7 @@ setup(
     entry_points={
         "console_scripts": [
             "pos_system=app.main:main",
+            "pos_rebuild_rollups=app.models.rollups:main",
         ],
     },
     include_package_data=True,
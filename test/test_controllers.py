@@ -3,6 +3,7 @@ import unittest
 import os
 import sys
 import tempfile
+import json
 from datetime import datetime, timedelta
 
 # Agregar directorio raíz al path para importar módulos
@@ -14,6 +15,15 @@ from app.controllers.user_controller import UserController
 from app.controllers.product_controller import ProductController
 from app.controllers.sales_controller import SalesController
 from app.controllers.report_controller import ReportController
+from app.controllers.report_job_controller import ReportJobController, CANCEL_SLOTS
+from app.controllers.bulk_update_controller import BulkUpdateController
+from app.models.barcode_index import BarcodeIndex
+from app.models.product_search_index import ProductSearchIndex
+from app.models.trigram_index import TrigramIndex
+from app.models.pricing_engine import PricingEngine
+from app.models.cart import Cart
+from app.utils.money import Money
+from app.utils.report_cache import ReportCache
 
 class TestUserController(unittest.TestCase):
     """Pruebas para UserController"""
@@ -276,6 +286,271 @@ class TestProductController(unittest.TestCase):
         
         self.assertEqual(len(low_stock), 1)
         self.assertEqual(low_stock[0]["name"], "Low Stock Product")
+    
+    def test_get_products_page(self):
+        """Probar paginación por cursor del catálogo"""
+        for i in range(7):
+            self.product_controller.create_product({
+                "name": f"Producto {i % 3}",
+                "category_id": self.category_id if i < 5 else None,
+                "price": 10.0
+            })
+        
+        names = []
+        cursor = None
+        while True:
+            page = self.product_controller.get_products_page(cursor=cursor, limit=3)
+            self.assertLessEqual(len(page["products"]), 3)
+            names.extend(p["name"] for p in page["products"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        self.assertEqual(names, sorted(p["name"] for p in self.product_controller.get_all_products()))
+        
+        page = self.product_controller.get_products_page(limit=3, category_id=self.category_id)
+        self.assertEqual(len(page["products"]), 3)
+        self.assertEqual(page["products"][0]["category_name"], "Test Category")
+        
+        page = self.product_controller.get_products_page(cursor=page["next_cursor"], limit=3,
+                                                         category_id=self.category_id)
+        self.assertEqual(len(page["products"]), 2)
+        self.assertIsNone(page["next_cursor"])
+    
+    def test_sorted_pages(self):
+        """Probar páginas ordenadas por otras columnas y movimientos por fecha"""
+        prices = [30.0, 10.0, 20.0, 10.0]
+        product_ids = [
+            self.product_controller.create_product({"name": f"Producto {i}", "price": price, "stock_quantity": 10})
+            for i, price in enumerate(prices)
+        ]
+        
+        page = self.product_controller.get_products_page(limit=3, order_by="price", descending=True)
+        self.assertEqual([p["price"] for p in page["products"]], [30.0, 20.0, 10.0])
+        
+        page = self.product_controller.get_products_page(cursor=page["next_cursor"], limit=3,
+                                                         order_by="price", descending=True)
+        self.assertEqual([p["product_id"] for p in page["products"]], [product_ids[1]])
+        
+        with self.assertRaises(ValueError):
+            self.product_controller.get_products_page(order_by="description")
+        
+        # Movimientos: los más recientes primero, con filtros
+        for product_id in product_ids:
+            self.product_controller.update_stock(product_id, -1, 1, "sale")
+        self.product_controller.update_stock(product_ids[0], 5, 1, "purchase", notes="Compra")
+        
+        page = self.product_controller.get_stock_movements_page(limit=3)
+        movements = page["movements"]
+        self.assertEqual(len(movements), 3)
+        self.assertEqual(movements[0]["notes"], "Compra")
+        self.assertEqual(movements[0]["user_name"], "admin")
+        self.assertIsNotNone(page["next_cursor"])
+        
+        page = self.product_controller.get_stock_movements_page(cursor=page["next_cursor"], limit=3)
+        self.assertEqual(len(page["movements"]), 2)
+        self.assertIsNone(page["next_cursor"])
+        
+        page = self.product_controller.get_stock_movements_page(product_id=product_ids[0], movement_type="sale")
+        self.assertEqual([m["quantity"] for m in page["movements"]], [-1])
+    
+    def test_barcode_index_sync(self):
+        """Probar que el índice de códigos de barras sigue los cambios del catálogo"""
+        index = BarcodeIndex(self.db)
+        index.load()
+        controller = ProductController(self.db, barcode_index=index)
+        
+        # Alta
+        product_id = controller.create_product({
+            "name": "Indexed Product",
+            "barcode": "7501234567890",
+            "category_id": self.category_id,
+            "price": 10.0,
+            "stock_quantity": 20
+        })
+        product = controller.get_product_by_barcode("7501234567890")
+        self.assertIsNotNone(product)
+        self.assertEqual(product["product_id"], product_id)
+        
+        # Modificación de precio
+        controller.update_product(product_id, {"name": "Indexed Product", "barcode": "7501234567890",
+                                               "category_id": self.category_id, "price": 12.5,
+                                               "stock_quantity": 20, "is_active": 1})
+        self.assertEqual(float(controller.get_product_by_barcode("7501234567890")["price"]), 12.5)
+        
+        # Movimiento de stock
+        controller.update_stock(product_id, -5, 1, "sale")
+        product = controller.get_product_by_barcode("7501234567890")
+        db_product = controller.get_product_by_id(product_id)
+        self.assertEqual(int(product["stock_quantity"]), int(db_product["stock_quantity"]))
+        
+        # Baja
+        controller.delete_product(product_id)
+        self.assertIsNone(controller.get_product_by_barcode("7501234567890"))
+
+    def test_product_search_index_sync(self):
+        """Probar que el índice de búsqueda sigue los cambios del catálogo"""
+        index = ProductSearchIndex(self.db)
+        index.load()
+        self.product_controller.register_index(index)
+        
+        product_id = self.product_controller.create_product({
+            "name": "Limón Tahití",
+            "category_id": self.category_id,
+            "price": 2.0,
+            "stock_quantity": 30
+        })
+        self.assertEqual([p["product_id"] for p in index.search("limon")], [product_id])
+        
+        self.product_controller.update_product(product_id, {"name": "Limón Pajarito",
+                                                            "category_id": self.category_id,
+                                                            "price": 2.0, "stock_quantity": 30,
+                                                            "is_active": 1})
+        self.assertEqual(index.search("tahiti"), [])
+        self.assertEqual(len(index.search("limon paj")), 1)
+        
+        self.product_controller.delete_product(product_id)
+        self.assertEqual(index.search("limon"), [])
+
+    def test_fuzzy_search_fallback(self):
+        """Probar que la búsqueda recurre al índice de trigramas si no hay coincidencias"""
+        index = TrigramIndex(self.db)
+        index.load()
+        controller = ProductController(self.db, trigram_index=index)
+        
+        product_id = controller.create_product({
+            "name": "Mantequilla Alpina",
+            "category_id": self.category_id,
+            "price": 6.0,
+            "stock_quantity": 12
+        })
+        
+        # Coincidencia exacta: no se usa el índice de trigramas
+        results = controller.search_products("mantequilla")
+        self.assertEqual([p["product_id"] for p in results], [product_id])
+        self.assertNotIn("score", results[0])
+        
+        # Con errores de escritura se devuelven los productos más parecidos
+        results = controller.search_products("mantequila alpna")
+        self.assertEqual(results[0]["product_id"], product_id)
+        self.assertEqual(results[0]["stock_quantity"], 12)
+        self.assertGreater(results[0]["score"], 0)
+        
+        controller.delete_product(product_id)
+        self.assertEqual(controller.fuzzy_search_products("mantequila"), [])
+
+class TestBulkUpdateController(unittest.TestCase):
+    """Pruebas para BulkUpdateController"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = Database(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+        
+        self.barcode_index = BarcodeIndex(self.db)
+        self.product_controller = ProductController(self.db, barcode_index=self.barcode_index)
+        self.bulk_controller = BulkUpdateController(self.db, self.product_controller)
+        
+        self.db.execute("INSERT INTO categories (name) VALUES (?)", ["Bebidas"])
+        self.drinks_id = self.db.cursor.lastrowid
+        self.db.execute("INSERT INTO categories (name) VALUES (?)", ["Aseo"])
+        self.cleaning_id = self.db.cursor.lastrowid
+        
+        products = [
+            ("7700000000001", "Agua", self.drinks_id, 1000.0),
+            ("7700000000002", "Gaseosa", self.drinks_id, 2550.0),
+            ("7700000000003", "Jugo inactivo", self.drinks_id, 3000.0, 0),
+            ("7700000000004", "Jabón", self.cleaning_id, 4000.0)
+        ]
+        for barcode, name, category_id, price, *active in products:
+            self.product_controller.create_product({
+                "barcode": barcode, "name": name, "category_id": category_id,
+                "price": price, "cost": price / 2, "is_active": active[0] if active else 1
+            })
+        self.barcode_index.load()
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def _price(self, barcode):
+        return self.db.fetch_one("SELECT price FROM products WHERE barcode = ?", [barcode])["price"]
+    
+    def test_percent_increase_by_category(self):
+        """Probar aumento porcentual de una categoría con vista previa"""
+        filters = {"category_id": self.drinks_id}
+        changes = {"price": {"percent": 5}}
+        
+        preview = self.bulk_controller.update_products(filters, changes, dry_run=True)
+        self.assertTrue(preview["success"])
+        self.assertEqual(preview["count"], 2)
+        self.assertEqual([(c["name"], c["old"], c["new"]) for c in preview["changes"]],
+                         [("Agua", 1000.0, 1050.0), ("Gaseosa", 2550.0, 2677.5)])
+        
+        # La vista previa no modifica nada
+        self.assertEqual(self._price("7700000000001"), 1000.0)
+        
+        result = self.bulk_controller.update_products(filters, changes)
+        self.assertEqual(result["count"], 2)
+        self.assertEqual(self._price("7700000000001"), 1050.0)
+        self.assertEqual(self._price("7700000000003"), 3000.0)  # Inactivo
+        self.assertEqual(self._price("7700000000004"), 4000.0)  # Otra categoría
+        
+        # Los índices en memoria se actualizan
+        self.assertEqual(self.barcode_index.get("7700000000002")["price"], 2677.5)
+    
+    def test_set_attribute_for_selected_products(self):
+        """Probar asignación de un valor a una lista de productos"""
+        result = self.bulk_controller.update_products(
+            {"barcodes": ["7700000000001", "7700000000004", "999"]},
+            {"min_stock_level": 10}
+        )
+        self.assertEqual(result["count"], 2)
+        
+        levels = self.db.fetch_all("SELECT barcode, min_stock_level FROM products ORDER BY barcode")
+        self.assertEqual([row["min_stock_level"] for row in levels], [10, 5, 5, 10])
+        
+        # Repetir el mismo cambio no modifica filas
+        result = self.bulk_controller.update_products({"barcodes": ["7700000000001"]}, {"min_stock_level": 10})
+        self.assertEqual(result["count"], 0)
+    
+    def test_invalid_changes(self):
+        """Probar que los cambios inválidos se rechazan sin modificar nada"""
+        for changes in ({"stock_quantity": 5}, {"price": {"percent": 5, "add": 1}},
+                        {"is_active": {"percent": 5}}, {"price": -1}, {}):
+            result = self.bulk_controller.update_products({"category_id": self.drinks_id}, changes)
+            self.assertFalse(result["success"], changes)
+        
+        self.assertFalse(self.bulk_controller.update_products({}, {"price": 1})["success"])
+        self.assertEqual(self._price("7700000000001"), 1000.0)
+    
+    def test_price_list(self):
+        """Probar aplicación de una lista de precios por código de barras"""
+        prices = {"7700000000001": 1200, "7700000000002": 2550, "7709999999999": 10}
+        
+        preview = self.bulk_controller.update_price_list(prices, dry_run=True)
+        self.assertEqual(preview["count"], 1)
+        self.assertEqual(preview["not_found"], ["7709999999999"])
+        self.assertEqual(self._price("7700000000001"), 1000.0)
+        
+        result = self.bulk_controller.update_price_list(prices)
+        self.assertTrue(result["success"])
+        self.assertEqual(self._price("7700000000001"), 1200.0)
+        self.assertEqual(self.barcode_index.get("7700000000001")["price"], 1200.0)
+        
+        # Lista de precios desde un CSV
+        price_file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        price_file.write("Código;Precio\n7700000000004;$ 4.500,00\n")
+        price_file.close()
+        try:
+            self.assertEqual(self.bulk_controller.read_price_list(price_file.name), {"7700000000004": 4500.0})
+        finally:
+            os.remove(price_file.name)
 
 class TestSalesController(unittest.TestCase):
     """Pruebas para SalesController"""
@@ -378,6 +653,41 @@ class TestSalesController(unittest.TestCase):
         self.assertEqual(int(product1["stock_quantity"]), 98)  # 100 - 2
         self.assertEqual(int(product2["stock_quantity"]), 49)  # 50 - 1
     
+    def test_create_sale_repeated_lines(self):
+        """Probar venta con el mismo producto en varias líneas"""
+        items = [
+            {"product_id": self.product1_id, "quantity": 2, "unit_price": 10.0, "subtotal": 20.0},
+            {"product_id": self.product2_id, "quantity": 1, "unit_price": 20.0, "subtotal": 20.0},
+            {"product_id": self.product1_id, "quantity": 3, "unit_price": 10.0, "subtotal": 30.0}
+        ]
+        
+        sale_id = self.sales_controller.create_sale(
+            user_id=self.user_id,
+            items=items,
+            payment_method="cash",
+            total_amount=70.0
+        )
+        
+        self.assertIsNotNone(sale_id)
+        
+        sale = self.sales_controller.get_sale_by_id(sale_id)
+        self.assertEqual(len(sale["items"]), 3)
+        
+        # El stock se descuenta por la suma de las líneas de cada producto
+        product1 = self.product_controller.get_product_by_id(self.product1_id)
+        product2 = self.product_controller.get_product_by_id(self.product2_id)
+        self.assertEqual(int(product1["stock_quantity"]), 95)  # 100 - 2 - 3
+        self.assertEqual(int(product2["stock_quantity"]), 49)  # 50 - 1
+        
+        # Un movimiento de inventario por línea
+        movements = self.db.fetch_all("SELECT * FROM inventory_movements WHERE reference_id = ?", [sale_id])
+        self.assertEqual(len(movements), 3)
+        
+        # Al cancelar se restaura el stock completo
+        self.assertTrue(self.sales_controller.cancel_sale(sale_id, self.user_id))
+        product1 = self.product_controller.get_product_by_id(self.product1_id)
+        self.assertEqual(int(product1["stock_quantity"]), 100)
+    
     def test_cancel_sale(self):
         """Probar cancelación de ventas"""
         # Crear venta
@@ -495,6 +805,101 @@ class TestSalesController(unittest.TestCase):
         self.assertEqual(int(yesterday_summary["total_sales"]), 1)
         self.assertEqual(float(yesterday_summary["total_amount"]), 150.0)
         self.assertEqual(float(yesterday_summary["cash_amount"]), 150.0)
+    
+    def test_money_amounts(self):
+        """Probar importes como Money y totales diarios sin error de redondeo"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        # Money, texto con formato y float se guardan igual
+        items = [
+            {'product_id': self.product1_id, 'quantity': 3, 'price': Money(1000), 'subtotal': Money(3000)},
+            {'product_id': self.product2_id, 'quantity': 1, 'price': "$20.00", 'subtotal': 20.0}
+        ]
+        sale_id = self.sales_controller.create_sale(
+            user_id=self.user_id,
+            items=items,
+            payment_method="cash",
+            total_amount=Money(5800),
+            tax_amount="$8.00"
+        )
+        
+        sale = self.sales_controller.get_sale_by_id(sale_id)
+        self.assertEqual(sale['sale']['total_amount'], 58.0)
+        self.assertEqual(sale['sale']['tax_amount'], 8.0)
+        self.assertEqual(sorted(item['subtotal'] for item in sale['items']), [20.0, 30.0])
+        
+        # Diez ventas de 0.10 suman exactamente 1.00 (con float: 0.9999999999999999)
+        for _ in range(10):
+            self.db.execute(
+                "INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date) VALUES (?, ?, ?, ?, ?, ?)",
+                [self.user_id, 0.1, 0.0, "card", "paid", f"{today} 12:00:00"]
+            )
+        
+        summary = self.sales_controller.get_sales_summary_by_day(today, today)
+        self.assertEqual(summary[0]['card_amount'], 1.0)
+        self.assertEqual(summary[0]['total_amount'], 59.0)
+    
+    def test_tax_from_pricing_engine(self):
+        """Probar que la venta registra el mismo IVA que muestra el carrito"""
+        engine = PricingEngine(self.db)
+        engine.load()
+        engine.set_product_rule(self.product2_id, exempt=True)
+        self.sales_controller.pricing_engine = engine
+        self.product_controller.register_index(engine)
+        
+        cart = Cart(pricing=engine)
+        cart.add_product(self.product_controller.get_product_by_id(self.product1_id), quantity=3)
+        cart.add_product(self.product_controller.get_product_by_id(self.product2_id))
+        self.assertEqual(cart.tax, Money(480))
+        
+        # Sin tax_amount el controlador usa las tasas de las líneas del carrito
+        sale_id = self.sales_controller.create_sale(
+            user_id=self.user_id,
+            items=cart.to_sale_items(),
+            payment_method="cash",
+            total_amount=cart.total
+        )
+        sale = self.sales_controller.get_sale_by_id(sale_id)
+        self.assertEqual(sale['sale']['tax_amount'], 4.8)
+        self.assertEqual(sale['sale']['total_amount'], 54.8)
+        
+        # Cambiar de categoría un producto del carrito vuelve a tasar solo su línea
+        self.db.execute("INSERT INTO categories (name) VALUES ('Alimentos')")
+        food_id = self.db.cursor.lastrowid
+        engine.set_category_rule(food_id, exempt=True)
+        product = self.product_controller.get_product_by_id(self.product1_id)
+        product['category_id'] = food_id
+        self.product_controller.update_product(self.product1_id, product)
+        self.assertEqual(cart.tax_cents, 0)
+        self.assertEqual(engine.quote(cart.to_sale_items())['total'], Money(5000))
+    
+    def test_register_counters(self):
+        """Probar los contadores de caja, el reporte X y la verificación contra las ventas"""
+        register_id = self.sales_controller.open_cash_register(self.user_id, 200.0)
+        items = [{"product_id": self.product1_id, "quantity": 1, "price": 10.0, "subtotal": 10.0}]
+        
+        for method, amount in (("Efectivo", 10.0), ("cash", 0.1), ("Tarjeta", 20.0), ("card", 0.2)):
+            self.sales_controller.create_sale(self.user_id, items, method, amount)
+        
+        report = self.sales_controller.generate_x_report(register_id)
+        self.assertEqual(report['sales_count'], 4)
+        self.assertEqual(report['total_cash'], 10.1)
+        self.assertEqual(report['total_card'], 20.2)
+        self.assertEqual(report['expected_amount'], 210.1)
+        self.assertIsNone(report['difference'])
+        self.assertEqual(self.sales_controller.verify_register_counters(), [])
+        
+        # Una venta modificada por fuera del controlador desvía los contadores
+        self.db.execute("UPDATE sales SET payment_status = 'canceled' WHERE total_amount = 20.0")
+        mismatches = self.sales_controller.verify_register_counters()
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0]['actual']['card_cents'], 20)
+        
+        report = self.sales_controller.generate_z_report(register_id)
+        self.assertEqual(report['total_card'], 0.2)
+        self.assertEqual(report['canceled_count'], 1)
+        self.assertEqual(self.sales_controller.verify_register_counters(), [])
+
 
 class TestReportController(unittest.TestCase):
     """Pruebas básicas para ReportController"""
@@ -524,6 +929,7 @@ class TestReportController(unittest.TestCase):
         self.reports_dir = tempfile.mkdtemp()
         # Sobrescribir el directorio de reportes del controlador
         self.report_controller.reports_dir = self.reports_dir
+        self.report_controller.cache = ReportCache(os.path.join(self.reports_dir, 'cache'))
     
     def tearDown(self):
         """Limpieza después de cada prueba"""
@@ -554,6 +960,108 @@ class TestReportController(unittest.TestCase):
         self.assertTrue(filename.startswith(expected_prefix))
         self.assertTrue(filename.endswith('.csv'))
     
+    def test_report_cache(self):
+        """Probar que los reportes se sirven de la caché hasta que cambian sus ventas"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        cache = self.report_controller.cache
+        
+        def add_sale(day, amount):
+            self.db.execute(
+                "INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date) VALUES (1, ?, 0, 'cash', 'paid', ?)",
+                [amount, f"{day} 10:00:00"]
+            )
+            return self.db.cursor.lastrowid
+        
+        sale_id = add_sale(today, 10.0)
+        path = self.report_controller.generate_daily_sales_report(date=today, format='csv')
+        self.assertEqual(self.report_controller.generate_daily_sales_report(date=today, format='csv'), path)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        
+        # Una cancelación no cambia el último sale_id pero sí la marca de agua
+        self.assertTrue(self.sales_controller.cancel_sale(sale_id, 1, "Prueba"))
+        self.report_controller.generate_daily_sales_report(date=today, format='csv')
+        with open(path) as f:
+            self.assertIn("canceled", f.read())
+        self.assertEqual(cache.misses, 2)
+        
+        # Un período cerrado se guarda como inmutable y no se vuelve a generar
+        add_sale(yesterday, 5.0)
+        self.report_controller.generate_daily_sales_report(date=yesterday, format='json')
+        add_sale(yesterday, 7.0)
+        path = self.report_controller.generate_daily_sales_report(date=yesterday, format='json')
+        with open(path) as f:
+            self.assertEqual(json.load(f)['summary']['total_sales'], 1)
+        self.assertEqual(cache.hits, 2)
+    
+    def test_report_progress_and_cancel(self):
+        """Probar el avance por página y la cancelación de un reporte"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.db.execute(
+            "INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date) VALUES (1, 10.0, 0, 'cash', 'paid', ?)",
+            [f"{today} 10:00:00"]
+        )
+        
+        fractions = []
+        def progress(fraction):
+            fractions.append(fraction)
+        
+        path = self.report_controller.generate_daily_sales_report(date=today, format='pdf', progress=progress)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertEqual(len(fractions), 4)
+        self.assertAlmostEqual(fractions[-1], 1.0)
+        
+        # Cancelar después de la primera página: no queda archivo ni entrada en la caché
+        self.report_controller.cache.invalidate()
+        os.remove(path)
+        path = self.report_controller.generate_daily_sales_report(
+            date=today, format='pdf', progress=lambda fraction: fraction < 0.5
+        )
+        self.assertIsNone(path)
+        self.assertEqual(os.listdir(self.reports_dir), ['cache'])
+        self.assertEqual(self.report_controller.cache.total_bytes, 0)
+    
+    def test_report_jobs(self):
+        """Probar la generación de reportes en el pool de procesos"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.db.execute(
+            "INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date) VALUES (1, 10.0, 0, 'cash', 'paid', ?)",
+            [f"{today} 10:00:00"]
+        )
+        
+        jobs = ReportJobController(self.temp_db_file, reports_dir=self.reports_dir,
+                                   cache_dir=os.path.join(self.reports_dir, 'cache'), max_workers=1)
+        progress = {}
+        results = {}
+        
+        self.assertTrue(jobs.start())
+        try:
+            on_progress = lambda job_id, fraction: progress.setdefault(job_id, []).append(fraction)
+            on_finished = lambda job_id, result: results.__setitem__(job_id, result)
+            
+            pdf_job = jobs.submit('daily_sales', {'date': today, 'format': 'pdf'}, on_progress, on_finished)
+            # Con un solo proceso el segundo trabajo espera al primero y se cancela antes de empezar;
+            # aunque su identificador coincida módulo CANCEL_SLOTS no comparte la casilla de cancelación
+            jobs._next_id = pdf_job + CANCEL_SLOTS
+            csv_job = jobs.submit('period_sales', {'start_date': today, 'end_date': today, 'format': 'csv'},
+                                  on_progress, on_finished)
+            self.assertNotEqual(jobs._jobs[pdf_job]['slot'], jobs._jobs[csv_job]['slot'])
+            self.assertTrue(jobs.cancel(csv_job))
+            self.assertIsNone(jobs.submit('inventory', {}))
+            
+            self.assertTrue(jobs.wait_idle(60))
+        finally:
+            jobs.stop()
+        
+        self.assertTrue(results[pdf_job]['success'])
+        self.assertTrue(os.path.exists(results[pdf_job]['path']))
+        self.assertEqual(progress[pdf_job][0], 0.0)
+        
+        self.assertTrue(results[csv_job]['cancelled'])
+        self.assertFalse(os.path.exists(os.path.join(self.reports_dir, f"ventas_{today.replace('-', '')}_{today.replace('-', '')}.csv")))
+        self.assertFalse(jobs.cancel(csv_job))
+    
     def test_generate_inventory_report(self):
         """Probar generación de reporte de inventario"""
         # Este es un test mínimo que solo verifica que no haya errores al generar el reporte
@@ -2,6 +2,9 @@
 import unittest
 import os
 import sys
+import time
+import tempfile
+import threading
 from unittest.mock import MagicMock, patch
 
 # Agregar el directorio raíz al path para importar los módulos
@@ -10,6 +13,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from app.devices.barcode_scanner import BarcodeScanner
 from app.devices.thermal_printer import ThermalPrinter
 from app.devices.cash_drawer import CashDrawer
+from app.devices.device_worker import DeviceWorker
+from app.devices.print_spooler import PrintSpooler
+from app.devices.escpos_renderer import EscposReceiptRenderer
+from app.devices.device_manager import DeviceManager
 
 class TestBarcodeScanner(unittest.TestCase):
     """Pruebas para el controlador de lector de códigos de barras"""
@@ -272,19 +279,71 @@ class TestThermalPrinter(unittest.TestCase):
         }
         
         # Probar impresión
+        mock_connection.createJob.return_value = 123  # Job ID
         with patch('builtins.open', unittest.mock.mock_open()) as mock_file:
-            with patch('os.unlink') as mock_unlink:
-                result = printer._print_cups(receipt_data)
-                
-                # Verificar resultado
-                self.assertTrue(result)
-                
-                # Verificar que se llamó a printFile
-                mock_connection.printFile.assert_called_once()
-                
-                # Verificar que se creó y eliminó el archivo temporal
-                mock_file.assert_called_once()
-                mock_unlink.assert_called_once()
+            result = printer._print_cups(receipt_data)
+            
+            # Verificar resultado
+            self.assertTrue(result)
+            
+            # Verificar que el documento se envió desde memoria
+            mock_connection.createJob.assert_called_once()
+            mock_connection.startDocument.assert_called_once_with(
+                'WPRP-260', 123, 'Recibo #1001', ThermalPrinter.CUPS_FORMAT_TEXT, 1
+            )
+            data, length = mock_connection.writeRequestData.call_args[0]
+            self.assertIn(b'Test Store', data)
+            self.assertEqual(length, len(data))
+            mock_connection.finishDocument.assert_called_once_with('WPRP-260')
+            
+            # Verificar que no se usaron archivos temporales
+            mock_connection.printFile.assert_not_called()
+            mock_file.assert_not_called()
+    
+    @patch('cups.Connection')
+    def test_print_receipt_cups_reuses_connection(self, mock_cups_connection):
+        """Probar que los recibos reutilizan la conexión CUPS"""
+        mock_connection = MagicMock()
+        mock_connection.getPrinters.return_value = {'WPRP-260': {}}
+        mock_connection.createJob.return_value = 123
+        mock_cups_connection.return_value = mock_connection
+        
+        printer = ThermalPrinter({'connection_type': 'cups', 'printer_name': 'WPRP-260'})
+        self.assertTrue(printer.connect())
+        
+        for number in range(3):
+            self.assertTrue(printer._print_cups({'receipt_number': number}))
+        
+        mock_cups_connection.assert_called_once()
+        self.assertEqual(mock_connection.createJob.call_count, 3)
+        
+        # Si la conexión falla se descarta y el siguiente trabajo abre una nueva
+        mock_connection.createJob.side_effect = RuntimeError("conexión perdida")
+        self.assertFalse(printer._print_cups({'receipt_number': 4}))
+        self.assertIsNone(printer.cups_connection)
+    
+    @patch('cups.Connection')
+    def test_print_receipt_cups_file_mode(self, mock_cups_connection):
+        """Probar el modo con archivo temporal (nombre único y eliminado al terminar)"""
+        mock_connection = MagicMock()
+        mock_connection.printFile.return_value = 123
+        mock_cups_connection.return_value = mock_connection
+        
+        printer = ThermalPrinter({
+            'connection_type': 'cups',
+            'printer_name': 'WPRP-260',
+            'cups_submit_mode': 'file'
+        })
+        
+        self.assertTrue(printer._print_cups({'receipt_number': 1}))
+        self.assertTrue(printer._print_cups({'receipt_number': 2}))
+        
+        first_file = mock_connection.printFile.call_args_list[0][0][1]
+        second_file = mock_connection.printFile.call_args_list[1][0][1]
+        self.assertNotEqual(first_file, second_file)
+        self.assertFalse(os.path.exists(first_file))
+        self.assertFalse(os.path.exists(second_file))
+        mock_connection.createJob.assert_not_called()
     
     def test_format_receipt_text(self):
         """Probar formateo de texto del recibo"""
@@ -325,7 +384,7 @@ class TestThermalPrinter(unittest.TestCase):
         """Probar apertura del cajón de dinero"""
         # Configurar mocks
         mock_connection = MagicMock()
-        mock_connection.printFile.return_value = 123  # Job ID
+        mock_connection.createJob.return_value = 123  # Job ID
         mock_cups_connection.return_value = mock_connection
         
         # Crear impresora
@@ -333,18 +392,19 @@ class TestThermalPrinter(unittest.TestCase):
         
         # Probar apertura del cajón
         with patch('builtins.open', unittest.mock.mock_open()) as mock_file:
-            with patch('os.unlink') as mock_unlink:
-                result = printer.open_cash_drawer()
-                
-                # Verificar resultado
-                self.assertTrue(result)
-                
-                # Verificar que se llamó a printFile
-                mock_connection.printFile.assert_called_once()
-                
-                # Verificar que se creó y eliminó el archivo temporal
-                mock_file.assert_called_once()
-                mock_unlink.assert_called_once()
+            result = printer.open_cash_drawer()
+            
+            # Verificar resultado
+            self.assertTrue(result)
+            
+            # Verificar que el comando se envió como trabajo raw desde memoria
+            mock_connection.startDocument.assert_called_once_with(
+                'WPRP-260', 123, 'Abrir cajón', ThermalPrinter.CUPS_FORMAT_RAW, 1
+            )
+            mock_connection.writeRequestData.assert_called_once_with(b'\x1B\x70\x00\x19\x19', 5)
+            
+            # Verificar que no se usaron archivos temporales
+            mock_file.assert_not_called()
 
 
 class TestCashDrawer(unittest.TestCase):
@@ -465,5 +525,326 @@ class TestCashDrawer(unittest.TestCase):
         self.assertEqual(command[1], 0x70)  # p
         self.assertEqual(len(command), 5)   # ESC p m t1 t2
 
+class TestEscposRenderer(unittest.TestCase):
+    """Pruebas para el generador de recibos ESC/POS"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        self.renderer = EscposReceiptRenderer(32)
+        self.receipt_data = {
+            'store_name': 'Test Store',
+            'receipt_number': '1001',
+            'items': [
+                {'name': 'Café molido', 'quantity': 2, 'price': '$10,00', 'subtotal': 20.0},
+                {'name': 'Producto con un nombre muy largo', 'quantity': 1, 'price': 15.0, 'subtotal': 15.0}
+            ],
+            'subtotal': 35.0,
+            'tax': 5.6,
+            'total': 40.6,
+            'payment_method': 'Efectivo',
+            'amount_received': 50.0,
+            'change': 9.4
+        }
+    
+    def test_render_receipt(self):
+        """Probar que el recibo se genera completo en un solo bloque"""
+        data = self.renderer.render(self.receipt_data)
+        
+        self.assertIsInstance(data, bytes)
+        self.assertTrue(data.startswith(b'\x1b@'))
+        self.assertTrue(data.endswith(b'\x1dV\x00'))
+        self.assertIn(b'Test Store', data)
+        self.assertIn('Café molido'.encode('cp437'), data)
+        self.assertIn(b'Producto con un n...', data)
+        self.assertIn(b'$10.00', data)
+        self.assertIn(b'CAMBIO:   $9.40', data)
+        self.assertIn(b'\x1bE\x01TOTAL:    $40.60\n\x1bE\x00', data)
+    
+    def test_render_barcode_and_qr(self):
+        """Probar códigos de barras y QR nativos"""
+        barcode = self.renderer.render(dict(self.receipt_data, barcode_data='1001'))
+        self.assertIn(b'\x1dk\x041001\x00', barcode)
+        
+        qr = self.renderer.render(dict(self.receipt_data, qr_data='https://example.com'))
+        self.assertIn(b'\x1d(k\x16\x001P0https://example.com', qr)
+    
+    def test_print_escpos_single_write(self):
+        """Probar que ThermalPrinter envía el recibo en una sola escritura"""
+        printer = ThermalPrinter({'connection_type': 'file', 'device_path': '/dev/null'})
+        printer.printer = MagicMock()
+        
+        self.assertTrue(printer._print_escpos(self.receipt_data))
+        
+        printer.printer._raw.assert_called_once_with(self.renderer.render(self.receipt_data))
+        printer.printer.text.assert_not_called()
+        printer.printer.set.assert_not_called()
+    
+    def test_print_escpos_invalid_receipt_raises(self):
+        """Probar que un recibo inválido lanza el error en lugar de devolver False"""
+        printer = ThermalPrinter({'connection_type': 'file', 'device_path': '/dev/null'})
+        printer.printer = MagicMock()
+        
+        # Un error en los datos no se corrige reintentando: la cola lo marca como fallido
+        with self.assertRaises(TypeError):
+            printer._print_escpos(dict(self.receipt_data, items=[{'name': 'Producto', 'quantity': {}}]))
+        printer.printer._raw.assert_not_called()
+        
+        # Un fallo de la impresora sí devuelve False para reintentarlo
+        printer.printer._raw.side_effect = OSError("sin papel")
+        self.assertFalse(printer._print_escpos(self.receipt_data))
+
+class TestDeviceManager(unittest.TestCase):
+    """Pruebas para el administrador de conexiones de dispositivos"""
+    
+    class FakeDevice:
+        """Dispositivo simulado que cuenta conexiones"""
+        
+        def __init__(self):
+            self.plugged = True
+            self.connections = 0
+        
+        def connect(self):
+            if self.plugged:
+                self.connections += 1
+            return self.plugged
+        
+        def is_available(self):
+            return self.plugged
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        self.device = self.FakeDevice()
+        self.events = []
+        
+        self.manager = DeviceManager(check_interval=0.01)
+        self.manager.register('printer', self.device)
+        self.manager.add_status_listener(
+            lambda name, connected, message: self.events.append((name, connected))
+        )
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.manager.stop()
+    
+    def test_connection_is_reused(self):
+        """Probar que las operaciones reutilizan la conexión"""
+        self.assertEqual(self.manager.connect_all(), {'printer': True})
+        
+        for _ in range(3):
+            self.assertEqual(self.manager.run('printer', lambda device: 'ok'), 'ok')
+        
+        self.assertEqual(self.device.connections, 1)
+        self.assertEqual(self.events, [('printer', True)])
+    
+    def test_health_check_reconnects(self):
+        """Probar que la revisión detecta la desconexión y reconecta al volver el dispositivo"""
+        self.manager.connect_all()
+        
+        self.device.plugged = False
+        self.manager.check_now()
+        self.assertFalse(self.manager.is_connected('printer'))
+        self.assertFalse(self.manager.run('printer', lambda device: 'ok'))
+        
+        self.device.plugged = True
+        self.manager.check_now()
+        self.assertTrue(self.manager.is_connected('printer'))
+        self.assertEqual(self.device.connections, 2)
+        self.assertEqual(self.events, [('printer', True), ('printer', False), ('printer', True)])
+    
+    def test_failed_operation_reconnects_lazily(self):
+        """Probar que una operación fallida fuerza la reconexión en el siguiente uso"""
+        self.manager.connect_all()
+        
+        self.assertFalse(self.manager.run('printer', lambda device: False))
+        self.assertFalse(self.manager.is_connected('printer'))
+        
+        def out_of_paper(device):
+            raise RuntimeError("sin papel")
+        
+        with self.assertRaises(RuntimeError):
+            self.manager.run('printer', out_of_paper)
+        self.assertEqual(self.manager.get_status()['printer']['last_error'], "sin papel")
+        
+        self.assertEqual(self.manager.run('printer', lambda device: 'ok'), 'ok')
+        self.assertEqual(self.device.connections, 3)
+    
+    def test_background_health_thread(self):
+        """Probar que el hilo de revisión publica la desconexión"""
+        self.manager.connect_all()
+        self.manager.start()
+        
+        self.device.plugged = False
+        deadline = time.time() + 5
+        while ('printer', False) not in self.events and time.time() < deadline:
+            time.sleep(0.01)
+        
+        self.assertIn(('printer', False), self.events)
+
+class TestDeviceWorker(unittest.TestCase):
+    """Pruebas para el ejecutor de tareas de dispositivos"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        self.worker = DeviceWorker()
+        self.worker.start()
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.worker.stop()
+    
+    def test_submit_does_not_block(self):
+        """Probar que encolar una tarea lenta no bloquea al llamador"""
+        release = threading.Event()
+        finished = []
+        
+        # La tarea espera hasta que la prueba la libere
+        queued = self.worker.submit("print_receipt", release.wait, 5,
+                                    on_finished=lambda name, result: finished.append((name, result)))
+        
+        self.assertTrue(queued)
+        self.assertEqual(finished, [])
+        
+        release.set()
+        self.assertTrue(self.worker.wait_idle(5))
+        self.assertEqual(finished, [("print_receipt", True)])
+    
+    def test_tasks_run_in_order(self):
+        """Probar que las tareas se ejecutan en el orden en que se encolan"""
+        order = []
+        
+        self.worker.submit("print_receipt", order.append, "print")
+        self.worker.submit("open_drawer", order.append, "drawer")
+        
+        self.assertTrue(self.worker.wait_idle(5))
+        self.assertEqual(order, ["print", "drawer"])
+    
+    def test_failure_callback(self):
+        """Probar que un error se notifica y el ejecutor sigue funcionando"""
+        errors = []
+        results = []
+        
+        def failing_task():
+            raise IOError("impresora sin papel")
+        
+        self.worker.submit("print_receipt", failing_task,
+                           on_failed=lambda name, error: errors.append((name, str(error))))
+        self.worker.submit("open_drawer", lambda: True,
+                           on_finished=lambda name, result: results.append(result))
+        
+        self.assertTrue(self.worker.wait_idle(5))
+        self.assertEqual(errors, [("print_receipt", "impresora sin papel")])
+        self.assertEqual(results, [True])
+    
+    def test_submit_after_stop(self):
+        """Probar que no se aceptan tareas con el ejecutor detenido"""
+        self.assertTrue(self.worker.stop())
+        self.assertFalse(self.worker.submit("open_drawer", lambda: True))
+
+class TestPrintSpooler(unittest.TestCase):
+    """Pruebas para la cola de impresión persistente"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        self.spool_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.spooler = PrintSpooler(self.spool_file, base_delay=0.01, max_delay=0.05)
+        self.spooler.open()
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.spooler.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.spool_file + suffix):
+                os.remove(self.spool_file + suffix)
+    
+    def _wait_for(self, condition, timeout=5):
+        """Esperar a que se cumpla una condición"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return condition()
+    
+    def test_print_in_order(self):
+        """Probar que los trabajos se imprimen en orden de llegada"""
+        printed = []
+        self.spooler.register_handler('receipt', lambda payload: printed.append(payload['receipt_number']) or True)
+        
+        for number in range(5):
+            self.spooler.enqueue('receipt', {'receipt_number': number})
+        
+        self.spooler.start()
+        
+        self.assertTrue(self._wait_for(lambda: len(printed) == 5))
+        self.assertEqual(printed, [0, 1, 2, 3, 4])
+        self.assertTrue(self._wait_for(lambda: self.spooler.get_stats()['pending'] == 0))
+    
+    def test_retry_with_backoff(self):
+        """Probar que un trabajo fallido se reintenta hasta imprimirse"""
+        attempts = []
+        failures = []
+        
+        def flaky_printer(payload):
+            attempts.append(payload['receipt_number'])
+            return len(attempts) >= 3  # Falla dos veces (sin papel)
+        
+        self.spooler.register_handler('receipt', flaky_printer)
+        self.spooler.on_job_failed = lambda job_id, job_type, error, count: failures.append(count)
+        
+        self.spooler.enqueue('receipt', {'receipt_number': 1})
+        self.spooler.start()
+        
+        self.assertTrue(self._wait_for(lambda: self.spooler.get_stats()['done'] == 1))
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(failures, [1, 2])
+    
+    def test_failed_job_does_not_block_queue(self):
+        """Probar que un trabajo que no puede imprimirse no bloquea a los siguientes"""
+        printed = []
+        self.spooler.register_handler('receipt', lambda payload: printed.append(payload['receipt_number']) or True)
+        
+        bad_payload = self.spooler.enqueue('receipt', {'total': 10})  # Sin receipt_number
+        unknown_type = self.spooler.enqueue('label', {'receipt_number': 0})
+        self.spooler.enqueue('receipt', {'receipt_number': 1})
+        self.spooler.start()
+        
+        self.assertTrue(self._wait_for(lambda: printed == [1]))
+        stats = self.spooler.get_stats()
+        self.assertEqual((stats['pending'], stats['failed'], stats['done']), (0, 2, 1))
+        self.assertEqual([job['status'] for job in self.spooler.get_pending_jobs()], ['failed', 'failed'])
+        
+        self.assertTrue(self.spooler.discard(bad_payload))
+        self.assertTrue(self.spooler.discard(unknown_type))
+        self.assertFalse(self.spooler.discard(bad_payload))
+        self.assertEqual(self.spooler.get_stats()['failed'], 0)
+    
+    def test_max_attempts(self):
+        """Probar que un trabajo se marca como fallido al agotar sus intentos"""
+        self.spooler.max_attempts = 3
+        self.spooler.register_handler('receipt', lambda payload: False)  # Impresora sin papel
+        
+        self.spooler.enqueue('receipt', {'receipt_number': 1})
+        self.spooler.start()
+        
+        self.assertTrue(self._wait_for(lambda: self.spooler.get_stats()['failed'] == 1))
+        self.assertEqual(self.spooler.get_pending_jobs()[0]['attempts'], 3)
+    
+    def test_replay_pending_jobs(self):
+        """Probar que los trabajos pendientes sobreviven a un reinicio"""
+        # Encolar sin hilo de impresión (la aplicación se cierra antes de imprimir)
+        self.spooler.enqueue('receipt', {'receipt_number': 1})
+        self.spooler.enqueue('receipt', {'receipt_number': 2})
+        self.spooler.close()
+        
+        # Reabrir la cola como al iniciar la aplicación
+        printed = []
+        self.spooler = PrintSpooler(self.spool_file, base_delay=0.01)
+        self.spooler.register_handler('receipt', lambda payload: printed.append(payload['receipt_number']) or True)
+        self.assertTrue(self.spooler.open())
+        self.assertEqual(len(self.spooler.get_pending_jobs()), 2)
+        
+        self.spooler.start()
+        self.assertTrue(self._wait_for(lambda: printed == [1, 2]))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
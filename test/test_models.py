@@ -3,6 +3,8 @@ import unittest
 import os
 import sys
 import tempfile
+import sqlite3
+import threading
 from datetime import datetime
 
 # Agregar directorio raíz al path para importar módulos
@@ -14,6 +16,13 @@ from app.models.user import User
 from app.models.product import Product
 from app.models.sale import Sale
 from app.models.inventory import Inventory
+from app.models.barcode_index import BarcodeIndex
+from app.models.product_search_index import ProductSearchIndex
+from app.models.trigram_index import TrigramIndex, trigrams
+from app.models.migrations import get_latest_version, DRILLDOWN_ROLLUP_TRIGGERS
+from app.models.cart import Cart
+from app.models.pricing_engine import PricingEngine
+from app.utils.money import Money
 
 class TestDatabase(unittest.TestCase):
     """Pruebas para la clase Database"""
@@ -50,6 +59,33 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(user["full_name"], "Test User")
         self.assertEqual(user["role"], "admin")
     
+    def test_fetch_page(self):
+        """Probar paginación por cursor con orden descendente y valores NULL"""
+        self.db.execute_many(
+            "INSERT INTO categories (name, description) VALUES (?, ?)",
+            [(f"Categoría {i}", None if i % 3 == 0 else f"Descripción {i % 2}") for i in range(7)]
+        )
+        
+        seen = []
+        cursor = None
+        while True:
+            page = self.db.fetch_page("category_id, description", "categories",
+                                      ["IFNULL(description, '')", "category_id"],
+                                      cursor=cursor, limit=3, descending=True)
+            self.assertNotIn("_page_key0", page["rows"][0])
+            seen.extend(row["category_id"] for row in page["rows"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        # Descripción 1, Descripción 0 y luego las vacías; por ID descendente en empates
+        self.assertEqual(seen, [6, 2, 5, 3, 7, 4, 1])
+        
+        page = self.db.fetch_page("category_id", "categories", ["category_id"],
+                                  conditions=["category_id > ?"], params=[2], cursor=4, limit=2)
+        self.assertEqual([row["category_id"] for row in page["rows"]], [5, 6])
+        self.assertEqual(page["next_cursor"], 6)
+    
     def test_transaction(self):
         """Probar transacciones"""
         # Iniciar transacción
@@ -79,6 +115,91 @@ class TestDatabase(unittest.TestCase):
         # Verificar que no se insertaron los datos
         user = self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user2"])
         self.assertIsNone(user)
+    
+    def test_transaction_context_manager(self):
+        """Probar transacciones con gestor de contexto y anidamiento"""
+        # Confirmación al salir del bloque
+        with self.db.transaction():
+            self.db.execute("INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
+                          ["user1", "pass1", "User One", "cashier"])
+            self.assertTrue(self.db.in_transaction)
+        
+        self.assertFalse(self.db.in_transaction)
+        self.assertIsNotNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user1"]))
+        
+        # Una excepción en un bloque anidado revierte solo ese bloque
+        with self.db.transaction():
+            self.db.execute("INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
+                          ["user2", "pass2", "User Two", "cashier"])
+            
+            with self.assertRaises(ValueError):
+                with self.db.transaction():
+                    self.db.execute("INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
+                                  ["user3", "pass3", "User Three", "cashier"])
+                    raise ValueError("fallo")
+        
+        self.assertIsNotNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user2"]))
+        self.assertIsNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user3"]))
+        
+        # Una excepción en el bloque externo revierte todo
+        with self.assertRaises(ValueError):
+            with self.db.transaction():
+                self.db.execute("INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
+                              ["user4", "pass4", "User Four", "cashier"])
+                raise ValueError("fallo")
+        
+        self.assertIsNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user4"]))
+    
+    def test_failed_commit_rolls_back(self):
+        """Probar que un COMMIT fallido no deja la conexión dentro de la transacción"""
+        self.db.execute("PRAGMA foreign_keys = ON")
+        
+        # La clave foránea diferida solo se comprueba al confirmar
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.db.transaction():
+                self.db.execute("PRAGMA defer_foreign_keys = ON")
+                self.db.execute("INSERT INTO products (barcode, name, category_id, price) VALUES (?, ?, ?, ?)",
+                              ["1234567890123", "Producto", 999, 10.0])
+        
+        self.assertFalse(self.db.conn.in_transaction)
+        self.assertFalse(self.db.in_transaction)
+        self.assertIsNone(self.db.fetch_one("SELECT * FROM products WHERE barcode = ?", ["1234567890123"]))
+        
+        # La siguiente unidad de trabajo se confirma normalmente
+        with self.db.transaction():
+            self.db.execute("INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
+                          ["user1", "pass1", "User One", "cashier"])
+        
+        self.assertIsNotNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user1"]))
+    
+    def test_concurrent_read_during_write(self):
+        """Probar que las lecturas de otro hilo no esperan a una transacción abierta"""
+        mode = self.db.fetch_one("PRAGMA journal_mode")
+        self.assertEqual(mode["journal_mode"], "wal")
+        
+        results = {}
+        
+        def read_users():
+            user = self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user1"])
+            results["user"] = user
+            results["count"] = self.db.fetch_one("SELECT COUNT(*) AS total FROM users")["total"]
+        
+        with self.db.transaction():
+            self.db.execute("INSERT INTO users (username, password, full_name, role) VALUES (?, ?, ?, ?)",
+                          ["user1", "pass1", "User One", "cashier"])
+            
+            # El lector ve el último estado confirmado, sin el usuario aún no confirmado
+            reader = threading.Thread(target=read_users)
+            reader.start()
+            reader.join(timeout=5)
+            self.assertFalse(reader.is_alive())
+            
+            self.assertIsNone(results["user"])
+            
+            # El hilo dueño de la transacción ve sus propios cambios
+            self.assertIsNotNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user1"]))
+        
+        self.assertIsNotNone(self.db.fetch_one("SELECT * FROM users WHERE username = ?", ["user1"]))
 
 class TestUserModel(unittest.TestCase):
     """Pruebas para el modelo User"""
@@ -296,6 +417,91 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(len(low_stock_products), 1)
         self.assertEqual(low_stock_products[0]["name"], "Low Stock Product")
 
+    def test_get_page(self):
+        """Probar paginación por cursor con nombres repetidos y filtros"""
+        other_category = self.product_model.create_category("Other Category")
+        for i in range(5):
+            self.product_model.create({
+                "name": "Producto A" if i < 3 else f"Producto {chr(66 + i)}",
+                "price": 1.0,
+                "category_id": self.category_id if i % 2 == 0 else other_category,
+                "stock_quantity": i,
+                "min_stock_level": 2
+            })
+        
+        # Recorrer todas las páginas sin repetir ni saltar productos
+        seen = []
+        page = self.product_model.get_page(limit=2)
+        while True:
+            seen.extend((p["name"], p["product_id"]) for p in page["products"])
+            if page["next_cursor"] is None:
+                break
+            page = self.product_model.get_page(cursor=page["next_cursor"], limit=2)
+        
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(page["products"][-1]["category_name"], "Test Category")
+        
+        # Filtros por categoría y stock bajo, y orden por ID
+        page = self.product_model.get_page(limit=10, category_id=self.category_id)
+        self.assertEqual(len(page["products"]), 3)
+        self.assertIsNone(page["next_cursor"])
+        
+        page = self.product_model.get_page(limit=10, low_stock_only=True)
+        self.assertEqual({p["stock_quantity"] for p in page["products"]}, {0, 1, 2})
+        
+        page = self.product_model.get_page(cursor=2, limit=2, order_by="product_id")
+        self.assertEqual([p["product_id"] for p in page["products"]], [3, 4])
+        self.assertEqual(page["next_cursor"], 4)
+        
+        with self.assertRaises(ValueError):
+            self.product_model.get_page(order_by="price")
+    
+    def test_search_full_text(self):
+        """Probar búsqueda por prefijo, sin acentos y ordenada por relevancia"""
+        self.product_model.create({"name": "Café Molido", "barcode": "7701234567890", "price": 12.0})
+        self.product_model.create({"name": "Azúcar Morena", "description": "Endulzante para café", "price": 5.0})
+        self.product_model.create({"name": "Agua Mineral", "barcode": "7709876543210", "price": 2.0})
+        
+        # Sin acentos y por prefijo
+        results = self.product_model.search("cafe")
+        self.assertEqual([p["name"] for p in results], ["Café Molido", "Azúcar Morena"])
+        
+        results = self.product_model.search("azucar mor")
+        self.assertEqual([p["name"] for p in results], ["Azúcar Morena"])
+        
+        # Código de barras por prefijo
+        results = self.product_model.search("770987")
+        self.assertEqual([p["name"] for p in results], ["Agua Mineral"])
+        
+        # Un solo carácter se busca como subcadena
+        results = self.product_model.search("m")
+        self.assertEqual(len(results), 3)
+        
+        # Los símbolos y palabras reservadas de FTS5 no generan errores
+        results = self.product_model.search('"agua" (min*')
+        self.assertEqual([p["name"] for p in results], ["Agua Mineral"])
+        self.assertEqual(self.product_model.search("OR NEAR("), [])
+    
+    def test_search_index_follows_changes(self):
+        """Probar que el índice de texto completo sigue los cambios del catálogo"""
+        product_id = self.product_model.create({"name": "Jugo de Naranja", "price": 3.0})
+        self.assertEqual(len(self.product_model.search("naranja")), 1)
+        
+        self.product_model.update(product_id, {"name": "Jugo de Mango"})
+        self.assertEqual(self.product_model.search("naranja"), [])
+        self.assertEqual(len(self.product_model.search("mango")), 1)
+        
+        # Los cambios de stock no reindexan el producto
+        self.product_model.update_stock(product_id, 5)
+        self.assertEqual(len(self.product_model.search("mango")), 1)
+        
+        self.db.execute("DELETE FROM products WHERE product_id = ?", [product_id])
+        self.assertEqual(self.product_model.search("mango"), [])
+        
+        # integrity-check lanza una excepción si el índice no coincide con la tabla
+        self.db.execute("INSERT INTO products_fts (products_fts) VALUES ('integrity-check')")
+
 class TestSaleModel(unittest.TestCase):
     """Pruebas para el modelo Sale"""
     
@@ -432,6 +638,113 @@ class TestSaleModel(unittest.TestCase):
         self.assertIsNotNone(today_total)
         self.assertEqual(int(today_total["total_sales"]), 2)
         self.assertAlmostEqual(float(today_total["total_amount"]), 68.25, places=2)
+    
+    def test_register_counters(self):
+        """Probar los contadores de caja y los reportes X y Z"""
+        register_id = self.sale_model.open_cash_register(self.user_id, 100.0)
+        items = [{"product_id": self.product1_id, "quantity": 1, "unit_price": 10.50}]
+        
+        cash_id = self.sale_model.create(user_id=self.user_id, items=items, payment_method="Efectivo", total_amount=10.50)
+        self.sale_model.create(user_id=self.user_id, items=items, payment_method="card", total_amount=10.50)
+        self.sale_model.create(user_id=self.user_id, items=items, payment_method="Transferencia", total_amount=10.50)
+        self.assertEqual(self.sale_model.get_by_id(cash_id)['sale']['payment_method'], 'cash')
+        
+        report = self.sale_model.generate_x_report(register_id)
+        self.assertEqual(report['sales_count'], 3)
+        self.assertEqual(report['total_cash'], 10.5)
+        self.assertEqual(report['total_sales'], 31.5)
+        self.assertEqual(report['expected_amount'], 110.5)
+        
+        self.assertTrue(self.sale_model.cancel(cash_id, self.user_id, "Prueba"))
+        self.assertTrue(self.sale_model.close_cash_register(register_id, self.user_id, 100.0))
+        
+        report = self.sale_model.generate_z_report(register_id, include_sales=True)
+        self.assertEqual(report['sales_count'], 2)
+        self.assertEqual(report['canceled_count'], 1)
+        self.assertEqual(report['total_cash'], 0)
+        self.assertEqual(report['total_canceled'], 10.5)
+        self.assertEqual(report['difference'], 0)
+        self.assertEqual(report['register']['other_sales'], 10.5)
+        self.assertEqual(len(report['sales']), 3)
+    
+    def test_daily_rollup(self):
+        """Probar que el resumen diario coincide con las ventas y que rebuild lo recalcula"""
+        items = [{"product_id": self.product1_id, "quantity": 1, "unit_price": 10.50}]
+        
+        first_id = self.sale_model.create(user_id=self.user_id, items=items, payment_method="cash",
+                                          total_amount=10.10, tax_amount=1.40)
+        self.sale_model.create(user_id=self.user_id, items=items, payment_method="card", total_amount=20.20)
+        self.sale_model.create(user_id=self.user_id, items=items, payment_method="cash", total_amount=0.30)
+        self.assertTrue(self.sale_model.cancel(first_id, self.user_id, "Prueba"))
+        
+        # Ventas de otro mes cargadas directamente en la tabla
+        for amount in (5.0, 7.5):
+            self.db.execute(
+                "INSERT INTO sales (user_id, total_amount, tax_amount, payment_method, payment_status, sale_date) VALUES (?, ?, 0, 'cash', 'paid', ?)",
+                [self.user_id, amount, "2023-01-15 12:00:00"]
+            )
+        
+        today = self.sale_model.get_by_id(first_id)['sale']['sale_date'][:10]
+        summary = self.sale_model.get_summary_by_day(today, today)
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]['total_sales'], 2)
+        self.assertEqual(summary[0]['total_amount'], 20.5)
+        self.assertEqual(summary[0]['cash_amount'], 0.3)
+        
+        months = {row['period']: row for row in self.sale_model.get_total_by_period('month')}
+        self.assertEqual(months['2023-01']['total_sales'], 2)
+        self.assertEqual(months['2023-01']['average_sale'], 6.25)
+        
+        # El resumen coincide con agrupar la tabla sales
+        rollup_query = "SELECT * FROM sales_daily_rollup WHERE sales_count != 0 ORDER BY 1, 2, 3"
+        expected = self.db.fetch_all(rollup_query)
+        self.db.execute("DELETE FROM sales_daily_rollup")
+        self.sale_model.rollup.rebuild()
+        self.assertEqual(self.db.fetch_all(rollup_query), expected)
+        self.assertEqual(len(expected), 4)
+        
+        # Recalcular un solo día no toca los demás
+        self.db.execute("UPDATE sales_daily_rollup SET total_cents = 0")
+        self.sale_model.rollup.rebuild("2023-01-15", "2023-01-15")
+        self.assertEqual(self.sale_model.get_total_by_period('year')[-1]['total_amount'], 12.5)
+    
+    def test_drilldown_rollups(self):
+        """Probar los resúmenes por hora y por producto y su verificación"""
+        self.db.execute("INSERT INTO categories (name) VALUES ('Bebidas')")
+        drinks_id = self.db.cursor.lastrowid
+        self.db.execute("UPDATE products SET category_id = ? WHERE product_id = ?", [drinks_id, self.product2_id])
+        
+        sale_ids = []
+        for sale_date, quantity in (("2024-05-10 09:15:00", 3), ("2024-05-10 09:45:00", 1), ("2024-05-10 18:05:00", 2)):
+            sale_id = self.sale_model.create(
+                user_id=self.user_id, payment_method="cash", total_amount=10.0 * quantity + 15.0,
+                items=[{"product_id": self.product1_id, "quantity": quantity, "unit_price": 10.0},
+                       {"product_id": self.product2_id, "quantity": 1, "unit_price": 15.0}]
+            )
+            self.db.execute("UPDATE sales SET sale_date = ? WHERE sale_id = ?", [sale_date, sale_id])
+            sale_ids.append(sale_id)
+        self.assertTrue(self.sale_model.cancel(sale_ids[2], self.user_id, "Prueba"))
+        
+        hours = self.sale_model.get_sales_by_hour("2024-05-10", "2024-05-10")
+        self.assertEqual([(h['hour'], h['total_sales'], h['total_amount']) for h in hours], [(9, 2, 70.0)])
+        
+        top = self.sale_model.get_top_products("2024-05-10", "2024-05-10")
+        self.assertEqual([(p['product_id'], p['total_quantity'], p['total_amount']) for p in top],
+                         [(self.product1_id, 4, 40.0), (self.product2_id, 2, 30.0)])
+        
+        mix = self.sale_model.get_sales_by_category("2024-05-10", "2024-05-10")
+        self.assertEqual([(c['category_name'], c['total_amount']) for c in mix],
+                         [("Test Category", 40.0), ("Bebidas", 30.0)])
+        self.assertAlmostEqual(sum(c['share'] for c in mix), 1.0)
+        self.assertEqual(self.sale_model.rollup.verify(), [])
+        
+        # Un detalle borrado sin pasar por los disparadores se detecta y se corrige
+        self.db.execute("DROP TRIGGER product_rollup_item_delete")
+        self.db.execute("DELETE FROM sale_items WHERE sale_id = ? AND product_id = ?", [sale_ids[0], self.product2_id])
+        mismatches = self.sale_model.rollup.verify(repair=True)
+        self.assertEqual([(m['table'], m['stored'], m['actual']) for m in mismatches],
+                         [("product_daily_rollup", (2, 3000), (1, 1500))])
+        self.assertEqual(self.sale_model.rollup.verify(), [])
 
 class TestInventoryModel(unittest.TestCase):
     """Pruebas para el modelo Inventory"""
@@ -581,5 +894,656 @@ class TestInventoryModel(unittest.TestCase):
         self.assertEqual(int(return_summary["count"]), 1)
         self.assertEqual(int(return_summary["total_quantity"]), 3)
 
+class TestBarcodeIndex(unittest.TestCase):
+    """Pruebas para el índice de códigos de barras en memoria"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = Database(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+        
+        self.product_model = Product(self.db)
+        
+        # Crear productos de prueba
+        for i in range(5):
+            self.product_model.create({
+                "name": f"Product {i}",
+                "barcode": f"77000000000{i}",
+                "price": 10.0 + i,
+                "stock_quantity": 10
+            })
+        
+        # Producto sin código de barras (no se indexa)
+        self.product_model.create({"name": "Sin código", "price": 1.0})
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def test_load_and_get(self):
+        """Probar carga completa y búsqueda sin acceso a la base de datos"""
+        index = BarcodeIndex(self.db)
+        self.assertEqual(index.load(), 5)
+        
+        product = index.get("770000000002")
+        self.assertIsNotNone(product)
+        self.assertEqual(product["name"], "Product 2")
+        
+        # Modificar la copia devuelta no debe alterar el índice
+        product["name"] = "Modificado"
+        self.assertEqual(index.get("770000000002")["name"], "Product 2")
+        
+        self.assertIsNone(index.get("999"))
+        
+        stats = index.get_stats()
+        self.assertEqual(stats["entries"], 5)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+    
+    def test_bounded_index(self):
+        """Probar el modo acotado con expulsión LRU y consulta a la base de datos"""
+        index = BarcodeIndex(self.db, max_entries=2)
+        self.assertEqual(index.load(), 2)
+        
+        # Recorrer todo el catálogo: los códigos no residentes se buscan en la base de datos
+        for i in range(5):
+            product = index.get(f"77000000000{i}")
+            self.assertIsNotNone(product)
+            self.assertEqual(product["name"], f"Product {i}")
+        
+        stats = index.get_stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertGreaterEqual(stats["misses"], 3)
+        
+        # El último código consultado queda residente
+        hits = stats["hits"]
+        index.get("770000000004")
+        self.assertEqual(index.get_stats()["hits"], hits + 1)
+        
+        # Guardar un producto no residente no lo carga ni expulsa a los residentes
+        product = self.db.fetch_one("SELECT * FROM products WHERE barcode = ?", ["770000000000"])
+        index.on_product_saved(product)
+        index.get("770000000003")
+        index.get("770000000004")
+        self.assertEqual(index.get_stats()["hits"], hits + 3)
+        
+        # Un producto residente se refresca con los datos guardados
+        product = dict(self.db.fetch_one("SELECT * FROM products WHERE barcode = ?", ["770000000004"]), name="Renombrado")
+        index.on_product_saved(product)
+        self.assertEqual(index.get("770000000004")["name"], "Renombrado")
+        self.assertEqual(index.get_stats()["entries"], 2)
+    
+    def test_listeners(self):
+        """Probar la sincronización del índice con los cambios del catálogo"""
+        index = BarcodeIndex(self.db)
+        index.load()
+        
+        product = index.get("770000000001")
+        index.on_stock_changed(product["product_id"], -3)
+        self.assertEqual(int(index.get("770000000001")["stock_quantity"]), 7)
+        
+        # Cambio de código de barras
+        product["barcode"] = "123"
+        index.on_product_saved(product)
+        self.assertIsNone(index.get("770000000001"))
+        self.assertIsNotNone(index.get("123"))
+        
+        index.on_product_removed(product["product_id"])
+        self.assertIsNone(index.get("123"))
+
+class TestProductSearchIndex(unittest.TestCase):
+    """Pruebas para el índice de prefijos de búsqueda de productos"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = Database(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+        
+        self.product_model = Product(self.db)
+        
+        self.product_model.create({"name": "Café Molido", "barcode": "7701111", "price": 12.0})
+        self.product_model.create({"name": "Azúcar Morena", "barcode": "7702222", "price": 5.0})
+        self.product_model.create({"name": "Tomate chonto", "price": 3.0})
+        self.product_model.create({"name": "Mora de castilla", "price": 4.0})
+        self.product_model.create({"name": "Producto inactivo Mo", "price": 1.0, "is_active": 0})
+        
+        self.index = ProductSearchIndex(self.db)
+        self.assertEqual(self.index.load(), 4)
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def _names(self, text):
+        return [product["name"] for product in self.index.search(text)]
+    
+    def test_prefix_search(self):
+        """Probar búsqueda por prefijo de nombre y código, sin acentos"""
+        # Primero los que empiezan por la palabra, luego en orden alfabético
+        self.assertEqual(self._names("mo"), ["Mora de castilla", "Azúcar Morena", "Café Molido"])
+        self.assertEqual(self._names("azucar"), ["Azúcar Morena"])
+        self.assertEqual(self._names("CAFÉ mol"), ["Café Molido"])
+        self.assertEqual(self._names("mo cas"), ["Mora de castilla"])
+        self.assertEqual(self._names("77022"), ["Azúcar Morena"])
+        self.assertEqual(self._names("xyz"), [])
+        self.assertEqual(self._names("  "), [])
+        
+        # Límite de resultados
+        self.assertEqual(len(self.index.search("mo", limit=2)), 2)
+    
+    def test_incremental_updates(self):
+        """Probar que el índice sigue los cambios sin recargarse"""
+        product = self.index.search("tomate")[0]
+        
+        product["name"] = "Tomate de árbol"
+        self.index.on_product_saved(dict(product, is_active=1))
+        self.assertEqual(self._names("arbol"), ["Tomate de árbol"])
+        self.assertEqual(self._names("chonto"), [])
+        
+        self.index.on_stock_changed(product["product_id"], 8)
+        self.assertEqual(self.index.search("tomate")[0]["stock_quantity"], 8)
+        
+        self.index.on_product_removed(product["product_id"])
+        self.assertEqual(self._names("tomate"), [])
+        self.assertEqual(len(self.index), 3)
+        
+        # Los nodos sin productos se eliminan del árbol
+        self.assertNotIn("t", self.index._root.children)
+
+class TestTrigramIndex(unittest.TestCase):
+    """Pruebas para el índice de trigramas (búsqueda tolerante a errores)"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = Database(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+        
+        self.product_model = Product(self.db)
+        
+        self.product_model.create({"name": "Coca Cola 1.5L", "price": 5.0})
+        self.product_model.create({"name": "Chocolatina Jet", "price": 1.0})
+        self.product_model.create({"name": "Arroz Diana", "description": "Arroz blanco premium", "price": 4.0})
+        self.product_model.create({"name": "Jabón de baño", "price": 3.0})
+        self.product_model.create({"name": "Producto inactivo", "price": 1.0, "is_active": 0})
+        
+        self.index = TrigramIndex(self.db)
+        self.assertEqual(self.index.load(), 4)
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def _names(self, text, **kwargs):
+        return [product["name"] for product in self.index.search(text, **kwargs)]
+    
+    def test_trigrams(self):
+        """Probar la normalización antes de generar trigramas"""
+        self.assertEqual(trigrams("Coca Cola"), trigrams("cocacola"))
+        self.assertEqual(trigrams("Jabón"), trigrams("JABON"))
+        self.assertEqual(trigrams("ab"), {"  a", " ab", "ab "})
+        self.assertEqual(trigrams(None), set())
+    
+    def test_fuzzy_search(self):
+        """Probar búsqueda con errores de escritura, sin acentos ni espacios"""
+        self.assertEqual(self._names("cocacola")[0], "Coca Cola 1.5L")
+        self.assertEqual(self._names("chocolatna")[0], "Chocolatina Jet")
+        self.assertEqual(self._names("jabon de bano"), ["Jabón de baño"])
+        self.assertEqual(self._names("aroz diana"), ["Arroz Diana"])
+        
+        # La descripción también cuenta, con menos peso que el nombre
+        results = self.index.search("premium")
+        self.assertEqual([product["name"] for product in results], ["Arroz Diana"])
+        self.assertLess(results[0]["score"], 1.0)
+        
+        self.assertEqual(self._names("inactivo"), [])
+        self.assertEqual(self._names("zzzz"), [])
+        self.assertEqual(self._names(""), [])
+        self.assertEqual(len(self.index.search("co", limit=1, min_score=0)), 1)
+    
+    def test_incremental_updates(self):
+        """Probar que el índice sigue los cambios sin recargarse"""
+        product_id = self.index.search("jabon")[0]["product_id"]
+        
+        self.index.on_product_saved({"product_id": product_id, "name": "Jabón líquido", "is_active": 1})
+        self.assertEqual(self._names("jabon liquido"), ["Jabón líquido"])
+        self.assertEqual(self._names("bano"), [])
+        
+        self.index.on_product_removed(product_id)
+        self.assertEqual(self._names("jabon"), [])
+        self.assertEqual(len(self.index), 3)
+        
+        # Los trigramas sin productos se eliminan
+        self.assertNotIn("jab", self.index._names.postings)
+    
+    def test_max_entries(self):
+        """Probar que el índice acotado conserva los productos más recientes"""
+        self.db.execute("UPDATE products SET updated_at = '2020-01-01 00:00:00'")
+        self.db.execute("UPDATE products SET updated_at = '2025-01-01 00:00:00' WHERE name LIKE 'Arroz%'")
+        
+        index = TrigramIndex(self.db, max_entries=2)
+        self.assertEqual(index.load(), 2)
+        self.assertEqual([product["name"] for product in index.search("arroz")], ["Arroz Diana"])
+        
+        # Un producto nuevo desplaza al más antiguo del índice
+        index.on_product_saved({"product_id": 999, "name": "Leche entera", "is_active": 1})
+        self.assertEqual(len(index), 2)
+        self.assertEqual([product["name"] for product in index.search("leche")], ["Leche entera"])
+        self.assertEqual([product["name"] for product in index.search("arroz")], ["Arroz Diana"])
+
+class RecordingDatabase(Database):
+    """Base de datos que registra las consultas de lectura ejecutadas"""
+    
+    def __init__(self, db_path):
+        super().__init__(db_path)
+        self.queries = []
+    
+    def _query(self, query, params, fetch_all):
+        if not query.lstrip().upper().startswith(("EXPLAIN", "PRAGMA")):
+            self.queries.append((query, params))
+        return super()._query(query, params, fetch_all)
+
+class TestCart(unittest.TestCase):
+    """Pruebas para el carrito de la venta"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        self.cart = Cart(tax_rate=0.16)
+        self.events = []
+        self.cart.add_listener(lambda event, row, line: self.events.append((event, row)))
+    
+    def test_add_product(self):
+        """Prueba de agregar productos y sumar cantidades"""
+        self.cart.add_product({'product_id': 1, 'name': 'Agua', 'price': 10.5})
+        self.cart.add_product({'product_id': 2, 'name': 'Pan', 'price': '$3.25'})
+        line = self.cart.add_product({'id': 1, 'name': 'Agua', 'price': 10.5}, quantity=2)
+        
+        self.assertEqual(len(self.cart), 2)
+        self.assertEqual(line.quantity, 3)
+        self.assertEqual(line.subtotal_cents, 3150)
+        self.assertEqual(self.cart.subtotal_cents, 3475)
+        self.assertEqual(self.cart.tax_cents, 556)
+        self.assertEqual(self.cart.total_cents, 4031)
+        self.assertEqual(self.cart.total, Money(4031))
+        self.assertEqual(self.cart.item_count, 4)
+        self.assertEqual(self.events, [('added', 0), ('added', 1), ('changed', 0)])
+    
+    def test_remove_and_quantities(self):
+        """Prueba de quitar líneas y cambiar cantidades"""
+        for product_id in range(1, 4):
+            self.cart.add_product({'product_id': product_id, 'name': f'P{product_id}', 'price': product_id})
+        
+        self.assertTrue(self.cart.remove(1))
+        self.assertFalse(self.cart.remove(1))
+        self.assertEqual(self.cart.row_of(3), 1)
+        self.assertEqual(self.cart.line(1).product_id, 3)
+        
+        self.assertTrue(self.cart.set_quantity(3, 5))
+        self.assertEqual(self.cart.subtotal_cents, 1700)
+        self.assertTrue(self.cart.set_quantity(2, 0))
+        self.assertNotIn(2, self.cart)
+        self.assertEqual(self.cart.subtotal_cents, 1500)
+        
+        self.assertEqual(self.events[3:], [('removed', 0), ('changed', 1), ('removed', 0)])
+        
+        self.cart.clear()
+        self.assertEqual(len(self.cart), 0)
+        self.assertEqual(self.cart.total_cents, 0)
+        self.assertEqual(self.events[-1], ('cleared', None))
+    
+    def test_totals_match_full_recalculation(self):
+        """Prueba de que los totales incrementales coinciden con recalcularlos"""
+        for i in range(300):
+            self.cart.add_product({'product_id': i % 120, 'name': f'P{i}', 'price': 0.01 + (i % 120) * 1.37})
+        self.cart.set_quantity(5, 7)
+        self.cart.remove(10)
+        
+        expected = sum(line.unit_price_cents * line.quantity for line in self.cart)
+        self.assertEqual(self.cart.subtotal_cents, expected)
+        self.assertEqual(len(self.cart), 119)
+        
+        items = self.cart.to_sale_items()
+        self.assertEqual(sum(item['subtotal'] for item in items), Money(expected))
+        self.assertEqual(items[0]['product_id'], 0)
+    
+    def test_tax_rate(self):
+        """Prueba de cambio de la tasa de IVA"""
+        self.cart.add_product({'product_id': 1, 'name': 'Agua', 'price': 100})
+        self.cart.set_tax_rate(0.08)
+        
+        self.assertEqual(self.cart.tax_cents, 800)
+        self.assertEqual(self.cart.total_cents, 10800)
+        self.assertEqual(self.events[-1], ('totals', None))
+    
+    def test_tax_by_rate(self):
+        """Prueba del IVA por tasa: se redondea una vez por tasa y se actualiza por línea"""
+        cart = Cart(tax_rate=0.16)
+        cart.add_product({'product_id': 1, 'name': 'Agua', 'price': 3.33}, quantity=3)
+        self.assertEqual(cart.tax_cents, 160)  # 999 * 0.16 = 159.84
+        
+        cart.add_product({'product_id': 2, 'name': 'Pan', 'price': 10})
+        cart.set_quantity(1, 4)
+        self.assertEqual(cart.tax_cents, 373)  # 2332 * 0.16 = 373.12
+        self.assertEqual(cart.get_line(1).tax_rate, 0.16)
+        
+        cart.set_tax_rate(0)
+        self.assertEqual(cart.tax_cents, 0)
+        self.assertEqual(cart.tax_breakdown, {0: (Money(2332), Money(0))})
+
+class TestPricingEngine(unittest.TestCase):
+    """Pruebas para el motor de impuestos"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = RecordingDatabase(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+        
+        self.db.execute("INSERT INTO categories (name) VALUES ('Alimentos')")
+        self.food_id = self.db.cursor.lastrowid
+        self.db.execute("INSERT INTO categories (name) VALUES ('Bebidas')")
+        self.drinks_id = self.db.cursor.lastrowid
+        
+        self.engine = PricingEngine(self.db)
+        self.engine.load()
+        self.changes = []
+        self.engine.add_listener(self.changes.append)
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def test_rule_precedence(self):
+        """Prueba de la tasa por producto, por categoría y general"""
+        self.assertTrue(self.engine.set_category_rule(self.food_id, exempt=True))
+        self.assertTrue(self.engine.set_product_rule(7, rate=0.08))
+        
+        self.assertEqual(self.engine.rate_for(7, self.food_id), 0.08)
+        self.assertEqual(self.engine.rate_for(8, self.food_id), 0)
+        self.assertEqual(self.engine.rate_for(9, self.drinks_id), 0.16)
+        
+        # Las reglas guardadas se vuelven a cargar igual
+        engine = PricingEngine(self.db)
+        self.assertEqual(engine.load(), 2)
+        self.assertEqual(engine.rate_for_product({'product_id': 8, 'category_id': self.food_id}), 0)
+        
+        self.assertTrue(self.engine.remove_rule(product_id=7))
+        self.assertEqual(self.engine.rate_for(7, self.food_id), 0)
+    
+    def test_resolved_rates_are_cached(self):
+        """Prueba de que las tasas resueltas no consultan la base de datos"""
+        self.engine.set_category_rule(self.food_id, rate=0.05)
+        self.db.queries.clear()
+        
+        for _ in range(100):
+            self.engine.rate_for(1, self.food_id)
+            self.engine.rate_for_product({'product_id': 1})
+        self.assertEqual(self.db.queries, [])
+        
+        # Un producto que cambia de categoría se vuelve a resolver y se avisa
+        self.engine.on_product_saved({'product_id': 1, 'category_id': self.drinks_id})
+        self.assertEqual(self.changes[-1], {'product_id': 1, 'category_id': self.drinks_id})
+        self.assertEqual(self.engine.rate_for(1, self.drinks_id), 0.16)
+    
+    def test_default_rate_from_config(self):
+        """Prueba de la tasa general leída y guardada en system_config"""
+        cart = Cart(pricing=self.engine)
+        cart.add_product({'product_id': 1, 'name': 'Agua', 'price': 100, 'category_id': self.drinks_id})
+        cart.add_product({'product_id': 2, 'name': 'Pan', 'price': 50, 'category_id': self.food_id})
+        self.assertEqual(cart.tax_cents, 2400)
+        
+        self.assertTrue(self.engine.set_default_rate(0.08))
+        self.assertEqual(cart.tax_cents, 1200)
+        self.assertIsNone(self.changes[-1])
+        
+        row = self.db.fetch_one("SELECT config_value FROM system_config WHERE config_key = 'tax_rate'")
+        self.assertEqual(float(row['config_value']), 0.08)
+        
+        self.engine.set_category_rule(self.food_id, exempt=True)
+        self.assertEqual(cart.tax_cents, 800)
+        self.assertEqual(self.engine.quote(cart.to_sale_items())['tax'], cart.tax)
+        self.assertFalse(self.engine.set_default_rate("abc"))
+
+class TestMigrations(unittest.TestCase):
+    """Pruebas para las migraciones y los planes de consulta"""
+    
+    # Consultas que recorren la tabla de forma intencional
+    ALLOWED_SCANS = [
+        "p.name LIKE ?"  # Búsqueda por subcadena en el catálogo
+    ]
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = RecordingDatabase(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def test_migrate_existing_database(self):
+        """Probar la migración de una base de datos creada sin índices"""
+        self.assertEqual(self.db.get_schema_version(), get_latest_version())
+        
+        # Simular una base de datos de tienda anterior a las migraciones
+        self.db.execute("DROP INDEX idx_sales_sale_date")
+        self.db.execute("PRAGMA user_version = 0")
+        
+        self.assertTrue(self.db.migrate())
+        self.assertEqual(self.db.get_schema_version(), get_latest_version())
+        
+        index = self.db.fetch_one("SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?",
+                                  ["idx_sales_sale_date"])
+        self.assertIsNotNone(index)
+        
+        # Volver a migrar no hace nada
+        self.assertTrue(self.db.migrate())
+    
+    def test_migrate_register_counters(self):
+        """Probar que la migración asocia las ventas existentes a su caja y llena los contadores"""
+        self.db.execute(
+            "INSERT INTO cash_registers (user_id, opening_amount, opening_time, status) VALUES (1, 50, ?, 'open')",
+            ["2024-03-01 08:00:00"]
+        )
+        for method, amount in (("Efectivo", 12.5), ("cash", 7.5), ("Tarjeta", 30.0)):
+            self.db.execute(
+                "INSERT INTO sales (user_id, total_amount, payment_method, payment_status, sale_date) VALUES (1, ?, ?, 'paid', ?)",
+                [amount, method, "2024-03-01 09:00:00"]
+            )
+        self.db.execute("PRAGMA user_version = 3")
+        
+        self.assertTrue(self.db.migrate())
+        register = self.db.fetch_one("SELECT * FROM cash_registers")
+        self.assertEqual((register['paid_count'], register['cash_cents'], register['card_cents']), (3, 2000, 3000))
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) AS n FROM sales WHERE payment_method = 'cash'")['n'], 2)
+    
+    def test_migrate_sales_rollup(self):
+        """Probar que la migración llena el resumen diario con las ventas existentes"""
+        # Simular una base de datos anterior al resumen
+        for trigger in ("sales_rollup_insert", "sales_rollup_update", "sales_rollup_delete"):
+            self.db.execute(f"DROP TRIGGER {trigger}")
+        self.db.execute("DROP TABLE sales_daily_rollup")
+        self.db.execute("PRAGMA user_version = 4")
+        
+        for amount, status in ((12.5, 'paid'), (7.5, 'paid'), (30.0, 'canceled')):
+            self.db.execute(
+                "INSERT INTO sales (user_id, total_amount, payment_method, payment_status, sale_date) VALUES (1, ?, 'cash', ?, ?)",
+                [amount, status, "2024-03-01 09:00:00"]
+            )
+        
+        self.assertTrue(self.db.migrate())
+        rows = self.db.fetch_all("SELECT payment_status, sales_count, total_cents FROM sales_daily_rollup ORDER BY 1")
+        self.assertEqual([tuple(row.values()) for row in rows], [('canceled', 1, 3000), ('paid', 2, 2000)])
+        
+        # Los disparadores mantienen el resumen desde la migración
+        self.db.execute("UPDATE sales SET payment_status = 'canceled' WHERE total_amount = 7.5")
+        self.assertEqual(Sale(self.db).rollup.cash_flow("2024-03-01")['total_sales'], 12.5)
+    
+    def test_migrate_drilldown_rollups(self):
+        """Probar que la migración llena los resúmenes por hora y por producto"""
+        for trigger in DRILLDOWN_ROLLUP_TRIGGERS:
+            self.db.execute(f"DROP TRIGGER {trigger}")
+        self.db.execute("DROP TABLE sales_hourly_rollup")
+        self.db.execute("DROP TABLE product_daily_rollup")
+        self.db.execute("PRAGMA user_version = 5")
+        
+        self.db.execute("INSERT INTO products (name, price) VALUES ('Café', 2.5)")
+        product_id = self.db.cursor.lastrowid
+        sale_id = self.db.execute(
+            "INSERT INTO sales (user_id, total_amount, payment_method, payment_status, sale_date) VALUES (1, 7.5, 'cash', 'paid', ?)",
+            ["2024-03-01 13:30:00"]
+        )
+        self.db.execute(
+            "INSERT INTO sale_items (sale_id, product_id, quantity, unit_price, subtotal) VALUES (?, ?, 3, 2.5, 7.5)",
+            [sale_id, product_id]
+        )
+        
+        self.assertTrue(self.db.migrate())
+        sale_model = Sale(self.db)
+        self.assertEqual(sale_model.get_sales_by_hour("2024-03-01", "2024-03-01")[0]['hour'], 13)
+        self.assertEqual(sale_model.get_top_products()[0]['total_quantity'], 3)
+        self.assertEqual(sale_model.rollup.verify(), [])
+    
+    def test_migrate_builds_search_index(self):
+        """Probar que la migración indexa los productos ya existentes"""
+        # Simular una base de datos anterior al índice de texto completo
+        for trigger in ("products_fts_insert", "products_fts_update", "products_fts_delete"):
+            self.db.execute(f"DROP TRIGGER {trigger}")
+        self.db.execute("DROP TABLE products_fts")
+        self.db.execute("PRAGMA user_version = 1")
+        
+        self.db.execute("INSERT INTO products (name, price) VALUES (?, ?)", ["Galletas de Avena", 4.0])
+        
+        self.assertTrue(self.db.migrate())
+        results = Product(self.db).search("galle")
+        self.assertEqual([p["name"] for p in results], ["Galletas de Avena"])
+    
+    def test_migrate_restores_search_index(self):
+        """Probar que migrate repara el índice si una carga masiva se interrumpió"""
+        with self.assertRaises(RuntimeError):
+            with self.db.suspend_search_index():
+                self.db.execute("INSERT INTO products (name, price) VALUES (?, ?)", ["Galletas de Avena", 4.0])
+                raise RuntimeError("interrumpido")
+        
+        # Al salir del bloque (aun con error) se recrean los disparadores
+        self.assertEqual([p["name"] for p in Product(self.db).search("galle")], ["Galletas de Avena"])
+        
+        # Simular un cierre inesperado dentro del bloque
+        self.db.execute("DROP TRIGGER products_fts_insert")
+        self.db.execute("INSERT INTO products (name, price) VALUES (?, ?)", ["Galletas de Coco", 4.0])
+        
+        self.assertTrue(self.db.migrate())
+        self.assertEqual(len(Product(self.db).search("galle")), 2)
+        self.db.execute("INSERT INTO products (name, price) VALUES (?, ?)", ["Galletas de Mantequilla", 4.0])
+        self.assertEqual(len(Product(self.db).search("galle")), 3)
+    
+    def test_model_queries_use_indexes(self):
+        """Probar que las consultas de los modelos no recorren tablas completas"""
+        user_model = User(self.db)
+        product_model = Product(self.db)
+        sale_model = Sale(self.db)
+        inventory_model = Inventory(self.db)
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        user_id = user_model.create("testuser", "password123", "Test User", "cashier")
+        category_id = product_model.create_category("Test Category")
+        product_id = product_model.create({
+            "name": "Product 1",
+            "barcode": "1234567890123",
+            "price": 10.0,
+            "category_id": category_id,
+            "stock_quantity": 100
+        })
+        
+        sale_id = sale_model.create(user_id=user_id,
+                                    items=[{"product_id": product_id, "quantity": 2, "unit_price": 10.0}],
+                                    payment_method="cash", total_amount=20.0)
+        register_id = sale_model.open_cash_register(user_id, 100.0)
+        
+        # Ejecutar las consultas de lectura de cada modelo
+        user_model.get_by_id(user_id)
+        user_model.get_by_username("testuser")
+        user_model.get_all()
+        user_model.get_all(active_only=True)
+        user_model.authenticate("testuser", "password123")
+        
+        product_model.get_by_id(product_id)
+        product_model.get_by_barcode("1234567890123")
+        product_model.get_all()
+        product_model.get_all(active_only=False)
+        product_model.get_by_category(category_id)
+        product_model.search("Product")
+        product_model.get_low_stock()
+        product_model.get_page(cursor=("Product", 0), category_id=category_id)
+        product_model.get_page(cursor=0, order_by="product_id", category_id=category_id)
+        product_model.get_page(low_stock_only=True)
+        product_model.get_all_categories()
+        product_model.get_category_by_id(category_id)
+        
+        sale_model.get_by_id(sale_id)
+        sale_model.get_all()
+        sale_model.get_all(start_date=today, end_date=today, user_id=user_id, payment_status="paid")
+        sale_model.get_summary_by_day(today, today)
+        sale_model.get_top_products(today, today)
+        sale_model.get_total_by_period("month")
+        sale_model.get_total_by_period("day")
+        sale_model.rollup.cash_flow(today)
+        sale_model.rollup.rebuild(today, today)
+        sale_model.rollup.verify(today, today)
+        sale_model.get_sales_by_hour(today, today)
+        sale_model.get_sales_by_category(today, today)
+        sale_model.get_top_products()
+        sale_model.get_today_sales()
+        sale_model.get_open_cash_register(user_id)
+        sale_model.generate_x_report(register_id)
+        sale_model.generate_z_report(register_id, include_sales=True)
+        sale_model.register_counters.recompute(register_id)
+        
+        inventory_model.get_movements()
+        inventory_model.get_movements(product_id=product_id, start_date=today, end_date=today)
+        inventory_model.get_stock_value()
+        inventory_model.get_low_stock_products()
+        inventory_model.get_product_movement_history(product_id)
+        inventory_model.get_stock_changes_by_period("day", today, today)
+        inventory_model.get_movement_summary_by_type()
+        
+        queries = list(self.db.queries)
+        self.assertGreater(len(queries), 0)
+        
+        failures = []
+        for query, params in queries:
+            if any(allowed in query for allowed in self.ALLOWED_SCANS):
+                continue
+            
+            scans = self.db.find_table_scans(query, params)
+            if scans:
+                failures.append(f"{scans}: {' '.join(query.split())}")
+        
+        self.assertEqual(failures, [], "\n".join(failures))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
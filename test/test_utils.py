@@ -0,0 +1,283 @@
+# tests/test_utils.py
+import unittest
+import os
+import sys
+import tempfile
+
+# Agregar directorio raíz al path para importar módulos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Importar utilidades
+from app.models.database import Database
+from app.models.barcode_index import BarcodeIndex
+from app.utils.catalog_importer import CatalogImporter
+from app.utils.money import (Money, to_cents, format_cents, cents_from_amounts,
+                             sum_amounts, amounts_from_cents)
+from app.utils.helpers import parse_currency, format_currency
+from app.utils.report_cache import ReportCache
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+class TestMoney(unittest.TestCase):
+    """Pruebas para los importes en centavos"""
+    
+    def test_to_cents(self):
+        """Prueba de conversión de importes a centavos"""
+        self.assertEqual(to_cents("$12.50"), 1250)
+        self.assertEqual(to_cents("12,5"), 1250)
+        self.assertEqual(to_cents("$1,234.50"), 123450)
+        self.assertEqual(to_cents("1.234,50"), 123450)
+        self.assertEqual(to_cents("-0.05"), -5)
+        self.assertEqual(to_cents(0.1 + 0.2), 30)
+        self.assertEqual(to_cents(2.675), 268)
+        self.assertEqual(to_cents(-2.675), -268)
+        self.assertEqual(to_cents(3), 300)
+        self.assertEqual(to_cents(None), 0)
+        self.assertEqual(to_cents(Money(42)), 42)
+        self.assertRaises(ValueError, to_cents, "abc")
+    
+    def test_format(self):
+        """Prueba de formato de importes"""
+        self.assertEqual(format_cents(123405), "$1234.05")
+        self.assertEqual(format_cents(-5), "-$0.05")
+        self.assertEqual(str(Money(1250)), "$12.50")
+        self.assertEqual(f"{Money(1250):.1f}", "12.5")
+        self.assertEqual(float(Money(1999)), 19.99)
+        self.assertEqual(Money.parse("x", default=Money()), Money(0))
+        self.assertRaises(ValueError, Money.parse, "x")
+    
+    def test_arithmetic(self):
+        """Prueba de operaciones con Money"""
+        price = Money.parse("$19.99")
+        
+        self.assertEqual(price * 3, Money(5997))
+        self.assertEqual(price * 0.5, Money(1000))
+        self.assertEqual(price + Money(1), Money(2000))
+        self.assertEqual(price - Money(2000), Money(-1))
+        self.assertEqual(sum([price, price]), Money(3998))
+        self.assertEqual(Money(10000).apply_rate(0.16), Money(1600))
+        self.assertEqual(Money(3475).apply_rate(0.16), Money(556))
+        self.assertTrue(Money(1) > Money(0))
+        self.assertFalse(Money(0))
+        
+        with self.assertRaises(AttributeError):
+            price.cents = 0
+    
+    def test_bulk_helpers(self):
+        """Prueba de conversión en lote para reportes"""
+        self.assertEqual(cents_from_amounts([0.1, "0.20", None, 3, Money(5)]), [10, 20, 0, 300, 5])
+        
+        # La suma de floats acumula error; la de centavos no
+        self.assertNotEqual(sum([0.1] * 10), 1.0)
+        self.assertEqual(sum_amounts([0.1] * 10), Money(100))
+        
+        rows = [{'total_amount': 1001, 'total_tax': None, 'name': 'x'}]
+        self.assertEqual(amounts_from_cents(rows, ('total_amount', 'total_tax')),
+                         [{'total_amount': 10.01, 'total_tax': None, 'name': 'x'}])
+    
+    def test_helpers(self):
+        """Prueba de las funciones de moneda de helpers"""
+        self.assertEqual(parse_currency("$1,234.56"), 1234.56)
+        self.assertEqual(parse_currency("no"), 0.0)
+        self.assertEqual(format_currency(2.675), "$2.68")
+        self.assertEqual(format_currency("x"), "$0.00")
+
+class TestCatalogImporter(unittest.TestCase):
+    """Pruebas para el importador masivo de catálogos"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        # Crear una base de datos temporal para las pruebas
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db').name
+        self.db = Database(self.temp_db_file)
+        self.db.connect()
+        self.db.init_schema()
+        
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.barcode_index = BarcodeIndex(self.db)
+        self.importer = CatalogImporter(self.db, indexes=[self.barcode_index], batch_size=2)
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.db.close()
+        self.temp_dir.cleanup()
+        if os.path.exists(self.temp_db_file):
+            os.remove(self.temp_db_file)
+    
+    def _write_csv(self, content, name="catalogo.csv"):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+    
+    def _product(self, barcode):
+        return self.db.fetch_one("SELECT * FROM products WHERE barcode = ?", [barcode])
+    
+    def test_import_csv(self):
+        """Probar importación de CSV con validación y errores por fila"""
+        path = self._write_csv(
+            "Código de barras;Nombre;Categoría;Precio;Costo;Stock\n"
+            "7701234567890;Arroz Diana 500g;Granos;$ 3.500,00;2800;10\n"
+            "7701234567891;Frijol 500g;granos;4200.5;;\n"
+            "12;Código corto;Granos;100;50;1\n"
+            "7701234567892;;Granos;100;50;1\n"
+            "7701234567893;Precio inválido;Granos;abc;50;1\n"
+            ";;;;;\n"
+            "7701234567894;Aceite 1L;Aceites;9.900;7000;2.5\n"
+        )
+        
+        progress = []
+        result = self.importer.import_file(path, lambda rows, fraction: progress.append(rows))
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['total_rows'], 6)
+        self.assertEqual(result['imported'], 2)
+        self.assertEqual(result['error_count'], 4)
+        self.assertEqual([error['row'] for error in result['errors']], [4, 5, 6, 8])
+        self.assertEqual(result['errors'][0]['barcode'], "12")
+        self.assertEqual(progress[-1], 6)
+        
+        arroz = self._product("7701234567890")
+        self.assertEqual(arroz['name'], "Arroz Diana 500g")
+        self.assertEqual(arroz['price'], 3500.0)
+        self.assertEqual(arroz['stock_quantity'], 10)
+        
+        # Las categorías se reutilizan sin distinguir mayúsculas y se crean si no existen
+        frijol = self._product("7701234567891")
+        self.assertEqual(frijol['price'], 4200.5)
+        self.assertEqual(frijol['category_id'], arroz['category_id'])
+        self.assertEqual(frijol['stock_quantity'], 0)
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) AS n FROM categories")['n'], 1)
+        
+        # Los índices en memoria se recargan al terminar
+        self.assertEqual(self.barcode_index.get("7701234567890")['name'], "Arroz Diana 500g")
+    
+    def test_import_updates_existing_products(self):
+        """Probar que la importación actualiza por código de barras sin duplicar"""
+        self.db.execute(
+            "INSERT INTO products (barcode, name, price, stock_quantity, min_stock_level) VALUES (?, ?, ?, ?, ?)",
+            ["7701234567890", "Arroz", 3000, 40, 8]
+        )
+        
+        path = self._write_csv("barcode,name,price,stock\n7701234567890,Arroz Diana 500g,3600,99\n")
+        result = self.importer.import_file(path)
+        
+        self.assertEqual(result['imported'], 1)
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) AS n FROM products")['n'], 1)
+        
+        # Solo cambian las columnas presentes en el archivo
+        product = self._product("7701234567890")
+        self.assertEqual(product['name'], "Arroz Diana 500g")
+        self.assertEqual(product['price'], 3600)
+        self.assertEqual(product['min_stock_level'], 8)
+        
+        # El stock de un producto existente no se reemplaza sin un movimiento de inventario
+        self.assertEqual(product['stock_quantity'], 40)
+        self.assertEqual(self.db.fetch_one("SELECT COUNT(*) AS n FROM inventory_movements")['n'], 0)
+        
+        # El índice de texto completo sigue los cambios
+        rows = self.db.fetch_all(
+            "SELECT rowid FROM products_fts WHERE products_fts MATCH ?", ['"diana"*']
+        )
+        self.assertEqual(len(rows), 1)
+    
+    def test_bulk_import_rebuilds_search_index(self):
+        """Probar que una importación grande reconstruye el índice de búsqueda al final"""
+        lines = "".join(f"77000000{i:05d},Galletas surtidas {i},10\n" for i in range(10))
+        path = self._write_csv("barcode,name,price\n" + lines)
+        
+        importer = CatalogImporter(self.db, batch_size=2, bulk_threshold=4)
+        result = importer.import_file(path)
+        
+        self.assertEqual(result['imported'], 10)
+        self.assertTrue(self.db._has_search_index_triggers())
+        
+        rows = self.db.fetch_all(
+            "SELECT rowid FROM products_fts WHERE products_fts MATCH ?", ['"galletas"*']
+        )
+        self.assertEqual(len(rows), 10)
+    
+    def test_import_cancel_and_invalid_files(self):
+        """Probar cancelación, columnas faltantes y formatos no soportados"""
+        lines = "".join(f"77000000{i:05d},Producto {i},10\n" for i in range(10))
+        path = self._write_csv("barcode,name,price\n" + lines)
+        
+        result = self.importer.import_file(path, lambda rows, fraction: False)
+        self.assertTrue(result['cancelled'])
+        self.assertEqual(result['imported'], 2)
+        
+        result = self.importer.import_file(self._write_csv("barcode,name\n1234,A\n", "sin_precio.csv"))
+        self.assertFalse(result['success'])
+        self.assertIn("price", result['message'])
+        
+        result = self.importer.import_file(self._write_csv("", "catalogo.txt"))
+        self.assertFalse(result['success'])
+    
+    @unittest.skipIf(openpyxl is None, "openpyxl no está instalado")
+    def test_import_xlsx(self):
+        """Probar importación de XLSX con códigos guardados como números"""
+        path = os.path.join(self.temp_dir.name, "catalogo.xlsx")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Código", "Nombre", "Precio", "Activo"])
+        sheet.append([7701234567890, "Arroz Diana 500g", 3500, "sí"])
+        sheet.append([7701234567891.0, "Frijol 500g", 4200, "no"])
+        workbook.save(path)
+        
+        result = self.importer.import_file(path)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['imported'], 2)
+        self.assertEqual(self._product("7701234567890")['is_active'], 1)
+        self.assertEqual(self._product("7701234567891")['is_active'], 0)
+
+class TestReportCache(unittest.TestCase):
+    """Pruebas para la caché de reportes"""
+    
+    def setUp(self):
+        """Configuración para cada prueba"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+    
+    def tearDown(self):
+        """Limpieza después de cada prueba"""
+        self.temp_dir.cleanup()
+    
+    def _report(self, name, size):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w") as f:
+            f.write("x" * size)
+        return path
+    
+    def test_watermark_and_lru_eviction(self):
+        """Probar la marca de agua, la expulsión por tamaño y el índice en disco"""
+        cache = ReportCache(self.cache_dir, max_bytes=250)
+        keys = [ReportCache.make_key("daily_sales", {"date": f"2024-01-0{i}"}, "csv") for i in range(1, 4)]
+        
+        cache.put(keys[0], self._report("a.csv", 100), watermark=(7, [["paid", 2, 1500]]))
+        cache.put(keys[1], self._report("b.csv", 100), watermark=None, immutable=True)
+        
+        # Tuplas y listas son la misma marca; otra marca invalida el reporte
+        self.assertIsNotNone(cache.get(keys[0], [7, [["paid", 2, 1500]]]))
+        self.assertIsNotNone(cache.get(keys[1], lambda: self.fail("no se verifica un reporte inmutable")))
+        self.assertIsNone(cache.get(keys[0], (8, [["paid", 3, 2000]])))
+        
+        # Al superar el tamaño máximo se elimina el usado hace más tiempo
+        cache.put(keys[0], self._report("a.csv", 100), watermark=1)
+        cache.get(keys[1])
+        cache.put(keys[2], self._report("c.csv", 100), watermark=1)
+        self.assertIsNone(cache.get(keys[0], 1))
+        self.assertEqual(cache.total_bytes, 200)
+        
+        # Otra instancia lee el índice guardado
+        reloaded = ReportCache(self.cache_dir, max_bytes=250)
+        self.assertIsNotNone(reloaded.get(keys[2], 1))
+        self.assertIsNotNone(reloaded.get(keys[1]))
+        self.assertEqual(sorted(os.listdir(self.cache_dir)),
+                         sorted([ReportCache.INDEX_FILE, keys[1] + ".csv", keys[2] + ".csv"]))
+
+if __name__ == '__main__':
+    unittest.main()